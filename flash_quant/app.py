@@ -2,8 +2,7 @@
 Flash Quant - Flask Web 入口
 所有数据从 MySQL 读取, 不再用 mock
 """
-import json
-from datetime import datetime, timezone, timedelta
+from datetime import timezone, timedelta
 from flask import Flask, render_template, jsonify, request, redirect, url_for, session, Response
 from functools import wraps
 from config.settings import settings
@@ -53,86 +52,12 @@ def create_app():
     @app.route('/')
     @login_required
     def home():
-        from models.db_ops import (
-            get_open_positions, query_signals, get_dashboard_stats,
-            get_daily_stats, count_signals_today,
-        )
-        positions = get_open_positions()
-        signals = query_signals(limit=20)
-        stats = get_dashboard_stats()
-
-        # 今日信号统计
-        stats['signals_today'] = count_signals_today()
-        # 按 tier 分
-        today_signals = [s for s in query_signals(limit=200)
-                         if s.get('timestamp') and hasattr(s['timestamp'], 'date')
-                         and s['timestamp'].date() == datetime.now(MYT).date()]
-        stats['tier1_today'] = len([s for s in today_signals if s.get('tier') == 'tier1'])
-        stats['tier2_today'] = len([s for s in today_signals if s.get('tier') == 'tier2'])
-        stats['tier3_today'] = len([s for s in today_signals if s.get('tier') == 'tier3'])
-
-        # 资金曲线
-        daily = get_daily_stats(days=30)
-        equity_curve = []
-        if daily:
-            for d in reversed(daily):
-                equity_curve.append({
-                    'date': d['date'].isoformat() if hasattr(d['date'], 'isoformat') else str(d['date']),
-                    'balance': d.get('ending_balance') or 10000,
-                })
-        if not equity_curve:
-            equity_curve = [{'date': datetime.now(MYT).strftime('%Y-%m-%d'), 'balance': 10000 + stats['total_pnl']}]
-
-        # 丰富 position 数据
-        for p in positions:
-            sym = p.get('symbol', '')
-            tc = get_leverage_tier(sym)
-            lev = p.get('leverage') or tc['max_leverage']
-            margin = p.get('margin') or 300
-            entry = p.get('entry_price') or 0
-            current = p.get('current_price') or entry
-            direction = p.get('direction', 'long')
-
-            p['notional'] = margin * lev
-            p['mmr'] = round(0.5 / lev * 100, 2)
-            p['mark_price'] = current
-            if direction == 'long':
-                p['liq_price'] = round(entry * (1 - 1/lev * 0.95), 6) if entry else 0
-            else:
-                p['liq_price'] = round(entry * (1 + 1/lev * 0.95), 6) if entry else 0
-            p['realized_pnl'] = round((p.get('unrealized_pnl') or 0) - (p.get('fee') or 0), 2)
-
-            # 止盈价 (如果没有)
-            if not p.get('take_profit'):
-                tp_levels = p.get('take_profit_levels')
-                if tp_levels:
-                    if isinstance(tp_levels, str):
-                        tp_levels = json.loads(tp_levels)
-                    if tp_levels:
-                        highest = max(t[0] for t in tp_levels)
-                        if direction == 'long':
-                            p['take_profit'] = round(entry * (1 + highest/lev), 6)
-                        else:
-                            p['take_profit'] = round(entry * (1 - highest/lev), 6)
-
-            # 格式化时间
-            ot = p.get('open_time')
-            if ot and hasattr(ot, 'strftime'):
-                p['open_time_str'] = ot.strftime('%m-%d %H:%M')
-            else:
-                p['open_time_str'] = str(ot)[:16] if ot else ''
-
-        # 格式化信号时间
-        for s in signals:
-            ts = s.get('timestamp') or s.get('created_at')
-            if ts and hasattr(ts, 'strftime'):
-                s['timestamp_str'] = ts.strftime('%m-%d %H:%M')
-            else:
-                s['timestamp_str'] = str(ts)[:16] if ts else ''
-
+        """首页: 读 engine 维护的物化汇总 (data/dashboard_summarizer.py)"""
+        from data.dashboard_summarizer import load_home_summary
+        summary = load_home_summary()
         return render_template('home.html',
-                             positions=positions, signals=signals,
-                             stats=stats, equity_curve=equity_curve)
+                             positions=summary['positions'], signals=summary['signals'],
+                             stats=summary['stats'], equity_curve=summary['equity_curve'])
 
     @app.route('/signals')
     @login_required
@@ -237,56 +162,11 @@ def create_app():
     @app.route('/backtest')
     @login_required
     def backtest_page():
-        import os, glob
-        base = os.path.dirname(__file__)
-
-        # 加载所有回测版本
-        versions = []
-        bt_files = {
-            'backtest_result.json': '✅ Liquidation A (2025) — 部署中',
-            'analysis/liquidation_2024_result.json': '✅ Liquidation A (2024)',
-            'analysis/liquidation_2026_result.json': '✅ Liquidation A (2026 YTD)',
-            'analysis/liquidation_2025_top90.json': '❌ TOP90 扩容失败 (2025)',
-            'analysis/pump_fade_result.json': '❌ Pump-Fade 镜像失败 (2025)',
-            'analysis/funding_extreme_result.json': '❌ Funding Extreme 失败 (2025)',
-            'backtest_result_v1_tier1_tier2.json': '历史: V1 Tier1+2',
-            'backtest_result_v2_tier1_100coins.json': '历史: V2 Tier1',
-            'backtest_result_signal_trader.json': '历史: Signal Trader',
-        }
-        for fname, label in bt_files.items():
-            path = os.path.join(base, fname)
-            if not os.path.exists(path):
-                continue
-            with open(path) as f:
-                r = json.load(f)
-            r['label'] = label
-            r['file'] = fname
-            # 补指标
-            trades = r.get('trades', [])
-            wins_pnl = [t['pnl'] for t in trades if t.get('pnl', 0) > 0]
-            loss_pnl = [t['pnl'] for t in trades if t.get('pnl', 0) <= 0]
-            avg_w = sum(wins_pnl) / len(wins_pnl) if wins_pnl else 0
-            avg_l = abs(sum(loss_pnl) / len(loss_pnl)) if loss_pnl else 1
-            if not r.get('profit_factor'):
-                r['profit_factor'] = round(avg_w / avg_l, 2) if avg_l else 0
-            if not r.get('breakeven_winrate'):
-                r['breakeven_winrate'] = round(avg_l / (avg_w + avg_l) * 100, 1) if (avg_w + avg_l) else 50
-            # 月度
-            from collections import defaultdict
-            monthly = defaultdict(lambda: {'trades': 0, 'pnl': 0, 'wins': 0})
-            for t in trades:
-                m = t.get('date', '')[:7]
-                if not m or m == 'end': continue
-                monthly[m]['trades'] += 1
-                monthly[m]['pnl'] += t.get('pnl', 0)
-                if t.get('pnl', 0) > 0: monthly[m]['wins'] += 1
-            r['monthly'] = [
-                {'month': m, 'trades': d['trades'],
-                 'win_rate': d['wins']/d['trades']*100 if d['trades'] else 0,
-                 'pnl': round(d['pnl'], 2)}
-                for m, d in sorted(monthly.items())
-            ]
-            versions.append(r)
+        import os
+        from web.backtest_results import load_versions
+
+        # 加载所有回测版本 (按文件 mtime 缓存解析结果)
+        versions = load_versions(os.path.dirname(__file__))
 
         # 默认显示第一个有数据的,或选中的
         selected = request.args.get('v', '0')
@@ -320,27 +200,16 @@ def create_app():
     @app.route('/api/stream')
     @login_required
     def api_stream():
-        """SSE 实时推送 (FR-041)"""
-        def generate():
-            import time as _time
-            from models.db_ops import get_open_positions, get_dashboard_stats, query_signals
-            while True:
-                try:
-                    positions = get_open_positions()
-                    stats = get_dashboard_stats()
-                    recent = query_signals(limit=5)
-                    data = json.dumps({
-                        'positions': len(positions),
-                        'total_trades': stats['total'],
-                        'total_pnl': stats['total_pnl'],
-                        'win_rate': stats['win_rate'],
-                        'recent_signals': len(recent),
-                    }, default=str)
-                    yield f"data: {data}\n\n"
-                except Exception:
-                    pass
-                _time.sleep(5)
-        return Response(generate(), mimetype='text/event-stream')
+        """SSE 实时推送 (FR-041): 所有连接共用一个后台发布线程, 见 web/stream.py"""
+        from web.stream import dashboard_stream
+        return Response(dashboard_stream.subscribe(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @app.route('/api/stream/stats')
+    @login_required
+    def api_stream_stats():
+        from web.stream import dashboard_stream
+        return jsonify(dashboard_stream.stats())
 
     @app.route('/health')
     def health():
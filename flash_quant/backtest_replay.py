@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Flash Quant — 事件回放回测 (实盘扫描器/执行器/风控原样运行, 见 replay/harness.py)
+
+用法:
+  python3 backtest_replay.py --start 2025-01-01 --end 2026-01-01
+  python3 backtest_replay.py --symbols BTCUSDT,ETHUSDT --events ws_2026-03-01.jsonl
+  python3 backtest_replay.py --record ws_today.jsonl --minutes 60   # 录制实盘 WS 消息
+
+K线首次运行从 Binance 拉取并缓存到 --cache-dir, 之后离线回放
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, '.')
+from core.logger import setup_logging
+from replay.sources import fetch_klines, symbol_events, recorded_events, merge_events, JsonlRecorder
+
+
+def _ms(day: str) -> int:
+    return int(datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def build_events(symbols, start_ms, end_ms, cache_dir, event_files):
+    sources = []
+    for sym in symbols:
+        rows = fetch_klines(sym, start_ms, end_ms, cache_dir)
+        print(f"  {sym}: {len(rows)} 根 5m")
+        sources.append(symbol_events(sym, rows))
+    for path in event_files:
+        sources.append(recorded_events(path))
+    return merge_events(*sources)
+
+
+async def record(symbols, path, minutes):
+    from ws.shards import ShardedStreamClient
+    recorder = JsonlRecorder(path)
+    client = ShardedStreamClient(recorder)
+    streams = []
+    for sym in symbols:
+        s = sym.lower()
+        streams += [f"{s}@kline_5m", f"{s}@kline_15m", f"{s}@kline_1h", f"{s}@aggTrade"]
+    client.add_streams(streams)
+    task = asyncio.create_task(client.run())
+    await asyncio.sleep(minutes * 60)
+    client.stop()
+    await task
+    recorder.close()
+    print(f"录制完成: {recorder.count} 条 → {path}")
+
+
+def main():
+    from engine import DEFAULT_SYMBOLS
+
+    p = argparse.ArgumentParser(description='Flash Quant 事件回放回测')
+    p.add_argument('--symbols', default=','.join(DEFAULT_SYMBOLS))
+    p.add_argument('--start', default='2025-01-01')
+    p.add_argument('--end', default='2026-01-01')
+    p.add_argument('--cache-dir', default='data/replay_cache')
+    p.add_argument('--events', action='append', default=[],
+                   help='录制的 WS 消息 JSONL (可多次指定)')
+    p.add_argument('--no-klines', action='store_true', help='只回放 --events')
+    p.add_argument('--record', help='录制实盘 WS 消息到该文件')
+    p.add_argument('--minutes', type=int, default=60)
+    p.add_argument('--log-level', default='WARNING')
+    args = p.parse_args()
+
+    setup_logging(level=args.log_level, json_format=False)
+    symbols = [s.strip().upper() for s in args.symbols.split(',') if s.strip()]
+
+    if args.record:
+        asyncio.run(record(symbols, args.record, args.minutes))
+        return
+
+    from replay.harness import ReplayHarness
+
+    print(f"\n📡 准备事件 ({args.start} → {args.end}, {len(symbols)} 币)...")
+    start_ms, end_ms = _ms(args.start), _ms(args.end)
+    if args.no_klines:
+        events = merge_events(*(recorded_events(f) for f in args.events))
+    else:
+        events = build_events(symbols, start_ms, end_ms, args.cache_dir, args.events)
+
+    harness = ReplayHarness(symbols)
+    report = asyncio.run(harness.run(events))
+    print("\n📊 回放结果")
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+流式指标 vs 批量重算 — 每根 K线收盘的耗时对比
+
+用法: python bench_indicators.py [--bars 50] [--ticks 20]
+
+批量: 每个 symbol 收盘后用最近 N 根重算 RSI/EMA/MACD/ADX/BB/量比 (Tier 3 现行做法)
+流式: 每个 symbol 收盘后 IndicatorHub.on_kline() 一次 + snapshot()
+"""
+import argparse
+import random
+import time
+from dataclasses import dataclass
+
+from data import indicators as batch
+from data.stream_indicators import IndicatorHub
+
+
+@dataclass
+class _Kline:
+    timestamp: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    is_closed: bool = True
+
+
+def _make_klines(n, seed):
+    rnd = random.Random(seed)
+    price = rnd.uniform(1, 1000)
+    out = []
+    for i in range(n):
+        o = price
+        price *= 1 + rnd.gauss(0, 0.01)
+        out.append(_Kline(i * 3600_000, o, max(o, price) * 1.002,
+                          min(o, price) * 0.998, price, rnd.uniform(10, 1000)))
+    return out
+
+
+def _batch_all(klines):
+    closes = [k.close for k in klines]
+    highs = [k.high for k in klines]
+    lows = [k.low for k in klines]
+    volumes = [k.volume for k in klines]
+    batch.rsi(closes, 14)
+    batch.ema(closes, 20)
+    batch.macd(closes)
+    batch.adx(highs, lows, closes, 14)
+    batch.bollinger_bands(closes, 20)
+    batch.volume_ratio(volumes, 20)
+
+
+def bench(n_symbols, window, ticks):
+    history = {f'S{i}USDT': _make_klines(window + ticks, i) for i in range(n_symbols)}
+
+    hub = IndicatorHub()
+    for sym, ks in history.items():
+        for k in ks[:window]:
+            hub.on_kline(sym, '1h', k)
+
+    t0 = time.perf_counter()
+    for t in range(window, window + ticks):
+        for ks in history.values():
+            _batch_all(ks[t - window + 1:t + 1])
+    batch_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for t in range(window, window + ticks):
+        for sym, ks in history.items():
+            hub.on_kline(sym, '1h', ks[t])
+            hub.get(sym, '1h')
+    stream_s = time.perf_counter() - t0
+
+    return batch_s / ticks * 1000, stream_s / ticks * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bars', type=int, default=50, help='批量重算窗口 (Tier 3 = 50)')
+    parser.add_argument('--ticks', type=int, default=20, help='模拟收盘次数')
+    args = parser.parse_args()
+
+    print(f"窗口={args.bars} 根, 每档 {args.ticks} 次收盘")
+    print(f"{'symbols':>8} {'批量 ms/收盘':>14} {'流式 ms/收盘':>14} {'加速':>8}")
+    for n in (50, 100, 250, 500):
+        b, s = bench(n, args.bars, args.ticks)
+        print(f"{n:>8} {b:>14.2f} {s:>14.2f} {b / s:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+Flash Quant - 统一时钟
+实盘走系统时间; 回放 (replay/) 时切到模拟时钟, 扫描器/执行器/风控代码不用改。
+所有业务代码取 "现在" 都走 clock.now(tz), 不直接调 datetime.now()。
+"""
+import time as _time
+from datetime import datetime, timezone
+
+_sim_ms = None   # 模拟时间 (毫秒), None = 使用系统时间
+
+
+def now(tz=timezone.utc) -> datetime:
+    """当前时间 (带时区)"""
+    if _sim_ms is None:
+        return datetime.now(tz)
+    return datetime.fromtimestamp(_sim_ms / 1000, tz)
+
+
+def time() -> float:
+    """当前 unix 时间戳 (秒)"""
+    if _sim_ms is None:
+        return _time.time()
+    return _sim_ms / 1000
+
+
+def set_sim_time(ms: int):
+    """切换到模拟时钟并设置当前时间 (毫秒)"""
+    global _sim_ms
+    _sim_ms = ms
+
+
+def use_wall_clock():
+    """恢复系统时间"""
+    global _sim_ms
+    _sim_ms = None
+
+
+def is_simulated() -> bool:
+    return _sim_ms is not None
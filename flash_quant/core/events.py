@@ -0,0 +1,124 @@
+"""
+Flash Quant - 引擎事件通知 (Redis pub/sub)
+
+engine 和 Web 是两个进程。engine 开平仓后往 Redis 频道发一条事件,
+Web 进程的 dashboard 广播器 (web/stream.py) 收到后立即重算推送,
+不用等下一个轮询周期。
+
+Redis 只是 "有变化" 的提示, 不承载数据; 未安装 redis 包 / 连不上时
+publish 静默跳过, Web 端退化为按固定间隔刷新。回放 (模拟时钟) 时不发事件。
+
+同进程内的订阅者 (engine 里的看板汇总任务) 用 add_listener 注册,
+publish_soon 时在调用方线程里直接回调, 不经过 Redis。
+"""
+import asyncio
+import json
+import time
+
+from config.settings import settings
+from core import clock
+from core.logger import get_logger
+
+try:
+    import redis
+except ImportError:     # 可选依赖
+    redis = None
+
+logger = get_logger('events')
+
+CHANNEL = 'flash_quant:events'
+CONNECT_TIMEOUT = 0.5    # 发布方: 连不上 Redis 不能拖住开平仓
+RETRY_AFTER = 30         # 发布失败后多久再尝试连接 (秒)
+
+_client = None
+_down_until = 0.0
+_listeners = []
+
+
+def add_listener(fn):
+    """注册同进程事件回调 fn(kind, data); 返回 fn 便于 remove_listener"""
+    _listeners.append(fn)
+    return fn
+
+
+def remove_listener(fn):
+    if fn in _listeners:
+        _listeners.remove(fn)
+
+
+def _new_client(**kwargs):
+    return redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT,
+                       db=settings.REDIS_DB, **kwargs)
+
+
+def publish(kind: str, **data) -> bool:
+    """同步发布一条事件; 失败返回 False (不抛异常)"""
+    global _client, _down_until
+    if redis is None or clock.is_simulated() or time.monotonic() < _down_until:
+        return False
+    try:
+        if _client is None:
+            _client = _new_client(socket_connect_timeout=CONNECT_TIMEOUT,
+                                  socket_timeout=CONNECT_TIMEOUT)
+        _client.publish(CHANNEL, json.dumps({'kind': kind, 'ts': time.time(), **data},
+                                            default=str))
+        return True
+    except Exception as e:
+        _client = None
+        _down_until = time.monotonic() + RETRY_AFTER
+        logger.warning("events.publish_failed", kind=kind, error=str(e))
+        return False
+
+
+def publish_soon(kind: str, **data):
+    """在 asyncio 代码里调用: 先回调同进程订阅者, 再丢到线程池发布到 Redis, 不等待结果"""
+    if clock.is_simulated():
+        return
+    for fn in list(_listeners):
+        try:
+            fn(kind, data)
+        except Exception as e:
+            logger.warning("events.listener_failed", kind=kind, error=str(e))
+    if redis is None:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        publish(kind, **data)
+        return
+    loop.run_in_executor(None, lambda: publish(kind, **data))
+
+
+def listen(on_event, should_stop=lambda: False, reconnect_delay: float = 5.0):
+    """订阅事件频道 (阻塞, 放在后台线程里跑), 断线自动重连
+
+    on_event(dict) 在本线程里回调; redis 包不可用时直接返回。
+    """
+    if redis is None:
+        logger.info("events.listen_disabled", reason="redis not installed")
+        return
+    while not should_stop():
+        pubsub = None
+        try:
+            pubsub = _new_client(socket_connect_timeout=5).pubsub(
+                ignore_subscribe_messages=True)
+            pubsub.subscribe(CHANNEL)
+            logger.info("events.subscribed", channel=CHANNEL)
+            while not should_stop():
+                msg = pubsub.get_message(timeout=1.0)
+                if msg is None:
+                    continue
+                try:
+                    event = json.loads(msg['data'])
+                except (TypeError, ValueError):
+                    continue
+                on_event(event)
+        except Exception as e:
+            logger.warning("events.listen_error", error=str(e))
+            time.sleep(reconnect_delay)
+        finally:
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
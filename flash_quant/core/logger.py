@@ -36,6 +36,8 @@ class StructLogger:
         self._logger = logging.getLogger(name)
 
     def _log(self, level, event, **kwargs):
+        if not self._logger.isEnabledFor(level):
+            return
         record = self._logger.makeRecord(
             self._logger.name, level, '', 0, event, (), None
         )
@@ -0,0 +1,166 @@
+"""
+看板物化汇总
+首页需要的数据 (今日信号/分 tier 计数、统计、资金曲线、带派生字段的持仓、
+最近信号) 由 engine 定期算好写进 dashboard_summaries 表, 页面只按主键读一行。
+
+- engine 里每 15s 刷新一次; 开平仓事件 (core/events) 触发立即刷新
+- 汇总过期 (engine 没跑) 时 Web 端现算一次并写回, 页面照常可用
+"""
+import asyncio
+import json
+from datetime import datetime, date, timezone, timedelta
+from decimal import Decimal
+
+from core import clock, events
+from core.constants import get_leverage_tier
+from core.logger import get_logger
+
+logger = get_logger('dashboard_summary')
+
+MYT = timezone(timedelta(hours=8))
+
+HOME = 'home'
+REFRESH_INTERVAL = 15    # engine 定时刷新 (秒)
+MAX_AGE = 60             # Web 端认为汇总已过期的时长 (秒)
+MIN_GAP = 1.0            # 事件触发刷新的最短间隔, 连续开平仓合并
+START_BALANCE = 10000
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _row(d: dict, drop=()) -> dict:
+    return {k: _jsonable(v) for k, v in d.items() if k not in drop}
+
+
+def _time_str(ts, fmt='%m-%d %H:%M') -> str:
+    if ts and hasattr(ts, 'strftime'):
+        return ts.strftime(fmt)
+    return str(ts)[:16] if ts else ''
+
+
+def enrich_position(p: dict) -> dict:
+    """持仓派生字段: 名义价值 / 维持保证金率 / 强平价 / 止盈价 / 开仓时间"""
+    sym = p.get('symbol', '')
+    tc = get_leverage_tier(sym)
+    lev = p.get('leverage') or tc['max_leverage']
+    margin = p.get('margin') or 300
+    entry = p.get('entry_price') or 0
+    current = p.get('current_price') or entry
+    direction = p.get('direction', 'long')
+
+    p['notional'] = margin * lev
+    p['mmr'] = round(0.5 / lev * 100, 2)
+    p['mark_price'] = current
+    if direction == 'long':
+        p['liq_price'] = round(entry * (1 - 1/lev * 0.95), 6) if entry else 0
+    else:
+        p['liq_price'] = round(entry * (1 + 1/lev * 0.95), 6) if entry else 0
+    p['realized_pnl'] = round((p.get('unrealized_pnl') or 0) - (p.get('fee') or 0), 2)
+
+    # 止盈价 (如果没有)
+    if not p.get('take_profit'):
+        tp_levels = p.get('take_profit_levels')
+        if tp_levels:
+            if isinstance(tp_levels, str):
+                tp_levels = json.loads(tp_levels)
+            if tp_levels:
+                highest = max(t[0] for t in tp_levels)
+                if direction == 'long':
+                    p['take_profit'] = round(entry * (1 + highest/lev), 6)
+                else:
+                    p['take_profit'] = round(entry * (1 - highest/lev), 6)
+
+    p['open_time_str'] = _time_str(p.get('open_time'))
+    return p
+
+
+def build_home_summary() -> dict:
+    """从业务表计算首页数据 (templates/home.html 的全部变量)"""
+    from models.db_ops import (
+        get_open_positions, query_signals, get_dashboard_stats,
+        get_daily_stats, count_signals_today_by_tier,
+    )
+    stats = get_dashboard_stats()
+
+    # 今日信号统计 (按 tier 一次分组计数)
+    by_tier = count_signals_today_by_tier()
+    stats['signals_today'] = sum(by_tier.values())
+    for tier in ('tier1', 'tier2', 'tier3'):
+        stats[f'{tier}_today'] = by_tier.get(tier, 0)
+
+    # 资金曲线
+    equity_curve = []
+    for d in reversed(get_daily_stats(days=30)):
+        equity_curve.append({
+            'date': d['date'].isoformat() if hasattr(d['date'], 'isoformat') else str(d['date']),
+            'balance': d.get('ending_balance') or START_BALANCE,
+        })
+    if not equity_curve:
+        equity_curve = [{'date': clock.now(MYT).strftime('%Y-%m-%d'),
+                         'balance': START_BALANCE + stats['total_pnl']}]
+
+    positions = [_row(enrich_position(p)) for p in get_open_positions()]
+
+    signals = []
+    for s in query_signals(limit=20):
+        s['timestamp_str'] = _time_str(s.get('timestamp') or s.get('created_at'))
+        signals.append(_row(s, drop=('raw_data',)))
+
+    return {'positions': positions, 'signals': signals,
+            'stats': stats, 'equity_curve': equity_curve}
+
+
+def refresh_home_summary() -> dict:
+    """重算并写入首页汇总, 返回 payload"""
+    from models.db_ops import upsert_dashboard_summary
+    payload = build_home_summary()
+    upsert_dashboard_summary(HOME, payload)
+    return payload
+
+
+def _age_seconds(updated_at) -> float:
+    now = clock.now(MYT)
+    if updated_at.tzinfo is None:
+        now = now.replace(tzinfo=None)
+    return (now - updated_at).total_seconds()
+
+
+def load_home_summary(max_age: float = MAX_AGE) -> dict:
+    """Web 首页: 读汇总行; 没有或过期时现算一次并写回"""
+    from models.db_ops import get_dashboard_summary
+    row = get_dashboard_summary(HOME)
+    if row and row.get('updated_at') and _age_seconds(row['updated_at']) <= max_age:
+        payload = row['payload']
+        return json.loads(payload) if isinstance(payload, str) else payload
+    try:
+        return refresh_home_summary()
+    except Exception as e:
+        logger.warning("dashboard_summary.refresh_failed", error=str(e))
+        return build_home_summary()
+
+
+async def dashboard_summarizer(interval: int = REFRESH_INTERVAL):
+    """engine 任务: 定时刷新首页汇总, 开平仓事件触发立即刷新"""
+    logger.info("dashboard_summarizer.started", interval=interval)
+    wake = asyncio.Event()
+    listener = events.add_listener(lambda kind, data: wake.set())
+    try:
+        while True:
+            try:
+                await asyncio.to_thread(refresh_home_summary)
+            except Exception as e:
+                logger.error("dashboard_summary.error", error=str(e))
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=interval)
+                await asyncio.sleep(MIN_GAP)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+    finally:
+        events.remove_listener(listener)
@@ -0,0 +1,419 @@
+"""
+增量 (流式) 技术指标 — 每根收盘 K线 O(1) 更新
+与 data/indicators.py 批量函数逐值等价 (同样的种子/平滑方式),
+由 ws/binance_ws.py 在 K线收盘时推送, 扫描器直接读取最新值,
+不必每次扫描都从整段价格序列重算。
+"""
+import math
+import threading
+from collections import deque
+from typing import Optional
+
+from data import indicators as batch
+
+
+class StreamingEMA:
+    """EMA: 前 period 个值的 SMA 作种子, 之后递推 (同 indicators.ema)"""
+
+    __slots__ = ('period', 'k', 'value', '_seed_sum', '_count')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.k = 2 / (period + 1)
+        self.value = None
+        self._seed_sum = 0.0
+        self._count = 0
+
+    def update(self, x: float) -> Optional[float]:
+        self._count += 1
+        if self._count < self.period:
+            self._seed_sum += x
+            return None
+        if self._count == self.period:
+            self.value = (self._seed_sum + x) / self.period
+        else:
+            self.value = x * self.k + self.value * (1 - self.k)
+        return self.value
+
+
+class RollingStats:
+    """定长窗口均值/方差 (总体方差), 滑窗 Welford 更新"""
+
+    # 每 RESYNC_EVERY 次更新重新精确求和一次, 抑制浮点漂移 (均摊 O(1))
+    RESYNC_EVERY = 1000
+
+    __slots__ = ('period', 'window', 'mean', '_m2', '_updates')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+
+    @property
+    def ready(self) -> bool:
+        return len(self.window) == self.period
+
+    @property
+    def variance(self) -> Optional[float]:
+        if not self.ready:
+            return None
+        return max(self._m2, 0.0) / self.period
+
+    @property
+    def std(self) -> Optional[float]:
+        var = self.variance
+        return None if var is None else math.sqrt(var)
+
+    def update(self, x: float):
+        w = self.window
+        if len(w) < self.period:
+            w.append(x)
+            n = len(w)
+            delta = x - self.mean
+            self.mean += delta / n
+            self._m2 += delta * (x - self.mean)
+            return
+        old = w[0]
+        w.append(x)
+        old_mean = self.mean
+        self.mean = old_mean + (x - old) / self.period
+        self._m2 += (x - old) * (x - self.mean + old - old_mean)
+        self._updates += 1
+        if self._updates % self.RESYNC_EVERY == 0:
+            self.mean = sum(w) / self.period
+            self._m2 = sum((v - self.mean) ** 2 for v in w)
+
+
+class StreamingBollinger:
+    """布林带 (同 indicators.bollinger_bands)"""
+
+    __slots__ = ('stats', 'std_dev')
+
+    def __init__(self, period: int = 20, std_dev: float = 2.0):
+        self.stats = RollingStats(period)
+        self.std_dev = std_dev
+
+    def update(self, close: float):
+        self.stats.update(close)
+
+    @property
+    def value(self):
+        """(upper, middle, lower) 或 None"""
+        if not self.stats.ready:
+            return None
+        mid = self.stats.mean
+        band = self.std_dev * self.stats.std
+        return mid + band, mid, mid - band
+
+
+class StreamingRSI:
+    """Wilder RSI (同 indicators.rsi)"""
+
+    __slots__ = ('period', 'value', '_prev', '_gain_sum', '_loss_sum',
+                 '_avg_gain', '_avg_loss', '_deltas')
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.value = None
+        self._prev = None
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+        self._avg_gain = None
+        self._avg_loss = None
+        self._deltas = 0
+
+    def update(self, close: float) -> Optional[float]:
+        if self._prev is None:
+            self._prev = close
+            return None
+        d = close - self._prev
+        self._prev = close
+        gain = d if d > 0 else 0
+        loss = -d if d < 0 else 0
+        self._deltas += 1
+        p = self.period
+
+        if self._deltas < p:
+            self._gain_sum += gain
+            self._loss_sum += loss
+            return None
+        if self._deltas == p:
+            self._avg_gain = (self._gain_sum + gain) / p
+            self._avg_loss = (self._loss_sum + loss) / p
+        else:
+            self._avg_gain = (self._avg_gain * (p - 1) + gain) / p
+            self._avg_loss = (self._avg_loss * (p - 1) + loss) / p
+
+        if self._avg_loss == 0:
+            self.value = 100.0
+        else:
+            rs = self._avg_gain / self._avg_loss
+            self.value = 100 - 100 / (1 + rs)
+        return self.value
+
+
+class StreamingMACD:
+    """MACD (同 indicators.macd), 保留上一根柱值供 "柱体放大" 判断"""
+
+    __slots__ = ('fast', 'slow', 'signal', 'macd', 'signal_value',
+                 'hist', 'prev_hist', '_count')
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+        self.macd = None
+        self.signal_value = None
+        self.hist = None
+        self.prev_hist = None
+        self._count = 0
+
+    @property
+    def ready(self) -> bool:
+        # 批量版要求 len(closes) >= slow + signal
+        return self._count >= self.slow.period + self.signal.period and self.hist is not None
+
+    def update(self, close: float):
+        self._count += 1
+        f = self.fast.update(close)
+        s = self.slow.update(close)
+        if s is None:
+            return
+        self.macd = f - s
+        sig = self.signal.update(self.macd)
+        if sig is None:
+            return
+        self.signal_value = sig
+        self.prev_hist = self.hist
+        self.hist = self.macd - sig
+
+
+class _WilderSum:
+    """indicators.adx 内部的 wilder_smooth: 种子为前 p 项之和 (非均值)"""
+
+    __slots__ = ('period', 'value', '_count')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.value = 0.0
+        self._count = 0
+
+    def update(self, x: float) -> Optional[float]:
+        self._count += 1
+        if self._count <= self.period:
+            self.value += x
+            return self.value if self._count == self.period else None
+        self.value = self.value - self.value / self.period + x
+        return self.value
+
+
+class StreamingADX:
+    """ADX (同 indicators.adx)"""
+
+    __slots__ = ('period', 'value', '_prev', '_atr', '_plus', '_minus', '_adx')
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.value = None
+        self._prev = None   # (high, low, close)
+        self._atr = _WilderSum(period)
+        self._plus = _WilderSum(period)
+        self._minus = _WilderSum(period)
+        self._adx = _WilderSum(period)
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        prev = self._prev
+        self._prev = (high, low, close)
+        if prev is None:
+            return None
+        ph, pl, pc = prev
+        tr = max(high - low, abs(high - pc), abs(low - pc))
+        up = high - ph
+        down = pl - low
+        atr = self._atr.update(tr)
+        plus = self._plus.update(up if up > down and up > 0 else 0)
+        minus = self._minus.update(down if down > up and down > 0 else 0)
+        if atr is None:
+            return None
+
+        if atr == 0:
+            dx = 0
+        else:
+            plus_di = 100 * plus / atr
+            minus_di = 100 * minus / atr
+            di_sum = plus_di + minus_di
+            dx = 0 if di_sum == 0 else 100 * abs(plus_di - minus_di) / di_sum
+
+        smoothed = self._adx.update(dx)
+        if smoothed is not None:
+            self.value = smoothed / self.period
+        return self.value
+
+
+class StreamingVolumeRatio:
+    """量比: 最新成交量 / 前 lookback 根均量 (同 indicators.volume_ratio)"""
+
+    __slots__ = ('lookback', 'value', '_window', '_sum', '_updates')
+
+    def __init__(self, lookback: int = 20):
+        self.lookback = lookback
+        self.value = None
+        self._window = deque(maxlen=lookback)
+        self._sum = 0.0
+        self._updates = 0
+
+    def update(self, volume: float) -> Optional[float]:
+        w = self._window
+        if w:
+            avg = self._sum / len(w)
+            self.value = volume / avg if avg > 0 else 0
+        if len(w) == self.lookback:
+            self._sum -= w[0]
+        w.append(volume)
+        self._sum += volume
+        self._updates += 1
+        if self._updates % RollingStats.RESYNC_EVERY == 0:
+            self._sum = sum(w)
+        return self.value
+
+
+class IndicatorSet:
+    """单个 symbol+interval 的全部流式指标 (Tier 2/3 扫描器所需)"""
+
+    EMA_PERIODS = (9, 20, 21, 50)
+    RANGE_BARS = 20     # 近期高低点窗口 (Tier 3 position 评分)
+
+    def __init__(self):
+        self.emas = {p: StreamingEMA(p) for p in self.EMA_PERIODS}
+        self.rsi = StreamingRSI(14)
+        self.macd = StreamingMACD(12, 26, 9)
+        self.adx = StreamingADX(14)
+        self.bb = StreamingBollinger(20, 2.0)
+        self.vol_ratio = StreamingVolumeRatio(20)
+        self.closes = deque(maxlen=self.RANGE_BARS)
+        self.bars = 0
+        self.last_ts = None
+        self.last_close = None
+
+    def update(self, timestamp: int, high: float, low: float,
+               close: float, volume: float):
+        for e in self.emas.values():
+            e.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.adx.update(high, low, close)
+        self.bb.update(close)
+        self.vol_ratio.update(volume)
+        self.closes.append(close)
+        self.bars += 1
+        self.last_ts = timestamp
+        self.last_close = close
+
+    def snapshot(self) -> dict:
+        """当前各指标最新值 (未就绪的为 None)"""
+        m = self.macd
+        return {
+            'timestamp': self.last_ts,
+            'bars': self.bars,
+            'close': self.last_close,
+            'ema': {p: e.value for p, e in self.emas.items()},
+            'rsi': self.rsi.value,
+            'macd_hist': m.hist if m.ready else None,
+            'macd_prev_hist': m.prev_hist if m.ready else None,
+            'adx': self.adx.value,
+            'bb': self.bb.value,
+            'volume_ratio': self.vol_ratio.value,
+            'high_20': max(self.closes) if len(self.closes) == self.RANGE_BARS else None,
+            'low_20': min(self.closes) if len(self.closes) == self.RANGE_BARS else None,
+        }
+
+
+class IndicatorHub:
+    """
+    全局流式指标表 (symbol, interval) → IndicatorSet
+    只接收已收盘 K线, 时间戳不大于上一根的重复/乱序 K线直接丢弃
+    """
+
+    def __init__(self):
+        self._sets = {}
+        self._lock = threading.Lock()
+
+    def on_kline(self, symbol: str, interval: str, kline) -> bool:
+        """推送一根 K线 (Kline 对象), 返回是否被计入"""
+        if not kline.is_closed:
+            return False
+        key = (symbol, interval)
+        with self._lock:
+            ind = self._sets.get(key)
+            if ind is None:
+                ind = self._sets[key] = IndicatorSet()
+            if ind.last_ts is not None and kline.timestamp <= ind.last_ts:
+                return False
+            ind.update(kline.timestamp, kline.high, kline.low,
+                       kline.close, kline.volume)
+        return True
+
+    def get(self, symbol: str, interval: str) -> Optional[dict]:
+        """最新指标快照, 无数据返回 None"""
+        with self._lock:
+            ind = self._sets.get((symbol, interval))
+            return ind.snapshot() if ind else None
+
+    def snapshot_for(self, symbol: str, interval: str, klines: list) -> dict:
+        """
+        klines (已收盘, 时间升序) 最后一根对应的指标快照
+        流式状态恰好更新到这根且历史不短于窗口时直接返回 (O(1)),
+        否则 (冷启动/缺 K线/WS 落后) 在窗口上批量计算
+
+        两条路径的种子不同: 流式从预热起的完整历史递推, 批量只看窗口。
+        50 根窗口下 EMA20 相差约 0.1% 以内, RSI/ADX 相差 1-3 点,
+        MACD 柱差别更大 (窗口内只有约 16 根柱值); 流式值更接近长历史的收敛值。
+        """
+        snap = self.get(symbol, interval)
+        if (snap and klines and snap['timestamp'] == klines[-1].timestamp
+                and snap['bars'] >= len(klines)):
+            return snap
+        return window_snapshot(klines)
+
+    def reset(self, symbol: str = None):
+        with self._lock:
+            if symbol is None:
+                self._sets.clear()
+            else:
+                for key in [k for k in self._sets if k[0] == symbol]:
+                    del self._sets[key]
+
+
+def window_snapshot(klines: list) -> dict:
+    """用批量函数在 K线窗口上计算快照 (字段同 IndicatorSet.snapshot)"""
+    closes = [k.close for k in klines]
+    highs = [k.high for k in klines]
+    lows = [k.low for k in klines]
+    volumes = [k.volume for k in klines]
+    n = IndicatorSet.RANGE_BARS
+
+    emas = {p: batch.ema(closes, p) for p in IndicatorSet.EMA_PERIODS}
+    rsi_vals = batch.rsi(closes, 14)
+    _, _, hist = batch.macd(closes)
+    adx_vals = batch.adx(highs, lows, closes, 14)
+    upper, middle, lower = batch.bollinger_bands(closes, 20)
+    return {
+        'timestamp': klines[-1].timestamp if klines else None,
+        'bars': len(klines),
+        'close': closes[-1] if closes else None,
+        'ema': {p: v[-1] if v else None for p, v in emas.items()},
+        'rsi': rsi_vals[-1] if rsi_vals else None,
+        'macd_hist': hist[-1] if len(hist) >= 2 else None,
+        'macd_prev_hist': hist[-2] if len(hist) >= 2 else None,
+        'adx': adx_vals[-1] if adx_vals else None,
+        'bb': (upper[-1], middle[-1], lower[-1]) if upper else None,
+        'volume_ratio': batch.volume_ratio(volumes, 20),
+        'high_20': max(closes[-n:]) if len(closes) >= n else None,
+        'low_20': min(closes[-n:]) if len(closes) >= n else None,
+    }
+
+
+# 全局单例
+indicator_hub = IndicatorHub()
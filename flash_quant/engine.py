@@ -16,7 +16,9 @@ from scanner.liquidation_hunter import LiquidationHunter
 from executor.paper_executor import PaperExecutor
 from risk.risk_manager import risk_manager
 from models.db_ops import count_open_trades, get_open_symbols
+from models.async_db import db_writer, aread
 from data.daily_stats_updater import daily_stats_updater
+from data.dashboard_summarizer import dashboard_summarizer
 
 logger = get_logger('engine')
 
@@ -43,8 +45,8 @@ async def position_monitor(executor, interval: int = 30):
         try:
             await executor.check_positions()
             risk_manager.update_positions(
-                count_open_trades(),
-                get_open_symbols(),
+                await aread(count_open_trades),
+                await aread(get_open_symbols),
             )
         except Exception as e:
             logger.error("position_monitor.error", error=str(e))
@@ -57,6 +59,7 @@ async def warmup_klines(symbols):
         import ccxt
         exchange = ccxt.binance({'options': {'defaultType': 'future'}})
         from data.kline_cache import kline_cache, Kline
+        from data.stream_indicators import indicator_hub
 
         for sym in symbols:
             try:
@@ -64,26 +67,32 @@ async def warmup_klines(symbols):
                 # 拉 5min K线
                 ohlcv_5m = exchange.fetch_ohlcv(pair, '5m', limit=25)
                 for c in ohlcv_5m[:-1]:
-                    kline_cache.update(sym, '5m', Kline(
+                    kline = Kline(
                         timestamp=c[0], open=c[1], high=c[2],
                         low=c[3], close=c[4], volume=c[5], is_closed=True,
-                    ))
+                    )
+                    kline_cache.update(sym, '5m', kline)
+                    indicator_hub.on_kline(sym, '5m', kline)
 
                 # 拉 15min K线 (Tier 2 需要)
                 ohlcv_15m = exchange.fetch_ohlcv(pair, '15m', limit=50)
                 for c in ohlcv_15m[:-1]:
-                    kline_cache.update(sym, '15m', Kline(
+                    kline = Kline(
                         timestamp=c[0], open=c[1], high=c[2],
                         low=c[3], close=c[4], volume=c[5], is_closed=True,
-                    ))
+                    )
+                    kline_cache.update(sym, '15m', kline)
+                    indicator_hub.on_kline(sym, '15m', kline)
 
                 # 拉 1H K线 (大趋势判断需要 EMA50, 至少 55 根)
                 ohlcv_1h = exchange.fetch_ohlcv(pair, '1h', limit=60)
                 for c in ohlcv_1h[:-1]:
-                    kline_cache.update(sym, '1h', Kline(
+                    kline = Kline(
                         timestamp=c[0], open=c[1], high=c[2],
                         low=c[3], close=c[4], volume=c[5], is_closed=True,
-                    ))
+                    )
+                    kline_cache.update(sym, '1h', kline)
+                    indicator_hub.on_kline(sym, '1h', kline)
 
                 logger.info("warmup.done", symbol=sym)
             except Exception as e:
@@ -134,11 +143,13 @@ async def main():
     # 6. 启动
     logger.info("engine.started", strategy="liquidation_hunter")
     await asyncio.gather(
+        db_writer.run(),
         ws.run(),
         rest.run(),
         liq_hunter.run(),
         position_monitor(executor, interval=30),
         daily_stats_updater(interval=300),
+        dashboard_summarizer(),
     )
 
 
@@ -154,4 +165,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("engine.stopped")
     finally:
+        # 退出前把 write-behind 队列里剩余的信号/审计写完
+        loop.run_until_complete(db_writer.stop())
         loop.close()
@@ -13,6 +13,7 @@ import asyncio
 import time
 from datetime import datetime, timezone, timedelta
 from executor.base import ExecutorBase
+from core import events
 from models.db_ops import (
     insert_trade, update_trade, insert_position,
     delete_position_by_trade, get_open_positions,
@@ -195,6 +196,7 @@ class BinanceExecutor(ExecutorBase):
                 'entry': entry_price, 'stop': stop_price,
                 'margin': margin, 'quantity': quantity,
             })
+            events.publish_soon('position_opened', symbol=symbol, trade_id=trade_id)
 
             return {'trade_id': trade_id, 'order_id': order_id, 'entry_price': entry_price}
 
@@ -276,6 +278,7 @@ class BinanceExecutor(ExecutorBase):
             logger.info("binance.closed",
                        trade_id=trade_id, symbol=symbol,
                        pnl=round(pnl, 2), reason=reason)
+            events.publish_soon('position_closed', symbol=symbol, trade_id=trade_id)
 
             return {'trade_id': trade_id, 'pnl': pnl}
 
@@ -372,6 +375,7 @@ class BinanceExecutor(ExecutorBase):
 
             logger.info("binance.stop_loss_synced",
                        trade_id=trade_id, symbol=symbol, pnl=round(pnl, 2))
+            events.publish_soon('position_closed', symbol=symbol, trade_id=trade_id)
 
         except Exception as e:
             logger.error("binance.sync_error",
@@ -2,15 +2,13 @@
 模拟下单器 - FR-020
 Phase 1 唯一执行器, 不真实下单, 所有操作写 DB
 """
-from datetime import datetime, timezone, timedelta
+from datetime import timezone, timedelta
+from core import clock, events
 from executor.base import ExecutorBase
 from data.market_data import market_data
 from risk.circuit_breaker import circuit_breaker
-from models.db_ops import (
-    insert_trade, update_trade, insert_position,
-    delete_position_by_trade, get_open_positions, get_open_trades,
-    write_audit,
-)
+from models.db_ops import get_open_positions, get_trade_by_id
+from models.async_db import db_writer, aread
 from core.constants import (
     PAPER_SLIPPAGE_PCT, PAPER_TAKER_FEE_PCT,
     TIER1_TAKE_PROFIT_LADDER, get_leverage_tier,
@@ -58,10 +56,10 @@ class PaperExecutor(ExecutorBase):
         # 持仓时间
         tier_config = get_leverage_tier(symbol)
         max_hold = timedelta(hours=tier_config.get('max_hold_hours', 20))
-        now = datetime.now(MYT)
+        now = clock.now(MYT)
 
-        # 写 DB: trades
-        trade_id = insert_trade({
+        # 写 DB: trades (关键写, 落库后才返回)
+        trade_id = await db_writer.insert_trade({
             'signal_id': signal_id,
             'mode': 'paper',
             'tier': tier,
@@ -78,7 +76,7 @@ class PaperExecutor(ExecutorBase):
 
         # 写 DB: positions
         tp_levels = TIER1_TAKE_PROFIT_LADDER if tier == 'tier1' else []
-        insert_position({
+        await db_writer.insert_position({
             'trade_id': trade_id,
             'symbol': symbol,
             'direction': direction,
@@ -92,21 +90,22 @@ class PaperExecutor(ExecutorBase):
             'max_hold_until': now + max_hold,
         })
 
-        write_audit('system', 'open_position', symbol,
-                    {'trade_id': trade_id, 'direction': direction,
-                     'leverage': leverage, 'margin': margin,
-                     'entry': round(entry_price, 6), 'stop': round(stop_loss_price, 6)})
+        await db_writer.write_audit('system', 'open_position', symbol,
+                                    {'trade_id': trade_id, 'direction': direction,
+                                     'leverage': leverage, 'margin': margin,
+                                     'entry': round(entry_price, 6),
+                                     'stop': round(stop_loss_price, 6)})
 
         logger.info("paper.opened",
                     id=trade_id, symbol=symbol, direction=direction,
                     entry=round(entry_price, 2), leverage=leverage, margin=margin)
+        events.publish_soon('position_opened', symbol=symbol, trade_id=trade_id)
 
         return {'trade_id': trade_id, 'entry_price': entry_price}
 
     async def close_position(self, trade_id: int, reason: str) -> dict:
         # 从 DB 读取交易
-        from models.db_ops import get_trade_by_id
-        trade = get_trade_by_id(trade_id)
+        trade = await aread(get_trade_by_id, trade_id)
         if not trade or trade['status'] != 'open':
             return {'error': 'trade_not_found_or_closed'}
 
@@ -139,10 +138,10 @@ class PaperExecutor(ExecutorBase):
         pnl = pnl_raw - total_fee
         pnl_pct = pnl / trade['margin'] if trade['margin'] > 0 else 0
 
-        now = datetime.now(MYT)
+        now = clock.now(MYT)
 
-        # 更新 DB: trades
-        update_trade(trade_id, {
+        # 更新 DB: trades (关键写, 落库后才返回)
+        await db_writer.update_trade(trade_id, {
             'status': 'closed',
             'exit_price': exit_price,
             'close_time': now,
@@ -153,25 +152,26 @@ class PaperExecutor(ExecutorBase):
         })
 
         # 删除 positions
-        delete_position_by_trade(trade_id)
+        await db_writer.delete_position_by_trade(trade_id)
 
         # 通知风控
         circuit_breaker.record_trade(pnl, symbol, now)
 
-        write_audit('system', 'close_position', symbol,
-                    {'trade_id': trade_id, 'pnl': round(pnl, 2),
-                     'reason': reason, 'exit': round(exit_price, 6)})
+        await db_writer.write_audit('system', 'close_position', symbol,
+                                    {'trade_id': trade_id, 'pnl': round(pnl, 2),
+                                     'reason': reason, 'exit': round(exit_price, 6)})
 
         logger.info("paper.closed",
                     id=trade_id, symbol=symbol,
                     pnl=round(pnl, 2), pnl_pct=f"{pnl_pct:.1%}", reason=reason)
+        events.publish_soon('position_closed', symbol=symbol, trade_id=trade_id)
 
         return {'trade_id': trade_id, 'pnl': pnl}
 
     async def check_positions(self):
         """检查止损/止盈/超时"""
-        open_pos = get_open_positions()
-        now = datetime.now(MYT)
+        open_pos = await aread(get_open_positions)
+        now = clock.now(MYT)
 
         for pos in open_pos:
             trade_id = pos['trade_id']
@@ -224,13 +224,12 @@ class PaperExecutor(ExecutorBase):
                         await self.close_position(trade_id, f'take_profit_{roi:.0%}')
                         continue
 
-            # 更新 position 的 current_price 和 unrealized_pnl
-            from models.db_ops import update_position
+            # 更新 position 的 current_price 和 unrealized_pnl (非关键, 走批量)
             if direction == 'long':
                 upnl = (price - entry) / entry * notional
             else:
                 upnl = (entry - price) / entry * notional
-            update_position(pos['id'], {
+            await db_writer.update_position(pos['id'], {
                 'current_price': price,
                 'unrealized_pnl': round(upnl, 4),
             })
@@ -3,6 +3,7 @@
 过滤 Tier D 垃圾币 + 上市不足 7 天的新币
 """
 from datetime import datetime, timezone
+from core import clock
 from core.constants import TIER_D_VOLUME_THRESHOLD, NEW_LISTING_DAYS
 
 
@@ -28,7 +29,7 @@ def is_tradable(symbol: str, volume_24h: float,
 
     # BR-003: 新币黑名单
     if listing_date is not None:
-        now = datetime.now(timezone.utc)
+        now = clock.now(timezone.utc)
         if listing_date.tzinfo is None:
             listing_date = listing_date.replace(tzinfo=timezone.utc)
         days_since = (now - listing_date).days
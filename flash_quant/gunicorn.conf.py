@@ -0,0 +1,25 @@
+"""
+Flash Quant - gunicorn 配置 (supervisord: gunicorn -c gunicorn.conf.py app:app)
+
+/api/stream 是长连接 SSE: 同步 worker 每个连接占一个线程。
+装了 gevent 时用 gevent worker (一个连接一个协程); 否则用 gthread 多线程兜底。
+dashboard 推送数据由进程内单个发布线程计算 (web/stream.py), 与连接数无关。
+"""
+import importlib.util
+import os
+
+from config.settings import settings
+
+bind = f"127.0.0.1:{settings.WEB_PORT}"
+workers = int(os.getenv('WEB_WORKERS', '1'))
+
+if importlib.util.find_spec('gevent') is not None:
+    worker_class = 'gevent'
+    worker_connections = int(os.getenv('WEB_WORKER_CONNECTIONS', '1000'))
+else:
+    worker_class = 'gthread'
+    threads = int(os.getenv('WEB_THREADS', '64'))
+
+timeout = 60
+graceful_timeout = 10
+keepalive = 30
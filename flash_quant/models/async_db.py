@@ -0,0 +1,311 @@
+"""
+Flash Quant - 异步持久化层 (write-behind)
+
+engine 的 asyncio 循环里不能直接调 db_ops 的同步函数: 每次调用都单独
+建连接 + commit, DB 抖动时整个循环 (包括 WebSocket 收包) 被卡住。
+
+这里用一个有界 asyncio.Queue + 后台 flush 任务:
+- 非关键写 (信号/审计/持仓浮盈): 入队即返回, 后台按批写入
+  同表连续 insert 合成一次 executemany, 整批一个事务
+- 关键写 (开平仓 trades/positions): 同样走队列保证顺序,
+  但调用方 await 到该批 commit 成功才返回 (持久化后才确认)
+- 队列满时生产者 await 等待 (背压), 等待次数/时长计入 stats()
+- 所有 DB 调用都在线程池里执行, 不阻塞事件循环
+- 读路径: aread(fn, ...) 在线程池里跑 db_ops 的查询函数
+
+writer 未启动时 (Web 进程/脚本/测试) 自动退化为直接同步写。
+"""
+import asyncio
+import time
+from sqlalchemy import insert, update, delete
+from models.base import get_engine
+from models import db_ops
+from models.signal import signals
+from models.trade import trades
+from models.position import positions
+from models.audit_log import audit_logs
+from core.logger import get_logger
+
+logger = get_logger('async_db')
+
+MAX_QUEUE = 5000        # 队列上限, 满了生产者等待 (背压)
+MAX_BATCH = 200         # 单次 flush 最多条数
+FLUSH_INTERVAL = 0.5    # 非关键写最长攒批时间 (秒)
+STATS_LOG_INTERVAL = 60  # 统计日志间隔 (秒)
+
+
+class _Op:
+    """一条待写操作"""
+
+    __slots__ = ('kind', 'table', 'values', 'where', 'future')
+
+    def __init__(self, kind, table, values=None, where=None, future=None):
+        self.kind = kind        # 'insert' | 'update' | 'delete'
+        self.table = table
+        self.values = values
+        self.where = where
+        self.future = future    # 关键写: commit 后 set_result
+
+    @property
+    def critical(self):
+        return self.future is not None
+
+
+class AsyncDBWriter:
+
+    def __init__(self, engine_factory=get_engine, max_queue: int = MAX_QUEUE,
+                 max_batch: int = MAX_BATCH, flush_interval: float = FLUSH_INTERVAL):
+        self._engine_factory = engine_factory
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue = None
+        self._running = False
+        self._stopping = False
+        self._done = None
+        self._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'batches': 0,
+            'errors': 0,
+            'critical_writes': 0,
+            'backpressure_waits': 0,
+            'backpressure_wait_ms': 0.0,
+            'max_queue_depth': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    # ─── 生命周期 ──────────────────────────────────────────
+
+    async def run(self):
+        """后台 flush 循环 (放进 engine 的 asyncio.gather)"""
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._done = asyncio.Event()
+        self._stopping = False
+        self._running = True
+        logger.info("db_writer.started", max_queue=self.max_queue,
+                    max_batch=self.max_batch)
+        last_stats = time.time()
+        try:
+            while not self._stopping or not self._queue.empty():
+                batch = await self._collect()
+                if batch:
+                    await self._flush(batch)
+                if time.time() - last_stats >= STATS_LOG_INTERVAL:
+                    logger.info("db_writer.stats", **self.stats())
+                    last_stats = time.time()
+        finally:
+            self._running = False
+            self._done.set()
+            logger.info("db_writer.stopped", **self.stats())
+
+    async def stop(self):
+        """写完队列里剩余的操作后结束 run()"""
+        if not self._running:
+            return
+        self._stopping = True
+        await self._done.wait()
+
+    async def _collect(self) -> list:
+        """等第一条, 再攒批: 满 max_batch / 超过 flush_interval / 遇到关键写 即返回"""
+        try:
+            first = await asyncio.wait_for(self._queue.get(), timeout=1.0)
+        except asyncio.TimeoutError:
+            return []
+        batch = self._drain_nowait([first])
+        deadline = time.monotonic() + self.flush_interval
+        while (len(batch) < self.max_batch
+               and not any(op.critical for op in batch)):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                op = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            batch = self._drain_nowait(batch + [op])
+        return batch
+
+    def _drain_nowait(self, batch: list) -> list:
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    # ─── 入队 ──────────────────────────────────────────────
+
+    async def _submit(self, op: _Op):
+        q = self._queue
+        self._stats['enqueued'] += 1
+        if q.full():
+            t0 = time.monotonic()
+            self._stats['backpressure_waits'] += 1
+            await q.put(op)
+            self._stats['backpressure_wait_ms'] += (time.monotonic() - t0) * 1000
+        else:
+            q.put_nowait(op)
+        depth = q.qsize()
+        if depth > self._stats['max_queue_depth']:
+            self._stats['max_queue_depth'] = depth
+
+    async def _submit_critical(self, op: _Op):
+        op.future = asyncio.get_running_loop().create_future()
+        await self._submit(op)
+        return await op.future
+
+    # ─── 写 (flush) ────────────────────────────────────────
+
+    async def _flush(self, batch: list):
+        t0 = time.monotonic()
+        try:
+            results = await asyncio.to_thread(self._write_batch, batch)
+        except Exception as e:
+            # 整批失败 → 逐条重试, 只让坏的那条失败
+            logger.error("db_writer.batch_failed", size=len(batch), error=str(e))
+            results = await asyncio.to_thread(self._write_one_by_one, batch)
+        else:
+            self._stats['written'] += len(batch)
+
+        for op, res in zip(batch, results):
+            if not op.critical or op.future.done():
+                continue
+            if isinstance(res, Exception):
+                op.future.set_exception(res)
+            else:
+                self._stats['critical_writes'] += 1
+                op.future.set_result(res)
+
+        ms = (time.monotonic() - t0) * 1000
+        self._stats['batches'] += 1
+        self._stats['last_flush_ms'] = round(ms, 2)
+        self._stats['max_flush_ms'] = round(max(self._stats['max_flush_ms'], ms), 2)
+
+    def _write_batch(self, batch: list) -> list:
+        """整批一个事务; 同表同列的连续非关键 insert 合并为 executemany"""
+        results = [None] * len(batch)
+        engine = self._engine_factory()
+        with engine.begin() as conn:
+            i = 0
+            while i < len(batch):
+                op = batch[i]
+                if op.kind == 'insert' and not op.critical:
+                    keys = op.values.keys()
+                    j = i
+                    while (j < len(batch) and batch[j].kind == 'insert'
+                           and not batch[j].critical and batch[j].table is op.table
+                           and batch[j].values.keys() == keys):
+                        j += 1
+                    conn.execute(insert(op.table), [b.values for b in batch[i:j]])
+                    i = j
+                    continue
+                results[i] = self._execute(conn, op)
+                i += 1
+        return results
+
+    def _write_one_by_one(self, batch: list) -> list:
+        results = []
+        for op in batch:
+            try:
+                with self._engine_factory().begin() as conn:
+                    results.append(self._execute(conn, op))
+                self._stats['written'] += 1
+            except Exception as e:
+                self._stats['errors'] += 1
+                logger.error("db_writer.write_failed", table=op.table.name,
+                             kind=op.kind, error=str(e))
+                results.append(e)
+        return results
+
+    @staticmethod
+    def _execute(conn, op: _Op):
+        if op.kind == 'insert':
+            return conn.execute(insert(op.table).values(**op.values)).inserted_primary_key[0]
+        if op.kind == 'update':
+            conn.execute(update(op.table).where(op.where).values(**op.values))
+        elif op.kind == 'delete':
+            conn.execute(delete(op.table).where(op.where))
+        return None
+
+    # ─── 业务 API ──────────────────────────────────────────
+    # writer 未运行时退化为线程池里的同步写, 语义与 db_ops 一致
+
+    async def save_signal(self, data: dict, wait: bool = False):
+        """
+        保存信号. wait=True 时等待落库并返回 id (要挂 trade.signal_id 的信号),
+        否则入队即返回 None
+        """
+        if not self._running:
+            return await asyncio.to_thread(db_ops.save_signal, data)
+        op = _Op('insert', signals, db_ops.signal_values(data))
+        if wait:
+            return await self._submit_critical(op)
+        await self._submit(op)
+        return None
+
+    async def write_audit(self, actor: str, action: str, target: str = None,
+                          details: dict = None, severity: str = 'info'):
+        if not self._running:
+            return await asyncio.to_thread(db_ops.write_audit, actor, action,
+                                           target, details, severity)
+        await self._submit(_Op('insert', audit_logs, db_ops.audit_values(
+            actor, action, target, details, severity)))
+
+    async def insert_trade(self, data: dict) -> int:
+        """关键写: 落库后返回 trade id"""
+        if not self._running:
+            return await asyncio.to_thread(db_ops.insert_trade, data)
+        return await self._submit_critical(
+            _Op('insert', trades, db_ops.trade_values(data)))
+
+    async def update_trade(self, trade_id: int, data: dict):
+        """关键写: 平仓等状态变更, 落库后返回"""
+        if not self._running:
+            return await asyncio.to_thread(db_ops.update_trade, trade_id, data)
+        await self._submit_critical(
+            _Op('update', trades, data, where=trades.c.id == trade_id))
+
+    async def insert_position(self, data: dict) -> int:
+        if not self._running:
+            return await asyncio.to_thread(db_ops.insert_position, data)
+        return await self._submit_critical(
+            _Op('insert', positions, db_ops.position_values(data)))
+
+    async def delete_position_by_trade(self, trade_id: int):
+        if not self._running:
+            return await asyncio.to_thread(db_ops.delete_position_by_trade, trade_id)
+        await self._submit_critical(
+            _Op('delete', positions, where=positions.c.trade_id == trade_id))
+
+    async def update_position(self, position_id: int, data: dict):
+        """非关键: 持仓现价/浮盈刷新, 丢一次下个周期会再写"""
+        if not self._running:
+            return await asyncio.to_thread(db_ops.update_position, position_id, data)
+        await self._submit(
+            _Op('update', positions, data, where=positions.c.id == position_id))
+
+    # ─── 指标 ──────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        s = dict(self._stats)
+        s['queue_depth'] = self._queue.qsize() if self._queue else 0
+        s['queue_max'] = self.max_queue
+        s['avg_batch'] = round(s['written'] / s['batches'], 2) if s['batches'] else 0
+        s['backpressure_wait_ms'] = round(s['backpressure_wait_ms'], 2)
+        return s
+
+
+async def aread(fn, *args, **kwargs):
+    """异步读: 在线程池里执行 db_ops 的查询函数, 例如
+    await aread(db_ops.get_open_positions)"""
+    return await asyncio.to_thread(fn, *args, **kwargs)
+
+
+# 全局单例
+db_writer = AsyncDBWriter()
@@ -3,13 +3,13 @@ AuditLog 模型 - 审计日志表
 """
 import json
 from sqlalchemy import (
-    Table, Column, BigInteger, String, DateTime, Enum, JSON, Index, func
+    Table, Column, String, DateTime, Enum, JSON, Index, func
 )
-from models.base import metadata
+from models.base import metadata, BigIntId
 
 audit_logs = Table(
     'audit_logs', metadata,
-    Column('id', BigInteger, primary_key=True, autoincrement=True),
+    Column('id', BigIntId, primary_key=True, autoincrement=True),
     Column('timestamp', DateTime, server_default=func.now()),
     Column('actor', String(50), nullable=False),
     Column('action', String(100), nullable=False),
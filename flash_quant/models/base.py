@@ -2,12 +2,15 @@
 Flash Quant - 数据库基础
 SQLAlchemy Core (不用 ORM 关系映射)
 """
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, MetaData, BigInteger, Integer
 from sqlalchemy.orm import sessionmaker, scoped_session
 from config.settings import settings
 
 metadata = MetaData()
 
+# 主键类型: MySQL 上是 BIGINT; SQLite 只有 INTEGER PRIMARY KEY 才自增 (回放/测试的内存库)
+BigIntId = BigInteger().with_variant(Integer, 'sqlite')
+
 _engine = None
 _session_factory = None
 
@@ -26,6 +29,13 @@ def get_engine():
     return _engine
 
 
+def set_engine(engine):
+    """替换全局 engine (回放/测试用内存库), 同时重置 session 工厂"""
+    global _engine, _session_factory
+    _engine = engine
+    _session_factory = None
+
+
 def get_session():
     global _session_factory
     if _session_factory is None:
@@ -44,6 +54,7 @@ def init_db():
     import models.daily_stat  # noqa
     import models.circuit_breaker  # noqa
     import models.audit_log  # noqa
+    import models.dashboard_summary  # noqa
 
     engine = get_engine()
     metadata.create_all(engine)
@@ -2,13 +2,13 @@
 CircuitBreaker 模型 - 断路器状态表
 """
 from sqlalchemy import (
-    Table, Column, BigInteger, String, DateTime, Enum, JSON, Index, func
+    Table, Column, String, DateTime, Enum, JSON, Index, func
 )
-from models.base import metadata
+from models.base import metadata, BigIntId
 
 circuit_breakers = Table(
     'circuit_breakers', metadata,
-    Column('id', BigInteger, primary_key=True, autoincrement=True),
+    Column('id', BigIntId, primary_key=True, autoincrement=True),
     Column('type', Enum(
         'consecutive_loss', 'daily_loss', 'weekly_loss',
         'monthly_loss', 'black_swan', 'manual'
@@ -2,13 +2,13 @@
 DailyStat 模型 - 日统计表
 """
 from sqlalchemy import (
-    Table, Column, BigInteger, Date, Float, Integer, DateTime, func
+    Table, Column, Date, Float, Integer, DateTime, func
 )
-from models.base import metadata
+from models.base import metadata, BigIntId
 
 daily_stats = Table(
     'daily_stats', metadata,
-    Column('id', BigInteger, primary_key=True, autoincrement=True),
+    Column('id', BigIntId, primary_key=True, autoincrement=True),
     Column('date', Date, nullable=False, unique=True),
     Column('starting_balance', Float, nullable=False),
     Column('ending_balance', Float, nullable=False),
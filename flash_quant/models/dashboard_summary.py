@@ -0,0 +1,14 @@
+"""
+DashboardSummary 模型 - 看板物化汇总 (每个页面一行)
+
+由 data/dashboard_summarizer.py 定期/开平仓后重算写入, Web 页面按主键读一行
+"""
+from sqlalchemy import Table, Column, String, DateTime, JSON
+from models.base import metadata
+
+dashboard_summaries = Table(
+    'dashboard_summaries', metadata,
+    Column('name', String(32), primary_key=True),
+    Column('payload', JSON, nullable=False),
+    Column('updated_at', DateTime, nullable=False),
+)
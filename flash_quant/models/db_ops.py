@@ -3,7 +3,8 @@ Flash Quant - 数据库操作函数
 所有 DB 读写都在这里
 """
 import json
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, time, timezone, timedelta
+from core import clock
 from sqlalchemy import select, insert, update, delete, func, desc, and_, text
 from models.base import get_engine
 from models.signal import signals
@@ -12,6 +13,7 @@ from models.position import positions
 from models.daily_stat import daily_stats
 from models.circuit_breaker import circuit_breakers
 from models.audit_log import audit_logs
+from models.dashboard_summary import dashboard_summaries
 from core.logger import get_logger
 
 logger = get_logger('db_ops')
@@ -44,12 +46,17 @@ def _query(stmt):
 # Signals
 # ============================================================
 
-def save_signal(data: dict) -> int:
-    """保存信号记录"""
-    data['timestamp'] = data.get('timestamp', datetime.now(MYT))
+def signal_values(data: dict) -> dict:
+    """信号 dict → signals 表列值 (补 timestamp, raw_data 转 JSON)"""
+    data['timestamp'] = data.get('timestamp', clock.now(MYT))
     if isinstance(data.get('raw_data'), dict):
         data['raw_data'] = json.dumps(data['raw_data'], default=str)
-    stmt = insert(signals).values(**{k: v for k, v in data.items() if k in signals.c})
+    return {k: v for k, v in data.items() if k in signals.c}
+
+
+def save_signal(data: dict) -> int:
+    """保存信号记录"""
+    stmt = insert(signals).values(**signal_values(data))
     result = _exec(stmt)
     return result.inserted_primary_key[0]
 
@@ -68,7 +75,7 @@ def query_signals(limit=100, decision=None, tier=None, symbol=None):
 
 def count_signals_today():
     """今日信号数"""
-    today = datetime.now(MYT).date()
+    today = clock.now(MYT).date()
     stmt = select(func.count()).select_from(signals).where(
         func.date(signals.c.timestamp) == today
     )
@@ -77,15 +84,31 @@ def count_signals_today():
         return conn.execute(stmt).scalar() or 0
 
 
+def count_signals_today_by_tier():
+    """今日信号数按 tier 分组 {'tier1': n, ...} (走 timestamp 索引的范围查询)"""
+    start = datetime.combine(clock.now(MYT).date(), time.min)
+    stmt = (select(signals.c.tier, func.count())
+            .where(and_(signals.c.timestamp >= start,
+                        signals.c.timestamp < start + timedelta(days=1)))
+            .group_by(signals.c.tier))
+    engine = get_engine()
+    with engine.connect() as conn:
+        return {tier: n for tier, n in conn.execute(stmt)}
+
+
 # ============================================================
 # Trades
 # ============================================================
 
-def insert_trade(data: dict) -> int:
-    """创建交易记录"""
+def trade_values(data: dict) -> dict:
     if isinstance(data.get('take_profit_data'), (dict, list)):
         data['take_profit_data'] = json.dumps(data['take_profit_data'], default=str)
-    stmt = insert(trades).values(**{k: v for k, v in data.items() if k in trades.c})
+    return {k: v for k, v in data.items() if k in trades.c}
+
+
+def insert_trade(data: dict) -> int:
+    """创建交易记录"""
+    stmt = insert(trades).values(**trade_values(data))
     result = _exec(stmt)
     return result.inserted_primary_key[0]
 
@@ -110,7 +133,7 @@ def query_trades(limit=100, mode=None, status=None, symbol=None):
 
 def get_closed_trades(days=30):
     """获取最近N天已平仓交易"""
-    cutoff = datetime.now(MYT) - timedelta(days=days)
+    cutoff = clock.now(MYT) - timedelta(days=days)
     stmt = (select(trades)
             .where(and_(trades.c.status == 'closed', trades.c.close_time >= cutoff))
             .order_by(desc(trades.c.close_time)))
@@ -143,7 +166,7 @@ def get_open_symbols():
 
 def get_consecutive_losses(window_hours=24):
     """计算窗口内连续亏损"""
-    cutoff = datetime.now(MYT) - timedelta(hours=window_hours)
+    cutoff = clock.now(MYT) - timedelta(hours=window_hours)
     rows = _query(
         select(trades.c.pnl)
         .where(and_(trades.c.status == 'closed', trades.c.close_time >= cutoff))
@@ -162,10 +185,14 @@ def get_consecutive_losses(window_hours=24):
 # Positions
 # ============================================================
 
-def insert_position(data: dict) -> int:
+def position_values(data: dict) -> dict:
     if isinstance(data.get('take_profit_levels'), (dict, list)):
         data['take_profit_levels'] = json.dumps(data['take_profit_levels'], default=str)
-    stmt = insert(positions).values(**{k: v for k, v in data.items() if k in positions.c})
+    return {k: v for k, v in data.items() if k in positions.c}
+
+
+def insert_position(data: dict) -> int:
+    stmt = insert(positions).values(**position_values(data))
     result = _exec(stmt)
     return result.inserted_primary_key[0]
 
@@ -206,7 +233,7 @@ def upsert_daily_stat(date, data: dict):
 
 
 def get_daily_stats(days=30):
-    cutoff = datetime.now(MYT).date() - timedelta(days=days)
+    cutoff = clock.now(MYT).date() - timedelta(days=days)
     return _query(
         select(daily_stats)
         .where(daily_stats.c.date >= cutoff)
@@ -218,14 +245,42 @@ def get_daily_stats(days=30):
 # Audit Log
 # ============================================================
 
+def audit_values(actor: str, action: str, target: str = None,
+                 details: dict = None, severity: str = 'info') -> dict:
+    return {
+        'actor': actor, 'action': action, 'target': target,
+        'details': json.dumps(details or {}, default=str, ensure_ascii=False),
+        'severity': severity,
+    }
+
+
 def write_audit(actor: str, action: str, target: str = None,
                 details: dict = None, severity: str = 'info'):
     """写审计日志"""
     _exec(insert(audit_logs).values(
-        actor=actor, action=action, target=target,
-        details=json.dumps(details or {}, default=str, ensure_ascii=False),
-        severity=severity,
-    ))
+        **audit_values(actor, action, target, details, severity)))
+
+
+# ============================================================
+# Dashboard 物化汇总
+# ============================================================
+
+def upsert_dashboard_summary(name: str, payload: dict, updated_at=None):
+    """写入/覆盖一个页面的汇总行"""
+    values = {'payload': payload, 'updated_at': updated_at or clock.now(MYT)}
+    engine = get_engine()
+    with engine.connect() as conn:
+        result = conn.execute(update(dashboard_summaries)
+                              .where(dashboard_summaries.c.name == name).values(**values))
+        if result.rowcount == 0:
+            conn.execute(insert(dashboard_summaries).values(name=name, **values))
+        conn.commit()
+
+
+def get_dashboard_summary(name: str):
+    """读取汇总行 {'name', 'payload', 'updated_at'}, 没有则 None"""
+    rows = _query(select(dashboard_summaries).where(dashboard_summaries.c.name == name))
+    return rows[0] if rows else None
 
 
 # ============================================================
@@ -5,11 +5,11 @@ from sqlalchemy import (
     Table, Column, BigInteger, String, Float, Integer, DateTime, Enum, JSON,
     Index, func
 )
-from models.base import metadata
+from models.base import metadata, BigIntId
 
 positions = Table(
     'positions', metadata,
-    Column('id', BigInteger, primary_key=True, autoincrement=True),
+    Column('id', BigIntId, primary_key=True, autoincrement=True),
     Column('trade_id', BigInteger, nullable=False),
     Column('symbol', String(20), nullable=False),
     Column('direction', Enum('long', 'short'), nullable=False),
@@ -2,14 +2,14 @@
 Signal 模型 - 信号记录表
 """
 from sqlalchemy import (
-    Table, Column, BigInteger, String, Float, Boolean, DateTime, Enum, JSON,
+    Table, Column, String, Float, Boolean, DateTime, Enum, JSON,
     Index, func
 )
-from models.base import metadata
+from models.base import metadata, BigIntId
 
 signals = Table(
     'signals', metadata,
-    Column('id', BigInteger, primary_key=True, autoincrement=True),
+    Column('id', BigIntId, primary_key=True, autoincrement=True),
     Column('timestamp', DateTime, nullable=False),
     Column('tier', Enum('tier1', 'tier2', 'tier3'), nullable=False),
     Column('symbol', String(20), nullable=False),
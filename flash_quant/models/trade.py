@@ -5,11 +5,11 @@ from sqlalchemy import (
     Table, Column, BigInteger, String, Float, Integer, DateTime, Enum, JSON,
     Index, func
 )
-from models.base import metadata
+from models.base import metadata, BigIntId
 
 trades = Table(
     'trades', metadata,
-    Column('id', BigInteger, primary_key=True, autoincrement=True),
+    Column('id', BigIntId, primary_key=True, autoincrement=True),
     Column('signal_id', BigInteger),
     Column('mode', Enum('paper', 'live'), nullable=False),
     Column('tier', Enum('tier1', 'tier2', 'tier3'), nullable=False),
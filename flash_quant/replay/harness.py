@@ -0,0 +1,174 @@
+"""
+事件回放回测 — 实盘代码原样跑在历史数据上
+
+- 时钟: core.clock 切到模拟时间, 每个事件前拨到事件时间; 没有 sleep
+- 数据: 事件走 BinanceWebSocket._dispatch → kline_cache / cvd_calculator /
+  indicator_hub / market_data / black_swan, 与实盘同一条路径
+- 扫描: 每个 5m 收盘时刻调用各扫描器的 scan_once() (实盘 run() 每 30s 调一次)
+- 执行: PaperExecutor 原样开平仓, 写内存 SQLite (models.base.set_engine)
+- 持仓: 有持仓时, 下一根 5m 收盘前按 开→高/低→低/高→收 路径逐点刷新价格
+  并调用 check_positions(), 止损/止盈/超时按 bar 内路径触发
+
+单例 (kline_cache / market_data / 风控) 是进程级的, 一个进程只跑一次回放。
+"""
+import time
+from sqlalchemy import create_engine, select
+from sqlalchemy.pool import StaticPool
+from core import clock
+from core.logger import get_logger
+from models.base import set_engine, init_db, get_engine
+from models.trade import trades
+from models.db_ops import count_open_trades, get_open_symbols
+from models.async_db import aread
+from replay.sources import BAR_MS
+
+logger = get_logger('replay')
+
+INITIAL_CAPITAL = 10000
+PROGRESS_EVERY = 20000    # 每处理 N 个时间点打一次进度
+
+
+def intrabar_path(o: float, h: float, l: float, c: float) -> list:
+    """bar 内价格路径: 阳线先探低再冲高, 阴线先冲高再探低"""
+    if c >= o:
+        return [o, l, h, c]
+    return [o, h, l, c]
+
+
+class ReplayHarness:
+
+    def __init__(self, symbols: list, scanners=None, executor=None):
+        self.symbols = [s.upper() for s in symbols]
+        self._scanners = scanners
+        self._executor = executor
+        self.ws = None
+        self.executor = None
+        self.scanners = []
+        self._open_symbols = set()
+        self._steps = 0
+        self._events = 0
+
+    def setup(self, db_url: str = 'sqlite://'):
+        """内存库 + 实盘组件 (在 setup 里 import, 避免没回放时也拉起全部单例)"""
+        set_engine(create_engine(db_url, poolclass=StaticPool,
+                                 connect_args={'check_same_thread': False}))
+        init_db()
+
+        from ws.binance_ws import BinanceWebSocket
+        from executor.paper_executor import PaperExecutor
+        from scanner.liquidation_hunter import LiquidationHunter
+
+        self.ws = BinanceWebSocket(self.symbols)
+        self.executor = self._executor or PaperExecutor()
+        self.scanners = self._scanners or [LiquidationHunter(self.symbols, executor=self.executor)]
+
+    async def run(self, events) -> dict:
+        """events: 按时间排序的 (event_ms, stream, data), 见 replay/sources.py"""
+        if self.ws is None:
+            self.setup()
+        t0 = time.time()
+        batch = []
+        try:
+            for ev in events:
+                if batch and ev[0] != batch[0][0]:
+                    await self._step(batch)
+                    batch = []
+                batch.append(ev)
+            if batch:
+                await self._step(batch)
+        finally:
+            clock.use_wall_clock()
+        elapsed = time.time() - t0
+        report = self.report()
+        report.update({
+            'events': self._events,
+            'steps': self._steps,
+            'elapsed_s': round(elapsed, 2),
+            'events_per_s': round(self._events / elapsed) if elapsed > 0 else 0,
+        })
+        return report
+
+    async def _step(self, batch: list):
+        """同一时间点的所有事件"""
+        ts = batch[0][0]
+        closes_5m = [data['k'] for stream, data in batch if stream.endswith('@kline_5m')]
+
+        # 1. 有持仓: 先按 bar 内路径检查止损/止盈/超时
+        if closes_5m and self._open_symbols:
+            await self._walk_intrabar(closes_5m)
+
+        # 2. 收盘事件走实盘 WS 处理路径
+        clock.set_sim_time(ts)
+        for _, stream, data in batch:
+            self.ws._dispatch(stream, data)
+        self._events += len(batch)
+
+        # 3. 5m 收盘 → 扫描 + 开仓
+        if closes_5m:
+            for scanner in self.scanners:
+                await scanner.scan_once()
+            await self._sync_positions()
+
+        self._steps += 1
+        if self._steps % PROGRESS_EVERY == 0:
+            logger.info("replay.progress", ts=ts, steps=self._steps,
+                        events=self._events, open=len(self._open_symbols))
+
+    async def _walk_intrabar(self, klines: list):
+        from data.market_data import market_data
+
+        held = [k for k in klines if k['s'] in self._open_symbols]
+        if not held:
+            return
+        start = held[0]['t']
+        paths = [(k['s'], intrabar_path(k['o'], k['h'], k['l'], k['c'])) for k in held]
+        for i in range(4):
+            clock.set_sim_time(start + i * BAR_MS['5m'] // 4)
+            for sym, path in paths:
+                market_data.update_price(sym, path[i])
+            await self.executor.check_positions()
+        await self._sync_positions()
+
+    async def _sync_positions(self):
+        from risk.risk_manager import risk_manager
+
+        self._open_symbols = await aread(get_open_symbols)
+        risk_manager.update_positions(await aread(count_open_trades),
+                                      set(self._open_symbols))
+
+    def report(self) -> dict:
+        with get_engine().connect() as conn:
+            rows = conn.execute(
+                select(trades).where(trades.c.status == 'closed')
+                .order_by(trades.c.close_time, trades.c.id)
+            ).mappings().all()
+        return summarize(rows)
+
+
+def summarize(rows) -> dict:
+    """已平仓交易 → 汇总 (笔数/胜率/PnL/最大回撤/平仓原因)"""
+    equity = peak = INITIAL_CAPITAL
+    max_dd = 0.0
+    wins = 0
+    total = 0.0
+    reasons = {}
+    for r in rows:
+        pnl = r['pnl'] or 0
+        total += pnl
+        wins += pnl > 0
+        equity += pnl
+        peak = max(peak, equity)
+        max_dd = max(max_dd, (peak - equity) / peak)
+        reason = r['close_reason'] or 'unknown'
+        if reason.startswith('take_profit'):
+            reason = 'take_profit'
+        reasons[reason] = reasons.get(reason, 0) + 1
+    n = len(rows)
+    return {
+        'trades': n,
+        'win_rate': round(wins / n, 4) if n else 0,
+        'pnl': round(total, 2),
+        'return_pct': round(total / INITIAL_CAPITAL * 100, 2),
+        'max_drawdown_pct': round(max_dd * 100, 2),
+        'close_reasons': reasons,
+    }
@@ -0,0 +1,167 @@
+"""
+回放事件源
+
+事件统一为 (event_ms, stream, data), data 与 Binance 组合流 `data` 字段同格式,
+这样回放直接走 BinanceWebSocket._dispatch, 与实盘同一条处理路径。
+
+- 本地 K线缓存: <cache_dir>/<SYMBOL>_5m.json, ccxt fetch_ohlcv 格式 [[t,o,h,l,c,v], ...]
+  缺失/不够时用 ccxt 增量补拉一次, 之后离线回放
+- 15m / 1h 由 5m 聚合 (整点对齐, 不完整的桶丢弃)
+- 录制的 WS 消息: JSONL, 每行一条原始组合流消息 {"stream": ..., "data": ...}
+- merge_events: 多路按事件时间归并 (heapq, 同时间保持输入顺序)
+"""
+import heapq
+import json
+import os
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - 取决于部署环境
+    _loads = json.loads
+
+BAR_MS = {'5m': 300_000, '15m': 900_000, '1h': 3_600_000}
+FETCH_LIMIT = 1500
+
+
+# ─── 本地 K线缓存 ──────────────────────────────────────────
+
+def cache_path(cache_dir: str, symbol: str) -> str:
+    return os.path.join(cache_dir, f"{symbol.upper()}_5m.json")
+
+
+def load_cached_klines(cache_dir: str, symbol: str) -> list:
+    path = cache_path(cache_dir, symbol)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        return _loads(f.read())
+
+
+def fetch_klines(symbol: str, start_ms: int, end_ms: int, cache_dir: str,
+                 exchange=None) -> list:
+    """
+    返回 [start_ms, end_ms) 内的已收盘 5m K线.
+    本地缓存覆盖不到的部分用 ccxt 补拉并写回缓存 (只拉缺的头/尾)
+    """
+    rows = load_cached_klines(cache_dir, symbol)
+    step = BAR_MS['5m']
+    ranges = []
+    if not rows:
+        ranges.append((start_ms, end_ms))
+    else:
+        if start_ms < rows[0][0]:
+            ranges.append((start_ms, rows[0][0]))
+        if rows[-1][0] + step < end_ms:
+            ranges.append((rows[-1][0] + step, end_ms))
+
+    if ranges:
+        if exchange is None:
+            import ccxt
+            exchange = ccxt.binance({'options': {'defaultType': 'future'}})
+        pair = symbol.upper().replace('USDT', '/USDT')
+        fetched = []
+        for lo, hi in ranges:
+            since = lo
+            while since < hi:
+                batch = exchange.fetch_ohlcv(pair, '5m', since=since, limit=FETCH_LIMIT)
+                batch = [r for r in batch if r[0] < hi]
+                if not batch:
+                    break
+                fetched.extend(batch)
+                since = batch[-1][0] + step
+        if fetched:
+            merged = {r[0]: r[:6] for r in rows}
+            merged.update({r[0]: r[:6] for r in fetched})
+            rows = [merged[t] for t in sorted(merged)]
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path(cache_dir, symbol), 'w') as f:
+                json.dump(rows, f)
+
+    return [r for r in rows if start_ms <= r[0] < end_ms]
+
+
+def resample(rows: list, interval: str) -> list:
+    """5m → 15m / 1h, 按整点对齐; 缺 bar 的桶丢弃 (不造假 K线)"""
+    size = BAR_MS[interval]
+    need = size // BAR_MS['5m']
+    out = []
+    bucket = []
+    for r in rows:
+        if bucket and r[0] // size != bucket[0][0] // size:
+            if len(bucket) == need:
+                out.append(_merge_bars(bucket, size))
+            bucket = []
+        bucket.append(r)
+    if len(bucket) == need:
+        out.append(_merge_bars(bucket, size))
+    return out
+
+
+def _merge_bars(bucket: list, size: int) -> list:
+    t = bucket[0][0] // size * size
+    return [t, bucket[0][1], max(r[2] for r in bucket), min(r[3] for r in bucket),
+            bucket[-1][4], sum(r[5] for r in bucket)]
+
+
+# ─── 事件流 ────────────────────────────────────────────────
+
+def kline_events(symbol: str, rows: list, interval: str = '5m'):
+    """收盘 K线 → (close_ms, stream, data), data 同 Binance kline 推送"""
+    sym = symbol.upper()
+    stream = f"{sym.lower()}@kline_{interval}"
+    span = BAR_MS[interval]
+    for t, o, h, l, c, v in (r[:6] for r in rows):
+        close_ms = t + span - 1
+        yield close_ms, stream, {
+            'e': 'kline', 'E': close_ms, 's': sym,
+            'k': {'t': t, 'T': close_ms, 's': sym, 'i': interval,
+                  'o': o, 'h': h, 'l': l, 'c': c, 'v': v, 'x': True},
+        }
+
+
+def symbol_events(symbol: str, rows_5m: list, intervals=('5m', '15m', '1h')) -> list:
+    """单币全部周期的 K线事件 (已按时间排序)"""
+    streams = []
+    for interval in intervals:
+        rows = rows_5m if interval == '5m' else resample(rows_5m, interval)
+        streams.append(kline_events(symbol, rows, interval))
+    return list(merge_events(*streams))
+
+
+def recorded_events(path: str):
+    """录制的 WS 消息 (JSONL) → (event_ms, stream, data)"""
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            msg = _loads(line)
+            stream = msg.get('stream')
+            if not stream:
+                continue
+            data = msg.get('data') or {}
+            ts = data.get('E') or data.get('T') or (data.get('k') or {}).get('T')
+            if ts is None:
+                continue
+            yield ts, stream, data
+
+
+def merge_events(*sources):
+    """多路事件按时间归并; 同一时间先到先出 (源内顺序 + 源顺序稳定)"""
+    return heapq.merge(*sources, key=lambda ev: ev[0])
+
+
+class JsonlRecorder:
+    """ShardedStreamClient 的 on_message 回调: 原样落盘, 供 recorded_events 回放"""
+
+    def __init__(self, path: str):
+        self._f = open(path, 'a')
+        self.count = 0
+
+    def __call__(self, stream: str, data: dict):
+        self._f.write(json.dumps({'stream': stream, 'data': data}, separators=(',', ':')))
+        self._f.write('\n')
+        self.count += 1
+
+    def close(self):
+        self._f.close()
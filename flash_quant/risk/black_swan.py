@@ -2,7 +2,8 @@
 黑天鹅熔断器 - FR-033
 监控 Tier A 币种 5min 异常波动
 """
-from datetime import datetime, timezone, timedelta
+from datetime import timezone, timedelta
+from core import clock
 from core.constants import BLACK_SWAN_VOLATILITY_THRESHOLD, BLACK_SWAN_PAUSE_MINUTES
 from core.logger import get_logger
 
@@ -47,7 +48,7 @@ class BlackSwanMonitor:
         if not self._active:
             return False
 
-        now = datetime.now(timezone.utc)
+        now = clock.now(timezone.utc)
         if self._expires_at and now >= self._expires_at:
             self._active = False
             self._trigger_event = None
@@ -73,7 +74,7 @@ class BlackSwanMonitor:
 
     def _trigger(self, symbol: str, volatility: float):
         """触发熔断"""
-        now = datetime.now(timezone.utc)
+        now = clock.now(timezone.utc)
         self._active = True
         self._expires_at = now + timedelta(minutes=BLACK_SWAN_PAUSE_MINUTES)
         self._trigger_event = {
@@ -3,6 +3,7 @@
 管理连亏/时段/同币冷却断路器
 """
 from datetime import datetime, timezone, timedelta
+from core import clock
 from core.constants import (
     CIRCUIT_CONSECUTIVE_PAUSE, CIRCUIT_CONSECUTIVE_PAUSE_HOURS,
     CIRCUIT_CONSECUTIVE_FULL_PAUSE, CIRCUIT_CONSECUTIVE_FULL_PAUSE_HOURS,
@@ -31,7 +32,7 @@ class CircuitBreakerEngine:
     def record_trade(self, pnl: float, symbol: str, close_time: datetime = None):
         """记录一笔交易结果"""
         if close_time is None:
-            close_time = datetime.now(timezone.utc)
+            close_time = clock.now(timezone.utc)
         self._recent_trades.append({
             'pnl': pnl,
             'symbol': symbol,
@@ -53,7 +54,7 @@ class CircuitBreakerEngine:
         Returns:
             (active: bool, reason: str)
         """
-        now = datetime.now(timezone.utc)
+        now = clock.now(timezone.utc)
 
         # 清理过期的
         expired = [k for k, v in self._breakers.items()
@@ -82,7 +83,7 @@ class CircuitBreakerEngine:
             return False, 0
 
         last_close = self._symbol_cooldowns[symbol]
-        now = datetime.now(timezone.utc)
+        now = clock.now(timezone.utc)
         if last_close.tzinfo is None:
             last_close = last_close.replace(tzinfo=timezone.utc)
 
@@ -97,7 +98,7 @@ class CircuitBreakerEngine:
 
     def activate(self, btype: str, duration_hours: float, reason: str):
         """手动激活断路器"""
-        now = datetime.now(timezone.utc)
+        now = clock.now(timezone.utc)
         self._breakers[btype] = {
             'active': True,
             'expires_at': now + timedelta(hours=duration_hours),
@@ -119,7 +120,7 @@ class CircuitBreakerEngine:
 
     def get_consecutive_losses(self, window_hours: int = 24) -> int:
         """计算窗口内连续亏损笔数"""
-        now = datetime.now(timezone.utc)
+        now = clock.now(timezone.utc)
         cutoff = now - timedelta(hours=window_hours)
 
         recent = [t for t in self._recent_trades
@@ -140,7 +141,7 @@ class CircuitBreakerEngine:
 
     def get_period_pnl(self, hours: int) -> float:
         """计算指定时间段内的总 PnL"""
-        now = datetime.now(timezone.utc)
+        now = clock.now(timezone.utc)
         cutoff = now - timedelta(hours=hours)
         return sum(t['pnl'] for t in self._recent_trades
                    if t['close_time'] >= cutoff)
@@ -174,7 +175,7 @@ class CircuitBreakerEngine:
         # 单日
         if daily_pnl / balance <= -CIRCUIT_DAILY_LOSS_PCT:
             # 暂停到当日 UTC 23:59
-            now = datetime.now(timezone.utc)
+            now = clock.now(timezone.utc)
             remaining = (24 - now.hour) + (60 - now.minute) / 60
             self.activate('daily_loss', remaining,
                          f"daily_loss_{daily_pnl:.1f}U_{daily_pnl/balance:.1%}")
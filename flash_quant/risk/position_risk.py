@@ -1,7 +1,8 @@
 """
 单笔风控 + 仓位计算 - FR-030, BR-005, BR-008
 """
-from datetime import datetime, timezone
+from datetime import timezone
+from core import clock
 from core.constants import (
     MAX_MARGIN_PER_TRADE, MAX_CONCURRENT_POSITIONS,
     WEEKEND_POSITION_MULTIPLIER, CIRCUIT_CONSECUTIVE_HALF,
@@ -26,7 +27,7 @@ def calculate_position_size(base_margin: float = MAX_MARGIN_PER_TRADE,
 
     # BR-008: 周末减仓
     if is_weekend is None:
-        is_weekend = datetime.now(timezone.utc).weekday() in (5, 6)
+        is_weekend = clock.now(timezone.utc).weekday() in (5, 6)
     if is_weekend:
         margin *= WEEKEND_POSITION_MULTIPLIER
 
@@ -12,12 +12,13 @@
 """
 import asyncio
 import time
-from datetime import datetime, timezone, timedelta
+from datetime import timezone, timedelta
+from core import clock
 from scanner.base import ScannerBase
 from data.kline_cache import kline_cache
 from filters.blacklist_filter import is_tradable
 from data.market_data import market_data
-from models.db_ops import save_signal
+from models.async_db import db_writer
 from core.logger import get_logger
 
 logger = get_logger('liquidation_hunter')
@@ -58,47 +59,53 @@ class LiquidationHunter(ScannerBase):
                     leverage=LEVERAGE)
         while True:
             try:
-                signals = await self.scan()
-                self._scan_count += 1
-
-                for sig in signals:
-                    sym = sig['symbol']
-                    kline_ts = sig.get('kline_timestamp', 0)
-                    if self._last_trigger_ts.get(sym) == kline_ts:
-                        continue
-                    self._last_trigger_ts[sym] = kline_ts
-
-                    # 保存信号
-                    try:
-                        sig_id = save_signal(sig)
-                    except Exception as e:
-                        logger.error("liq_hunter.save_error", error=str(e))
-                        sig_id = None
-
-                    # 触发开仓 (做多 = 反弹交易)
-                    if sig['final_decision'] == 'executed' and self.executor:
-                        from risk.risk_manager import risk_manager
-                        result = risk_manager.check(sig)
-                        if result.approved:
-                            await self.executor.open_position(
-                                symbol=sym,
-                                direction='long',
-                                tier='liquidation',
-                                margin=result.position_size,
-                                leverage=LEVERAGE,
-                                stop_loss_roi=STOP_LOSS_ROI,
-                                signal_id=sig_id,
-                            )
-                            logger.info("liq_hunter.trade_opened",
-                                       symbol=sym,
-                                       drop_pct=sig['price_change_pct'],
-                                       vol_ratio=sig['volume_ratio'])
-
+                await self.scan_once()
             except Exception as e:
                 logger.error("liq_hunter.scan_error", error=str(e))
 
             await asyncio.sleep(SCAN_INTERVAL)
 
+    async def scan_once(self) -> list:
+        """扫描一轮并处理信号 (存库 + 开仓). 实盘由 run() 定时调用, 回放在 5m 收盘时调用"""
+        signals = await self.scan()
+        self._scan_count += 1
+
+        for sig in signals:
+            sym = sig['symbol']
+            kline_ts = sig.get('kline_timestamp', 0)
+            if self._last_trigger_ts.get(sym) == kline_ts:
+                continue
+            self._last_trigger_ts[sym] = kline_ts
+
+            # 保存信号: 要开仓的等落库拿 id (trade.signal_id), 其余入队即返回
+            will_trade = sig['final_decision'] == 'executed' and self.executor
+            try:
+                sig_id = await db_writer.save_signal(sig, wait=bool(will_trade))
+            except Exception as e:
+                logger.error("liq_hunter.save_error", error=str(e))
+                sig_id = None
+
+            # 触发开仓 (做多 = 反弹交易)
+            if sig['final_decision'] == 'executed' and self.executor:
+                from risk.risk_manager import risk_manager
+                result = risk_manager.check(sig)
+                if result.approved:
+                    await self.executor.open_position(
+                        symbol=sym,
+                        direction='long',
+                        tier='liquidation',
+                        margin=result.position_size,
+                        leverage=LEVERAGE,
+                        stop_loss_roi=STOP_LOSS_ROI,
+                        signal_id=sig_id,
+                    )
+                    logger.info("liq_hunter.trade_opened",
+                               symbol=sym,
+                               drop_pct=sig['price_change_pct'],
+                               vol_ratio=sig['volume_ratio'])
+
+        return signals
+
     async def scan(self) -> list:
         signals = []
         t0 = time.time()
@@ -159,7 +166,7 @@ class LiquidationHunter(ScannerBase):
             'body_ratio': 0,
             'cvd_aligned': True,
             'funding_passed': True,
-            'timestamp': datetime.now(timezone.utc),
+            'timestamp': clock.now(timezone.utc),
             'kline_timestamp': latest.timestamp,
             'final_decision': 'executed',
             'filter_reason': None,
@@ -4,7 +4,8 @@ Tier 1 极速爆破扫描器 - FR-001
 """
 import asyncio
 import time
-from datetime import datetime, timezone
+from datetime import timezone
+from core import clock
 from scanner.base import ScannerBase
 from data.kline_cache import kline_cache
 from data.cvd_calculator import cvd_calculator
@@ -38,7 +39,7 @@ class Tier1Scalper(ScannerBase):
 
     def _is_trading_hours(self) -> bool:
         """BR-007: Tier 1 仅在 UTC 8-22"""
-        hour = datetime.now(timezone.utc).hour
+        hour = clock.now(timezone.utc).hour
         start, end = TIER1_TRADING_HOURS_UTC
         return start <= hour < end
 
@@ -217,7 +218,7 @@ class Tier1Scalper(ScannerBase):
             'body_ratio': round(body_ratio, 4),
             'cvd_aligned': cvd_passed,
             'funding_passed': funding_passed,
-            'timestamp': datetime.now(timezone.utc),
+            'timestamp': clock.now(timezone.utc),
             'kline_timestamp': latest.timestamp,  # 用于去重
         }
 
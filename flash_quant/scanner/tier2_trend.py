@@ -7,7 +7,8 @@ Tier 2 次级爆发扫描器 (检讨后改版)
 """
 import asyncio
 import time
-from datetime import datetime, timezone, timedelta
+from datetime import timezone, timedelta
+from core import clock
 from scanner.base import ScannerBase
 from data.kline_cache import kline_cache
 from data.market_data import market_data
@@ -162,7 +163,7 @@ class Tier2TrendScanner(ScannerBase):
             'body_ratio': round(body_ratio, 4),
             'cvd_aligned': True,
             'funding_passed': funding_passed,
-            'timestamp': datetime.now(MYT),
+            'timestamp': clock.now(MYT),
             'kline_timestamp': latest.timestamp,
         }
 
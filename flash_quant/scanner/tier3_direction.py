@@ -5,11 +5,12 @@ Tier 3 1H 方向扫描器 - FR-003
 """
 import asyncio
 import time
-from datetime import datetime, timezone, timedelta
+from datetime import timezone, timedelta
+from core import clock
 from scanner.base import ScannerBase
 from data.kline_cache import kline_cache
 from data.market_data import market_data
-from data.indicators import rsi, macd, adx, bollinger_bands, ema, sma, volume_ratio
+from data.stream_indicators import indicator_hub
 from filters.wick_filter import wick_filter
 from filters.funding_filter import funding_filter
 from filters.blacklist_filter import is_tradable
@@ -43,7 +44,7 @@ class Tier3DirectionScanner(ScannerBase):
         while True:
             try:
                 # 等待整点 (1H K线收盘)
-                now = datetime.now(MYT)
+                now = clock.now(MYT)
                 # 在每小时的第 0-1 分钟扫描
                 if now.minute <= 1:
                     scan_signals = await self.scan()
@@ -95,6 +96,24 @@ class Tier3DirectionScanner(ScannerBase):
                        scanned=len(self.symbols), signals=len(signals))
         return signals
 
+    def _indicators(self, symbol: str, klines: list) -> dict:
+        """
+        评分用指标: 优先读流式指标 (收盘时已增量更新, O(1)),
+        流式状态未覆盖到最后一根已收盘 K线或历史不足时回退批量计算
+        """
+        snap = indicator_hub.snapshot_for(symbol, '1h', klines)
+        return {
+            'rsi': snap['rsi'],
+            'ema20': snap['ema'][20],
+            'volume_ratio': snap['volume_ratio'] or 0,
+            'high_20': snap['high_20'],
+            'low_20': snap['low_20'],
+            'macd_hist': snap['macd_hist'],
+            'macd_prev_hist': snap['macd_prev_hist'],
+            'adx': snap['adx'],
+            'bb': snap['bb'],
+        }
+
     def _scan_one(self, symbol: str) -> dict:
         # 黑名单
         vol_24h = market_data.get_volume_24h(symbol)
@@ -102,25 +121,24 @@ class Tier3DirectionScanner(ScannerBase):
         if not tradable:
             return None
 
-        # 1H K线 (需要至少 50 根)
-        klines = kline_cache.get(symbol, '1h', n=50)
+        # 1H K线 (需要至少 50 根); 整点扫描时最后一根通常是刚开盘的, 只用已收盘的
+        klines = kline_cache.get(symbol, '1h', n=51)
+        if klines and not klines[-1].is_closed:
+            klines = klines[:-1]
+        klines = klines[-50:]
         if len(klines) < 30:
             return None
 
-        closes = [k.close for k in klines]
-        highs = [k.high for k in klines]
-        lows = [k.low for k in klines]
-        volumes = [k.volume for k in klines]
         latest = klines[-1]
+        ind = self._indicators(symbol, klines)
 
         # === 评分系统 ===
         score = 0
         direction_votes = {'long': 0, 'short': 0}
 
         # 1. RSI 评分 (0-25)
-        rsi_vals = rsi(closes, 14)
-        if rsi_vals:
-            r = rsi_vals[-1]
+        r = ind['rsi']
+        if r is not None:
             if r > 55:
                 s = min(25, (r - 50) * 0.5)
                 score += s
@@ -131,10 +149,9 @@ class Tier3DirectionScanner(ScannerBase):
                 direction_votes['short'] += 1
 
         # 2. MA 评分 (0-25) — 价格 vs EMA20
-        ema20 = ema(closes, 20)
-        if ema20:
-            price = closes[-1]
-            ma = ema20[-1]
+        ma = ind['ema20']
+        if ma is not None:
+            price = latest.close
             diff_pct = (price - ma) / ma * 100
             if diff_pct > 0:
                 s = min(25, diff_pct * 5)
@@ -146,18 +163,18 @@ class Tier3DirectionScanner(ScannerBase):
                 direction_votes['short'] += 1
 
         # 3. Volume 评分 (0-25)
-        vr = volume_ratio(volumes, 20)
+        vr = ind['volume_ratio']
         if vr > 1:
             s = min(25, (vr - 1) * 10)
             score += s
 
         # 4. Position 评分 (0-25) — 价格在近期范围的位置
-        if len(closes) >= 20:
-            high_20 = max(closes[-20:])
-            low_20 = min(closes[-20:])
+        if ind['high_20'] is not None:
+            high_20 = ind['high_20']
+            low_20 = ind['low_20']
             range_20 = high_20 - low_20
             if range_20 > 0:
-                pos = (closes[-1] - low_20) / range_20  # 0=底部, 1=顶部
+                pos = (latest.close - low_20) / range_20  # 0=底部, 1=顶部
                 if pos > 0.6:
                     s = min(25, (pos - 0.5) * 50)
                     score += s
@@ -168,27 +185,27 @@ class Tier3DirectionScanner(ScannerBase):
                     direction_votes['short'] += 1
 
         # 5. MACD 加分 (0-10)
-        _, _, hist = macd(closes)
-        if len(hist) >= 2:
-            if hist[-1] > 0 and hist[-1] > hist[-2]:
-                score += min(10, abs(hist[-1]) * 1000)
+        hist, prev_hist = ind['macd_hist'], ind['macd_prev_hist']
+        if hist is not None and prev_hist is not None:
+            if hist > 0 and hist > prev_hist:
+                score += min(10, abs(hist) * 1000)
                 direction_votes['long'] += 1
-            elif hist[-1] < 0 and hist[-1] < hist[-2]:
-                score += min(10, abs(hist[-1]) * 1000)
+            elif hist < 0 and hist < prev_hist:
+                score += min(10, abs(hist) * 1000)
                 direction_votes['short'] += 1
 
         # 6. ADX 加分 (0-10) — 趋势强度
-        adx_vals = adx(highs, lows, closes, 14)
-        if adx_vals and adx_vals[-1] > 20:
-            score += min(10, (adx_vals[-1] - 20) * 0.5)
+        adx_val = ind['adx']
+        if adx_val is not None and adx_val > 20:
+            score += min(10, (adx_val - 20) * 0.5)
 
         # 7. BB 加分 (0-5) — 布林带突破
-        upper, middle, lower = bollinger_bands(closes, 20)
-        if upper and lower:
-            if closes[-1] > upper[-1]:
+        if ind['bb'] is not None:
+            upper, _, lower = ind['bb']
+            if latest.close > upper:
                 score += 5
                 direction_votes['long'] += 1
-            elif closes[-1] < lower[-1]:
+            elif latest.close < lower:
                 score += 5
                 direction_votes['short'] += 1
 
@@ -224,7 +241,7 @@ class Tier3DirectionScanner(ScannerBase):
             'body_ratio': round(body_ratio, 4),
             'cvd_aligned': True,
             'funding_passed': funding_passed,
-            'timestamp': datetime.now(MYT),
+            'timestamp': clock.now(MYT),
             'kline_timestamp': latest.timestamp,
         }
 
@@ -0,0 +1,153 @@
+"""
+异步持久化层测试 — 批量写入 / 关键写落库后确认 / 背压 / 未启动退化
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.pool import StaticPool
+
+from models.base import metadata
+from models.async_db import AsyncDBWriter
+from models.signal import signals
+from models.trade import trades
+from models.position import positions
+from models.audit_log import audit_logs
+
+
+class _CountingEngine:
+    """包一层 engine, 统计事务 (begin) 次数"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.transactions = 0
+
+    def begin(self):
+        self.transactions += 1
+        return self.engine.begin()
+
+
+@pytest.fixture
+def engine():
+    eng = create_engine('sqlite://', poolclass=StaticPool,
+                        connect_args={'check_same_thread': False})
+    metadata.create_all(eng)
+    return _CountingEngine(eng)
+
+
+def _signal(i, decision='filtered'):
+    return {'tier': 'tier1', 'symbol': f'S{i}USDT', 'direction': 'long',
+            'price': 1.0 + i, 'final_decision': decision,
+            'timestamp': datetime(2026, 1, 1)}
+
+
+def _trade():
+    return {'mode': 'paper', 'tier': 'tier1', 'symbol': 'BTCUSDT',
+            'direction': 'long', 'leverage': 10, 'margin': 300,
+            'entry_price': 100.0, 'quantity': 30.0, 'status': 'open',
+            'open_time': datetime(2026, 1, 1)}
+
+
+def _count(engine, table):
+    with engine.engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+
+async def _with_writer(writer, coro_fn):
+    task = asyncio.create_task(writer.run())
+    await asyncio.sleep(0)
+    try:
+        return await coro_fn()
+    finally:
+        await writer.stop()
+        await task
+
+
+class TestAsyncDBWriter:
+
+    def test_non_critical_writes_are_batched(self, engine):
+        writer = AsyncDBWriter(engine_factory=lambda: engine, flush_interval=0.05)
+
+        async def body():
+            for i in range(50):
+                assert await writer.save_signal(_signal(i)) is None
+                await writer.write_audit('system', 'test', f'S{i}', {'i': i})
+
+        asyncio.run(_with_writer(writer, body))
+        assert _count(engine, signals) == 50
+        assert _count(engine, audit_logs) == 50
+        stats = writer.stats()
+        assert stats['written'] == 100
+        assert stats['batches'] < 10
+        assert engine.transactions == stats['batches']
+
+    def test_critical_write_is_durable_before_return(self, engine):
+        writer = AsyncDBWriter(engine_factory=lambda: engine, flush_interval=5)
+
+        async def body():
+            sig_id = await writer.save_signal(_signal(1, 'executed'), wait=True)
+            trade_id = await writer.insert_trade(dict(_trade(), signal_id=sig_id))
+            # 返回时已经 commit, 不用等 flush_interval
+            assert _count(engine, trades) == 1
+            await writer.update_trade(trade_id, {'status': 'closed', 'pnl': 12.5})
+            with engine.engine.connect() as conn:
+                row = conn.execute(select(trades).where(trades.c.id == trade_id)).mappings().one()
+            assert row['status'] == 'closed' and row['signal_id'] == sig_id
+            return trade_id
+
+        trade_id = asyncio.run(_with_writer(writer, body))
+        assert trade_id == 1
+        assert writer.stats()['critical_writes'] == 3
+
+    def test_order_preserved_across_critical_and_batched(self, engine):
+        writer = AsyncDBWriter(engine_factory=lambda: engine, flush_interval=5)
+
+        async def body():
+            trade_id = await writer.insert_trade(_trade())
+            await writer.insert_position({
+                'trade_id': trade_id, 'symbol': 'BTCUSDT', 'direction': 'long',
+                'leverage': 10, 'margin': 300, 'entry_price': 100.0,
+                'quantity': 30.0, 'stop_loss_price': 99.0,
+                'open_time': datetime(2026, 1, 1),
+                'max_hold_until': datetime(2026, 1, 2)})
+            await writer.update_position(1, {'current_price': 101.0})
+            await writer.delete_position_by_trade(trade_id)
+
+        asyncio.run(_with_writer(writer, body))
+        assert _count(engine, positions) == 0
+
+    def test_bad_row_fails_alone(self, engine):
+        writer = AsyncDBWriter(engine_factory=lambda: engine, flush_interval=0.05)
+
+        async def body():
+            await writer.save_signal(_signal(1))
+            with pytest.raises(Exception):
+                await writer.insert_trade({'symbol': 'BTCUSDT'})  # 缺必填列
+            await writer.save_signal(_signal(2))
+
+        asyncio.run(_with_writer(writer, body))
+        assert _count(engine, signals) == 2
+        assert writer.stats()['errors'] == 1
+
+    def test_backpressure_when_queue_full(self, engine):
+        writer = AsyncDBWriter(engine_factory=lambda: engine, max_queue=5,
+                               max_batch=5, flush_interval=0.01)
+
+        async def body():
+            for i in range(40):
+                await writer.save_signal(_signal(i))
+
+        asyncio.run(_with_writer(writer, body))
+        stats = writer.stats()
+        assert _count(engine, signals) == 40
+        assert stats['backpressure_waits'] > 0
+        assert stats['max_queue_depth'] <= 5
+
+    def test_not_running_falls_back_to_sync(self, engine, monkeypatch):
+        from models import db_ops
+        monkeypatch.setattr(db_ops, 'get_engine', lambda: engine.engine)
+        writer = AsyncDBWriter(engine_factory=lambda: engine)
+        sig_id = asyncio.run(writer.save_signal(_signal(1)))
+        assert sig_id == 1
+        assert writer.stats()['enqueued'] == 0
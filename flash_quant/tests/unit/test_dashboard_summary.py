@@ -0,0 +1,127 @@
+"""
+看板物化汇总测试 — 首页数据 / 汇总读写与过期 / 开平仓事件触发刷新 / 回测结果文件缓存
+"""
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.pool import StaticPool
+
+import models.base as base
+from core import events
+from data import dashboard_summarizer as ds
+from models.base import metadata, set_engine
+from models.daily_stat import daily_stats
+from models.db_ops import upsert_dashboard_summary, get_dashboard_summary
+from models.position import positions
+from models.signal import signals
+from web import backtest_results
+
+MYT = timezone(timedelta(hours=8))
+
+
+@pytest.fixture
+def db():
+    old = base._engine
+    eng = create_engine('sqlite://', poolclass=StaticPool,
+                        connect_args={'check_same_thread': False})
+    metadata.create_all(eng)
+    set_engine(eng)
+    yield eng
+    set_engine(old)
+
+
+def _signal(tier, ts):
+    return {'timestamp': ts, 'tier': tier, 'symbol': 'BTCUSDT', 'direction': 'long',
+            'price': 100.0, 'final_decision': 'filtered', 'raw_data': {'x': 1}}
+
+
+def _seed(eng):
+    now = datetime.now(MYT).replace(tzinfo=None)
+    with eng.begin() as conn:
+        conn.execute(insert(signals), [
+            _signal('tier1', now), _signal('tier1', now), _signal('tier2', now),
+            _signal('tier3', now - timedelta(days=1)),
+        ])
+        conn.execute(insert(positions).values(
+            trade_id=1, symbol='BTCUSDT', direction='long', leverage=10, margin=300,
+            entry_price=100.0, quantity=30.0, current_price=101.0, unrealized_pnl=9.0,
+            stop_loss_price=95.0, take_profit_levels=[[0.1, 0.5], [0.3, 0.5]],
+            open_time=datetime(2026, 1, 2, 3, 4), max_hold_until=datetime(2026, 1, 3)))
+        conn.execute(insert(daily_stats).values(
+            date=now.date() - timedelta(days=1), starting_balance=10000, ending_balance=10120))
+
+
+def test_build_home_summary(db):
+    _seed(db)
+    payload = ds.build_home_summary()
+    json.dumps(payload)     # 可直接存 JSON 列
+
+    stats = payload['stats']
+    assert stats['signals_today'] == 3
+    assert (stats['tier1_today'], stats['tier2_today'], stats['tier3_today']) == (2, 1, 0)
+
+    p, = payload['positions']
+    assert p['notional'] == 3000
+    assert p['mark_price'] == 101.0
+    assert p['liq_price'] == round(100 * (1 - 1 / 10 * 0.95), 6)
+    assert p['take_profit'] == round(100 * (1 + 0.3 / 10), 6)
+    assert p['open_time_str'] == '01-02 03:04'
+
+    assert len(payload['signals']) == 4
+    assert 'raw_data' not in payload['signals'][0]
+    assert payload['equity_curve'][-1]['balance'] == 10120
+
+
+def test_load_reads_fresh_row_and_refreshes_stale(db, monkeypatch):
+    upsert_dashboard_summary(ds.HOME, {'cached': True})
+    monkeypatch.setattr(ds, 'build_home_summary', lambda: {'cached': False})
+    assert ds.load_home_summary() == {'cached': True}
+
+    upsert_dashboard_summary(ds.HOME, {'cached': True},
+                             updated_at=datetime.now(MYT) - timedelta(seconds=ds.MAX_AGE + 5))
+    assert ds.load_home_summary() == {'cached': False}
+    assert get_dashboard_summary(ds.HOME)['payload'] == {'cached': False}
+
+
+def test_position_event_triggers_refresh(monkeypatch):
+    calls = []
+    monkeypatch.setattr(ds, 'refresh_home_summary', lambda: calls.append(1))
+    monkeypatch.setattr(ds, 'MIN_GAP', 0)
+    monkeypatch.setattr(events, 'redis', None)
+
+    async def run():
+        task = asyncio.create_task(ds.dashboard_summarizer(interval=60))
+        await asyncio.sleep(0.05)
+        events.publish_soon('position_opened', symbol='BTCUSDT', trade_id=1)
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert not events._listeners
+
+
+def test_backtest_result_cache(tmp_path):
+    backtest_results.clear_cache()
+    path = tmp_path / 'r.json'
+    path.write_text(json.dumps({'trades': [
+        {'date': '2025-01-03', 'pnl': 10}, {'date': '2025-01-09', 'pnl': -5},
+        {'date': '2025-02-01', 'pnl': 4},
+    ]}))
+    files = {'r.json': 'R', 'missing.json': 'M'}
+
+    v1, = backtest_results.load_versions(str(tmp_path), files)
+    assert v1['label'] == 'R'
+    assert v1['profit_factor'] == round(7 / 5, 2)
+    assert [m['month'] for m in v1['monthly']] == ['2025-01', '2025-02']
+    assert backtest_results.load_result(str(path)) is backtest_results.load_result(str(path))
+
+    path.write_text(json.dumps({'trades': [], 'profit_factor': 3}))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    v2, = backtest_results.load_versions(str(tmp_path), files)
+    assert v2['profit_factor'] == 3 and v2['monthly'] == []
@@ -0,0 +1,121 @@
+"""
+回放回测测试 — 模拟时钟 / 事件源 (聚合, 归并, 录制) / K线缓存补拉 / bar 内路径 / 汇总
+"""
+import json
+from datetime import datetime, timezone
+
+from core import clock
+from replay.sources import (
+    BAR_MS, fetch_klines, resample, kline_events, symbol_events,
+    recorded_events, merge_events, JsonlRecorder, cache_path,
+)
+from replay.harness import intrabar_path, summarize
+
+T0 = 1_735_689_600_000  # 2025-01-01 00:00 UTC
+
+
+def _rows(n, start=T0):
+    return [[start + i * BAR_MS['5m'], 100 + i, 101 + i, 99 + i, 100.5 + i, 10.0]
+            for i in range(n)]
+
+
+class FakeExchange:
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def fetch_ohlcv(self, pair, tf, since=None, limit=1500):
+        self.calls.append(since)
+        return [r for r in self.rows if r[0] >= since][:limit]
+
+
+class TestClock:
+
+    def test_sim_and_wall_clock(self):
+        try:
+            clock.set_sim_time(T0)
+            assert clock.is_simulated()
+            assert clock.now() == datetime(2025, 1, 1, tzinfo=timezone.utc)
+            assert clock.time() == T0 / 1000
+        finally:
+            clock.use_wall_clock()
+        assert not clock.is_simulated()
+        assert clock.now().year >= 2026
+
+
+class TestSources:
+
+    def test_resample_aligns_and_drops_partial_buckets(self):
+        rows = _rows(14)[1:]   # 从 00:05 开始, 第一个 15m 桶不完整
+        out = resample(rows, '15m')
+        assert [r[0] for r in out] == [T0 + 900_000 * k for k in (1, 2, 3)]
+        first = out[0]
+        src = rows[2:5]
+        assert first[1] == src[0][1] and first[4] == src[-1][4]
+        assert first[2] == max(r[2] for r in src) and first[3] == min(r[3] for r in src)
+        assert first[5] == 30.0
+
+    def test_kline_events_match_ws_format(self):
+        ev = list(kline_events('btcusdt', _rows(1)))
+        ts, stream, data = ev[0]
+        assert stream == 'btcusdt@kline_5m'
+        assert ts == data['E'] == data['k']['T'] == T0 + 299_999
+        assert data['k']['s'] == 'BTCUSDT' and data['k']['x'] is True
+
+    def test_symbol_events_close_order(self):
+        evs = symbol_events('BTCUSDT', _rows(12))
+        times = [e[0] for e in evs]
+        assert times == sorted(times)
+        # 1h 收盘与最后一根 5m 同一时刻, 5m 在前
+        last = [e[1] for e in evs if e[0] == T0 + 3_599_999]
+        assert last == ['btcusdt@kline_5m', 'btcusdt@kline_15m', 'btcusdt@kline_1h']
+
+    def test_record_and_merge(self, tmp_path):
+        path = str(tmp_path / 'ws.jsonl')
+        rec = JsonlRecorder(path)
+        rec('btcusdt@aggTrade', {'s': 'BTCUSDT', 'T': T0 + 1000, 'E': T0 + 1000,
+                                 'q': '1', 'm': False})
+        rec('btcusdt@aggTrade', {'s': 'BTCUSDT', 'T': T0 + 400_000, 'E': T0 + 400_000,
+                                 'q': '2', 'm': True})
+        rec.close()
+
+        merged = list(merge_events(kline_events('BTCUSDT', _rows(2)),
+                                   recorded_events(path)))
+        assert [e[1].split('@')[1] for e in merged] == [
+            'aggTrade', 'kline_5m', 'aggTrade', 'kline_5m']
+
+    def test_fetch_klines_only_fetches_missing_tail(self, tmp_path):
+        all_rows = _rows(30)
+        cache = str(tmp_path)
+        with open(cache_path(cache, 'BTCUSDT'), 'w') as f:
+            json.dump(all_rows[:20], f)
+        ex = FakeExchange(all_rows)
+
+        got = fetch_klines('BTCUSDT', T0, T0 + 30 * BAR_MS['5m'], cache, exchange=ex)
+        assert got == all_rows
+        assert ex.calls == [all_rows[20][0]]
+
+        ex2 = FakeExchange(all_rows)
+        fetch_klines('BTCUSDT', T0, T0 + 30 * BAR_MS['5m'], cache, exchange=ex2)
+        assert ex2.calls == []
+
+
+class TestHarnessHelpers:
+
+    def test_intrabar_path(self):
+        assert intrabar_path(100, 105, 95, 103) == [100, 95, 105, 103]
+        assert intrabar_path(100, 105, 95, 97) == [100, 105, 95, 97]
+
+    def test_summarize(self):
+        rows = [
+            {'pnl': 100.0, 'close_reason': 'take_profit_200%'},
+            {'pnl': -300.0, 'close_reason': 'stop_loss'},
+            {'pnl': 50.0, 'close_reason': 'timeout'},
+        ]
+        rep = summarize(rows)
+        assert rep['trades'] == 3
+        assert rep['win_rate'] == round(2 / 3, 4)
+        assert rep['pnl'] == -150.0
+        assert rep['max_drawdown_pct'] == round(300 / 10100 * 100, 2)
+        assert rep['close_reasons'] == {'take_profit': 1, 'stop_loss': 1, 'timeout': 1}
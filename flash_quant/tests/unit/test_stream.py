@@ -0,0 +1,103 @@
+"""
+Dashboard SSE 广播测试 — 一次计算分发给所有订阅者 / 事件提前重算 / 无订阅不查询
+"""
+import threading
+import time
+
+from web.stream import DashboardBroadcaster
+
+
+class _Counter:
+    """模拟 DB 查询: 每次调用返回 {'n': 调用次数 // step}"""
+
+    def __init__(self, step=1):
+        self.calls = 0
+        self.step = step
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            return {'n': self.calls // self.step}
+
+
+def _take(gen, n):
+    return [next(gen) for _ in range(n)]
+
+
+def test_subscribers_share_one_compute():
+    compute = _Counter()
+    b = DashboardBroadcaster(compute, interval=0.05, heartbeat=1.0, listen_events=False)
+    subs = [b.subscribe() for _ in range(20)]
+    frames = [None] * len(subs)
+
+    def consume(i):
+        frames[i] = _take(subs[i], 3)
+
+    threads = [threading.Thread(target=consume, args=(i,)) for i in range(len(subs))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+    for s in subs:
+        s.close()
+
+    assert all(f.startswith('data: {"n": ') for fs in frames for f in fs)
+    # 20 个订阅者各收 3 帧, 查询次数与订阅者数量无关
+    assert compute.calls < 20
+    assert b.subscribers == 0
+
+
+def test_no_compute_without_subscribers():
+    compute = _Counter()
+    b = DashboardBroadcaster(compute, interval=0.01, heartbeat=1.0, listen_events=False)
+    sub = b.subscribe()
+    next(sub)
+    sub.close()
+    time.sleep(0.05)
+    calls = compute.calls
+    time.sleep(0.1)
+    assert compute.calls == calls
+
+
+def test_unchanged_payload_sends_heartbeat():
+    compute = _Counter(step=10 ** 6)     # 数据一直不变
+    b = DashboardBroadcaster(compute, interval=0.01, heartbeat=0.05, listen_events=False)
+    sub = b.subscribe()
+    first, second = _take(sub, 2)
+    sub.close()
+    assert first == 'data: {"n": 0}\n\n'
+    assert second == ': ping\n\n'
+    assert b.stats()['published'] == 1
+    assert compute.calls > 1
+
+
+def test_notify_recomputes_before_interval():
+    compute = _Counter()
+    b = DashboardBroadcaster(compute, interval=60, heartbeat=5.0, listen_events=False)
+    sub = b.subscribe()
+    assert next(sub) == 'data: {"n": 1}\n\n'
+    started = time.monotonic()
+    b.notify()
+    assert next(sub) == 'data: {"n": 2}\n\n'
+    assert time.monotonic() - started < 2
+    sub.close()
+
+
+def test_compute_error_keeps_last_frame():
+    state = {'fail': False, 'n': 0}
+
+    def compute():
+        if state['fail']:
+            raise RuntimeError('db down')
+        state['n'] += 1
+        return {'n': state['n']}
+
+    b = DashboardBroadcaster(compute, interval=0.01, heartbeat=0.05, listen_events=False)
+    sub = b.subscribe()
+    next(sub)
+    state['fail'] = True
+    time.sleep(0.05)
+    assert next(sub) == ': ping\n\n'
+    assert b.stats()['errors'] > 0
+    sub.close()
@@ -0,0 +1,211 @@
+"""
+流式指标单元测试 — 每一步都与 data/indicators.py 批量函数的最新值一致
+"""
+import math
+import random
+from dataclasses import dataclass
+
+import pytest
+from data import indicators as batch
+from data.stream_indicators import (
+    StreamingEMA, StreamingRSI, StreamingMACD, StreamingADX,
+    StreamingBollinger, StreamingVolumeRatio, RollingStats, IndicatorHub,
+    window_snapshot,
+)
+
+
+def _series(n=300, seed=7):
+    rnd = random.Random(seed)
+    price = 100.0
+    highs, lows, closes, volumes = [], [], [], []
+    for _ in range(n):
+        price *= 1 + rnd.gauss(0, 0.01)
+        closes.append(price)
+        highs.append(price * (1 + abs(rnd.gauss(0, 0.004))))
+        lows.append(price * (1 - abs(rnd.gauss(0, 0.004))))
+        volumes.append(rnd.uniform(10, 1000))
+    return highs, lows, closes, volumes
+
+
+def _same(stream_val, batch_vals):
+    if not batch_vals:
+        return stream_val is None
+    return stream_val is not None and math.isclose(
+        stream_val, batch_vals[-1], rel_tol=1e-9, abs_tol=1e-9)
+
+
+class TestEquivalence:
+
+    @pytest.mark.parametrize('period', [9, 20, 50])
+    def test_ema(self, period):
+        _, _, closes, _ = _series()
+        s = StreamingEMA(period)
+        for i, c in enumerate(closes):
+            s.update(c)
+            assert _same(s.value, batch.ema(closes[:i + 1], period))
+
+    def test_rsi(self):
+        _, _, closes, _ = _series()
+        s = StreamingRSI(14)
+        for i, c in enumerate(closes):
+            s.update(c)
+            assert _same(s.value, batch.rsi(closes[:i + 1], 14))
+
+    def test_rsi_flat_prices(self):
+        closes = [100.0] * 30
+        s = StreamingRSI(14)
+        for c in closes:
+            s.update(c)
+        assert s.value == batch.rsi(closes, 14)[-1] == 100.0
+
+    def test_macd_hist(self):
+        _, _, closes, _ = _series()
+        s = StreamingMACD()
+        for i, c in enumerate(closes):
+            s.update(c)
+            _, _, hist = batch.macd(closes[:i + 1])
+            if hist:
+                assert s.ready
+                assert math.isclose(s.hist, hist[-1], rel_tol=1e-9, abs_tol=1e-12)
+                if len(hist) >= 2:
+                    assert math.isclose(s.prev_hist, hist[-2], rel_tol=1e-9, abs_tol=1e-12)
+            else:
+                assert not s.ready
+
+    def test_adx(self):
+        highs, lows, closes, _ = _series()
+        s = StreamingADX(14)
+        for i in range(len(closes)):
+            s.update(highs[i], lows[i], closes[i])
+            assert _same(s.value, batch.adx(highs[:i + 1], lows[:i + 1], closes[:i + 1], 14))
+
+    def test_bollinger(self):
+        _, _, closes, _ = _series()
+        s = StreamingBollinger(20, 2.0)
+        for i, c in enumerate(closes):
+            s.update(c)
+            upper, middle, lower = batch.bollinger_bands(closes[:i + 1], 20)
+            if not upper:
+                assert s.value is None
+                continue
+            su, sm, sl = s.value
+            assert math.isclose(su, upper[-1], rel_tol=1e-9)
+            assert math.isclose(sm, middle[-1], rel_tol=1e-9)
+            assert math.isclose(sl, lower[-1], rel_tol=1e-9)
+
+    def test_volume_ratio(self):
+        _, _, _, volumes = _series()
+        s = StreamingVolumeRatio(20)
+        for i, v in enumerate(volumes):
+            s.update(v)
+            expected = batch.volume_ratio(volumes[:i + 1], 20)
+            if i == 0:
+                assert s.value is None
+            else:
+                assert math.isclose(s.value, expected, rel_tol=1e-9)
+
+    def test_rolling_stats_resync_keeps_precision(self):
+        rnd = random.Random(1)
+        data = [60000 + rnd.gauss(0, 50) for _ in range(5000)]
+        s = RollingStats(20)
+        for x in data:
+            s.update(x)
+        window = data[-20:]
+        mean = sum(window) / 20
+        var = sum((x - mean) ** 2 for x in window) / 20
+        assert math.isclose(s.mean, mean, rel_tol=1e-12)
+        assert math.isclose(s.variance, var, rel_tol=1e-6)
+
+
+@dataclass
+class _Kline:
+    timestamp: int
+    high: float
+    low: float
+    close: float
+    volume: float
+    is_closed: bool = True
+
+
+class TestIndicatorHub:
+
+    def test_only_closed_and_new_klines_counted(self):
+        hub = IndicatorHub()
+        assert hub.on_kline('BTCUSDT', '1h', _Kline(1, 2, 1, 1.5, 10))
+        assert not hub.on_kline('BTCUSDT', '1h', _Kline(2, 2, 1, 1.5, 10, is_closed=False))
+        assert not hub.on_kline('BTCUSDT', '1h', _Kline(1, 2, 1, 1.5, 10))
+        snap = hub.get('BTCUSDT', '1h')
+        assert snap['bars'] == 1 and snap['timestamp'] == 1
+        assert hub.get('BTCUSDT', '5m') is None
+
+    def test_snapshot_matches_batch(self):
+        highs, lows, closes, volumes = _series(120)
+        hub = IndicatorHub()
+        for i in range(len(closes)):
+            hub.on_kline('ETHUSDT', '1h', _Kline(i, highs[i], lows[i], closes[i], volumes[i]))
+        snap = hub.get('ETHUSDT', '1h')
+        assert math.isclose(snap['rsi'], batch.rsi(closes, 14)[-1], rel_tol=1e-9)
+        assert math.isclose(snap['ema'][20], batch.ema(closes, 20)[-1], rel_tol=1e-9)
+        assert math.isclose(snap['adx'], batch.adx(highs, lows, closes, 14)[-1], rel_tol=1e-9)
+        assert snap['high_20'] == max(closes[-20:])
+        assert snap['low_20'] == min(closes[-20:])
+
+    def test_reset_symbol(self):
+        hub = IndicatorHub()
+        hub.on_kline('BTCUSDT', '1h', _Kline(1, 2, 1, 1.5, 10))
+        hub.on_kline('ETHUSDT', '1h', _Kline(1, 2, 1, 1.5, 10))
+        hub.reset('BTCUSDT')
+        assert hub.get('BTCUSDT', '1h') is None
+        assert hub.get('ETHUSDT', '1h') is not None
+
+
+class TestSnapshotFor:
+    """Tier 3 扫描: 最后一根已收盘 K线对齐时读流式快照, 否则在窗口上批量计算"""
+
+    def _hub(self, n=300, seed=7):
+        highs, lows, closes, volumes = _series(n, seed)
+        klines = [_Kline(i, highs[i], lows[i], closes[i], volumes[i]) for i in range(n)]
+        hub = IndicatorHub()
+        for k in klines:
+            hub.on_kline('ETHUSDT', '1h', k)
+        return hub, klines, (highs, lows, closes)
+
+    def test_aligned_window_reads_stream(self):
+        hub, klines, (highs, lows, closes) = self._hub()
+        snap = hub.snapshot_for('ETHUSDT', '1h', klines[-50:])
+        assert snap['bars'] == 300
+        # 流式值基于完整历史, 不是 50 根窗口
+        assert math.isclose(snap['rsi'], batch.rsi(closes, 14)[-1], rel_tol=1e-9)
+        assert math.isclose(snap['adx'], batch.adx(highs, lows, closes, 14)[-1], rel_tol=1e-9)
+
+    def test_window_ahead_of_stream_falls_back(self):
+        hub, klines, _ = self._hub()
+        newer = _Kline(300, 1.0, 0.9, 0.95, 10)
+        window = klines[-49:] + [newer]
+        snap = hub.snapshot_for('ETHUSDT', '1h', window)
+        assert snap == window_snapshot(window)
+        assert snap['timestamp'] == 300 and snap['bars'] == 50
+        assert hub.snapshot_for('BTCUSDT', '1h', window) == window_snapshot(window)
+
+    def test_window_snapshot_fields(self):
+        hub, klines, _ = self._hub(120)
+        window = window_snapshot(klines)
+        stream = hub.get('ETHUSDT', '1h')
+        assert window.keys() == stream.keys()
+        for key in ('rsi', 'adx', 'macd_hist', 'macd_prev_hist', 'volume_ratio', 'high_20', 'low_20'):
+            assert math.isclose(window[key], stream[key], rel_tol=1e-9, abs_tol=1e-12), key
+        assert all(math.isclose(window['ema'][p], stream['ema'][p], rel_tol=1e-9) for p in stream['ema'])
+        assert all(math.isclose(a, b, rel_tol=1e-9) for a, b in zip(window['bb'], stream['bb']))
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_stream_vs_window_seed_difference(self, seed):
+        """种子不同带来的差异 (见 IndicatorHub.snapshot_for 文档)"""
+        hub, klines, _ = self._hub(300, seed)
+        stream = hub.get('ETHUSDT', '1h')
+        window = window_snapshot(klines[-50:])
+        assert math.isclose(stream['ema'][20], window['ema'][20], rel_tol=1e-3)
+        assert abs(stream['rsi'] - window['rsi']) < 2
+        assert abs(stream['adx'] - window['adx']) < 3
+        # 不依赖种子的字段完全一致
+        assert stream['high_20'] == window['high_20'] and stream['low_20'] == window['low_20']
+        assert math.isclose(stream['volume_ratio'], window['volume_ratio'], rel_tol=1e-9)
@@ -0,0 +1,231 @@
+"""
+WebSocket 分片层测试 — 分片规划 / 动态订阅不重连 / 分发 + 延迟 / 丢弃策略
+"""
+import asyncio
+import json
+
+from ws import shards as shards_mod
+from ws.shards import ShardedStreamClient, StreamShard, STREAMS_PER_SHARD
+
+
+class FakeWS:
+    """假连接: 先吐出预置消息, 然后挂起直到 close()"""
+
+    def __init__(self, url, messages):
+        self.url = url
+        self._messages = list(messages)
+        self.sent = []
+        self._closed = asyncio.Event()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._messages:
+            return self._messages.pop(0)
+        await self._closed.wait()
+        raise StopAsyncIteration
+
+    async def send(self, msg):
+        self.sent.append(json.loads(msg))
+
+    async def close(self):
+        self._closed.set()
+
+
+class SlowHandshakeWS(FakeWS):
+    """握手挂起, 直到 handshake 被 set"""
+
+    def __init__(self, url, messages, handshake):
+        super().__init__(url, messages)
+        self._handshake = handshake
+
+    async def __aenter__(self):
+        await self._handshake.wait()
+        return self
+
+
+class FakeConnector:
+
+    def __init__(self, messages_for=None, handshake=None):
+        self.connections = []
+        self._messages_for = messages_for or (lambda url: [])
+        self._handshake = handshake
+
+    def __call__(self, url, **kwargs):
+        if self._handshake is None:
+            ws = FakeWS(url, self._messages_for(url))
+        else:
+            ws = SlowHandshakeWS(url, self._messages_for(url), self._handshake)
+        self.connections.append(ws)
+        return ws
+
+
+def _streams(n_symbols):
+    out = []
+    for i in range(n_symbols):
+        sym = f"s{i}usdt"
+        out += [f"{sym}@kline_5m", f"{sym}@kline_15m", f"{sym}@kline_1h", f"{sym}@aggTrade"]
+    return out
+
+
+def _msg(stream, event_ms=1_000_000, **data):
+    return json.dumps({'stream': stream, 'data': dict(data, E=event_ms)})
+
+
+async def _run_briefly(client, body=None, settle=0.05):
+    task = asyncio.create_task(client.run())
+    await asyncio.sleep(settle)
+    try:
+        if body:
+            await body()
+            await asyncio.sleep(settle)
+    finally:
+        client.stop()
+        await task
+
+
+class TestShardPlanning:
+
+    def test_300_symbols_with_aggtrade_spread_without_truncation(self):
+        client = ShardedStreamClient(lambda s, d: None)
+        streams = _streams(300)
+        client.add_streams(streams)
+        assert len(client.shards) == 6
+        assert all(len(s.streams) <= STREAMS_PER_SHARD for s in client.shards)
+        assert client.owned_streams() == set(streams)
+
+    def test_duplicate_streams_not_added_twice(self):
+        client = ShardedStreamClient(lambda s, d: None)
+        client.add_streams(_streams(10))
+        client.add_streams(_streams(10))
+        assert sum(len(s.streams) for s in client.shards) == 40
+
+
+class TestShardRuntime:
+
+    def test_messages_dispatched_with_lag(self, monkeypatch):
+        got = []
+        conn = FakeConnector(lambda url: [
+            _msg('btcusdt@kline_5m', k={'x': False}),
+            _msg('btcusdt@aggTrade', q='1'),
+            json.dumps({'result': None, 'id': 1}),
+        ])
+        client = ShardedStreamClient(lambda s, d: got.append(s), connect=conn,
+                                     clock=lambda: 1_000_000 / 1000 + 0.25)
+        client.add_streams(['btcusdt@kline_5m', 'btcusdt@aggTrade'])
+        asyncio.run(_run_briefly(client))
+
+        assert got == ['btcusdt@kline_5m', 'btcusdt@aggTrade']
+        st = client.stats()
+        assert st['messages'] == 3
+        assert st['max_lag_ms'] == 250.0
+        assert 'streams=' in conn.connections[0].url
+
+    def test_dynamic_subscribe_without_reconnect(self, monkeypatch):
+        monkeypatch.setattr(shards_mod, 'CONTROL_MSG_INTERVAL', 0)
+        conn = FakeConnector()
+        client = ShardedStreamClient(lambda s, d: None, connect=conn)
+        client.add_streams(_streams(45))  # 180 streams → 1 shard, 20 free
+
+        async def body():
+            await client.subscribe(_streams(50)[180:])  # 5 个新 symbol = 20 streams
+            await client.unsubscribe(['s0usdt@aggTrade'])
+
+        asyncio.run(_run_briefly(client, body))
+        assert len(conn.connections) == 1
+        sent = conn.connections[0].sent
+        assert sent[0]['method'] == 'SUBSCRIBE' and len(sent[0]['params']) == 20
+        assert sent[1] == {'method': 'UNSUBSCRIBE', 'params': ['s0usdt@aggTrade'], 'id': 2}
+        assert len(client.shards[0].streams) == 199
+
+    def test_subscribe_overflow_opens_new_shard(self, monkeypatch):
+        monkeypatch.setattr(shards_mod, 'CONTROL_MSG_INTERVAL', 0)
+        conn = FakeConnector()
+        client = ShardedStreamClient(lambda s, d: None, connect=conn)
+        client.add_streams(_streams(50))  # 200 streams, shard 满
+
+        async def body():
+            await client.subscribe(_streams(51)[200:])
+
+        asyncio.run(_run_briefly(client, body))
+        assert len(client.shards) == 2
+        assert len(conn.connections) == 2
+        assert conn.connections[0].sent == []
+        assert 's50usdt@aggTrade' in conn.connections[1].url
+
+    def test_new_shard_connects_with_all_its_streams(self, monkeypatch):
+        monkeypatch.setattr(shards_mod, 'CONTROL_MSG_INTERVAL', 0)
+        conn = FakeConnector()
+        client = ShardedStreamClient(lambda s, d: None, connect=conn)
+        client.add_streams(_streams(45))  # 180 streams, 20 free
+
+        async def body():
+            # 先在 shard 0 上 SUBSCRIBE (会让出事件循环), 其余 40 个开新 shard
+            await client.subscribe(_streams(60)[180:])
+
+        asyncio.run(_run_briefly(client, body))
+        assert len(conn.connections) == 2
+        new = conn.connections[1]
+        assert new.url == client.shards[1].url()
+        assert len(client.shards[1].streams) == 40
+        assert new.sent == []
+
+    def test_empty_client_connects_only_after_subscribe(self):
+        conn = FakeConnector()
+        client = ShardedStreamClient(lambda s, d: None, connect=conn)
+
+        async def body():
+            assert conn.connections == []
+            await client.subscribe(_streams(2))
+
+        asyncio.run(_run_briefly(client, body))
+        assert len(conn.connections) == 1
+        assert conn.connections[0].url == client.shards[0].url()
+        assert len(client.shards[0].streams) == 8
+
+    def test_streams_added_during_handshake_subscribed_after_connect(self, monkeypatch):
+        monkeypatch.setattr(shards_mod, 'CONTROL_MSG_INTERVAL', 0)
+        handshake = asyncio.Event()
+        conn = FakeConnector(handshake=handshake)
+        client = ShardedStreamClient(lambda s, d: None, connect=conn)
+        client.add_streams(_streams(1))
+
+        async def body():
+            # URL 已按旧集合生成, 握手未完成时追加订阅
+            await client.subscribe(_streams(2)[4:])
+            await client.unsubscribe(['s0usdt@aggTrade'])
+            handshake.set()
+
+        asyncio.run(_run_briefly(client, body))
+        assert len(conn.connections) == 1
+        assert conn.connections[0].sent == [
+            {'method': 'SUBSCRIBE', 'params': sorted(_streams(2)[4:]), 'id': 1},
+            {'method': 'UNSUBSCRIBE', 'params': ['s0usdt@aggTrade'], 'id': 2},
+        ]
+
+
+class TestBackpressure:
+
+    def test_full_queue_drops_aggtrade_but_not_klines(self):
+        async def body():
+            shard = StreamShard(0, lambda s, d: None, queue_size=2)
+            await shard._enqueue(_msg('a@kline_5m'))
+            await shard._enqueue(_msg('a@kline_5m'))
+            await shard._enqueue(_msg('a@aggTrade'))
+            assert shard.drops == 1
+            # K线在队列满时等待, 处理端消化后入队
+            pending = asyncio.create_task(shard._enqueue(_msg('a@kline_1h')))
+            await asyncio.sleep(0)
+            assert not pending.done()
+            shard._queue.get_nowait()
+            await pending
+            assert shard._queue.qsize() == 2
+
+        asyncio.run(body())
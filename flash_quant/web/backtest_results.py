@@ -0,0 +1,87 @@
+"""
+回测结果文件 (/backtest 页面)
+解析 + 补指标 + 月度聚合的结果按 (mtime, size) 缓存, 文件没变就不重读
+"""
+import json
+import os
+import threading
+from collections import defaultdict
+
+BACKTEST_FILES = {
+    'backtest_result.json': '✅ Liquidation A (2025) — 部署中',
+    'analysis/liquidation_2024_result.json': '✅ Liquidation A (2024)',
+    'analysis/liquidation_2026_result.json': '✅ Liquidation A (2026 YTD)',
+    'analysis/liquidation_2025_top90.json': '❌ TOP90 扩容失败 (2025)',
+    'analysis/pump_fade_result.json': '❌ Pump-Fade 镜像失败 (2025)',
+    'analysis/funding_extreme_result.json': '❌ Funding Extreme 失败 (2025)',
+    'backtest_result_v1_tier1_tier2.json': '历史: V1 Tier1+2',
+    'backtest_result_v2_tier1_100coins.json': '历史: V2 Tier1',
+    'backtest_result_signal_trader.json': '历史: Signal Trader',
+}
+
+_cache = {}     # path -> ((mtime_ns, size), result)
+_lock = threading.Lock()
+
+
+def summarize_result(r: dict) -> dict:
+    """补盈亏比 / 保本胜率, 按月聚合交易"""
+    trades = r.get('trades', [])
+    wins_pnl = [t['pnl'] for t in trades if t.get('pnl', 0) > 0]
+    loss_pnl = [t['pnl'] for t in trades if t.get('pnl', 0) <= 0]
+    avg_w = sum(wins_pnl) / len(wins_pnl) if wins_pnl else 0
+    avg_l = abs(sum(loss_pnl) / len(loss_pnl)) if loss_pnl else 1
+    if not r.get('profit_factor'):
+        r['profit_factor'] = round(avg_w / avg_l, 2) if avg_l else 0
+    if not r.get('breakeven_winrate'):
+        r['breakeven_winrate'] = round(avg_l / (avg_w + avg_l) * 100, 1) if (avg_w + avg_l) else 50
+    # 月度
+    monthly = defaultdict(lambda: {'trades': 0, 'pnl': 0, 'wins': 0})
+    for t in trades:
+        m = t.get('date', '')[:7]
+        if not m or m == 'end': continue
+        monthly[m]['trades'] += 1
+        monthly[m]['pnl'] += t.get('pnl', 0)
+        if t.get('pnl', 0) > 0: monthly[m]['wins'] += 1
+    r['monthly'] = [
+        {'month': m, 'trades': d['trades'],
+         'win_rate': d['wins']/d['trades']*100 if d['trades'] else 0,
+         'pnl': round(d['pnl'], 2)}
+        for m, d in sorted(monthly.items())
+    ]
+    return r
+
+
+def load_result(path: str):
+    """读取并汇总一个结果文件; 文件不存在返回 None"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        with _lock:
+            _cache.pop(path, None)
+        return None
+    key = (st.st_mtime_ns, st.st_size)
+    with _lock:
+        hit = _cache.get(path)
+    if hit and hit[0] == key:
+        return hit[1]
+    with open(path) as f:
+        result = summarize_result(json.load(f))
+    with _lock:
+        _cache[path] = (key, result)
+    return result
+
+
+def load_versions(base_dir: str, files: dict = BACKTEST_FILES) -> list:
+    """所有存在的回测版本 (带 label / file); 返回新 dict, 缓存对象不被页面修改"""
+    versions = []
+    for fname, label in files.items():
+        r = load_result(os.path.join(base_dir, fname))
+        if r is None:
+            continue
+        versions.append({**r, 'label': label, 'file': fname})
+    return versions
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
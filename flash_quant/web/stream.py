@@ -0,0 +1,150 @@
+"""
+Flash Quant - Dashboard SSE 广播 (FR-041)
+
+每个浏览器连接各自轮询 DB 的话, N 个看板 = N 倍查询。这里只有一个
+后台发布线程按固定间隔 (或收到 engine 开平仓事件时立即) 计算一次推送
+数据, 序列化好之后分发给所有订阅者:
+
+- 没有订阅者时发布线程不查 DB
+- 数据和上次相同时不推送, 只定期发心跳注释保持连接
+- 订阅者只拿最新一帧: 慢客户端跳过中间帧, 不会在服务端堆积
+- 只用 threading 原语, gunicorn gevent/eventlet worker 打补丁后同样适用
+"""
+import json
+import threading
+import time
+
+from core import events
+from core.logger import get_logger
+
+logger = get_logger('web.stream')
+
+PUSH_INTERVAL = 5.0      # 定时重算间隔 (秒)
+HEARTBEAT = 15.0         # 无新数据时的心跳间隔 (秒)
+MIN_GAP = 0.5            # 事件触发的重算最短间隔, 连续开平仓合并成一次
+
+
+def build_stream_payload() -> dict:
+    """/api/stream 推送内容"""
+    from models.db_ops import get_open_positions, get_dashboard_stats, query_signals
+    positions = get_open_positions()
+    stats = get_dashboard_stats()
+    recent = query_signals(limit=5)
+    return {
+        'positions': len(positions),
+        'total_trades': stats['total'],
+        'total_pnl': stats['total_pnl'],
+        'win_rate': stats['win_rate'],
+        'recent_signals': len(recent),
+    }
+
+
+class DashboardBroadcaster:
+
+    def __init__(self, compute=build_stream_payload, interval: float = PUSH_INTERVAL,
+                 heartbeat: float = HEARTBEAT, listen_events: bool = True):
+        self._compute = compute
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.listen_events = listen_events
+        self._cond = threading.Condition()
+        self._frame = None           # 最新一帧 SSE 文本
+        self._version = 0
+        self._subscribers = 0
+        self._wake = False           # 有事件, 提前重算
+        self._thread = None
+        self._events_thread = None
+        self._stats = {'computes': 0, 'published': 0, 'errors': 0, 'events': 0}
+
+    # ─── 订阅 ─────────────────────────────────────────────
+
+    def subscribe(self):
+        """SSE 生成器: 先发当前帧, 之后每有新帧发一次, 空闲时发心跳"""
+        with self._cond:
+            self._subscribers += 1
+            self._ensure_started()
+            if self._frame is None:
+                self._wake = True
+                self._cond.notify_all()
+        seen = 0
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._version != seen, timeout=self.heartbeat)
+                    frame, version = self._frame, self._version
+                if version == seen or frame is None:
+                    yield ': ping\n\n'
+                    continue
+                seen = version
+                yield frame
+        finally:
+            with self._cond:
+                self._subscribers -= 1
+
+    def notify(self):
+        """请求立即重算 (engine 事件 / 本进程内的写操作后调用)"""
+        with self._cond:
+            self._stats['events'] += 1
+            self._wake = True
+            self._cond.notify_all()
+
+    @property
+    def subscribers(self) -> int:
+        return self._subscribers
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {**self._stats, 'subscribers': self._subscribers, 'version': self._version}
+
+    # ─── 发布线程 ─────────────────────────────────────────
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='dashboard-stream',
+                                            daemon=True)
+            self._thread.start()
+        if self.listen_events and self._events_thread is None:
+            self._events_thread = threading.Thread(
+                target=events.listen, args=(lambda event: self.notify(),),
+                name='dashboard-stream-events', daemon=True)
+            self._events_thread.start()
+
+    def _run(self):
+        last_payload = None
+        last_compute = 0.0
+        while True:
+            with self._cond:
+                # 没人订阅就一直睡; 有人订阅时等到周期到点或被事件唤醒
+                while True:
+                    if self._subscribers:
+                        due = last_compute + (MIN_GAP if self._wake else self.interval)
+                        wait = due - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(timeout=wait)
+                    else:
+                        self._cond.wait()
+                self._wake = False
+
+            last_compute = time.monotonic()
+            try:
+                payload = self._compute()
+            except Exception as e:
+                with self._cond:
+                    self._stats['errors'] += 1
+                logger.warning("stream.compute_failed", error=str(e))
+                continue
+
+            with self._cond:
+                self._stats['computes'] += 1
+                if payload == last_payload and self._frame is not None:
+                    continue
+                last_payload = payload
+                self._frame = f"data: {json.dumps(payload, default=str)}\n\n"
+                self._version += 1
+                self._stats['published'] += 1
+                self._cond.notify_all()
+
+
+# 全局单例 (每个 Web worker 进程一个)
+dashboard_stream = DashboardBroadcaster()
@@ -1,129 +1,103 @@
 """
 Binance WebSocket 客户端
-订阅 kline + aggTrade 多流
+订阅 kline + aggTrade 多流, 按连接分片 (ws/shards.py)
 """
-import asyncio
-import json
-import time
-import websockets
 from core.logger import get_logger
 from data.kline_cache import kline_cache, Kline
 from data.cvd_calculator import cvd_calculator
 from data.market_data import market_data
+from data.stream_indicators import indicator_hub
 from risk.black_swan import black_swan_monitor
+from ws.shards import ShardedStreamClient
 
 logger = get_logger('binance_ws')
 
-BINANCE_WS_FUTURES = "wss://fstream.binance.com/stream?streams="
+STATS_LOG_EVERY = 10000  # 每 N 条消息打印一次状态
 
 
 class BinanceWebSocket:
     """
-    管理 Binance Futures WebSocket 连接
-    订阅: kline_5m + kline_15m + kline_1h + aggTrade
+    管理 Binance Futures WebSocket 连接 (多连接分片, 见 ws/shards.py)
+    订阅: kline_5m + kline_15m + kline_1h + aggTrade (默认全部 symbol)
     """
 
-    def __init__(self, symbols: list, intervals: list = None):
-        self.symbols = [s.lower().replace('/usdt', 'usdt').replace(':usdt', '')
-                        for s in symbols]
+    def __init__(self, symbols: list, intervals: list = None,
+                 agg_trade_symbols: list = None, connect=None):
+        self.symbols = [self._norm(s) for s in symbols]
         self.intervals = intervals or ['5m', '15m', '1h']
-        self._running = False
+        # aggTrade (CVD) 默认覆盖全部 symbol, 分片后不再受 200 stream 限制
+        self.agg_trade_symbols = set(
+            self._norm(s) for s in agg_trade_symbols
+        ) if agg_trade_symbols is not None else None
         self._msg_count = 0
         self._error_count = 0
-        self._connected = False
+        self._client = ShardedStreamClient(self._dispatch, connect=connect)
+        self._client.add_streams(self._streams_for(self.symbols))
 
-    def _build_url(self) -> str:
+    @staticmethod
+    def _norm(symbol: str) -> str:
+        return symbol.lower().replace('/usdt', 'usdt').replace(':usdt', '')
+
+    def _streams_for(self, symbols: list) -> list:
+        """同一 symbol 的 stream 相邻, 尽量落在同一个 shard"""
         streams = []
-        for sym in self.symbols:
+        for sym in symbols:
             for interval in self.intervals:
                 streams.append(f"{sym}@kline_{interval}")
-        # aggTrade: 前 20 个主流币 (CVD 计算)
-        for sym in self.symbols[:20]:
-            streams.append(f"{sym}@aggTrade")
-        # Binance 单连接最多 200 streams
-        if len(streams) > 200:
-            streams = streams[:200]
-            logger.warning("binance_ws.stream_limit", count=len(streams))
-        return BINANCE_WS_FUTURES + "/".join(streams)
+            if self.agg_trade_symbols is None or sym in self.agg_trade_symbols:
+                streams.append(f"{sym}@aggTrade")
+        return streams
 
     async def run(self):
-        """主运行循环, 含重连"""
-        self._running = True
-        retry = 0
-        max_retry = 20
-
-        while self._running and retry < max_retry:
-            try:
-                url = self._build_url()
-                total_streams = len(self.symbols) * len(self.intervals) + min(len(self.symbols), 20)
-                logger.info("binance_ws.connecting",
-                           symbols=len(self.symbols),
-                           streams=total_streams)
-
-                async with websockets.connect(
-                    url, ping_interval=20, ping_timeout=10,
-                    max_size=10 * 1024 * 1024,  # 10MB
-                ) as ws:
-                    self._connected = True
-                    retry = 0
-                    logger.info("binance_ws.connected")
-
-                    async for msg in ws:
-                        self._process(msg)
-
-            except websockets.exceptions.ConnectionClosed as e:
-                self._connected = False
-                retry += 1
-                wait = min(2 ** retry, 60)
-                logger.warning("binance_ws.disconnected",
-                              code=e.code, retry=retry, wait=wait)
-                try:
-                    await asyncio.sleep(wait)
-                except RuntimeError:
-                    import time; time.sleep(wait)
-
-            except Exception as e:
-                self._connected = False
-                retry += 1
-                wait = min(2 ** retry, 60)
-                logger.error("binance_ws.error",
-                            error=str(e), retry=retry, wait=wait)
-                try:
-                    await asyncio.sleep(wait)
-                except RuntimeError:
-                    import time; time.sleep(wait)
-
-        logger.error("binance_ws.max_retries_reached", max_retry=max_retry)
+        """主运行循环 (各 shard 自带重连)"""
+        logger.info("binance_ws.connecting", symbols=len(self.symbols),
+                    shards=len(self._client.shards),
+                    streams=len(self._client.owned_streams()))
+        await self._client.run()
 
     def stop(self):
-        self._running = False
-
-    def _process(self, raw: str):
-        """处理单条 WebSocket 消息"""
+        self._client.stop()
+
+    async def subscribe_symbols(self, symbols: list):
+        """运行中追加监控币种, 不重连"""
+        syms = [self._norm(s) for s in symbols if self._norm(s) not in self.symbols]
+        if not syms:
+            return
+        self.symbols.extend(syms)
+        await self._client.subscribe(self._streams_for(syms))
+        logger.info("binance_ws.subscribed", added=len(syms), total=len(self.symbols))
+
+    async def unsubscribe_symbols(self, symbols: list):
+        """运行中移除监控币种, 不重连"""
+        syms = [self._norm(s) for s in symbols if self._norm(s) in self.symbols]
+        if not syms:
+            return
+        self.symbols = [s for s in self.symbols if s not in syms]
+        await self._client.unsubscribe(self._streams_for(syms))
+        logger.info("binance_ws.unsubscribed", removed=len(syms), total=len(self.symbols))
+
+    def _dispatch(self, stream: str, data: dict):
+        """处理单条已解析消息 (由 shard 处理协程调用)"""
         self._msg_count += 1
         try:
-            data = json.loads(raw)
-            stream = data.get('stream', '')
-
             if '@kline_' in stream:
-                self._handle_kline(data['data'])
-            elif '@aggTrade' in stream:
-                self._handle_agg_trade(data['data'])
-
-            # 每 1000 条打印一次状态
-            if self._msg_count % 1000 == 0:
-                from data.kline_cache import kline_cache
-                syms = kline_cache.symbols()
-                logger.info("binance_ws.stats",
-                           msgs=self._msg_count, errors=self._error_count,
-                           cached_symbols=len(syms))
-
+                self._handle_kline(data)
+            elif stream.endswith('@aggTrade'):
+                self._handle_agg_trade(data)
         except Exception as e:
             self._error_count += 1
             if self._error_count % 100 == 0:
                 logger.error("binance_ws.process_error",
                             error=str(e), total_errors=self._error_count)
 
+        if self._msg_count % STATS_LOG_EVERY == 0:
+            st = self._client.stats()
+            logger.info("binance_ws.stats",
+                       msgs=self._msg_count, errors=self._error_count,
+                       shards=st['shards'], drops=st['drops'],
+                       max_lag_ms=st['max_lag_ms'],
+                       cached_symbols=len(kline_cache.symbols()))
+
     def _handle_kline(self, data: dict):
         """处理 K线消息"""
         k = data.get('k', {})
@@ -143,6 +117,10 @@ class BinanceWebSocket:
 
         kline_cache.update(symbol, interval, kline)
 
+        # 流式指标: 收盘 K线 O(1) 增量更新
+        if kline.is_closed:
+            indicator_hub.on_kline(symbol, interval, kline)
+
         # 更新价格
         market_data.update_price(symbol, kline.close)
 
@@ -166,9 +144,16 @@ class BinanceWebSocket:
 
     @property
     def stats(self) -> dict:
+        st = self._client.stats()
         return {
-            'connected': self._connected,
+            'connected': self._client.connected,
             'messages': self._msg_count,
-            'errors': self._error_count,
+            'errors': self._error_count + st['errors'],
             'symbols': len(self.symbols),
+            'shards': st['shards'],
+            'streams': st['streams'],
+            'drops': st['drops'],
+            'max_lag_ms': st['max_lag_ms'],
+            'json': st['json'],
+            'per_shard': st['per_shard'],
         }
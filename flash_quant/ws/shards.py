@@ -0,0 +1,330 @@
+"""
+多连接分片 WebSocket 订阅层 (Binance 组合流)
+
+- 每个连接 (shard) 最多 STREAMS_PER_SHARD 个 stream, 超出自动开新连接, 不再截断
+- 动态 SUBSCRIBE / UNSUBSCRIBE: 在已有连接上发控制消息, 不重连
+- 每个 shard 一个读协程 + 一个处理协程, 中间是有界队列:
+  读端只收包不解析, 处理端批量解析 (有 orjson 用 orjson) 并分发
+- 队列满时 aggTrade 丢弃 (计入 drops), K线消息等待入队 (不丢收盘 K线)
+- 每个 shard 统计: 消息数 / 丢弃数 / 重连数 / 事件延迟 (now - E) / 队列深度
+"""
+import asyncio
+import json
+import time
+import websockets
+from core.logger import get_logger
+
+try:
+    import orjson
+    _loads = orjson.loads
+    JSON_BACKEND = 'orjson'
+except ImportError:  # pragma: no cover - 取决于部署环境
+    _loads = json.loads
+    JSON_BACKEND = 'json'
+
+logger = get_logger('ws_shards')
+
+BINANCE_FUTURES_STREAM = "wss://fstream.binance.com/stream"
+
+STREAMS_PER_SHARD = 200     # Binance 单连接 stream 上限
+QUEUE_SIZE = 20000          # 每个 shard 待处理消息上限
+PROCESS_BATCH = 500         # 处理端每批最多处理条数, 之后让出事件循环
+SUBSCRIBE_CHUNK = 100       # 单条 SUBSCRIBE 消息最多 stream 数
+CONTROL_MSG_INTERVAL = 0.2  # 控制消息间隔 (Binance 限 10 条/秒/连接)
+MAX_RETRY = 20
+LAG_EWMA_ALPHA = 0.05
+
+
+class StreamShard:
+    """一个 WebSocket 连接及其订阅的 stream 集合"""
+
+    def __init__(self, shard_id: int, on_message, base_url: str = BINANCE_FUTURES_STREAM,
+                 connect=None, queue_size: int = QUEUE_SIZE, clock=time.time):
+        self.shard_id = shard_id
+        self.streams = set()
+        self._on_message = on_message
+        self._base_url = base_url
+        self._connect = connect or websockets.connect
+        self._clock = clock
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._ws = None
+        self._running = False
+        self._req_id = 0
+        self._control_lock = asyncio.Lock()
+
+        self.connected = False
+        self.messages = 0
+        self.drops = 0
+        self.errors = 0
+        self.reconnects = 0
+        self.lag_ms = 0.0           # 事件延迟 EWMA
+        self.max_lag_ms = 0.0
+
+    # ─── 订阅管理 ──────────────────────────────────────────
+
+    @property
+    def free_slots(self) -> int:
+        return STREAMS_PER_SHARD - len(self.streams)
+
+    def url(self) -> str:
+        if not self.streams:
+            return self._base_url
+        return self._base_url + "?streams=" + "/".join(sorted(self.streams))
+
+    async def subscribe(self, streams: list):
+        new = [s for s in streams if s not in self.streams]
+        self.streams.update(new)
+        await self._send_control('SUBSCRIBE', new)
+
+    async def unsubscribe(self, streams: list):
+        gone = [s for s in streams if s in self.streams]
+        self.streams.difference_update(gone)
+        await self._send_control('UNSUBSCRIBE', gone)
+
+    async def _send_control(self, method: str, streams: list):
+        """连接在线时发控制消息; 离线时只改集合, 重连 URL 自然带上"""
+        if not streams or self._ws is None:
+            return
+        async with self._control_lock:
+            for i in range(0, len(streams), SUBSCRIBE_CHUNK):
+                self._req_id += 1
+                try:
+                    await self._ws.send(json.dumps({
+                        'method': method,
+                        'params': streams[i:i + SUBSCRIBE_CHUNK],
+                        'id': self._req_id,
+                    }))
+                except Exception as e:
+                    # 连接已断, 重连时用最新集合
+                    logger.warning("ws_shard.control_failed", shard=self.shard_id,
+                                   method=method, error=str(e))
+                    return
+                await asyncio.sleep(CONTROL_MSG_INTERVAL)
+
+    # ─── 运行 ──────────────────────────────────────────────
+
+    async def run(self):
+        self._running = True
+        processor = asyncio.create_task(self._process_loop())
+        retry = 0
+        try:
+            while self._running and retry < MAX_RETRY:
+                try:
+                    in_url = set(self.streams)
+                    async with self._connect(
+                        self.url(), ping_interval=20, ping_timeout=10,
+                        max_size=10 * 1024 * 1024,
+                    ) as ws:
+                        self._ws = ws
+                        self.connected = True
+                        retry = 0
+                        logger.info("ws_shard.connected", shard=self.shard_id,
+                                    streams=len(self.streams))
+                        # 建连期间集合有变 (URL 已生成): 补发控制消息
+                        await self._send_control('SUBSCRIBE', sorted(self.streams - in_url))
+                        await self._send_control('UNSUBSCRIBE', sorted(in_url - self.streams))
+                        async for raw in ws:
+                            await self._enqueue(raw)
+                    if not self._running:
+                        break
+                    raise ConnectionError("stream ended")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self._ws = None
+                    self.connected = False
+                    if not self._running:
+                        break
+                    retry += 1
+                    self.reconnects += 1
+                    wait = min(2 ** retry, 60)
+                    logger.warning("ws_shard.disconnected", shard=self.shard_id,
+                                   error=str(e), retry=retry, wait=wait)
+                    await asyncio.sleep(wait)
+            if retry >= MAX_RETRY:
+                logger.error("ws_shard.max_retries_reached", shard=self.shard_id,
+                             max_retry=MAX_RETRY)
+        finally:
+            self._ws = None
+            self.connected = False
+            processor.cancel()
+
+    def stop(self):
+        self._running = False
+        ws = self._ws
+        if ws is not None:
+            asyncio.ensure_future(ws.close())
+
+    async def _enqueue(self, raw):
+        q = self._queue
+        if not q.full():
+            q.put_nowait(raw)
+            return
+        head = raw[:64]
+        if (b'@aggTrade' if isinstance(head, bytes) else '@aggTrade') in head:
+            self.drops += 1
+            return
+        await q.put(raw)    # K线/其他: 等处理端消化 (背压到 socket)
+
+    async def _process_loop(self):
+        q = self._queue
+        while True:
+            raw = await q.get()
+            self._handle(raw)
+            # 一次最多处理 PROCESS_BATCH 条, 然后让出事件循环
+            for _ in range(PROCESS_BATCH - 1):
+                try:
+                    raw = q.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                self._handle(raw)
+            await asyncio.sleep(0)
+
+    def _handle(self, raw):
+        self.messages += 1
+        try:
+            msg = _loads(raw)
+            stream = msg.get('stream')
+            if stream is None:
+                return  # SUBSCRIBE 回执等
+            data = msg.get('data') or {}
+            event_ms = data.get('E')
+            if event_ms:
+                lag = self._clock() * 1000 - event_ms
+                self.lag_ms += LAG_EWMA_ALPHA * (lag - self.lag_ms)
+                if lag > self.max_lag_ms:
+                    self.max_lag_ms = lag
+            self._on_message(stream, data)
+        except Exception as e:
+            self.errors += 1
+            if self.errors % 100 == 1:
+                logger.error("ws_shard.process_error", shard=self.shard_id,
+                             error=str(e), total_errors=self.errors)
+
+    def stats(self) -> dict:
+        return {
+            'shard': self.shard_id,
+            'connected': self.connected,
+            'streams': len(self.streams),
+            'messages': self.messages,
+            'drops': self.drops,
+            'errors': self.errors,
+            'reconnects': self.reconnects,
+            'queue': self._queue.qsize(),
+            'lag_ms': round(self.lag_ms, 1),
+            'max_lag_ms': round(self.max_lag_ms, 1),
+        }
+
+
+class ShardedStreamClient:
+    """把任意数量的 stream 分摊到多个 StreamShard 连接"""
+
+    def __init__(self, on_message, base_url: str = BINANCE_FUTURES_STREAM,
+                 connect=None, queue_size: int = QUEUE_SIZE, clock=time.time):
+        self._on_message = on_message
+        self._base_url = base_url
+        self._connect = connect
+        self._queue_size = queue_size
+        self._clock = clock
+        self.shards = []
+        self._tasks = {}
+        self._running = False
+        self._stopped = None
+
+    def _new_shard(self) -> StreamShard:
+        shard = StreamShard(len(self.shards), self._on_message, self._base_url,
+                            connect=self._connect, queue_size=self._queue_size,
+                            clock=self._clock)
+        self.shards.append(shard)
+        return shard
+
+    def _start(self, shard: StreamShard):
+        """运行中启动 shard 连接; 没有 stream 的 shard 不建连"""
+        if self._running and shard.streams and shard.shard_id not in self._tasks:
+            self._tasks[shard.shard_id] = asyncio.create_task(shard.run())
+
+    def _plan(self, streams: list) -> dict:
+        """按顺序填满现有 shard 的空位, 不够再开新 shard. 返回 {shard: [streams]}"""
+        owned = self.owned_streams()
+        todo = [s for s in dict.fromkeys(streams) if s not in owned]
+        plan = {}
+        for shard in self.shards:
+            if not todo:
+                break
+            take, todo = todo[:shard.free_slots], todo[shard.free_slots:]
+            if take:
+                plan[shard] = take
+        while todo:
+            shard = self._new_shard()
+            take, todo = todo[:STREAMS_PER_SHARD], todo[STREAMS_PER_SHARD:]
+            plan[shard] = take
+        return plan
+
+    def owned_streams(self) -> set:
+        out = set()
+        for shard in self.shards:
+            out |= shard.streams
+        return out
+
+    def add_streams(self, streams: list):
+        """启动前规划订阅 (只改集合, run() 时按集合建连接)"""
+        for shard, take in self._plan(streams).items():
+            shard.streams.update(take)
+
+    async def subscribe(self, streams: list):
+        """运行中追加订阅: 有空位的 shard 发 SUBSCRIBE, 不够则开新连接
+
+        新 shard 先填满集合再启动, 建连 URL 即带上全部 stream
+        """
+        for shard, take in self._plan(streams).items():
+            if shard.shard_id in self._tasks:
+                await shard.subscribe(take)
+            else:
+                shard.streams.update(take)
+                self._start(shard)
+
+    async def unsubscribe(self, streams: list):
+        wanted = set(streams)
+        for shard in self.shards:
+            gone = [s for s in shard.streams if s in wanted]
+            if gone:
+                await shard.unsubscribe(gone)
+
+    async def run(self):
+        self._running = True
+        self._stopped = asyncio.Event()
+        for shard in self.shards:
+            self._start(shard)
+        logger.info("ws_shards.started", shards=len(self._tasks),
+                    streams=len(self.owned_streams()), json=JSON_BACKEND)
+        try:
+            await self._stopped.wait()
+        finally:
+            self._running = False
+            for task in self._tasks.values():
+                task.cancel()
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            self._tasks.clear()
+
+    def stop(self):
+        for shard in self.shards:
+            shard.stop()
+        if self._stopped is not None:
+            self._stopped.set()
+
+    @property
+    def connected(self) -> bool:
+        return bool(self.shards) and all(s.connected for s in self.shards if s.streams)
+
+    def stats(self) -> dict:
+        shards = [s.stats() for s in self.shards]
+        return {
+            'shards': len(shards),
+            'streams': sum(s['streams'] for s in shards),
+            'messages': sum(s['messages'] for s in shards),
+            'drops': sum(s['drops'] for s in shards),
+            'errors': sum(s['errors'] for s in shards),
+            'max_lag_ms': max((s['max_lag_ms'] for s in shards), default=0),
+            'json': JSON_BACKEND,
+            'per_shard': shards,
+        }
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回测速度 - 预计算指标 vs 逐根重算 (一年1h K线)
+
+python tests/performance/performance_test_backtest_speed.py 打印各策略耗时
+pytest tests/performance/performance_test_backtest_speed.py 断言加速比（按墙钟时间，机器繁忙时可能波动，
+不在默认的 pytest tests/ 收集范围内；结果一致性由 tests/unit/test_backtest_indicators.py 保证）
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'unit'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'xmr_monitor'))
+
+import backtest_indicators
+from backtest_engine import run_backtest
+from test_backtest_indicators import CONFIGS, make_candles
+
+
+def benchmark(n_bars=8760):
+    candles = make_candles(n_bars, 1)
+    rows = []
+    for name, config in sorted(CONFIGS.items()):
+        t0 = time.perf_counter()
+        run_backtest(candles, dict(config, precompute_indicators=False))
+        per_bar = time.perf_counter() - t0
+
+        backtest_indicators.clear_cache()
+        t0 = time.perf_counter()
+        run_backtest(candles, config)
+        cold = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        run_backtest(candles, config)
+        cached = time.perf_counter() - t0
+        rows.append((name, per_bar, cold, cached))
+    return rows
+
+
+def test_precompute_faster():
+    for name, per_bar, cold, cached in benchmark(3000):
+        assert cold < per_bar / 3, name
+        assert cached <= cold * 1.5, name
+
+
+if __name__ == '__main__':
+    print(f"{'策略':<6}{'逐根重算':>10}{'预计算':>10}{'缓存命中':>10}{'加速':>8}")
+    for name, per_bar, cold, cached in benchmark():
+        print(f"{name:<6}{per_bar:>9.2f}s{cold:>9.3f}s{cached:>9.3f}s{per_bar / cold:>7.1f}x")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回测指标预计算 - 与逐根重算的参考实现逐位一致
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'xmr_monitor'))
+
+import pytest
+
+from backtest_engine import CandleFeatures, run_backtest
+from backtest_indicators import IndicatorFrame, get_indicator_frame
+
+FEATURES = ['rsi', 'ma7', 'ma20', 'ma50', 'ma20_prev5', 'volume_ratio', 'price_position',
+            'atr', 'atr_pct', 'macd', 'bb', 'adx']
+TRAILS = [(5, 0.5, 10, 3.0), (7, 1.0, 21, 2.0)]
+
+# 各策略模式 (对应 v1-v9 预设的信号函数)
+CONFIGS = {
+    'v4': {'min_score': 60},
+    'v5': {'v5_mode': True, 'min_score': 50, 'adx_min_threshold': 20},
+    'v6': {'v6_mode': True, 'min_score': 55, 'adx_min_threshold': 15},
+    'v6b': {'v6b_mode': True, 'min_score': 60},
+    'v8': {'v8_mode': True, 'min_score': 50},
+    'v9': {'v9_mode': True, 'min_score': 55, 'v8_fast_atr_period': 3},
+}
+
+
+def make_candles(n, seed, flat=None):
+    """随机游走K线；flat=(start, end) 区间内为零波幅K线 (ADX 无效窗口)"""
+    rnd = random.Random(seed)
+    price = 100.0
+    candles = []
+    for i in range(n):
+        t = 1_700_000_000_000 + i * 3600000
+        if flat and flat[0] <= i < flat[1]:
+            candles.append({'time': t, 'open': price, 'high': price, 'low': price,
+                            'close': price, 'volume': 1.0})
+            continue
+        open_ = price
+        price *= 1 + rnd.gauss(0, 0.012)
+        candles.append({
+            'time': t, 'open': open_, 'close': price,
+            'high': max(open_, price) * (1 + abs(rnd.gauss(0, 0.004))),
+            'low': min(open_, price) * (1 - abs(rnd.gauss(0, 0.004))),
+            'volume': rnd.uniform(500, 2000),
+        })
+    return candles
+
+
+@pytest.mark.parametrize('flat', [None, (300, 450)])
+def test_features_match_per_bar(flat):
+    candles = make_candles(700, 3, flat)
+    frame = IndicatorFrame(candles)
+    for i in range(99, len(candles)):
+        ref = CandleFeatures(candles[i - 99:i + 1])
+        got = frame.at(i)
+        for key in FEATURES:
+            assert got[key] == ref[key], (i, key)
+        for params in TRAILS:
+            assert got.trail(*params) == ref.trail(*params), (i, params)
+
+
+@pytest.mark.parametrize('name', sorted(CONFIGS))
+def test_backtest_results_identical(name):
+    candles = make_candles(1500, 7)
+    config = dict(CONFIGS[name], initial_capital=2000)
+    fast = run_backtest(candles, config)
+    slow = run_backtest(candles, dict(config, precompute_indicators=False))
+    assert fast == slow
+    assert slow['summary']['total_trades'] > 0
+
+
+def test_frame_cached_per_candle_series():
+    candles = make_candles(300, 1)
+    frame = get_indicator_frame(candles)
+    assert get_indicator_frame(candles) is frame
+    assert get_indicator_frame(list(candles)) is not frame
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回测任务队列 - 结果缓存、任务生命周期与取消、同步接口路径
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'xmr_monitor'))
+os.environ['BACKTEST_WORKERS'] = '1'
+
+import pytest
+
+import backtest_data
+import backtest_jobs
+from backtest_data import base_backtest_config
+from backtest_engine import run_backtest
+from backtest_jobs import JobError, JobPlan, ResultCache, Task
+
+# dashboard 导入时会初始化生产路径下的回测库，这里先跳过，测试里指向临时库
+_init_backtest_db = backtest_data.init_backtest_db
+backtest_data.init_backtest_db = lambda *a, **kw: None
+try:
+    import trading_assistant_dashboard as dashboard
+finally:
+    backtest_data.init_backtest_db = _init_backtest_db
+
+STRATEGIES = ['v1', 'v2']
+CALLS = []
+
+
+def make_candles(symbol, year, n=600):
+    rnd = random.Random(f'{symbol}-{year}')
+    price = 100.0
+    candles = []
+    for i in range(n):
+        open_ = price
+        price *= 1 + rnd.gauss(0, 0.012)
+        candles.append({
+            'time': 1_700_000_000_000 + i * 3600000, 'open': open_, 'close': price,
+            'high': max(open_, price) * (1 + abs(rnd.gauss(0, 0.004))),
+            'low': min(open_, price) * (1 - abs(rnd.gauss(0, 0.004))),
+            'volume': rnd.uniform(500, 2000),
+        })
+    return candles
+
+
+def fake_klines(symbol, year):
+    """NODATA 没有K线，BAD 加载出错"""
+    CALLS.append((symbol, year))
+    if symbol == 'NODATA':
+        return []
+    if symbol == 'BAD':
+        raise RuntimeError('boom')
+    return make_candles(symbol, year)
+
+
+def make_plan(symbols, years=(2021,), full=False, finalize=None):
+    tasks = [Task(s, y, st, base_backtest_config(1000, st), meta={'symbol': s, 'year': y, 'strategy': st})
+             for s in symbols for y in years for st in STRATEGIES]
+    return JobPlan('scan', tasks, finalize or (lambda results: results), full=full)
+
+
+@pytest.fixture(autouse=True)
+def fresh_queue(monkeypatch):
+    monkeypatch.setattr(backtest_jobs, 'BACKTEST_WORKERS', 1)
+    monkeypatch.setattr(backtest_jobs, 'result_cache', ResultCache())
+    CALLS.clear()
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """统计实际执行的回测条数"""
+    runs = []
+    run_batch = backtest_jobs._run_batch
+
+    def counting(candles, configs, full):
+        runs.extend(configs)
+        return run_batch(candles, configs, full)
+
+    monkeypatch.setattr(backtest_jobs, '_run_batch', counting)
+    return runs
+
+
+def run(plan, load_candles=fake_klines):
+    job = backtest_jobs.submit(plan, load_candles)
+    assert job.wait(timeout=60)
+    return job
+
+
+# ==================== 结果缓存 ====================
+
+class TestResultCache:
+
+    def test_summary_lookup_served_from_full_result(self):
+        cache = ResultCache()
+        full = {'summary': {'total_trades': 3}, 'trades': [1, 2, 3]}
+        cache.put('k', True, full)
+        assert cache.get('k', False) is full
+        assert cache.get('k', True) is full
+
+    def test_full_lookup_not_served_from_summary(self):
+        cache = ResultCache()
+        cache.put('k', False, {'summary': {}})
+        assert cache.get('k', True) is None
+        assert cache.stats() == {'size': 1, 'max': cache.max_items, 'hits': 0, 'misses': 1}
+
+    def test_lru_eviction(self):
+        cache = ResultCache(max_items=2)
+        cache.put('a', False, 1)
+        cache.put('b', False, 2)
+        assert cache.get('a', False) == 1
+        cache.put('c', False, 3)
+        assert cache.get('b', False) is None
+        assert cache.get('a', False) == 1 and cache.get('c', False) == 3
+
+
+# ==================== 任务生命周期 ====================
+
+class TestJobLifecycle:
+
+    def test_results_match_direct_backtest(self, batches):
+        job = run(make_plan(['AAA', 'BBB'], years=(2021, 2022)))
+        assert job.status == 'done'
+        assert job.done == job.total == 8 and job.cached == 0
+        # K线按 (币种, 年份) 只加载一次
+        assert sorted(CALLS) == [('AAA', 2021), ('AAA', 2022), ('BBB', 2021), ('BBB', 2022)]
+        assert len(batches) == 8
+        for task, result in zip(job.plan.tasks, job.result):
+            expected = run_backtest(make_candles(task.symbol, task.year), task.config)
+            assert result == {'summary': expected['summary']}
+
+        d = job.to_dict(since=6)
+        assert d['progress'] == 100.0 and d['next'] == 8
+        assert len(d['partial']) == 2 and d['result'] == job.result
+        assert backtest_jobs.get_job(job.id) is job
+        assert backtest_jobs.list_jobs()[0]['job_id'] == job.id
+
+    def test_no_data_tasks_recorded_as_none(self):
+        job = run(make_plan(['NODATA', 'AAA']))
+        assert job.status == 'done'
+        assert job.result[:2] == [None, None] and job.result[2] is not None
+        assert [p['no_data'] for p in job.partial] == [True, True, False, False]
+
+    def test_repeat_served_from_cache(self, batches):
+        run(make_plan(['AAA']))
+        batches.clear()
+        job = run(make_plan(['AAA']))
+        assert job.cached == job.total == 2 and batches == []
+
+    def test_summary_job_served_from_cached_full_results(self, batches):
+        full = run(make_plan(['AAA'], full=True))
+        assert 'trades' in full.result[0]
+        batches.clear()
+        summary = run(make_plan(['AAA'], full=False))
+        assert summary.cached == 2 and batches == []
+        assert summary.result[0]['summary'] == full.result[0]['summary']
+
+        # 只有 summary 的缓存不能满足完整结果请求
+        backtest_jobs.result_cache = ResultCache()
+        run(make_plan(['BBB'], full=False))
+        batches.clear()
+        job = run(make_plan(['BBB'], full=True))
+        assert job.cached == 0 and len(batches) == 2
+
+    def test_changed_config_misses_cache(self, batches):
+        run(make_plan(['AAA']))
+        batches.clear()
+        plan = make_plan(['AAA'])
+        plan.tasks[0].config = dict(plan.tasks[0].config, initial_capital=5000)
+        job = run(plan)
+        assert job.cached == 1 and len(batches) == 1
+
+    def test_finalize_job_error(self):
+        def finalize(results):
+            raise JobError('没有数据', status=404)
+        job = run(make_plan(['AAA'], finalize=finalize))
+        assert (job.status, job.error, job.error_status) == ('error', '没有数据', 404)
+        assert 'result' not in job.to_dict()
+
+    def test_load_error_fails_job(self):
+        job = run(make_plan(['BAD']))
+        assert job.status == 'error' and job.error == 'boom'
+        assert job.error_status == 500
+
+    def test_cancel_between_groups(self, batches):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_klines(symbol, year):
+            CALLS.append((symbol, year))
+            started.set()
+            release.wait(10)
+            return make_candles(symbol, year)
+
+        job = backtest_jobs.submit(make_plan(['AAA', 'BBB', 'CCC']), slow_klines)
+        assert started.wait(10)
+        assert backtest_jobs.cancel_job(job.id) is job
+        release.set()
+        assert job.wait(timeout=30)
+        assert job.status == 'cancelled' and job.result is None
+        assert CALLS == [('AAA', 2021)]
+        assert job.done == 2 and len(batches) == 2
+        assert backtest_jobs.cancel_job('missing') is None
+
+    def test_pool_loads_next_group_only_when_one_finishes(self, monkeypatch):
+        monkeypatch.setattr(backtest_jobs, 'BACKTEST_WORKERS', 2)
+        pool = ThreadPoolExecutor(2)
+        monkeypatch.setattr(backtest_jobs, 'get_pool', lambda: pool)
+        gate = threading.Event()
+        run_batch = backtest_jobs._run_batch
+
+        def gated(candles, configs, full):
+            gate.wait(10)
+            return run_batch(candles, configs, full)
+
+        monkeypatch.setattr(backtest_jobs, '_run_batch', gated)
+        symbols = [f'S{i}' for i in range(10)]
+        job = backtest_jobs.submit(make_plan(symbols), fake_klines)
+        time.sleep(0.3)
+        # 子进程都卡住时，父进程只加载 workers*GROUPS_PER_WORKER 组K线
+        assert len(CALLS) == 2 * backtest_jobs.GROUPS_PER_WORKER
+        gate.set()
+        assert job.wait(timeout=60)
+        pool.shutdown()
+        assert job.status == 'done' and len(CALLS) == 10
+        for task, result in zip(job.plan.tasks, job.result):
+            expected = run_backtest(make_candles(task.symbol, task.year), task.config)
+            assert result == {'summary': expected['summary']}
+
+    def test_wait_change_sees_progress(self):
+        job = backtest_jobs.submit(make_plan(['AAA']), fake_klines)
+        seen = 0
+        while not job.finished:
+            seen = job.wait_change(seen, timeout=10)
+        assert job.version == seen and job.version >= job.total
+
+
+# ==================== 同步接口 ====================
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    db = str(tmp_path / 'backtest_history.db')
+    backtest_data.init_backtest_db(db)
+    monkeypatch.setattr(dashboard, 'BACKTEST_DB', db)
+    monkeypatch.setattr(dashboard, 'fetch_historical_klines', fake_klines)
+    dashboard.app.config['TESTING'] = True
+    return dashboard.app.test_client(), db
+
+
+class TestDispatchSync:
+
+    def test_run_returns_result_and_saves(self, client):
+        client, db = client
+        resp = client.post('/api/backtest/run', json={'symbol': 'AAA', 'year': 2021, 'strategy': 'v2'})
+        assert resp.status_code == 200
+        body = resp.get_json()
+        expected = run_backtest(make_candles('AAA', 2021), base_backtest_config(1000, 'v2'))
+        assert body['summary'] == expected['summary']
+
+        conn = sqlite3.connect(db)
+        saved = conn.execute('SELECT id, symbol, year, strategy_version FROM backtest_runs').fetchall()
+        conn.close()
+        assert saved == [(body['run_id'], 'AAA', 2021, 'v2')]
+
+    def test_cached_result_not_mutated(self, client):
+        client, _ = client
+        first = client.post('/api/backtest/run', json={'symbol': 'AAA', 'year': 2021}).get_json()
+        second = client.post('/api/backtest/run', json={'symbol': 'AAA', 'year': 2021}).get_json()
+        assert second['run_id'] == first['run_id'] + 1
+        assert backtest_jobs.result_cache.stats()['hits'] == 1
+        cached = backtest_jobs.result_cache.get(next(iter(backtest_jobs.result_cache._data))[0], True)
+        assert 'run_id' not in cached
+
+    def test_job_error_status_returned(self, client):
+        client, _ = client
+        resp = client.post('/api/backtest/run', json={'symbol': 'NODATA', 'year': 2021})
+        assert resp.status_code == 400
+        assert resp.get_json() == {'error': 'NODATA 在 2021 年没有数据'}
+
+    def test_async_returns_job(self, client):
+        client, _ = client
+        resp = client.post('/api/backtest/run?async=1', json={'symbol': 'AAA', 'year': 2021})
+        assert resp.status_code == 202
+        job_id = resp.get_json()['job_id']
+        assert backtest_jobs.get_job(job_id).wait(timeout=60)
+        status = client.get(f'/api/jobs/{job_id}').get_json()
+        assert status['status'] == 'done' and 'run_id' in status['result']
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量回测 - 并行结果与直接回测一致、批量写库、断点续跑
+"""
+
+import os
+import random
+import sqlite3
+import sys
+from concurrent.futures import Future
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'xmr_monitor'))
+
+import pytest
+
+import batch_backtest
+from backtest_data import SymbolNotListed, base_backtest_config
+from backtest_engine import run_backtest
+
+STRATEGIES = ['v1', 'v2', 'v4.1']
+CALLS = []
+
+
+def make_candles(symbol, year, n=600):
+    rnd = random.Random(f'{symbol}-{year}')
+    price = 100.0
+    candles = []
+    for i in range(n):
+        open_ = price
+        price *= 1 + rnd.gauss(0, 0.012)
+        candles.append({
+            'time': 1_700_000_000_000 + i * 3600000, 'open': open_, 'close': price,
+            'high': max(open_, price) * (1 + abs(rnd.gauss(0, 0.004))),
+            'low': min(open_, price) * (1 - abs(rnd.gauss(0, 0.004))),
+            'volume': rnd.uniform(500, 2000),
+        })
+    return candles
+
+
+def fake_klines(symbol, year):
+    """NODATA 没拉到K线，UNLISTED 交易所确认未上市，BAD 加载出错"""
+    CALLS.append((symbol, year))
+    if symbol == 'NODATA':
+        return []
+    if symbol == 'UNLISTED':
+        raise SymbolNotListed(symbol)
+    if symbol == 'BAD':
+        raise RuntimeError('boom')
+    return make_candles(symbol, year)
+
+
+def sweep(db, symbols, workers=1, **kw):
+    return batch_backtest.run_sweep(symbols, [2021, 2022], STRATEGIES, db_path=str(db),
+                                    workers=workers, load_candles=fake_klines,
+                                    log=lambda *a: None, **kw)
+
+
+def rows(db):
+    conn = sqlite3.connect(str(db))
+    runs = conn.execute('SELECT symbol, year, strategy_version, final_capital, total_trades, note '
+                        'FROM backtest_runs ORDER BY symbol, year, strategy_version').fetchall()
+    trades = conn.execute('SELECT COUNT(*) FROM backtest_trades').fetchone()[0]
+    conn.close()
+    return runs, trades
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_sweep_matches_direct_backtest(tmp_path, workers):
+    db = tmp_path / 'bt.db'
+    stats = sweep(db, ['AAA', 'BBB'], workers=workers)
+    assert stats.runs == 12 and stats.errors == 0
+
+    runs, trades = rows(db)
+    assert len(runs) == 12
+    expected_trades = 0
+    for symbol, year, strategy, final_capital, total_trades, note in runs:
+        r = run_backtest(make_candles(symbol, year), base_backtest_config(2000, strategy))
+        assert final_capital == r['summary']['final_capital']
+        assert total_trades == r['summary']['total_trades']
+        assert note == f'batch_{year}'
+        expected_trades += len(r['trades'])
+    assert trades == expected_trades
+
+
+def test_resume_skips_completed_and_not_listed(tmp_path):
+    db = tmp_path / 'bt.db'
+    CALLS.clear()
+    first = sweep(db, ['AAA', 'NODATA', 'UNLISTED'])
+    assert (first.runs, first.no_data) == (6, 4)
+    assert os.path.exists(batch_backtest.default_checkpoint_path(str(db)))
+
+    CALLS.clear()
+    second = sweep(db, ['AAA', 'NODATA', 'UNLISTED', 'BBB', 'BAD'])
+    # 没拉到K线的 NODATA 重跑时再试，确认未上市的 UNLISTED 跳过
+    assert CALLS == [('NODATA', 2021), ('BBB', 2021), ('BAD', 2021),
+                     ('NODATA', 2022), ('BBB', 2022), ('BAD', 2022)]
+    assert second.skipped == 12
+    assert (second.runs, second.no_data, second.errors) == (6, 2, 2)
+    assert len(rows(db)[0]) == 12
+
+
+def test_changed_params_ignore_checkpoint(tmp_path):
+    db = tmp_path / 'bt.db'
+    sweep(db, ['UNLISTED'])
+    CALLS.clear()
+    stats = sweep(db, ['UNLISTED'], initial_capital=5000)
+    assert len(CALLS) == 2 and stats.no_data == 2
+
+
+class InlinePool:
+    """同步执行的进程池替身，记录提交的任务"""
+
+    submitted = []
+
+    def __init__(self, max_workers):
+        pass
+
+    def submit(self, fn, *args):
+        InlinePool.submitted.append((fn.__name__, args[0], [y for y, _ in args[1]]))
+        fut = Future()
+        fut.set_result(fn(*args))
+        return fut
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_pool_task_owns_all_years_of_a_symbol(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_backtest, 'ProcessPoolExecutor', InlinePool)
+    InlinePool.submitted = []
+    CALLS.clear()
+    stats = sweep(tmp_path / 'bt.db', ['AAA', 'UNLISTED'], workers=2)
+    assert InlinePool.submitted == [('run_symbol', 'AAA', [2021, 2022]),
+                                    ('run_symbol', 'UNLISTED', [2021, 2022])]
+    # 确认未上市后同一币种的其他年份不再请求
+    assert CALLS == [('AAA', 2021), ('AAA', 2022), ('UNLISTED', 2021)]
+    assert (stats.runs, stats.no_data) == (6, 2)
+
+
+def test_summary_only(tmp_path):
+    db = tmp_path / 'bt.db'
+    sweep(db, ['AAA'], keep_trades=False, checkpoint_path='')
+    runs, trades = rows(db)
+    assert len(runs) == 6 and trades == 0
+    assert not os.path.exists(batch_backtest.default_checkpoint_path(str(db)))
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推荐列表 - BTC大盘过滤、分数门槛与排序、线程池复用、快照版本号
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+import pytest
+
+import web_monitor
+
+DOWN = {'direction': 'down', 'strength': 1}
+STRONG_DOWN = {'direction': 'down', 'strength': 2}
+UP = {'direction': 'up', 'strength': 1}
+STRONG_UP = {'direction': 'up', 'strength': 2}
+
+
+class FakeExchange:
+    """只提供 fetch_tickers；K线分析由 analyze_symbol_simple 桩函数负责"""
+
+    def __init__(self, listed):
+        self.listed = listed
+        self.fail = False
+
+    def fetch_tickers(self):
+        if self.fail:
+            raise RuntimeError('tickers unavailable')
+        return {s: {'last': 1.0} for s in self.listed}
+
+
+@pytest.fixture
+def fake_market(monkeypatch):
+    scores = {'AAA/USDT': ('buy', 70), 'BBB/USDT': ('sell', 90),
+              'CCC/USDT': ('buy', 59), 'DDD/USDT': ('sell', 65),
+              'EEE/USDT': ('buy', 80)}
+    exchange = FakeExchange([f'{s}:USDT' for s in scores if s != 'EEE/USDT'])
+    clients = set()
+    lock = threading.Lock()
+
+    def analyze(ex, symbol):
+        with lock:
+            clients.add(id(ex))
+        if symbol not in scores:
+            raise RuntimeError('no data')
+        signal, score = scores[symbol]
+        return {'symbol': symbol, 'signal': signal, 'score': score, 'trend': 'neutral'}
+
+    monkeypatch.setattr(web_monitor, '_futures_exchange', lambda: exchange)
+    monkeypatch.setattr(web_monitor, 'get_btc_trend',
+                        lambda ex: {'direction': 'neutral', 'strength': 0})
+    monkeypatch.setattr(web_monitor, 'analyze_symbol_simple', analyze)
+    return exchange, scores
+
+
+class TestBtcFilter:
+
+    @pytest.mark.parametrize('trend, own, expected', [
+        (DOWN, 'bullish', 60), (STRONG_DOWN, 'neutral', 25), (DOWN, 'neutral', 40),
+    ])
+    def test_buy_penalised_when_btc_down(self, trend, own, expected):
+        result = web_monitor._apply_btc_filter(
+            {'signal': 'buy', 'score': 100, 'trend': own}, trend)
+        assert result['score'] == expected
+        assert result['btc_filter'] == 'BTC下跌,做多惩罚'
+
+    @pytest.mark.parametrize('trend, own, expected', [
+        (UP, 'bearish', 75), (STRONG_UP, 'neutral', 45), (UP, 'neutral', 60),
+    ])
+    def test_sell_penalised_when_btc_up(self, trend, own, expected):
+        result = web_monitor._apply_btc_filter(
+            {'signal': 'sell', 'score': 100, 'trend': own}, trend)
+        assert result['score'] == expected
+        assert result['btc_filter'] == 'BTC上涨,做空惩罚'
+
+    @pytest.mark.parametrize('trend, signal', [
+        (DOWN, 'sell'), (UP, 'buy'), ({'direction': 'neutral', 'strength': 0}, 'buy'),
+    ])
+    def test_same_direction_untouched(self, trend, signal):
+        result = web_monitor._apply_btc_filter({'signal': signal, 'score': 77}, trend)
+        assert result['score'] == 77 and 'btc_filter' not in result
+
+
+class TestComputeRecommendations:
+
+    def test_threshold_and_sort(self, fake_market):
+        recs = web_monitor.compute_recommendations(list(fake_market[1]))
+        # EEE 未上市被批量 ticker 过滤，CCC 低于 60 分门槛
+        assert [r['symbol'] for r in recs] == ['BBB/USDT', 'AAA/USDT', 'DDD/USDT']
+
+    def test_btc_filter_applied_before_threshold(self, fake_market, monkeypatch):
+        monkeypatch.setattr(web_monitor, 'get_btc_trend', lambda ex: STRONG_UP)
+        recs = web_monitor.compute_recommendations(list(fake_market[1]))
+        # 做空 90*0.45=40、65*0.45=29 均被门槛剔除
+        assert [(r['symbol'], r['score']) for r in recs] == [('AAA/USDT', 70)]
+
+    def test_full_list_scanned_when_tickers_fail(self, fake_market):
+        exchange, scores = fake_market
+        exchange.fail = True
+        recs = web_monitor.compute_recommendations(list(scores) + ['ZZZ/USDT'])
+        assert [r['symbol'] for r in recs] == ['BBB/USDT', 'EEE/USDT', 'AAA/USDT', 'DDD/USDT']
+
+    def test_worker_threads_reused_across_refreshes(self, monkeypatch):
+        threads = set()
+        lock = threading.Lock()
+
+        def analyze(ex, symbol):
+            with lock:
+                threads.add(threading.current_thread())
+            return None
+
+        monkeypatch.setattr(web_monitor, 'analyze_symbol_simple', analyze)
+        monkeypatch.setattr(web_monitor, 'get_btc_trend', lambda ex: DOWN)
+        symbols = [f'C{i}/USDT' for i in range(40)]
+        monkeypatch.setattr(web_monitor, '_futures_exchange',
+                            lambda: FakeExchange([f'{s}:USDT' for s in symbols]))
+        for _ in range(5):
+            web_monitor.compute_recommendations(symbols)
+        # 线程（及其线程局部 ccxt 客户端）不随每轮刷新重建
+        assert 0 < len(threads) <= web_monitor.RECOMMEND_WORKERS
+        assert all(t.name.startswith('recommend') for t in threads)
+
+
+class TestRefreshRecommendations:
+
+    @pytest.fixture(autouse=True)
+    def snapshot(self, monkeypatch):
+        snap = {'recommendations': [], 'updated_at': None, 'version': 0,
+                'duration_sec': 0, 'error': None}
+        monkeypatch.setattr(web_monitor, '_reco_snapshot', snap)
+        return snap
+
+    def _compute(self, monkeypatch, recs):
+        def compute():
+            if isinstance(recs, Exception):
+                raise recs
+            return [dict(r) for r in recs]
+        monkeypatch.setattr(web_monitor, 'compute_recommendations', compute)
+
+    def test_version_bumps_only_on_change(self, monkeypatch, snapshot):
+        recs = [{'symbol': 'AAA/USDT', 'signal': 'buy', 'score': 70, 'price': 1.0}]
+        self._compute(monkeypatch, [])
+        web_monitor.refresh_recommendations()
+        assert snapshot['version'] == 1 and snapshot['updated_at']
+
+        self._compute(monkeypatch, recs)
+        web_monitor.refresh_recommendations()
+        assert snapshot['version'] == 2
+
+        # 价格变化不算内容变化
+        self._compute(monkeypatch, [{**recs[0], 'price': 1.1}])
+        web_monitor.refresh_recommendations()
+        assert snapshot['version'] == 2
+        assert snapshot['recommendations'][0]['price'] == 1.1
+
+        self._compute(monkeypatch, [{**recs[0], 'score': 75}])
+        web_monitor.refresh_recommendations()
+        assert snapshot['version'] == 3
+
+    def test_error_keeps_last_list(self, monkeypatch, snapshot):
+        recs = [{'symbol': 'AAA/USDT', 'signal': 'buy', 'score': 70}]
+        self._compute(monkeypatch, recs)
+        web_monitor.refresh_recommendations()
+        updated_at = snapshot['updated_at']
+
+        self._compute(monkeypatch, RuntimeError('exchange down'))
+        web_monitor.refresh_recommendations()
+        assert snapshot['error'] == 'exchange down'
+        assert snapshot['version'] == 1 and snapshot['updated_at'] == updated_at
+        assert snapshot['recommendations'] == recs
+
+    def test_subscribers_woken(self, monkeypatch, snapshot):
+        self._compute(monkeypatch, [])
+        woken = []
+
+        def subscriber():
+            with web_monitor._reco_lock:
+                woken.append(web_monitor._reco_lock.wait_for(
+                    lambda: snapshot['version'] > 0, timeout=5))
+
+        t = threading.Thread(target=subscriber)
+        t.start()
+        web_monitor.refresh_recommendations()
+        t.join(5)
+        assert woken == [True]
@@ -4,12 +4,15 @@
 实时监控Web面板
 """
 
-from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask import Flask, Response, render_template, jsonify, request, send_from_directory
 import sqlite3
 import json
 from datetime import datetime, date
 import os
 import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import ccxt
 import pandas as pd
 import numpy as np
@@ -351,95 +354,224 @@ def get_kline(symbol):
 
 
 
-@app.route('/api/recommendations')
-def get_recommendations():
-    try:
-        symbols = [
-            'BTC/USDT', 'ETH/USDT', 'BNB/USDT', 'SOL/USDT', 'XRP/USDT',
-            'DOGE/USDT', 'ADA/USDT', 'AVAX/USDT', 'DOT/USDT', 'LINK/USDT',
-            'LTC/USDT', 'ATOM/USDT', 'UNI/USDT', 'BCH/USDT', 'TRX/USDT',
-            'NEAR/USDT', 'APT/USDT', 'SUI/USDT', 'SEI/USDT', 'INJ/USDT',
-            'ALGO/USDT', 'STX/USDT', 'HBAR/USDT', 'ICP/USDT', 'FIL/USDT',
-            'ETC/USDT', 'XLM/USDT', 'VET/USDT', 'IOTA/USDT', 'NEO/USDT',
-            'XTZ/USDT', 'KAVA/USDT', 'EGLD/USDT', 'FLOW/USDT',
-            'MINA/USDT', 'CFX/USDT', 'CELO/USDT', 'KSM/USDT', 'ASTR/USDT',
-            'AAVE/USDT', 'MKR/USDT', 'CRV/USDT', 'LDO/USDT', 'ENS/USDT',
-            'PENDLE/USDT', 'RENDER/USDT', 'SNX/USDT', 'COMP/USDT', 'SUSHI/USDT',
-            '1INCH/USDT', 'DYDX/USDT', 'GMX/USDT', 'YFI/USDT',
-            'RPL/USDT', 'LQTY/USDT', 'CVX/USDT', 'CAKE/USDT', 'JOE/USDT',
-            'ARB/USDT', 'OP/USDT', 'TIA/USDT', 'FET/USDT', 'WLD/USDT',
-            'JUP/USDT', 'PYTH/USDT', 'STRK/USDT', 'ZK/USDT', 'MANTA/USDT',
-            'DYM/USDT', 'ONDO/USDT', 'ETHFI/USDT', 'ENA/USDT', 'EIGEN/USDT',
-            'TAO/USDT', 'AR/USDT', 'GRT/USDT', 'METIS/USDT',
-            'IMX/USDT', 'GALA/USDT', 'AXS/USDT', 'SAND/USDT', 'APE/USDT',
-            'MANA/USDT', 'ENJ/USDT', 'ALICE/USDT', 'PIXEL/USDT', 'PORTAL/USDT',
-            'YGG/USDT', 'MAGIC/USDT', 'ILV/USDT', 'BIGTIME/USDT', 'SUPER/USDT',
-            'AGLD/USDT', 'ARKM/USDT', 'JASMY/USDT',
-            'PHB/USDT', 'IO/USDT', 'CGPT/USDT', 'AI/USDT', 'AKT/USDT',
-            'THETA/USDT', 'CHZ/USDT', 'MASK/USDT', 'ANKR/USDT', 'STORJ/USDT',
-            'SSV/USDT', 'GTC/USDT', 'LRC/USDT', 'BAND/USDT', 'API3/USDT',
-            'SKL/USDT', 'CELR/USDT', 'COTI/USDT', 'NMR/USDT', 'RLC/USDT',
-            'WIF/USDT', 'ORDI/USDT', '1000PEPE/USDT', '1000SHIB/USDT', '1000FLOKI/USDT',
-            '1000BONK/USDT', 'BOME/USDT', 'TURBO/USDT', 'PEOPLE/USDT', 'POPCAT/USDT',
-            'NEIRO/USDT', 'MEME/USDT', 'NOT/USDT', 'DOGS/USDT', 'HMSTR/USDT',
-            'TON/USDT', 'KAS/USDT', 'RUNE/USDT', 'RSR/USDT', 'ZEC/USDT',
-            'DASH/USDT', 'ZIL/USDT', 'ONT/USDT', 'QTUM/USDT', 'ROSE/USDT',
-            'ONE/USDT', 'HYPE/USDT', 'VIRTUAL/USDT', 'PNUT/USDT', 'ACE/USDT',
-        ]
-
-        recommendations = []
-        exchange = ccxt.binance({
+# ==================== 策略推荐（后台预计算） ====================
+# 推荐列表由后台线程按固定间隔计算并缓存在内存中，
+# /api/recommendations 直接返回最新快照，不在请求内访问交易所。
+
+RECOMMEND_SYMBOLS = [
+    'BTC/USDT', 'ETH/USDT', 'BNB/USDT', 'SOL/USDT', 'XRP/USDT',
+    'DOGE/USDT', 'ADA/USDT', 'AVAX/USDT', 'DOT/USDT', 'LINK/USDT',
+    'LTC/USDT', 'ATOM/USDT', 'UNI/USDT', 'BCH/USDT', 'TRX/USDT',
+    'NEAR/USDT', 'APT/USDT', 'SUI/USDT', 'SEI/USDT', 'INJ/USDT',
+    'ALGO/USDT', 'STX/USDT', 'HBAR/USDT', 'ICP/USDT', 'FIL/USDT',
+    'ETC/USDT', 'XLM/USDT', 'VET/USDT', 'IOTA/USDT', 'NEO/USDT',
+    'XTZ/USDT', 'KAVA/USDT', 'EGLD/USDT', 'FLOW/USDT',
+    'MINA/USDT', 'CFX/USDT', 'CELO/USDT', 'KSM/USDT', 'ASTR/USDT',
+    'AAVE/USDT', 'MKR/USDT', 'CRV/USDT', 'LDO/USDT', 'ENS/USDT',
+    'PENDLE/USDT', 'RENDER/USDT', 'SNX/USDT', 'COMP/USDT', 'SUSHI/USDT',
+    '1INCH/USDT', 'DYDX/USDT', 'GMX/USDT', 'YFI/USDT',
+    'RPL/USDT', 'LQTY/USDT', 'CVX/USDT', 'CAKE/USDT', 'JOE/USDT',
+    'ARB/USDT', 'OP/USDT', 'TIA/USDT', 'FET/USDT', 'WLD/USDT',
+    'JUP/USDT', 'PYTH/USDT', 'STRK/USDT', 'ZK/USDT', 'MANTA/USDT',
+    'DYM/USDT', 'ONDO/USDT', 'ETHFI/USDT', 'ENA/USDT', 'EIGEN/USDT',
+    'TAO/USDT', 'AR/USDT', 'GRT/USDT', 'METIS/USDT',
+    'IMX/USDT', 'GALA/USDT', 'AXS/USDT', 'SAND/USDT', 'APE/USDT',
+    'MANA/USDT', 'ENJ/USDT', 'ALICE/USDT', 'PIXEL/USDT', 'PORTAL/USDT',
+    'YGG/USDT', 'MAGIC/USDT', 'ILV/USDT', 'BIGTIME/USDT', 'SUPER/USDT',
+    'AGLD/USDT', 'ARKM/USDT', 'JASMY/USDT',
+    'PHB/USDT', 'IO/USDT', 'CGPT/USDT', 'AI/USDT', 'AKT/USDT',
+    'THETA/USDT', 'CHZ/USDT', 'MASK/USDT', 'ANKR/USDT', 'STORJ/USDT',
+    'SSV/USDT', 'GTC/USDT', 'LRC/USDT', 'BAND/USDT', 'API3/USDT',
+    'SKL/USDT', 'CELR/USDT', 'COTI/USDT', 'NMR/USDT', 'RLC/USDT',
+    'WIF/USDT', 'ORDI/USDT', '1000PEPE/USDT', '1000SHIB/USDT', '1000FLOKI/USDT',
+    '1000BONK/USDT', 'BOME/USDT', 'TURBO/USDT', 'PEOPLE/USDT', 'POPCAT/USDT',
+    'NEIRO/USDT', 'MEME/USDT', 'NOT/USDT', 'DOGS/USDT', 'HMSTR/USDT',
+    'TON/USDT', 'KAS/USDT', 'RUNE/USDT', 'RSR/USDT', 'ZEC/USDT',
+    'DASH/USDT', 'ZIL/USDT', 'ONT/USDT', 'QTUM/USDT', 'ROSE/USDT',
+    'ONE/USDT', 'HYPE/USDT', 'VIRTUAL/USDT', 'PNUT/USDT', 'ACE/USDT',
+]
+
+RECOMMEND_REFRESH_SECONDS = int(os.environ.get('RECOMMEND_REFRESH_SECONDS', 120))
+RECOMMEND_WORKERS = int(os.environ.get('RECOMMEND_WORKERS', 8))
+
+_reco_lock = threading.Condition()
+_reco_snapshot = {
+    'recommendations': [],
+    'updated_at': None,     # ISO时间, None = 尚未完成首次计算
+    'version': 0,           # 推荐内容变化时 +1 (SSE推送依据)
+    'duration_sec': 0,
+    'error': None,
+}
+_reco_worker = None
+_exchange_local = threading.local()
+# 常驻线程池：线程跨刷新复用，_futures_exchange 的线程局部客户端才不会每轮重建
+_reco_pool = ThreadPoolExecutor(max_workers=RECOMMEND_WORKERS,
+                                thread_name_prefix='recommend')
+
+
+def _futures_exchange():
+    """每个线程复用一个 ccxt 期货客户端（ccxt 同步客户端不宜跨线程共享）"""
+    ex = getattr(_exchange_local, 'exchange', None)
+    if ex is None:
+        ex = ccxt.binance({
             'enableRateLimit': True,
             'timeout': 10000,
             'options': {'defaultType': 'future'}
         })
+        _exchange_local.exchange = ex
+    return ex
+
+
+def _apply_btc_filter(result, btc_trend):
+    """BTC大盘过滤：逆大盘方向降分"""
+    signal = result.get('signal', '')
+    score = result.get('score', 0)
+    btc_dir = btc_trend['direction']
+    btc_str = btc_trend['strength']
+
+    # 检测个币是否有独立趋势
+    trend = result.get('trend', '')
+    coin_own_trend = trend in ['bullish', 'bearish']
+
+    if btc_dir == 'down' and signal == 'buy':
+        if coin_own_trend:
+            score = int(score * 0.60)
+        elif btc_str >= 2:
+            score = int(score * 0.25)
+        else:
+            score = int(score * 0.40)
+        result['score'] = score
+        result['btc_filter'] = 'BTC下跌,做多惩罚'
+    elif btc_dir == 'up' and signal == 'sell':
+        if coin_own_trend:
+            score = int(score * 0.75)
+        elif btc_str >= 2:
+            score = int(score * 0.45)
+        else:
+            score = int(score * 0.60)
+        result['score'] = score
+        result['btc_filter'] = 'BTC上涨,做空惩罚'
+    return result
 
-        # 获取BTC大盘趋势
-        btc_trend = get_btc_trend(exchange)
 
-        for symbol in symbols:
-            try:
-                result = analyze_symbol_simple(exchange, symbol)
-                if result:
-                    # BTC大盘过滤
-                    signal = result.get('signal', '')
-                    score = result.get('score', 0)
-                    btc_dir = btc_trend['direction']
-                    btc_str = btc_trend['strength']
-
-                    # 检测个币是否有独立趋势
-                    trend = result.get('trend', '')
-                    coin_own_trend = trend in ['bullish', 'bearish']
-
-                    if btc_dir == 'down' and signal == 'buy':
-                        if coin_own_trend:
-                            score = int(score * 0.60)
-                        elif btc_str >= 2:
-                            score = int(score * 0.25)
-                        else:
-                            score = int(score * 0.40)
-                        result['score'] = score
-                        result['btc_filter'] = 'BTC下跌,做多惩罚'
-                    elif btc_dir == 'up' and signal == 'sell':
-                        if coin_own_trend:
-                            score = int(score * 0.75)
-                        elif btc_str >= 2:
-                            score = int(score * 0.45)
-                        else:
-                            score = int(score * 0.60)
-                        result['score'] = score
-                        result['btc_filter'] = 'BTC上涨,做空惩罚'
-
-                    # 过滤后再检查分数门槛
-                    if score >= 60:
-                        recommendations.append(result)
-            except:
-                pass
+def compute_recommendations(symbols=None):
+    """计算一次推荐列表（按分数降序）"""
+    symbols = symbols or RECOMMEND_SYMBOLS
+    exchange = _futures_exchange()
 
-        return jsonify(recommendations)
+    # 一次批量 ticker 请求过滤掉期货市场不存在/已下架的币种
+    try:
+        tickers = exchange.fetch_tickers()
+        listed = [s for s in symbols if s in tickers or f"{s}:USDT" in tickers]
+        if listed:
+            symbols = listed
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        print(f"⚠️ 批量ticker获取失败，按完整列表扫描: {e}")
+
+    # 获取BTC大盘趋势
+    btc_trend = get_btc_trend(exchange)
+
+    def _analyze(symbol):
+        try:
+            return analyze_symbol_simple(_futures_exchange(), symbol)
+        except Exception:
+            return None
+
+    recommendations = []
+    for result in _reco_pool.map(_analyze, symbols):
+        if not result:
+            continue
+        _apply_btc_filter(result, btc_trend)
+        # 过滤后再检查分数门槛
+        if result.get('score', 0) >= 60:
+            recommendations.append(result)
+
+    recommendations.sort(key=lambda r: r.get('score', 0), reverse=True)
+    return recommendations
+
+
+def refresh_recommendations():
+    """计算并发布新快照；内容变化时 version +1 并唤醒SSE订阅者"""
+    started = time.time()
+    try:
+        recommendations = compute_recommendations()
+        error = None
+    except Exception as e:
+        recommendations, error = None, str(e)
+        print(f"❌ 推荐计算失败: {e}")
+
+    with _reco_lock:
+        if recommendations is not None:
+            key = lambda rs: [(r['symbol'], r['signal'], r['score']) for r in rs]
+            if key(recommendations) != key(_reco_snapshot['recommendations']) \
+                    or _reco_snapshot['updated_at'] is None:
+                _reco_snapshot['version'] += 1
+            _reco_snapshot['recommendations'] = recommendations
+            _reco_snapshot['updated_at'] = datetime.now().isoformat()
+        _reco_snapshot['duration_sec'] = round(time.time() - started, 2)
+        _reco_snapshot['error'] = error
+        _reco_lock.notify_all()
+
+
+def _recommendation_loop():
+    while True:
+        refresh_recommendations()
+        time.sleep(RECOMMEND_REFRESH_SECONDS)
+
+
+def start_recommendation_worker():
+    """启动后台推荐刷新线程（幂等）"""
+    global _reco_worker
+    with _reco_lock:
+        if _reco_worker is None or not _reco_worker.is_alive():
+            _reco_worker = threading.Thread(target=_recommendation_loop,
+                                            name='recommendations', daemon=True)
+            _reco_worker.start()
+
+
+def _wait_first_snapshot(timeout=60):
+    start_recommendation_worker()
+    with _reco_lock:
+        _reco_lock.wait_for(lambda: _reco_snapshot['updated_at'] is not None
+                            or _reco_snapshot['error'] is not None, timeout=timeout)
+        return dict(_reco_snapshot)
+
+
+@app.route('/api/recommendations')
+def get_recommendations():
+    """最新推荐快照（内存读取）; ?meta=1 附带更新时间/版本"""
+    snap = _wait_first_snapshot()
+    if snap['updated_at'] is None and snap['error']:
+        return jsonify({'error': snap['error']}), 500
+    if request.args.get('meta'):
+        return jsonify(snap)
+    resp = jsonify(snap['recommendations'])
+    resp.headers['X-Recommendations-Updated'] = snap['updated_at'] or ''
+    resp.headers['X-Recommendations-Version'] = str(snap['version'])
+    return resp
+
+
+@app.route('/api/recommendations/stream')
+def stream_recommendations():
+    """SSE：推荐快照变化时推送（每15秒发送心跳注释）"""
+    start_recommendation_worker()
+
+    def _events():
+        seen = -1
+        while True:
+            with _reco_lock:
+                _reco_lock.wait_for(lambda: _reco_snapshot['version'] != seen, timeout=15)
+                changed = _reco_snapshot['version'] != seen
+                if changed:
+                    seen = _reco_snapshot['version']
+                    payload = json.dumps(_reco_snapshot, ensure_ascii=False)
+            if changed:
+                yield f"event: recommendations\ndata: {payload}\n\n"
+            else:
+                yield ": keepalive\n\n"
 
+    return Response(_events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
 # BTC大盘趋势缓存
@@ -792,4 +924,5 @@ if __name__ == '__main__':
     print("🌐 启动Web监控面板...")
     print("📊 访问地址: http://localhost:5001")
     print("💡 按 Ctrl+C 停止服务器")
+    start_recommendation_worker()
     app.run(debug=False, host='0.0.0.0', port=5001)
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回测数据层 - 币种列表、历史K线、策略预设、回测历史库读写
+
+trading_assistant_dashboard 和 batch_backtest 共用；只依赖 requests/sqlite3，
+不引入 Flask，批量回测子进程可以直接导入。
+"""
+
+import os
+import sqlite3
+import time as _time
+from datetime import datetime, timezone
+
+import requests
+
+# 监控币种列表 (~100个)
+WATCH_SYMBOLS = [
+    # 顶级流动性 (10)
+    'BTC', 'ETH', 'SOL', 'XRP', 'BNB', 'DOGE', 'ADA', 'AVAX', 'LINK', 'DOT',
+    # 主流公链 (15)
+    'NEAR', 'SUI', 'APT', 'ATOM', 'FTM', 'HBAR', 'XLM', 'ETC', 'LTC', 'BCH',
+    'ALGO', 'ICP', 'FIL', 'XMR', 'TRX',
+    # Layer2/DeFi (15)
+    'ARB', 'OP', 'MATIC', 'AAVE', 'UNI', 'CRV', 'DYDX', 'INJ', 'SEI',
+    'STX', 'RUNE', 'SNX', 'COMP', 'MKR', 'LDO',
+    # AI/新叙事 (11)
+    'TAO', 'RENDER', 'FET', 'WLD', 'AGIX', 'OCEAN', 'ARKM', 'PENGU',
+    'AIXBT', 'GRASS', 'CGPT',
+    # 中市值热门 (22)
+    'TIA', 'JUP', 'PYTH', 'JTO', 'ENA', 'STRK', 'ZRO', 'WIF',
+    'SHIB', 'FLOKI', 'TRUMP',
+    'VET', 'AXS', 'ROSE', 'DUSK', 'CHZ', 'ENJ', 'SAND',
+    'ONDO', 'PENDLE', 'EIGEN', 'ETHFI', 'TON',
+    # GameFi/存储/其他 (15)
+    'MANA', 'GALA', 'IMX', 'ORDI', 'SXP', 'ZEC', 'DASH',
+    'WAVES', 'GRT', 'THETA', 'IOTA', 'NEO', 'KAVA', 'ONE', 'CELO',
+    # DeFi/基础设施 (15)
+    'CAKE', 'SUSHI', 'GMX', 'ENS', 'BLUR', 'PEOPLE', 'MASK',
+    '1INCH', 'ANKR', 'AR', 'FLOW', 'EGLD', 'KAS', 'JASMY', 'NOT',
+    # Meme/热点 (14)
+    'NEIRO', 'PNUT', 'POPCAT', 'TURBO', 'MEME', 'BOME', 'DOGS',
+    'FARTCOIN', 'USUAL', 'ME', 'MOODENG', 'SPX', 'ANIME', 'SONIC',
+    # 高波动 (15)
+    'HYPE', 'LINA', 'LEVER', 'ALPHA', 'UNFI',
+    'YGG', 'PIXEL', 'PORTAL', 'XAI', 'DYM', 'MANTA', 'ZK', 'W', 'SAGA', 'RSR',
+    # 跳过但显示 (7) — in SKIP_COINS, shown as skipped in UI
+    'BERA', 'IP', 'LIT', 'TROY', 'VIRTUAL', 'BONK', 'PEPE',
+]
+
+SYMBOL_MAP = {s: f'{s}USDT' for s in WATCH_SYMBOLS}
+# Binance futures uses 1000x prefix for low-price tokens
+SYMBOL_MAP.update({
+    'BONK': '1000BONKUSDT', 'PEPE': '1000PEPEUSDT',
+    'SHIB': '1000SHIBUSDT', 'FLOKI': '1000FLOKIUSDT',
+    'NEIRO': '1000NEIROUSDT',
+})
+
+SKIP_COINS = ['BERA', 'IP', 'LIT', 'TROY', 'VIRTUAL', 'BONK', 'PEPE', 'DUSK', 'FARTCOIN', 'ANIME']
+
+
+# ==============================
+# 历史K线
+# ==============================
+
+# 共享列式K线库 (kline-store 包, 源码在 trading-saas/backtest_2025)，mmap读取 + 只补拉缺失区间
+# 安装: pip install ../trading-saas/backtest_2025 ；未安装时直接走REST拉取
+# KLINE_STORE_DIR 指向 backtest_2025 的数据目录即可与回测脚本共用同一份K线
+try:
+    from kline_store import KlineStore, SymbolNotListed
+    _kline_store = KlineStore(os.environ.get('KLINE_STORE_DIR') or
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                           'data', 'kline_store'))
+except ImportError:
+    _kline_store = None
+
+    class SymbolNotListed(Exception):
+        """交易所确认没有这个合约 (HTTP 400)"""
+
+_kline_cache = {}
+_KLINE_CACHE_MAX = 10  # 最多缓存10个币种-年份，避免内存爆掉
+
+
+def _store_historical_klines(symbol, year, strict=False):
+    """从共享K线库读取一整年的1h K线，缺失部分先增量补拉
+
+    已拉过的区间（包括上市前、下架后等交易所没有K线的部分）记录在K线库里，不会重复请求。
+    """
+    binance_symbol = SYMBOL_MAP.get(symbol, f"{symbol}USDT")
+    start_ms = int(datetime(year, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    end_ms = int(datetime(year, 12, 31, 23, 59, 59, tzinfo=timezone.utc).timestamp() * 1000)
+    try:
+        _kline_store.update(symbol, '1h', start_ms, end_ms, market_symbol=binance_symbol)
+    except SymbolNotListed:
+        if strict:
+            raise
+        return []
+    except Exception as e:
+        print(f"补拉K线失败: {e}")
+    bars = _kline_store.load(symbol, '1h', start_ms, end_ms)
+    return [{'time': t, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+            for t, o, h, l, c, v in bars.tolist()]
+
+
+def fetch_historical_klines(symbol, year, strict=False):
+    """从Binance拉取一整年的1h K线数据
+
+    没有数据时返回空列表；strict=True 时交易所确认未上市则抛 SymbolNotListed，
+    调用方据此区分"确实没有这个币"和"这次没拉到"。
+    """
+    if _kline_store is not None:
+        return _store_historical_klines(symbol, year, strict)
+
+    cache_key = f"{symbol}_{year}"
+    if cache_key in _kline_cache:
+        return _kline_cache[cache_key]
+
+    binance_symbol = SYMBOL_MAP.get(symbol, f"{symbol}USDT")
+    start_dt = datetime(year, 1, 1, tzinfo=timezone.utc)
+    end_dt = datetime(year, 12, 31, 23, 59, 59, tzinfo=timezone.utc)
+    start_ms = int(start_dt.timestamp() * 1000)
+    end_ms = int(end_dt.timestamp() * 1000)
+
+    all_candles = []
+    current_start = start_ms
+    not_listed = False
+
+    while current_start < end_ms:
+        try:
+            url = "https://fapi.binance.com/fapi/v1/klines"
+            params = {
+                'symbol': binance_symbol,
+                'interval': '1h',
+                'startTime': current_start,
+                'endTime': end_ms,
+                'limit': 1500
+            }
+            response = requests.get(url, params=params, timeout=30)
+            if response.status_code == 400:
+                not_listed = True
+                break
+            klines = response.json()
+
+            if not klines or isinstance(klines, dict):
+                break
+
+            for k in klines:
+                all_candles.append({
+                    'time': int(k[0]),
+                    'open': float(k[1]),
+                    'high': float(k[2]),
+                    'low': float(k[3]),
+                    'close': float(k[4]),
+                    'volume': float(k[5])
+                })
+
+            current_start = int(klines[-1][0]) + 3600001
+            if len(klines) < 1500:
+                break
+
+            _time.sleep(0.2)  # 避免API限流
+        except Exception as e:
+            print(f"拉取K线失败: {e}")
+            break
+
+    if not_listed and strict:
+        raise SymbolNotListed(binance_symbol)
+    if all_candles:
+        # 限制缓存大小，避免内存溢出
+        if len(_kline_cache) >= _KLINE_CACHE_MAX:
+            _kline_cache.pop(next(iter(_kline_cache)))
+        _kline_cache[cache_key] = all_candles
+
+    return all_candles
+
+
+# ==============================
+# 回测历史库
+# ==============================
+
+BACKTEST_DB = '/opt/trading-bot/quant-trade-bot/data/db/backtest_history.db'
+
+def init_backtest_db(db_path=BACKTEST_DB):
+    """初始化回测历史数据库"""
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute('''CREATE TABLE IF NOT EXISTS backtest_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        symbol TEXT, year INTEGER, initial_capital REAL,
+        final_capital REAL, total_pnl REAL, win_rate REAL,
+        total_trades INTEGER, win_trades INTEGER, loss_trades INTEGER,
+        max_drawdown REAL, profit_factor REAL,
+        avg_win REAL, avg_loss REAL, best_trade REAL, worst_trade REAL,
+        bankrupt INTEGER, strategy_version TEXT,
+        run_time TEXT, note TEXT
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS backtest_trades (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id INTEGER, trade_id INTEGER,
+        direction TEXT, entry_price REAL, exit_price REAL,
+        amount REAL, leverage INTEGER,
+        pnl REAL, roi REAL, fee REAL, funding_fee REAL,
+        reason TEXT, entry_time TEXT, exit_time TEXT,
+        score INTEGER, stop_moves INTEGER,
+        FOREIGN KEY (run_id) REFERENCES backtest_runs(id)
+    )''')
+    conn.commit()
+    conn.close()
+
+
+# 策略预设
+STRATEGY_PRESETS = {
+    'v1': {
+        'label': 'v1 原始 (Original)',
+        'description': '低门槛/高杠杆/1h冷却',
+        'config': {
+            'min_score': 55,
+            'cooldown': 1,
+            'max_leverage': 10,
+            'enable_trend_filter': False,
+            'roi_stop_loss': -10,
+            'roi_trailing_start': 5,
+            'roi_trailing_distance': 3,
+        }
+    },
+    'v2': {
+        'label': 'v2 稳健 (Conservative)',
+        'description': '高门槛/低杠杆/12h冷却/趋势过滤/ROI模式',
+        'config': {
+            'min_score': 70,
+            'cooldown': 12,
+            'max_leverage': 5,
+            'enable_trend_filter': True,
+            'roi_stop_loss': -8,
+            'roi_trailing_start': 5,
+            'roi_trailing_distance': 3,
+        }
+    },
+    'v3': {
+        'label': 'v3 ROI模式 (ROI-Based)',
+        'description': '宽止损/移动止盈/让利润跑',
+        'config': {
+            'min_score': 60,
+            'cooldown': 4,
+            'max_leverage': 5,
+            'enable_trend_filter': True,
+            'roi_stop_loss': -10,
+            'roi_trailing_start': 8,
+            'roi_trailing_distance': 3,
+        }
+    },
+    'v4.1': {
+        'label': 'v4.1 防守反击',
+        'description': 'LONG≥70/3x杠杆/4h冷却/严格趋势过滤',
+        'config': {
+            'min_score': 60,
+            'long_min_score': 70,
+            'cooldown': 4,
+            'max_leverage': 3,
+            'enable_trend_filter': True,
+            'long_ma_slope_threshold': 0.02,
+            'roi_stop_loss': -10,
+            'roi_trailing_start': 6,
+            'roi_trailing_distance': 3,
+        }
+    },
+    'v4.2': {
+        'label': 'v4.2 扩容版',
+        'description': 'v4.1基础 + 30m冷却 + 20仓位 + 不限方向 + SHORT偏置1.05 + LONG加强过滤',
+        'config': {
+            'min_score': 60,
+            'long_min_score': 70,
+            'cooldown': 1,
+            'max_leverage': 3,
+            'max_positions': 12,
+            'max_same_direction': 12,
+            'short_bias': 1.05,
+            'enable_trend_filter': True,
+            'enable_btc_filter': True,
+            'long_ma_slope_threshold': 0.02,
+            'roi_stop_loss': -10,
+            'roi_trailing_start': 6,
+            'roi_trailing_distance': 3,
+        }
+    },
+    'v4.3': {
+        'label': 'v4.3 动态版',
+        'description': '动态杠杆(3-10x) + 移动止盈(按趋势强度调整启动点和回撤距离)',
+        'config': {
+            'min_score': 60,
+            'long_min_score': 70,
+            'cooldown': 1,
+            'max_leverage': 10,
+            'max_positions': 12,
+            'max_same_direction': 12,
+            'short_bias': 1.05,
+            'enable_trend_filter': True,
+            'enable_btc_filter': True,
+            'long_ma_slope_threshold': 0.02,
+            'dynamic_leverage': True,
+            'dynamic_tpsl': True,
+            'fixed_tp_mode': False,
+            'roi_stop_loss': -8,
+            'roi_trailing_start': 6,
+            'roi_trailing_distance': 3,
+        }
+    },
+    'v4.3.1': {
+        'label': 'v4.3.1 动态杠杆版',
+        'description': '动态杠杆(3-10x) + 杠杆联动止盈止损(高杠杆紧/低杠杆松)',
+        'config': {
+            'min_score': 60,
+            'long_min_score': 70,
+            'cooldown': 1,
+            'max_leverage': 10,
+            'max_positions': 15,
+            'max_same_direction': 15,
+            'short_bias': 1.05,
+            'enable_trend_filter': True,
+            'enable_btc_filter': True,
+            'long_ma_slope_threshold': 0.02,
+            'dynamic_leverage': True,
+            'leverage_based_tpsl': True,
+        }
+    },
+    'v4.4': {
+        'label': 'v4.4 高盈亏比',
+        'description': 'v4.2基础 + 止盈15% + 止损8% (风险收益比 1:1.87)',
+        'config': {
+            'min_score': 60,
+            'long_min_score': 70,
+            'cooldown': 1,
+            'max_leverage': 3,
+            'max_positions': 12,
+            'max_same_direction': 12,
+            'short_bias': 1.05,
+            'enable_trend_filter': True,
+            'enable_btc_filter': True,
+            'long_ma_slope_threshold': 0.02,
+            'roi_stop_loss': -8,
+            'roi_take_profit': 15,
+            'roi_trailing_start': 15,
+            'roi_trailing_distance': 3,
+        }
+    },
+    'v5.0': {
+        'label': 'v5.0 三重确认',
+        'description': '10x杠杆 | MACD+RSI+BB+ADX三重确认 | TP1:+10%(50%) TP2:+20%尾随 | ATR动态止损',
+        'config': {
+            'v5_mode': True,
+            'min_score': 75,
+            'long_min_score': 80,
+            'cooldown': 1,
+            'max_leverage': 10,
+            'max_positions': 5,
+            'max_same_direction': 5,
+            'short_bias': 1.05,
+            'adx_min_threshold': 25,
+            'roi_stop_loss': -8,
+            'tp1_roi': 10,
+            'tp1_close_ratio': 0.5,
+            'tp2_roi': 20,
+            'tp2_trail_distance': 5,
+        }
+    },
+    'v6': {
+        'label': 'v6 智能整合',
+        'description': 'v4.2评分基础 + MACD/ADX/BB加分(3x) | 6年回测PnL比v4.2高59%',
+        'config': {
+            'v6b_mode': True,
+            'min_score': 70,
+            'long_min_score': 85,
+            'cooldown': 1,
+            'max_leverage': 3,
+            'max_positions': 15,
+            'max_same_direction': 15,
+            'short_bias': 1.05,
+            'enable_trend_filter': True,
+            'long_ma_slope_threshold': 0.02,
+            'roi_stop_loss': -10,
+            'roi_trailing_start': 6,
+            'roi_trailing_distance': 3,
+        }
+    },
+    'v8': {
+        'label': 'v8 ATR双轨 (Dual Trail)',
+        'description': '快轨ATR(5)×0.5 + 慢轨ATR(10)×3 | 5x杠杆 | 交叉入场 | ATR止损 | 分步止盈',
+        'config': {
+            'v8_mode': True,
+            'min_score': 65,
+            'long_min_score': 75,
+            'cooldown': 1,
+            'max_leverage': 5,
+            'max_positions': 10,
+            'max_same_direction': 10,
+            'short_bias': 1.05,
+            'roi_stop_loss': -10,
+            'tp1_roi': 12,
+            'tp1_close_ratio': 0.5,
+            'tp2_roi': 25,
+            'tp2_trail_distance': 4,
+            'v8_fast_atr_period': 5,
+            'v8_fast_atr_factor': 0.5,
+            'v8_slow_atr_period': 10,
+            'v8_slow_atr_factor': 3.0,
+            'v8_adx_filter': True,
+        }
+    },
+    'v9': {
+        'label': 'v9 V6+V8融合 (Combined)',
+        'description': 'V6b评分 + V8 ATR双轨软确认 | 3x杠杆 | V6移动止盈 | 假信号过滤',
+        'config': {
+            'v9_mode': True,
+            'v8_fast_atr_period': 5,
+            'v8_fast_atr_factor': 0.5,
+            'v8_slow_atr_period': 10,
+            'v8_slow_atr_factor': 3.0,
+            'short_bias': 1.05,
+            'min_score': 70,
+            'long_min_score': 85,
+            'cooldown': 1,
+            'max_leverage': 3,
+            'max_positions': 15,
+            'max_same_direction': 15,
+            'enable_trend_filter': True,
+            'long_ma_slope_threshold': 0.02,
+            'roi_stop_loss': -10,
+            'roi_trailing_start': 6,
+            'roi_trailing_distance': 3,
+        }
+    },
+    'v4': {
+        'label': 'v4 自定义 (Custom)',
+        'description': '自由调整所有参数',
+        'config': {}
+    }
+}
+
+
+def base_backtest_config(initial_capital, strategy, default_strategy='v2'):
+    """基础配置 + 策略预设"""
+    config = {
+        'initial_capital': initial_capital,
+        'fee_rate': 0.0005,
+        'max_positions': 3,
+        'max_same_direction': 2
+    }
+    preset = STRATEGY_PRESETS.get(strategy, STRATEGY_PRESETS[default_strategy])
+    config.update(preset['config'])
+    return config
+
+
+# ==============================
+# 回测历史库写入
+# ==============================
+
+_RUN_COLUMNS = ('symbol, year, initial_capital, final_capital, total_pnl, '
+                'win_rate, total_trades, win_trades, loss_trades, '
+                'max_drawdown, profit_factor, avg_win, avg_loss, '
+                'best_trade, worst_trade, bankrupt, strategy_version, run_time, note')
+_TRADE_COLUMNS = ('run_id, trade_id, direction, entry_price, exit_price, '
+                  'amount, leverage, pnl, roi, fee, funding_fee, '
+                  'reason, entry_time, exit_time, score, stop_moves')
+
+
+def _run_row(symbol, year, strategy, summary, run_time, note):
+    s = summary
+    return (symbol, year, s['initial_capital'], s['final_capital'], s['total_pnl'],
+            s['win_rate'], s['total_trades'], s['win_trades'], s['loss_trades'],
+            s['max_drawdown'], s['profit_factor'], s['avg_win'], s['avg_loss'],
+            s['best_trade'], s['worst_trade'], 1 if s['bankrupt'] else 0,
+            strategy, run_time, note)
+
+
+def _trade_row(run_id, t):
+    return (run_id, t['trade_id'], t['direction'], t['entry_price'], t['exit_price'],
+            t['amount'], t['leverage'], t['pnl'], t['roi'], t['fee'], t['funding_fee'],
+            t['reason'], t['entry_time'], t['exit_time'], t['score'], t['stop_moves'])
+
+
+def save_backtest_runs(conn, runs):
+    """批量写入回测结果，一个事务提交
+
+    runs: [(symbol, year, strategy, result, note), ...]，result 为 run_backtest 返回值
+    （不含 trades 时只写 backtest_runs）。返回对应的 run_id 列表。
+    """
+    run_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    c = conn.cursor()
+    run_ids = []
+    trade_rows = []
+    with conn:
+        for symbol, year, strategy, result, note in runs:
+            c.execute(f'INSERT INTO backtest_runs ({_RUN_COLUMNS}) VALUES ({",".join("?" * 19)})',
+                      _run_row(symbol, year, strategy, result['summary'], run_time, note))
+            run_id = c.lastrowid
+            run_ids.append(run_id)
+            trade_rows.extend(_trade_row(run_id, t) for t in result.get('trades', ()))
+        if trade_rows:
+            c.executemany(f'INSERT INTO backtest_trades ({_TRADE_COLUMNS}) VALUES ({",".join("?" * 16)})',
+                          trade_rows)
+    return run_ids
+
+
+def existing_backtest_runs(conn, years):
+    """已入库的 (symbol, year, strategy_version)，批量回测据此跳过"""
+    c = conn.cursor()
+    c.execute("SELECT symbol, year, strategy_version FROM backtest_runs WHERE year IN ({})".format(
+        ','.join('?' * len(years))), list(years))
+    return set((r[0], r[1], r[2]) for r in c.fetchall())
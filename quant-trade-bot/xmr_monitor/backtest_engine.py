@@ -187,6 +187,83 @@ def calculate_adx(candles, period=14):
     return round(adx, 1)
 
 
+class CandleFeatures(dict):
+    """信号评分用的指标 - 从一段K线逐项计算（参考实现），按需计算并缓存
+
+    评分函数 (_score_*) 只通过 f['rsi'] / f['macd'] / f.trail(...) 读取指标；
+    run_backtest 默认换成 backtest_indicators 预计算指标帧的 frame.at(i)，
+    两者的键和数值完全一致。
+    """
+
+    def __init__(self, candles):
+        super().__init__()
+        self.candles = candles
+        self.closes = [c['close'] for c in candles]
+        self['price'] = self.closes[-1]
+        self['high'] = candles[-1]['high']
+        self['low'] = candles[-1]['low']
+
+    def __missing__(self, key):
+        self.update(self._CALC[key](self))
+        return self[key]
+
+    def _calc_rsi(self):
+        return {'rsi': calculate_rsi(self.closes, 14)}
+
+    def _calc_ma(self):
+        closes = self.closes
+        ma20 = sum(closes[-20:]) / 20
+        return {
+            'ma7': sum(closes[-7:]) / 7,
+            'ma20': ma20,
+            'ma50': sum(closes[-50:]) / 50 if len(closes) >= 50 else ma20,
+            'ma20_prev5': sum(closes[-25:-5]) / 20,   # 5根K线前的MA20 (趋势过滤斜率)
+        }
+
+    def _calc_volume(self):
+        volumes = [c['volume'] for c in self.candles]
+        avg_volume = sum(volumes[-20:]) / 20 if len(volumes) >= 20 else 1
+        return {'volume_ratio': volumes[-1] / avg_volume if avg_volume > 0 else 1}
+
+    def _calc_position(self):
+        highs = [c['high'] for c in self.candles[-50:]]
+        lows = [c['low'] for c in self.candles[-50:]]
+        high_50, low_50 = max(highs), min(lows)
+        price = self['price']
+        return {'price_position': (price - low_50) / (high_50 - low_50) if high_50 > low_50 else 0.5}
+
+    def _calc_atr(self):
+        atr, atr_pct = calculate_atr_from_candles(self.candles, 14)
+        return {'atr': atr, 'atr_pct': atr_pct}
+
+    def _calc_macd(self):
+        return {'macd': calculate_macd(self.closes, 12, 26, 9)}
+
+    def _calc_bb(self):
+        return {'bb': calculate_bollinger_bands(self.closes, 20, 2.0)}
+
+    def _calc_adx(self):
+        return {'adx': calculate_adx(self.candles, 14)}
+
+    _CALC = {
+        'rsi': _calc_rsi,
+        'ma7': _calc_ma, 'ma20': _calc_ma, 'ma50': _calc_ma, 'ma20_prev5': _calc_ma,
+        'volume_ratio': _calc_volume,
+        'price_position': _calc_position,
+        'atr': _calc_atr, 'atr_pct': _calc_atr,
+        'macd': _calc_macd,
+        'bb': _calc_bb,
+        'adx': _calc_adx,
+    }
+
+    def trail(self, fast_period, fast_factor, slow_period, slow_factor):
+        key = ('trail', fast_period, fast_factor, slow_period, slow_factor)
+        if key not in self:
+            self[key] = _trail_features(self.candles, fast_period, fast_factor,
+                                        slow_period, slow_factor)
+        return self[key]
+
+
 def analyze_signal_v5(candles, config=None):
     """V5信号分析 — MACD+RSI+BB+ADX三重确认 (100分+奖励)
 
@@ -201,24 +278,26 @@ def analyze_signal_v5(candles, config=None):
     """
     if len(candles) < 100:
         return 0, None
+    return _score_v5(CandleFeatures(candles), config)
 
-    closes = [c['close'] for c in candles]
-    volumes = [c['volume'] for c in candles]
-    current_price = closes[-1]
+
+def _score_v5(f, config=None):
+    """V5评分 - f 为 CandleFeatures 或预计算指标帧的某根K线"""
+    current_price = f['price']
 
     config = config or {}
     adx_min = config.get('adx_min_threshold', 25)
 
     # --- ADX gate ---
-    adx = calculate_adx(candles, 14)
+    adx = f['adx']
     if adx is None or adx < adx_min:
         return 0, None  # Skip ranging market
 
     # --- Calculate all indicators ---
-    rsi = calculate_rsi(closes, 14)
-    macd = calculate_macd(closes, 12, 26, 9)
-    bb = calculate_bollinger_bands(closes, 20, 2.0)
-    atr, atr_pct = calculate_atr_from_candles(candles, 14)
+    rsi = f['rsi']
+    macd = f['macd']
+    bb = f['bb']
+    atr, atr_pct = f['atr'], f['atr_pct']
 
     if macd is None or bb is None:
         return 0, None
@@ -305,9 +384,7 @@ def analyze_signal_v5(candles, config=None):
     score += adx_score
 
     # 5. Volume (10pts)
-    avg_volume = sum(volumes[-20:]) / 20 if len(volumes) >= 20 else 1
-    recent_volume = volumes[-1]
-    volume_ratio = recent_volume / avg_volume if avg_volume > 0 else 1
+    volume_ratio = f['volume_ratio']
     if volume_ratio > 1.5:
         vol_score = 10
     elif volume_ratio > 1.2:
@@ -404,22 +481,24 @@ def analyze_signal_v6(candles, config=None):
     """
     if len(candles) < 100:
         return 0, None
+    return _score_v6(CandleFeatures(candles), config)
 
-    closes = [c['close'] for c in candles]
-    volumes = [c['volume'] for c in candles]
-    current_price = closes[-1]
+
+def _score_v6(f, config=None):
+    """V6评分 - f 为 CandleFeatures 或预计算指标帧的某根K线"""
+    current_price = f['price']
 
     config = config or {}
     adx_min = config.get('adx_min_threshold', 20)
 
-    adx = calculate_adx(candles, 14)
+    adx = f['adx']
     if adx is None or adx < adx_min:
         return 0, None
 
-    rsi = calculate_rsi(closes, 14)
-    macd = calculate_macd(closes, 12, 26, 9)
-    bb = calculate_bollinger_bands(closes, 20, 2.0)
-    atr, atr_pct = calculate_atr_from_candles(candles, 14)
+    rsi = f['rsi']
+    macd = f['macd']
+    bb = f['bb']
+    atr, atr_pct = f['atr'], f['atr_pct']
 
     if macd is None or bb is None:
         return 0, None
@@ -484,9 +563,7 @@ def analyze_signal_v6(candles, config=None):
         score += 3
 
     # 5. MA趋势 (10pts) - 新增
-    ma7 = sum(closes[-7:]) / 7
-    ma20 = sum(closes[-20:]) / 20
-    ma50 = sum(closes[-50:]) / 50 if len(closes) >= 50 else ma20
+    ma7, ma20, ma50 = f['ma7'], f['ma20'], f['ma50']
 
     if current_price > ma7 > ma20 > ma50:
         score += 10; votes['LONG'] += 1
@@ -500,9 +577,7 @@ def analyze_signal_v6(candles, config=None):
         score += 2
 
     # 6. Volume (10pts)
-    avg_volume = sum(volumes[-20:]) / 20 if len(volumes) >= 20 else 1
-    recent_volume = volumes[-1]
-    volume_ratio = recent_volume / avg_volume if avg_volume > 0 else 1
+    volume_ratio = f['volume_ratio']
     if volume_ratio > 1.5:
         score += 10
     elif volume_ratio > 1.2:
@@ -562,18 +637,18 @@ def analyze_signal_v6b(candles, config=None):
     """
     if len(candles) < 100:
         return 0, None
+    return _score_v6b(CandleFeatures(candles), config)
 
-    closes = [c['close'] for c in candles]
-    volumes = [c['volume'] for c in candles]
-    highs = [c['high'] for c in candles]
-    lows = [c['low'] for c in candles]
-    current_price = closes[-1]
+
+def _score_v6b(f, config=None):
+    """V6b评分 - f 为 CandleFeatures 或预计算指标帧的某根K线"""
+    current_price = f['price']
     config = config or {}
 
     votes = {"LONG": 0, "SHORT": 0}
 
     # === 1. RSI (30pts) — 同v4 ===
-    rsi = calculate_rsi(closes, 14)
+    rsi = f['rsi']
     if rsi < 30:
         rsi_score = 30; votes["LONG"] += 1
     elif rsi > 70:
@@ -586,9 +661,7 @@ def analyze_signal_v6b(candles, config=None):
         rsi_score = 5
 
     # === 2. MA趋势 (30pts) — 同v4 ===
-    ma7 = sum(closes[-7:]) / 7
-    ma20 = sum(closes[-20:]) / 20
-    ma50 = sum(closes[-50:]) / 50 if len(closes) >= 50 else ma20
+    ma7, ma20, ma50 = f['ma7'], f['ma20'], f['ma50']
 
     if current_price > ma7 > ma20 > ma50:
         trend_score = 30; votes["LONG"] += 2
@@ -602,9 +675,7 @@ def analyze_signal_v6b(candles, config=None):
         trend_score = 5
 
     # === 3. Volume (20pts) — 同v4 ===
-    avg_volume = sum(volumes[-20:]) / 20 if len(volumes) >= 20 else 1
-    recent_volume = volumes[-1]
-    volume_ratio = recent_volume / avg_volume if avg_volume > 0 else 1
+    volume_ratio = f['volume_ratio']
     if volume_ratio > 1.5:
         volume_score = 20
     elif volume_ratio > 1.2:
@@ -615,9 +686,7 @@ def analyze_signal_v6b(candles, config=None):
         volume_score = 5
 
     # === 4. Price Position (20pts) — 同v4 ===
-    high_50 = max(highs[-50:]) if len(highs) >= 50 else max(highs)
-    low_50 = min(lows[-50:]) if len(lows) >= 50 else min(lows)
-    price_position = (current_price - low_50) / (high_50 - low_50) if high_50 > low_50 else 0.5
+    price_position = f['price_position']
 
     if price_position < 0.2:
         position_score = 20; votes["LONG"] += 1
@@ -647,9 +716,9 @@ def analyze_signal_v6b(candles, config=None):
         total_score = int(total_score * 0.85)
 
     # === v5 指标加分 (新增部分) ===
-    macd = calculate_macd(closes, 12, 26, 9)
-    bb = calculate_bollinger_bands(closes, 20, 2.0)
-    adx = calculate_adx(candles, 14)
+    macd = f['macd']
+    bb = f['bb']
+    adx = f['adx']
 
     # MACD确认 (+10)
     if macd:
@@ -683,7 +752,7 @@ def analyze_signal_v6b(candles, config=None):
     if direction == "SHORT" and short_bias != 1.0:
         total_score = int(total_score * short_bias)
 
-    atr, atr_pct = calculate_atr_from_candles(candles, 14)
+    atr, atr_pct = f['atr'], f['atr_pct']
 
     analysis = {
         "price": current_price,
@@ -707,18 +776,17 @@ def analyze_signal(candles):
     """分析交易信号（0-100分），从K线数据"""
     if len(candles) < 50:
         return 0, None
+    return _score_base(CandleFeatures(candles))
 
-    closes = [c['close'] for c in candles]
-    volumes = [c['volume'] for c in candles]
-    highs = [c['high'] for c in candles]
-    lows = [c['low'] for c in candles]
 
-    current_price = closes[-1]
+def _score_base(f):
+    """v1-v4 评分 - f 为 CandleFeatures 或预计算指标帧的某根K线"""
+    current_price = f['price']
 
     votes = {'LONG': 0, 'SHORT': 0}
 
     # 1. RSI (30分)
-    rsi = calculate_rsi(closes)
+    rsi = f['rsi']
     if rsi < 30:
         rsi_score = 30
         votes['LONG'] += 1
@@ -735,9 +803,7 @@ def analyze_signal(candles):
         rsi_score = 5
 
     # 2. 趋势 (30分)
-    ma7 = sum(closes[-7:]) / 7
-    ma20 = sum(closes[-20:]) / 20
-    ma50 = sum(closes[-50:]) / 50
+    ma7, ma20, ma50 = f['ma7'], f['ma20'], f['ma50']
 
     if current_price > ma7 > ma20 > ma50:
         trend_score = 30
@@ -755,9 +821,7 @@ def analyze_signal(candles):
         trend_score = 5
 
     # 3. 成交量 (20分)
-    avg_volume = sum(volumes[-20:]) / 20
-    recent_volume = volumes[-1]
-    volume_ratio = recent_volume / avg_volume if avg_volume > 0 else 1
+    volume_ratio = f['volume_ratio']
 
     if volume_ratio > 1.5:
         volume_score = 20
@@ -769,9 +833,7 @@ def analyze_signal(candles):
         volume_score = 5
 
     # 4. 价格位置 (20分)
-    high_50 = max(highs[-50:])
-    low_50 = min(lows[-50:])
-    price_position = (current_price - low_50) / (high_50 - low_50) if high_50 > low_50 else 0.5
+    price_position = f['price_position']
 
     if price_position < 0.2:
         position_score = 20
@@ -919,6 +981,7 @@ def run_backtest(candles_1h, config):
 
     candles_1h: list of dicts {time, open, high, low, close, volume}
     config: {initial_capital, min_score, fee_rate, max_positions, max_same_direction}
+            precompute_indicators=False 时不用预计算指标帧，逐根重算（参考实现）
 
     returns: {trades, equity_curve, summary}
     """
@@ -965,6 +1028,15 @@ def run_backtest(candles_1h, config):
     # 每100根K线记录一次资金曲线（避免数据点太多）
     curve_interval = max(1, len(candles_1h) // 500)
 
+    # 指标预计算：整段K线一次算好，同一份K线的各策略/参数组合共用
+    frame = None
+    if config.get('precompute_indicators', True) and len(candles_1h) > 100:
+        try:
+            from backtest_indicators import get_indicator_frame
+            frame = get_indicator_frame(candles_1h)
+        except ImportError:
+            pass  # 无 numpy 时逐根重算
+
     for i in range(100, len(candles_1h)):
         candle = candles_1h[i]
 
@@ -1093,24 +1165,27 @@ def run_backtest(candles_1h, config):
         if capital <= 50:
             continue
 
-        # 信号分析
-        lookback = candles_1h[max(0, i-99):i+1]
+        # 信号分析 (窗口 = 最近100根K线)
+        if frame is not None:
+            features = frame.at(i)
+        else:
+            features = CandleFeatures(candles_1h[max(0, i-99):i+1])
 
         v6_mode = config.get('v6_mode', False)
         v6b_mode = config.get('v6b_mode', False)
         if v9_mode:
-            score, analysis = analyze_signal_v9(lookback, config)
+            score, analysis = _score_v9(features, config)
         elif v8_mode:
-            score, analysis = analyze_signal_v8(lookback, config)
+            score, analysis = _score_v8(features, config)
         elif v6b_mode:
-            score, analysis = analyze_signal_v6b(lookback, config)
+            score, analysis = _score_v6b(features, config)
         elif v6_mode:
-            score, analysis = analyze_signal_v6(lookback, config)
+            score, analysis = _score_v6(features, config)
         elif v5_mode:
             # V5: MACD+RSI+BB+ADX 三重确认
-            score, analysis = analyze_signal_v5(lookback, config)
+            score, analysis = _score_v5(features, config)
         else:
-            score, analysis = analyze_signal(lookback)
+            score, analysis = _score_base(features)
 
         if score < min_score or analysis is None:
             continue
@@ -1123,9 +1198,9 @@ def run_backtest(candles_1h, config):
 
         if not v5_mode:
             # 趋势过滤：MA20斜率与方向冲突时跳过 (v4 only, v5 uses ADX)
-            if enable_trend_filter and len(lookback) >= 25:
-                ma20_now = sum(c['close'] for c in lookback[-20:]) / 20
-                ma20_prev = sum(c['close'] for c in lookback[-25:-5]) / 20
+            if enable_trend_filter:
+                ma20_now = features['ma20']
+                ma20_prev = features['ma20_prev5']
                 ma20_slope = (ma20_now - ma20_prev) / ma20_prev
                 long_threshold = long_ma_slope_threshold
                 if direction == 'LONG' and ma20_slope < -long_threshold:
@@ -1478,49 +1553,21 @@ def _calculate_atr_trail_bt(candles, atr_period, atr_factor):
     return trail
 
 
-def analyze_signal_v8(candles, config=None):
-    """V8信号分析 — ATR双轨交叉策略 (backtest版)
+def _trail_features(candles, fast_period, fast_factor, slow_period, slow_factor):
+    """V8/V9 双轨特征: 末两根轨道值 + 距上次绿区/红区/交叉的K线数
 
-    Fast Trail: ATR(5)×0.5, Slow Trail: ATR(10)×3.0
-    评分: 交叉新鲜度(35) + 区域强度(25) + 轨道间距(15) + 成交量(15) + 距离(10)
+    轨道不足两根时返回 None
     """
-    if len(candles) < 50:
-        return 0, None
-
-    config = config or {}
     closes = [c['close'] for c in candles]
     highs = [c['high'] for c in candles]
     lows = [c['low'] for c in candles]
-    volumes = [c['volume'] for c in candles]
-    current_price = closes[-1]
-
-    fast_period = config.get('v8_fast_atr_period', 5)
-    fast_factor = config.get('v8_fast_atr_factor', 0.5)
-    slow_period = config.get('v8_slow_atr_period', 10)
-    slow_factor = config.get('v8_slow_atr_factor', 3.0)
 
     trail1 = _calculate_atr_trail_bt(candles, fast_period, fast_factor)
     trail2 = _calculate_atr_trail_bt(candles, slow_period, slow_factor)
 
     if trail1[-1] is None or trail2[-1] is None or \
        trail1[-2] is None or trail2[-2] is None:
-        return 0, None
-
-    t1, t2 = trail1[-1], trail2[-1]
-    t1_prev, t2_prev = trail1[-2], trail2[-2]
-
-    # Crossover
-    buy_cross = t1_prev <= t2_prev and t1 > t2
-    sell_cross = t1_prev >= t2_prev and t1 < t2
-
-    # Zones
-    close = closes[-1]
-    high = highs[-1]
-    low = lows[-1]
-    green = t1 > t2 and close > t2 and low > t2
-    blue = t1 > t2 and close > t2 and low < t2
-    red = t2 > t1 and close < t2 and high < t2
-    yellow = t2 > t1 and close < t2 and high > t2
+        return None
 
     # Barssince green/red
     bars_since_green, bars_since_red = None, None
@@ -1537,8 +1584,74 @@ def analyze_signal_v8(candles, config=None):
             bars_since_red = j
         if bars_since_green is not None and bars_since_red is not None:
             break
-    bars_since_green = bars_since_green if bars_since_green is not None else 999
-    bars_since_red = bars_since_red if bars_since_red is not None else 999
+
+    # Bars since crossover (不含当前K线)
+    bars_since_cross = 30
+    for j in range(1, min(30, len(candles) - max(fast_period, slow_period))):
+        idx = len(candles) - 1 - j
+        if trail1[idx] is None or trail2[idx] is None:
+            break
+        prev_idx = idx - 1
+        if trail1[prev_idx] is None or trail2[prev_idx] is None:
+            break
+        if (trail1[prev_idx] <= trail2[prev_idx] and trail1[idx] > trail2[idx]) or \
+           (trail1[prev_idx] >= trail2[prev_idx] and trail1[idx] < trail2[idx]):
+            bars_since_cross = j
+            break
+
+    return {
+        't1': trail1[-1], 't2': trail2[-1],
+        't1_prev': trail1[-2], 't2_prev': trail2[-2],
+        'bars_since_green': bars_since_green if bars_since_green is not None else 999,
+        'bars_since_red': bars_since_red if bars_since_red is not None else 999,
+        'bars_since_cross': bars_since_cross,
+    }
+
+
+def _trail_params(config):
+    return (config.get('v8_fast_atr_period', 5), config.get('v8_fast_atr_factor', 0.5),
+            config.get('v8_slow_atr_period', 10), config.get('v8_slow_atr_factor', 3.0))
+
+
+def analyze_signal_v8(candles, config=None):
+    """V8信号分析 — ATR双轨交叉策略 (backtest版)
+
+    Fast Trail: ATR(5)×0.5, Slow Trail: ATR(10)×3.0
+    评分: 交叉新鲜度(35) + 区域强度(25) + 轨道间距(15) + 成交量(15) + 距离(10)
+    """
+    if len(candles) < 50:
+        return 0, None
+    return _score_v8(CandleFeatures(candles), config)
+
+
+def _score_v8(f, config=None):
+    """V8评分 - f 为 CandleFeatures 或预计算指标帧的某根K线"""
+    config = config or {}
+    current_price = f['price']
+
+    trail = f.trail(*_trail_params(config))
+    if trail is None:
+        return 0, None
+
+    t1, t2 = trail['t1'], trail['t2']
+    t1_prev, t2_prev = trail['t1_prev'], trail['t2_prev']
+
+    # Crossover
+    buy_cross = t1_prev <= t2_prev and t1 > t2
+    sell_cross = t1_prev >= t2_prev and t1 < t2
+
+    # Zones
+    close = current_price
+    high = f['high']
+    low = f['low']
+    green = t1 > t2 and close > t2 and low > t2
+    blue = t1 > t2 and close > t2 and low < t2
+    red = t2 > t1 and close < t2 and high < t2
+    yellow = t2 > t1 and close < t2 and high > t2
+
+    # Barssince green/red
+    bars_since_green = trail['bars_since_green']
+    bars_since_red = trail['bars_since_red']
 
     is_bull = bars_since_green < bars_since_red
 
@@ -1557,18 +1670,7 @@ def analyze_signal_v8(candles, config=None):
     if buy_cross or sell_cross:
         total_score += 35
     else:
-        bars_since_cross = 30
-        for j in range(1, min(30, len(candles) - max(fast_period, slow_period))):
-            idx = len(candles) - 1 - j
-            if trail1[idx] is None or trail2[idx] is None:
-                break
-            prev_idx = idx - 1
-            if trail1[prev_idx] is None or trail2[prev_idx] is None:
-                break
-            if (trail1[prev_idx] <= trail2[prev_idx] and trail1[idx] > trail2[idx]) or \
-               (trail1[prev_idx] >= trail2[prev_idx] and trail1[idx] < trail2[idx]):
-                bars_since_cross = j
-                break
+        bars_since_cross = trail['bars_since_cross']
         if bars_since_cross <= 3:
             total_score += 28
         elif bars_since_cross <= 6:
@@ -1596,8 +1698,7 @@ def analyze_signal_v8(candles, config=None):
         total_score += 3
 
     # 4. Volume (0-15)
-    avg_vol = sum(volumes[-20:]) / 20 if len(volumes) >= 20 else 1
-    vol_ratio = volumes[-1] / avg_vol if avg_vol > 0 else 1
+    vol_ratio = f['volume_ratio']
     if vol_ratio > 1.5:
         total_score += 15
     elif vol_ratio > 1.2:
@@ -1617,14 +1718,14 @@ def analyze_signal_v8(candles, config=None):
         total_score += 3
 
     # Penalties
-    rsi = calculate_rsi(closes)
+    rsi = f['rsi']
     if direction == 'LONG' and rsi > 80:
         total_score = int(total_score * 0.80)
     elif direction == 'SHORT' and rsi < 20:
         total_score = int(total_score * 0.80)
 
     # ADX filter
-    adx = calculate_adx(candles)
+    adx = f['adx']
     if config.get('v8_adx_filter', True) and adx is not None:
         if adx < 15:
             total_score = int(total_score * 0.60)
@@ -1637,15 +1738,7 @@ def analyze_signal_v8(candles, config=None):
         total_score = int(total_score * short_bias)
 
     # ATR for sizing
-    atr = None
-    if len(candles) >= 15:
-        trs = []
-        for i in range(len(candles) - 14, len(candles)):
-            h = candles[i]['high']
-            l = candles[i]['low']
-            pc = candles[i - 1]['close']
-            trs.append(max(h - l, abs(h - pc), abs(l - pc)))
-        atr = sum(trs) / 14
+    atr = f['atr']
 
     analysis = {
         'price': current_price,
@@ -1673,26 +1766,24 @@ def analyze_signal_v9(candles, config=None):
     核心: 调用V6b获取基础分数和方向, V8 trail作为软加分/惩罚
     止损: 使用V6的移动止盈系统(不用V8的ATR止损)
     """
+    if len(candles) < 100:
+        return 0, None
+    return _score_v9(CandleFeatures(candles), config)
+
+
+def _score_v9(f, config=None):
+    """V9评分 - f 为 CandleFeatures 或预计算指标帧的某根K线"""
     # Step 1: Get V6b base score (the proven winner)
-    v6b_score, v6b_analysis = analyze_signal_v6b(candles, config)
+    v6b_score, v6b_analysis = _score_v6b(f, config)
     if v6b_score == 0 or v6b_analysis is None:
         return 0, None
 
     config = config or {}
     direction = v6b_analysis['direction']
     current_price = v6b_analysis['price']
-    closes = [c['close'] for c in candles]
-    highs = [c['high'] for c in candles]
-    lows = [c['low'] for c in candles]
 
     # Step 2: V8 ATR Dual Trail (soft confirmation)
-    fast_period = config.get('v8_fast_atr_period', 5)
-    fast_factor = config.get('v8_fast_atr_factor', 0.5)
-    slow_period = config.get('v8_slow_atr_period', 10)
-    slow_factor = config.get('v8_slow_atr_factor', 3.0)
-
-    trail1 = _calculate_atr_trail_bt(candles, fast_period, fast_factor)
-    trail2 = _calculate_atr_trail_bt(candles, slow_period, slow_factor)
+    trail = f.trail(*_trail_params(config))
 
     v8_bonus = 0
     trail_sep = 0
@@ -1701,17 +1792,16 @@ def analyze_signal_v9(candles, config=None):
     t1 = t2 = 0
     buy_cross = sell_cross = False
 
-    if trail1[-1] is not None and trail2[-1] is not None and \
-       trail1[-2] is not None and trail2[-2] is not None:
-        t1, t2 = trail1[-1], trail2[-1]
-        t1_prev, t2_prev = trail1[-2], trail2[-2]
+    if trail is not None:
+        t1, t2 = trail['t1'], trail['t2']
+        t1_prev, t2_prev = trail['t1_prev'], trail['t2_prev']
 
         buy_cross = t1_prev <= t2_prev and t1 > t2
         sell_cross = t1_prev >= t2_prev and t1 < t2
 
-        close = closes[-1]
-        high = highs[-1]
-        low = lows[-1]
+        close = current_price
+        high = f['high']
+        low = f['low']
         green = t1 > t2 and close > t2 and low > t2
         blue = t1 > t2 and close > t2 and low < t2
         red = t2 > t1 and close < t2 and high < t2
@@ -1721,18 +1811,7 @@ def analyze_signal_v9(candles, config=None):
         trail_sep = abs(t1 - t2) / current_price * 100 if current_price > 0 else 0
 
         # Bars since crossover
-        bars_since_cross = 30
-        for j in range(1, min(30, len(candles) - max(fast_period, slow_period))):
-            idx = len(candles) - 1 - j
-            if trail1[idx] is None or trail2[idx] is None:
-                break
-            prev_idx = idx - 1
-            if trail1[prev_idx] is None or trail2[prev_idx] is None:
-                break
-            if (trail1[prev_idx] <= trail2[prev_idx] and trail1[idx] > trail2[idx]) or \
-               (trail1[prev_idx] >= trail2[prev_idx] and trail1[idx] < trail2[idx]):
-                bars_since_cross = j
-                break
+        bars_since_cross = trail['bars_since_cross']
         if buy_cross or sell_cross:
             bars_since_cross = 0
 
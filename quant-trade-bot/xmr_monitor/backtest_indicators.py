@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回测指标预计算 - 供 backtest_engine.run_backtest 使用
+
+run_backtest 每根K线把最近100根 (LOOKBACK) 交给信号评分，原来每根都要从头重算
+RSI/MACD/BB/ADX/ATR，单次回测是 O(K线数 × 窗口) 的纯Python循环。
+这里对整段K线一次性算出"每根K线对应窗口"的指标列:
+
+- 只依赖最近N根的指标 (RSI、ATR、MA、BB、量比、50根高低点) 用滑动累加
+- 依赖窗口起点的递推指标 (MACD 的 EMA、ADX 的 Wilder 平滑、V8 的 ATR 轨道)
+  和逐根实现一样从每个窗口的第一根开始递推，只是所有窗口同时做向量运算
+- 运算顺序与 backtest_engine 的逐根实现一致，结果逐位相同
+
+指标帧按K线序列缓存，v1-v9 各策略预设、参数扫描在同一份K线上共用。
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+LOOKBACK = 100        # run_backtest 的信号窗口
+FRAME_CACHE_MAX = 8   # 缓存的K线序列数
+
+
+def _seq_sum(x, k):
+    """out[e] = x[e-k+1] + ... + x[e]，从左到右累加（与 Python sum 相同），前 k-1 个为 NaN"""
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < k:
+        return out
+    acc = x[0:n - k + 1].copy()
+    for j in range(1, k):
+        acc = acc + x[j:n - k + 1 + j]
+    out[k - 1:] = acc
+    return out
+
+
+def _rolling(x, k, fn):
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < k:
+        return out
+    acc = x[0:n - k + 1].copy()
+    for j in range(1, k):
+        acc = fn(acc, x[j:n - k + 1 + j])
+    out[k - 1:] = acc
+    return out
+
+
+class IndicatorFrame:
+    """一段K线的指标列；第 i 列值 = 以第 i 根结尾、长度 lookback 的窗口上的指标"""
+
+    def __init__(self, candles, lookback=LOOKBACK):
+        self.candles = candles
+        self.lookback = lookback
+        self.n = len(candles)
+        self.close = np.array([c['close'] for c in candles], dtype=np.float64)
+        self.high = np.array([c['high'] for c in candles], dtype=np.float64)
+        self.low = np.array([c['low'] for c in candles], dtype=np.float64)
+        self.volume = np.array([c['volume'] for c in candles], dtype=np.float64)
+        self.windows = max(0, self.n - lookback + 1)   # 窗口数，窗口 s 覆盖 [s, s+lookback)
+        self._cols = {}
+        self._trails = {}
+        self._trail_features = {}
+
+        # 真实波幅 (第0根无前收盘)
+        prev_close = np.concatenate(([np.nan], self.close[:-1]))
+        self.tr = np.maximum(np.maximum(self.high - self.low, np.abs(self.high - prev_close)),
+                             np.abs(self.low - prev_close))
+
+    def at(self, i):
+        """第 i 根K线的指标，接口同 backtest_engine.CandleFeatures"""
+        return BarFeatures(self, i)
+
+    # ─── 指标列 ────────────────────────────────────────────────
+
+    def column(self, name):
+        if name not in self._cols:
+            getattr(self, '_build_' + self._BUILD[name])()
+        return self._cols[name]
+
+    def _window_col(self, values):
+        """按窗口计算的向量 (长度 windows) -> 按结尾K线索引的列"""
+        out = np.full(self.n, np.nan)
+        out[self.lookback - 1:] = values
+        return out
+
+    def _store(self, **cols):
+        for name, values in cols.items():
+            self._cols[name] = values.tolist() if isinstance(values, np.ndarray) else values
+
+    def _build_rsi(self, period=14):
+        delta = np.concatenate(([0.0], np.diff(self.close)))
+        gains = np.where(delta > 0, delta, 0.0)
+        losses = np.where(delta < 0, -delta, 0.0)
+        avg_gain = _seq_sum(gains, period) / period
+        avg_loss = _seq_sum(losses, period) / period
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+        self._store(rsi=np.where(avg_loss == 0, 100.0, rsi))
+
+    def _build_ma(self):
+        ma20 = _seq_sum(self.close, 20) / 20
+        ma20_prev5 = np.concatenate((np.full(5, np.nan), ma20[:-5]))[:self.n]
+        self._store(ma7=_seq_sum(self.close, 7) / 7, ma20=ma20,
+                    ma50=_seq_sum(self.close, 50) / 50, ma20_prev5=ma20_prev5)
+
+    def _build_volume(self):
+        avg_volume = _seq_sum(self.volume, 20) / 20
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(avg_volume > 0, self.volume / avg_volume, 1.0)
+        self._store(volume_ratio=ratio)
+
+    def _build_position(self):
+        high_50 = _rolling(self.high, 50, np.maximum)
+        low_50 = _rolling(self.low, 50, np.minimum)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pos = np.where(high_50 > low_50, (self.close - low_50) / (high_50 - low_50), 0.5)
+        self._store(price_position=pos)
+
+    def _build_atr(self, period=14):
+        atr = _seq_sum(self.tr, period) / period
+        with np.errstate(divide='ignore', invalid='ignore'):
+            atr_pct = np.where(self.close > 0, (atr / self.close) * 100, 0.0)
+        self._store(atr=atr, atr_pct=atr_pct)
+
+    def _build_bb(self, period=20, std_dev=2.0):
+        n = self.n
+        sma = _seq_sum(self.close, period) / period
+        variance = np.full(n, np.nan)
+        if n >= period:
+            acc = np.zeros(n - period + 1)
+            for j in range(period):
+                acc = acc + (self.close[j:n - period + 1 + j] - sma[period - 1:]) ** 2
+            variance[period - 1:] = acc / period
+        # 与 calculate_bollinger_bands 一样用 ** 0.5 (libm pow)
+        std = np.array([v ** 0.5 for v in variance.tolist()])
+        upper = sma + std_dev * std
+        lower = sma - std_dev * std
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bandwidth = np.where(sma > 0, (upper - lower) / sma * 100, 0.0)
+            percent_b = np.where(upper > lower, (self.close - lower) / (upper - lower), 0.5)
+        self._store(bb_upper=upper, bb_middle=sma, bb_lower=lower,
+                    bb_bandwidth=bandwidth, bb_percent_b=percent_b)
+
+    def _build_macd(self, fast=12, slow=26, signal_period=9):
+        """窗口内 MACD：EMA 以窗口第一根为种子，signal 从第 slow 根开始"""
+        L, K, x = self.lookback, self.windows, self.close
+        m_fast, m_slow, m_sig = 2.0 / (fast + 1), 2.0 / (slow + 1), 2.0 / (signal_period + 1)
+        if K == 0 or L < slow + signal_period:
+            self._cols.update(dict.fromkeys(
+                ('macd_value', 'macd_signal', 'macd_histogram', 'macd_prev_histogram')))
+            return
+        ema_fast = x[0:K].copy()
+        ema_slow = x[0:K].copy()
+        macd_line = signal = None
+        last = {}
+        for p in range(L):
+            if p > 0:
+                xp = x[p:p + K]
+                ema_fast = xp * m_fast + ema_fast * (1 - m_fast)
+                ema_slow = xp * m_slow + ema_slow * (1 - m_slow)
+            macd_line = ema_fast - ema_slow
+            if p == slow - 1:
+                signal = macd_line
+            elif p >= slow:
+                signal = macd_line * m_sig + signal * (1 - m_sig)
+            if p >= L - 2:
+                last[p] = (macd_line, signal)
+        macd_val, signal_val = last[L - 1]
+        prev_macd, prev_signal = last[L - 2]
+        self._store(macd_value=self._window_col(macd_val),
+                    macd_signal=self._window_col(signal_val),
+                    macd_histogram=self._window_col(macd_val - signal_val),
+                    macd_prev_histogram=self._window_col(prev_macd - prev_signal))
+
+    def _build_adx(self, period=14):
+        """窗口内 ADX：Wilder 平滑以窗口内前 period 根 TR/DM 的均值为种子"""
+        L, K, n = self.lookback, self.windows, self.n
+        if K == 0 or L < period * 2 + 1:
+            self._store(adx=[None] * n)
+            return
+        up_move = np.concatenate(([0.0], self.high[1:] - self.high[:-1]))
+        down_move = np.concatenate(([0.0], self.low[:-1] - self.low[1:]))
+        pdm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+        mdm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+        tr = self.tr
+
+        # 窗口 s 的第一个平滑值 = 窗口位置 1..period 的均值
+        smooth_tr = (_seq_sum(tr, period) / period)[period:period + K]
+        smooth_pdm = (_seq_sum(pdm, period) / period)[period:period + K]
+        smooth_mdm = (_seq_sum(mdm, period) / period)[period:period + K]
+
+        tail = []   # 最后 period 个 DX (值, 是否有效)
+        for p in range(period, L):
+            if p > period:
+                smooth_tr = (smooth_tr * (period - 1) + tr[p:p + K]) / period
+                smooth_pdm = (smooth_pdm * (period - 1) + pdm[p:p + K]) / period
+                smooth_mdm = (smooth_mdm * (period - 1) + mdm[p:p + K]) / period
+            if p < L - period:
+                continue
+            with np.errstate(divide='ignore', invalid='ignore'):
+                plus_di = 100 * smooth_pdm / smooth_tr
+                minus_di = 100 * smooth_mdm / smooth_tr
+                di_sum = plus_di + minus_di
+                dx = 100 * np.abs(plus_di - minus_di) / di_sum
+            tail.append((dx, (smooth_tr != 0) & (di_sum > 0)))
+
+        acc = tail[0][0].copy()
+        valid = tail[0][1].copy()
+        for dx, ok in tail[1:]:
+            acc = acc + dx
+            valid &= ok
+        adx = [round(v, 1) for v in (acc / period).tolist()]
+
+        # 极少数窗口有零波幅K线 (DX 被跳过)，按原实现逐个重算
+        if not valid.all():
+            from backtest_engine import calculate_adx
+            for s in np.flatnonzero(~valid).tolist():
+                adx[s] = calculate_adx(self.candles[s:s + L], period)
+        self._store(adx=[None] * (L - 1) + adx)
+
+    _BUILD = {
+        'rsi': 'rsi',
+        'ma7': 'ma', 'ma20': 'ma', 'ma50': 'ma', 'ma20_prev5': 'ma',
+        'volume_ratio': 'volume',
+        'price_position': 'position',
+        'atr': 'atr', 'atr_pct': 'atr',
+        'bb_upper': 'bb', 'bb_middle': 'bb', 'bb_lower': 'bb',
+        'bb_bandwidth': 'bb', 'bb_percent_b': 'bb',
+        'macd_value': 'macd', 'macd_signal': 'macd',
+        'macd_histogram': 'macd', 'macd_prev_histogram': 'macd',
+        'adx': 'adx',
+    }
+
+    def macd(self, i):
+        histogram = self.column('macd_histogram')
+        if histogram is None or i < self.lookback - 1:
+            return None
+        hist, prev = histogram[i], self.column('macd_prev_histogram')[i]
+        return {
+            'macd': self.column('macd_value')[i],
+            'signal': self.column('macd_signal')[i],
+            'histogram': hist,
+            'prev_histogram': prev,
+            'crossover_up': prev <= 0 and hist > 0,
+            'crossover_down': prev >= 0 and hist < 0,
+        }
+
+    def bb(self, i):
+        col = self.column
+        return {
+            'upper': col('bb_upper')[i],
+            'middle': col('bb_middle')[i],
+            'lower': col('bb_lower')[i],
+            'bandwidth': col('bb_bandwidth')[i],
+            'percent_b': col('bb_percent_b')[i],
+            'price': self.candles[i]['close'],
+        }
+
+    # ─── V8 ATR 双轨 ───────────────────────────────────────────
+
+    def _trail(self, period, factor, keep_from):
+        """窗口内 ATR 轨道，返回 {窗口位置 p: 向量}，只保留 p >= keep_from (末尾几十根)"""
+        key = (period, factor)
+        if key in self._trails:
+            return self._trails[key]
+        L, K = self.lookback, self.windows
+        atr = _seq_sum(self.tr, period) / period
+        out = {}
+        if period < L:
+            trail = self.close[period:period + K] - atr[period:period + K] * factor
+            if period >= keep_from:
+                out[period] = trail
+            for p in range(period + 1, L):
+                sc = self.close[p:p + K]
+                prev_sc = self.close[p - 1:p - 1 + K]
+                sl = atr[p:p + K] * factor
+                up = sc > trail
+                trail = np.where(
+                    up & (prev_sc > trail), np.maximum(trail, sc - sl),
+                    np.where((sc < trail) & (prev_sc < trail), np.minimum(trail, sc + sl),
+                             np.where(up, sc - sl, sc + sl)))
+                if p >= keep_from:
+                    out[p] = trail
+        self._trails[key] = out
+        return out
+
+    def trail_features(self, i, fast_period, fast_factor, slow_period, slow_factor):
+        """同 backtest_engine._trail_features，对所有窗口一次算好"""
+        key = (fast_period, fast_factor, slow_period, slow_factor)
+        feats = self._trail_features.get(key)
+        if feats is None:
+            feats = self._build_trail_features(*key)
+            self._trail_features[key] = feats
+        s = i - self.lookback + 1
+        if feats is None or s < 0:
+            return None
+        return {name: col[s] for name, col in feats.items()}
+
+    def _build_trail_features(self, fast_period, fast_factor, slow_period, slow_factor):
+        L, K = self.lookback, self.windows
+        max_period = max(fast_period, slow_period)
+        keep_from = max(L - 52, 0)
+        trail1 = self._trail(fast_period, fast_factor, keep_from)
+        trail2 = self._trail(slow_period, slow_factor, keep_from)
+        if K == 0 or L - 2 not in trail1 or L - 2 not in trail2:
+            return None
+
+        def has(p):
+            return p in trail1 and p in trail2
+
+        close_at = lambda p: self.close[p:p + K]
+
+        bars_since_green = np.full(K, 999)
+        bars_since_red = np.full(K, 999)
+        found_green = np.zeros(K, dtype=bool)
+        found_red = np.zeros(K, dtype=bool)
+        for j in range(min(50, L - max_period - 1)):
+            p = L - 1 - j
+            if not has(p):
+                break
+            t1, t2, c = trail1[p], trail2[p], close_at(p)
+            green = (t1 > t2) & (c > t2) & (self.low[p:p + K] > t2)
+            red = (t2 > t1) & (c < t2) & (self.high[p:p + K] < t2)
+            bars_since_green[green & ~found_green] = j
+            bars_since_red[red & ~found_red] = j
+            found_green |= green
+            found_red |= red
+
+        bars_since_cross = np.full(K, 30)
+        found = np.zeros(K, dtype=bool)
+        for j in range(1, min(30, L - max_period)):
+            p = L - 1 - j
+            if not has(p) or not has(p - 1):
+                break
+            t1, t2, t1_prev, t2_prev = trail1[p], trail2[p], trail1[p - 1], trail2[p - 1]
+            cross = ((t1_prev <= t2_prev) & (t1 > t2)) | ((t1_prev >= t2_prev) & (t1 < t2))
+            bars_since_cross[cross & ~found] = j
+            found |= cross
+
+        return {
+            't1': trail1[L - 1].tolist(), 't2': trail2[L - 1].tolist(),
+            't1_prev': trail1[L - 2].tolist(), 't2_prev': trail2[L - 2].tolist(),
+            'bars_since_green': bars_since_green.tolist(),
+            'bars_since_red': bars_since_red.tolist(),
+            'bars_since_cross': bars_since_cross.tolist(),
+        }
+
+
+class BarFeatures(dict):
+    """IndicatorFrame 中第 i 根K线的指标视图，按需取列"""
+
+    def __init__(self, frame, i):
+        super().__init__()
+        self.frame = frame
+        self.i = i
+        candle = frame.candles[i]
+        self['price'] = candle['close']
+        self['high'] = candle['high']
+        self['low'] = candle['low']
+
+    def __missing__(self, key):
+        frame, i = self.frame, self.i
+        if key == 'macd':
+            value = frame.macd(i)
+        elif key == 'bb':
+            value = frame.bb(i)
+        else:
+            value = frame.column(key)[i]
+        self[key] = value
+        return value
+
+    def trail(self, fast_period, fast_factor, slow_period, slow_factor):
+        return self.frame.trail_features(self.i, fast_period, fast_factor,
+                                         slow_period, slow_factor)
+
+
+# ==================== 缓存 ====================
+
+_frames = OrderedDict()
+_frames_lock = threading.Lock()
+
+
+def _frame_key(candles):
+    if not candles:
+        return (id(candles), 0)
+    return (id(candles), len(candles), candles[0]['time'], candles[-1]['time'],
+            candles[-1]['close'])
+
+
+def get_indicator_frame(candles, lookback=LOOKBACK):
+    """取（或创建）K线序列的指标帧
+
+    以列表对象 + 长度/首尾K线为键；缓存持有K线引用，id 不会被复用。
+    """
+    key = _frame_key(candles) + (lookback,)
+    with _frames_lock:
+        frame = _frames.get(key)
+        if frame is not None:
+            _frames.move_to_end(key)
+            return frame
+    frame = IndicatorFrame(candles, lookback)
+    with _frames_lock:
+        _frames[key] = frame
+        while len(_frames) > FRAME_CACHE_MAX:
+            _frames.popitem(last=False)
+    return frame
+
+
+def clear_cache():
+    with _frames_lock:
+        _frames.clear()
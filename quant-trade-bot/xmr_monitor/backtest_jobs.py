@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+回测任务队列 - 供 trading_assistant_dashboard 的回测/验证接口使用
+
+- 提交返回 job_id，任务在后台线程中调度，回测本身分批扔进进程池并行执行
+- 进度和逐条部分结果可轮询 (/api/jobs/<id>?since=N) 或 SSE 推送
+- (币种, 年份, 策略, 配置哈希, K线范围) 相同的回测直接命中结果缓存
+- K线在父进程按 (币种, 年份) 加载一次，同组回测按批次打包发送给子进程；
+  在途的组数有上限，一组跑完才加载下一组，父进程只持有少数几组K线
+"""
+
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+BACKTEST_WORKERS = int(os.environ.get('BACKTEST_WORKERS', os.cpu_count() or 2))
+RESULT_CACHE_MAX = int(os.environ.get('BACKTEST_CACHE_MAX', 20000))
+JOBS_KEEP = 200          # 内存中保留的历史任务数
+BATCHES_PER_WORKER = 4   # 每组回测切成 workers*4 批，兼顾负载均衡和K线序列化开销
+GROUPS_PER_WORKER = 2    # 最多 workers*2 组 (币种, 年份) 在途，排队的批次会一直引用整组K线
+
+
+class JobError(Exception):
+    """可直接返回给前端的任务错误（带HTTP状态码）"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class Task:
+    """一次 run_backtest 调用；meta 原样带回给 finalize / 部分结果"""
+    __slots__ = ('symbol', 'year', 'strategy', 'config', 'meta', 'min_bars')
+
+    def __init__(self, symbol, year, strategy, config, meta=None, min_bars=1):
+        self.symbol = symbol
+        self.year = year
+        self.strategy = strategy
+        self.config = config
+        self.meta = meta or {}
+        self.min_bars = min_bars
+
+
+class JobPlan:
+    """接口解析后的执行计划
+
+    finalize(results) 接收与 tasks 等长的列表（K线不足的任务为 None），
+    返回接口最终JSON；full=False 时子进程只回传 summary，减少进程间传输。
+    """
+
+    def __init__(self, kind, tasks, finalize, full=False, params=None):
+        self.kind = kind
+        self.tasks = tasks
+        self.finalize = finalize
+        self.full = full
+        self.params = params or {}
+
+
+def config_hash(config):
+    raw = json.dumps(config, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+# ==================== 结果缓存 ====================
+
+class ResultCache:
+    """LRU 回测结果缓存；需要 summary 时完整结果也可命中"""
+
+    def __init__(self, max_items=RESULT_CACHE_MAX):
+        self.max_items = max_items
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, full):
+        with self._lock:
+            for k in ((key, True),) if full else ((key, False), (key, True)):
+                if k in self._data:
+                    self._data.move_to_end(k)
+                    self.hits += 1
+                    return self._data[k]
+            self.misses += 1
+            return None
+
+    def put(self, key, full, result):
+        with self._lock:
+            self._data[(key, full)] = result
+            self._data.move_to_end((key, full))
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._data), 'max': self.max_items,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+result_cache = ResultCache()
+
+
+# ==================== 进程池 ====================
+
+def _run_batch(candles, configs, full):
+    """子进程: 同一份K线上跑一批配置"""
+    from backtest_engine import run_backtest
+    out = []
+    for cfg in configs:
+        r = run_backtest(candles, cfg)
+        out.append(r if full else {'summary': r['summary']})
+    return out
+
+
+def _noop():
+    return os.getpid()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """进程池（懒创建）；BACKTEST_WORKERS<=1 时返回 None，在任务线程内串行执行
+
+    Linux 上用 fork：子进程直接继承已导入的模块，不重新执行 dashboard 顶层代码。
+    启动时调用 warm_pool() 可在 Web 线程开始服务前一次性 fork 出全部 worker。
+    """
+    global _pool
+    if BACKTEST_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context('fork' if 'fork' in methods else None)
+            _pool = ProcessPoolExecutor(max_workers=BACKTEST_WORKERS, mp_context=ctx)
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def warm_pool():
+    pool = get_pool()
+    if pool is not None:
+        pool.submit(_noop).result()
+
+
+# ==================== 任务 ====================
+
+class Job:
+
+    def __init__(self, plan):
+        self.id = uuid.uuid4().hex[:12]
+        self.plan = plan
+        self.kind = plan.kind
+        self.status = 'queued'       # queued / running / done / error / cancelled
+        self.total = len(plan.tasks)
+        self.done = 0
+        self.cached = 0
+        self.results = [None] * self.total
+        self.partial = []            # 完成顺序的逐条摘要
+        self.result = None
+        self.error = None
+        self.error_status = 500
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+        self.version = 0             # 每次状态/进度变化 +1 (SSE)
+        self._cond = threading.Condition()
+
+    def _record(self, index, result, cached=False):
+        with self._cond:
+            self.results[index] = result
+            self.done += 1
+            if cached:
+                self.cached += 1
+            entry = {'index': index, 'meta': self.plan.tasks[index].meta, 'no_data': result is None}
+            if result is not None:
+                entry['summary'] = result['summary']
+            self.partial.append(entry)
+            self.version += 1
+            self._cond.notify_all()
+
+    def _set_status(self, status, **fields):
+        with self._cond:
+            self.status = status
+            for k, v in fields.items():
+                setattr(self, k, v)
+            self.version += 1
+            self._cond.notify_all()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'error', 'cancelled')
+
+    def wait(self, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self.finished, timeout=timeout)
+        return self.finished
+
+    def wait_change(self, seen_version, timeout=15):
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != seen_version or self.finished,
+                                timeout=timeout)
+            return self.version
+
+    def to_dict(self, since=0, include_result=True):
+        with self._cond:
+            d = {
+                'job_id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'total': self.total,
+                'done': self.done,
+                'cached': self.cached,
+                'progress': round(self.done / self.total * 100, 1) if self.total else 100.0,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'elapsed': round((self.finished_at or time.time()) - (self.started_at or self.created_at), 2),
+                'partial': self.partial[since:],
+                'next': len(self.partial),
+                'version': self.version,
+            }
+            if self.error:
+                d['error'] = self.error
+            if include_result and self.status == 'done':
+                d['result'] = self.result
+            return d
+
+
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def submit(plan, load_candles):
+    """提交执行计划，立即返回 Job；load_candles(symbol, year) -> K线列表"""
+    job = Job(plan)
+    with _jobs_lock:
+        _jobs[job.id] = job
+        while len(_jobs) > JOBS_KEEP:
+            oldest_id, oldest = next(iter(_jobs.items()))
+            if not oldest.finished:
+                break
+            _jobs.pop(oldest_id)
+    threading.Thread(target=_run_job, args=(job, load_candles),
+                     name=f'backtest-job-{job.id}', daemon=True).start()
+    return job
+
+
+def get_job(job_id):
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def list_jobs():
+    with _jobs_lock:
+        jobs = list(_jobs.values())
+    return [j.to_dict(since=len(j.partial), include_result=False) for j in reversed(jobs)]
+
+
+def cancel_job(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return None
+    job.cancel_requested = True
+    return job
+
+
+def _batches(items, n_batches):
+    size = max(1, math.ceil(len(items) / max(1, n_batches)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _run_job(job, load_candles):
+    plan = job.plan
+    job._set_status('running', started_at=time.time())
+    try:
+        # 按 (币种, 年份) 分组：K线只加载一次，前一组计算时加载下一组
+        groups = OrderedDict()
+        for i, t in enumerate(plan.tasks):
+            groups.setdefault((t.symbol, t.year), []).append(i)
+
+        pool = get_pool()
+        max_groups = GROUPS_PER_WORKER * max(1, BACKTEST_WORKERS)
+        pending = {}     # future -> (group, batch)
+        inflight = {}    # group -> 未完成的批次数
+
+        def collect():
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for fut in done:
+                group, batch = pending.pop(fut)
+                _finish_batch(job, batch, fut.result())
+                inflight[group] -= 1
+                if not inflight[group]:
+                    del inflight[group]
+
+        for group, indexes in groups.items():
+            # 在途组数到上限时先等有组跑完，再加载下一组
+            while len(inflight) >= max_groups and not job.cancel_requested:
+                collect()
+            if job.cancel_requested:
+                break
+            symbol, year = group
+            candles = load_candles(symbol, year) or []
+            span = (len(candles), candles[-1]['time'] if candles else 0)
+            todo = []
+            for i in indexes:
+                t = plan.tasks[i]
+                if len(candles) < t.min_bars:
+                    job._record(i, None)
+                    continue
+                key = (t.symbol, t.year, t.strategy, config_hash(t.config), span)
+                hit = result_cache.get(key, plan.full)
+                if hit is not None:
+                    job._record(i, hit, cached=True)
+                else:
+                    todo.append((i, key))
+            for batch in _batches(todo, BATCHES_PER_WORKER * max(1, BACKTEST_WORKERS)):
+                configs = [plan.tasks[i].config for i, _ in batch]
+                if pool is None:
+                    _finish_batch(job, batch, _run_batch(candles, configs, plan.full))
+                else:
+                    pending[pool.submit(_run_batch, candles, configs, plan.full)] = (group, batch)
+                    inflight[group] = inflight.get(group, 0) + 1
+            del candles
+
+        while pending and not job.cancel_requested:
+            collect()
+        for fut in pending:
+            fut.cancel()
+
+        if job.cancel_requested:
+            job._set_status('cancelled', finished_at=time.time())
+            return
+        result = plan.finalize(job.results)
+        job._set_status('done', result=result, finished_at=time.time())
+    except JobError as e:
+        job._set_status('error', error=str(e), error_status=e.status, finished_at=time.time())
+    except BrokenProcessPool as e:
+        _reset_pool()
+        job._set_status('error', error=f'回测进程异常退出: {e}', finished_at=time.time())
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        job._set_status('error', error=str(e), finished_at=time.time())
+
+
+def _finish_batch(job, batch, results):
+    for (i, key), r in zip(batch, results):
+        result_cache.put(key, job.plan.full, r)
+        job._record(i, r)
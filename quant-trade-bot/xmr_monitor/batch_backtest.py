@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量回测 - 币种 × 策略 × 年份全量扫描，结果写入 backtest_history.db
+
+- 不导入 Flask 仪表盘，只依赖 backtest_data / backtest_engine
+- 每个 (币种, 年份) 加载一次K线，依次跑完该组所有策略
+  （同一份K线的指标帧在策略间复用）
+- 多进程时一个币种的所有年份交给同一个子进程串行处理，
+  同一币种的K线库文件不会被多个进程同时补拉
+- 结果按批写库（一个事务 + executemany），写库后更新断点文件；
+  中断 (Ctrl-C / 被杀) 后用相同参数重跑会跳过已完成的回测和交易所确认未上市的币种年份
+  （只是这次没拉到K线的不记入断点，重跑时再试）
+- 结束时打印吞吐量 (回测/秒, K线/秒)
+
+用法:
+    python batch_backtest.py --years 2020 2021 2022
+    python batch_backtest.py --years 2024 --strategies v4.1 v5 --symbols BTC ETH --workers 8
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backtest_data import (WATCH_SYMBOLS, SKIP_COINS, STRATEGY_PRESETS, BACKTEST_DB,
+                           SymbolNotListed, fetch_historical_klines, init_backtest_db,
+                           base_backtest_config, save_backtest_runs, existing_backtest_runs)
+
+DEFAULT_STRATEGIES = ['v1', 'v2', 'v3', 'v4.1']
+DEFAULT_CAPITAL = 2000
+DEFAULT_NOTE = 'batch_{year}'
+MIN_BARS = 100
+FLUSH_EVERY = 50        # 累计多少条回测结果写一次库
+
+
+# ==================== 子进程 ====================
+
+def load_year_candles(symbol, year):
+    """默认K线加载: 交易所确认未上市时抛 SymbolNotListed"""
+    return fetch_historical_klines(symbol, year, strict=True)
+
+
+def run_unit(symbol, year, jobs, load_candles=load_year_candles, keep_trades=True):
+    """一个 (币种, 年份): 加载K线一次，跑完 jobs=[(strategy, config), ...]
+
+    no_data: K线不足 MIN_BARS；not_listed: load_candles 抛了 SymbolNotListed
+    """
+    from backtest_engine import run_backtest
+
+    started = time.time()
+    out = {'symbol': symbol, 'year': year, 'bars': 0, 'results': [],
+           'no_data': False, 'not_listed': False, 'error': None}
+    try:
+        try:
+            candles = load_candles(symbol, year)
+        except SymbolNotListed:
+            out['no_data'] = out['not_listed'] = True
+            return out
+        if not candles or len(candles) < MIN_BARS:
+            out['no_data'] = True
+            return out
+        out['bars'] = len(candles)
+        for strategy, config in jobs:
+            r = run_backtest(candles, config)
+            out['results'].append((strategy, r if keep_trades else {'summary': r['summary']}))
+    except Exception as e:
+        out['error'] = f'{type(e).__name__}: {e}'
+    finally:
+        out['seconds'] = time.time() - started
+    return out
+
+
+def run_symbol(symbol, year_jobs, load_candles=load_year_candles, keep_trades=True):
+    """一个币种的所有年份 year_jobs=[(year, jobs), ...]，串行执行，返回 [out, ...]
+
+    未上市时剩下的年份不再请求交易所。
+    """
+    outs = []
+    for year, jobs in year_jobs:
+        if outs and outs[-1]['not_listed']:
+            out = dict(outs[-1], year=year, seconds=0.0)
+        else:
+            out = run_unit(symbol, year, jobs, load_candles, keep_trades)
+        outs.append(out)
+    return outs
+
+
+# ==================== 断点 ====================
+
+class Checkpoint:
+    """已完成的回测和未上市的 (币种, 年份)；参数不同的旧断点不复用
+
+    只在对应结果提交到数据库之后保存，所以断点里的记录一定已经入库。
+    """
+
+    def __init__(self, path, params):
+        self.path = path
+        self.params = params
+        self.done = set()       # (symbol, year, strategy)
+        self.not_listed = set()     # (symbol, year) 交易所确认未上市
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"断点文件无法读取，忽略: {e}")
+                return
+            if data.get('params') != params:
+                print(f"断点参数不同，忽略旧断点: {path}")
+                return
+            self.done = set(tuple(k) for k in data.get('done', []))
+            # 旧断点的 no_data 里可能有只是没拉全的币种年份，不再沿用
+            self.not_listed = set(tuple(k) for k in data.get('not_listed', []))
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'params': self.params,
+                       'done': sorted(self.done),
+                       'not_listed': sorted(self.not_listed),
+                       'updated': time.strftime('%Y-%m-%d %H:%M:%S')}, f)
+        os.replace(tmp, self.path)
+
+
+def default_checkpoint_path(db_path):
+    return os.path.splitext(db_path)[0] + '.batch_checkpoint.json'
+
+
+# ==================== 调度 ====================
+
+class Stats:
+
+    def __init__(self, planned):
+        self.started = time.time()
+        self.planned = planned
+        self.skipped = 0        # 库里/断点里已有
+        self.runs = 0           # 本次完成并入库
+        self.no_data = 0
+        self.errors = 0
+        self.bars = 0           # 回测处理的K线总数 (K线数 × 策略数)
+        self.units_done = 0
+        self.years = OrderedDict()
+
+    def year(self, year):
+        return self.years.setdefault(year, {'runs': 0, 'no_data': 0, 'skipped': 0, 'errors': 0})
+
+    @property
+    def elapsed(self):
+        return time.time() - self.started
+
+    def rate(self):
+        return self.runs / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def plan_units(symbols, years, strategies, initial_capital, skip_runs, skip_not_listed, stats):
+    """展开为 [(symbol, year, [(strategy, config), ...])]，跳过已完成的部分"""
+    configs = {s: base_backtest_config(initial_capital, s) for s in strategies}
+    units = []
+    for year in years:
+        for symbol in symbols:
+            if (symbol, year) in skip_not_listed:
+                stats.skipped += len(strategies)
+                stats.year(year)['skipped'] += len(strategies)
+                continue
+            jobs = []
+            for strategy in strategies:
+                if (symbol, year, strategy) in skip_runs:
+                    stats.skipped += 1
+                    stats.year(year)['skipped'] += 1
+                else:
+                    jobs.append((strategy, configs[strategy]))
+            if jobs:
+                units.append((symbol, year, jobs))
+    return units
+
+
+def run_sweep(symbols, years, strategies, initial_capital=DEFAULT_CAPITAL, note=DEFAULT_NOTE,
+              db_path=BACKTEST_DB, workers=None, checkpoint_path=None, keep_trades=True,
+              flush_every=FLUSH_EVERY, load_candles=load_year_candles, log=print):
+    """执行批量回测，返回 Stats
+
+    checkpoint_path=None 用数据库旁的默认断点文件，'' 表示不使用断点。
+    workers<=1 时在当前进程串行执行。
+    """
+    workers = workers or os.cpu_count() or 1
+    if checkpoint_path is None:
+        checkpoint_path = default_checkpoint_path(db_path)
+    checkpoint = Checkpoint(checkpoint_path, {
+        'initial_capital': initial_capital, 'note': note, 'keep_trades': keep_trades})
+
+    init_backtest_db(db_path)
+    conn = sqlite3.connect(db_path)
+    skip_runs = existing_backtest_runs(conn, years) | checkpoint.done
+    stats = Stats(len(symbols) * len(strategies) * len(years))
+    units = plan_units(symbols, years, strategies, initial_capital,
+                       skip_runs, checkpoint.not_listed, stats)
+
+    log(f"计划运行: {len(symbols)}币种 × {len(strategies)}策略 × {len(years)}年 = {stats.planned} 次")
+    log(f"已完成 {stats.skipped} 次，将跳过 | 待跑 {sum(len(u[2]) for u in units)} 次"
+        f" ({len(units)} 组币种年份) | {workers} 进程")
+    log("=" * 60)
+
+    pending_rows = []
+
+    def flush():
+        if pending_rows:
+            save_backtest_runs(conn, pending_rows)
+            for symbol, year, strategy, _, _ in pending_rows:
+                checkpoint.done.add((symbol, year, strategy))
+            pending_rows.clear()
+        checkpoint.save()
+
+    def collect(out):
+        symbol, year, ys = out['symbol'], out['year'], stats.year(out['year'])
+        stats.units_done += 1
+        if out['error']:
+            stats.errors += 1
+            ys['errors'] += 1
+            log(f"  ERROR: {symbol}/{year}: {out['error']}")
+        elif out['no_data']:
+            stats.no_data += 1
+            ys['no_data'] += 1
+            if out['not_listed']:
+                checkpoint.not_listed.add((symbol, year))
+        for strategy, result in out['results']:
+            pending_rows.append((symbol, year, strategy, result, note.format(year=year, strategy=strategy)))
+            stats.runs += 1
+            ys['runs'] += 1
+            stats.bars += out['bars']
+        if len(pending_rows) >= flush_every or out['not_listed']:
+            flush()
+        if stats.units_done % 10 == 0 or stats.units_done == len(units):
+            left = len(units) - stats.units_done
+            eta = stats.elapsed / stats.units_done * left
+            log(f"  {stats.units_done}/{len(units)} 组 | 回测={stats.runs} 无数据={stats.no_data}"
+                f" 错误={stats.errors} | {stats.rate():.1f} 次/秒 | 剩余约 {eta:.0f}s")
+
+    pool = None
+    try:
+        if workers <= 1:
+            for symbol, year, jobs in units:
+                collect(run_unit(symbol, year, jobs, load_candles, keep_trades))
+        else:
+            # 一个币种一个任务: 同一币种的K线文件只由一个子进程补拉
+            by_symbol = OrderedDict()
+            for symbol, year, jobs in units:
+                by_symbol.setdefault(symbol, []).append((year, jobs))
+            pool = ProcessPoolExecutor(max_workers=workers)
+            futures = [pool.submit(run_symbol, symbol, year_jobs, load_candles, keep_trades)
+                       for symbol, year_jobs in by_symbol.items()]
+            for fut in as_completed(futures):
+                for out in fut.result():
+                    collect(out)
+    except KeyboardInterrupt:
+        log("\n中断: 保存已完成的结果，相同参数重跑可继续")
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        flush()
+        conn.close()
+        report(stats, log)
+    return stats
+
+
+def report(stats, log=print):
+    log("=" * 60)
+    for year, ys in stats.years.items():
+        log(f"  {year}: 成功={ys['runs']} 无数据组={ys['no_data']} 跳过={ys['skipped']} 错误组={ys['errors']}")
+    elapsed = stats.elapsed
+    log(f"全部完成: 计划={stats.planned} 成功={stats.runs} 跳过={stats.skipped}"
+        f" 无数据组={stats.no_data} 错误组={stats.errors}")
+    bars_rate = stats.bars / elapsed if elapsed > 0 else 0.0
+    log(f"耗时 {elapsed:.1f}s | 吞吐 {stats.rate():.2f} 次回测/秒 | {bars_rate:,.0f} K线/秒")
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description='批量回测: 币种 × 策略 × 年份')
+    p.add_argument('--years', type=int, nargs='+', default=[2020, 2021, 2022])
+    p.add_argument('--strategies', nargs='+', default=DEFAULT_STRATEGIES,
+                   help=f"可选: {' '.join(STRATEGY_PRESETS)}")
+    p.add_argument('--symbols', nargs='+', help='默认 WATCH_SYMBOLS 中除 SKIP_COINS 外的全部币种')
+    p.add_argument('--capital', type=float, default=DEFAULT_CAPITAL)
+    p.add_argument('--note', default=DEFAULT_NOTE, help='写入 note 列，可用 {year} {strategy}')
+    p.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    p.add_argument('--db', default=BACKTEST_DB)
+    p.add_argument('--checkpoint', help='断点文件 (默认数据库旁 *.batch_checkpoint.json)')
+    p.add_argument('--no-checkpoint', action='store_true')
+    p.add_argument('--no-trades', action='store_true', help='只写 backtest_runs，不写逐笔交易')
+    args = p.parse_args(argv)
+    unknown = [s for s in args.strategies if s not in STRATEGY_PRESETS]
+    if unknown:
+        p.error(f"未知策略: {' '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    skip = set(SKIP_COINS)
+    symbols = args.symbols or [s for s in WATCH_SYMBOLS if s not in skip]
+    try:
+        stats = run_sweep(symbols, args.years, args.strategies,
+                          initial_capital=args.capital, note=args.note, db_path=args.db,
+                          workers=args.workers,
+                          checkpoint_path='' if args.no_checkpoint else args.checkpoint,
+                          keep_trades=not args.no_trades)
+    except KeyboardInterrupt:
+        return 130
+    return 1 if stats.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
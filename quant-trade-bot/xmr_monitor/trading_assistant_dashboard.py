@@ -14,54 +14,17 @@ v1.2 新功能:
 
 from flask import Flask, jsonify, render_template_string, request
 import sqlite3
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 import os
 import requests
-import time as _time
+
+from backtest_data import (WATCH_SYMBOLS, SYMBOL_MAP, SKIP_COINS, STRATEGY_PRESETS,
+                           BACKTEST_DB, fetch_historical_klines, init_backtest_db,
+                           base_backtest_config, save_backtest_runs)
 
 app = Flask(__name__)
 
-# 监控币种列表 (~100个)
-WATCH_SYMBOLS = [
-    # 顶级流动性 (10)
-    'BTC', 'ETH', 'SOL', 'XRP', 'BNB', 'DOGE', 'ADA', 'AVAX', 'LINK', 'DOT',
-    # 主流公链 (15)
-    'NEAR', 'SUI', 'APT', 'ATOM', 'FTM', 'HBAR', 'XLM', 'ETC', 'LTC', 'BCH',
-    'ALGO', 'ICP', 'FIL', 'XMR', 'TRX',
-    # Layer2/DeFi (15)
-    'ARB', 'OP', 'MATIC', 'AAVE', 'UNI', 'CRV', 'DYDX', 'INJ', 'SEI',
-    'STX', 'RUNE', 'SNX', 'COMP', 'MKR', 'LDO',
-    # AI/新叙事 (11)
-    'TAO', 'RENDER', 'FET', 'WLD', 'AGIX', 'OCEAN', 'ARKM', 'PENGU',
-    'AIXBT', 'GRASS', 'CGPT',
-    # 中市值热门 (22)
-    'TIA', 'JUP', 'PYTH', 'JTO', 'ENA', 'STRK', 'ZRO', 'WIF',
-    'SHIB', 'FLOKI', 'TRUMP',
-    'VET', 'AXS', 'ROSE', 'DUSK', 'CHZ', 'ENJ', 'SAND',
-    'ONDO', 'PENDLE', 'EIGEN', 'ETHFI', 'TON',
-    # GameFi/存储/其他 (15)
-    'MANA', 'GALA', 'IMX', 'ORDI', 'SXP', 'ZEC', 'DASH',
-    'WAVES', 'GRT', 'THETA', 'IOTA', 'NEO', 'KAVA', 'ONE', 'CELO',
-    # DeFi/基础设施 (15)
-    'CAKE', 'SUSHI', 'GMX', 'ENS', 'BLUR', 'PEOPLE', 'MASK',
-    '1INCH', 'ANKR', 'AR', 'FLOW', 'EGLD', 'KAS', 'JASMY', 'NOT',
-    # Meme/热点 (14)
-    'NEIRO', 'PNUT', 'POPCAT', 'TURBO', 'MEME', 'BOME', 'DOGS',
-    'FARTCOIN', 'USUAL', 'ME', 'MOODENG', 'SPX', 'ANIME', 'SONIC',
-    # 高波动 (15)
-    'HYPE', 'LINA', 'LEVER', 'ALPHA', 'UNFI',
-    'YGG', 'PIXEL', 'PORTAL', 'XAI', 'DYM', 'MANTA', 'ZK', 'W', 'SAGA', 'RSR',
-    # 跳过但显示 (7) — in SKIP_COINS, shown as skipped in UI
-    'BERA', 'IP', 'LIT', 'TROY', 'VIRTUAL', 'BONK', 'PEPE',
-]
-
-SYMBOL_MAP = {s: f'{s}USDT' for s in WATCH_SYMBOLS}
-# Binance futures uses 1000x prefix for low-price tokens
-SYMBOL_MAP.update({
-    'BONK': '1000BONKUSDT', 'PEPE': '1000PEPEUSDT',
-    'SHIB': '1000SHIBUSDT', 'FLOKI': '1000FLOKIUSDT',
-    'NEIRO': '1000NEIROUSDT',
-})
+# 监控币种列表 WATCH_SYMBOLS / SYMBOL_MAP / SKIP_COINS 定义在 backtest_data
 
 # ===== v4策略 - 币种Tier分层 (2023-2025回测+2026验证) =====
 COIN_TIERS = {
@@ -87,7 +50,6 @@ COIN_TIERS = {
     'BNX': 'T3', 'TRUMP': 'T3', 'TRX': 'T3', 'ONE': 'T3',
     'JUP': 'T3',
 }
-SKIP_COINS = ['BERA', 'IP', 'LIT', 'TROY', 'VIRTUAL', 'BONK', 'PEPE', 'DUSK', 'FARTCOIN', 'ANIME']
 
 DB_PATH = '/opt/trading-bot/quant-trade-bot/data/db/paper_trader.db'  # Paper Trader 独立数据库
 
@@ -4404,333 +4366,15 @@ HTML_TEMPLATE = '''
 # ==============================
 # 回测模拟器
 # ==============================
-
-_kline_cache = {}
-_KLINE_CACHE_MAX = 10  # 最多缓存10个币种-年份，避免内存爆掉
-
-def fetch_historical_klines(symbol, year):
-    """从Binance拉取一整年的1h K线数据"""
-    cache_key = f"{symbol}_{year}"
-    if cache_key in _kline_cache:
-        return _kline_cache[cache_key]
-
-    binance_symbol = SYMBOL_MAP.get(symbol, f"{symbol}USDT")
-    start_dt = datetime(year, 1, 1, tzinfo=timezone.utc)
-    end_dt = datetime(year, 12, 31, 23, 59, 59, tzinfo=timezone.utc)
-    start_ms = int(start_dt.timestamp() * 1000)
-    end_ms = int(end_dt.timestamp() * 1000)
-
-    all_candles = []
-    current_start = start_ms
-
-    while current_start < end_ms:
-        try:
-            url = "https://fapi.binance.com/fapi/v1/klines"
-            params = {
-                'symbol': binance_symbol,
-                'interval': '1h',
-                'startTime': current_start,
-                'endTime': end_ms,
-                'limit': 1500
-            }
-            response = requests.get(url, params=params, timeout=30)
-            klines = response.json()
-
-            if not klines or isinstance(klines, dict):
-                break
-
-            for k in klines:
-                all_candles.append({
-                    'time': int(k[0]),
-                    'open': float(k[1]),
-                    'high': float(k[2]),
-                    'low': float(k[3]),
-                    'close': float(k[4]),
-                    'volume': float(k[5])
-                })
-
-            current_start = int(klines[-1][0]) + 3600001
-            if len(klines) < 1500:
-                break
-
-            _time.sleep(0.2)  # 避免API限流
-        except Exception as e:
-            print(f"拉取K线失败: {e}")
-            break
-
-    if all_candles:
-        # 限制缓存大小，避免内存溢出
-        if len(_kline_cache) >= _KLINE_CACHE_MAX:
-            _kline_cache.pop(next(iter(_kline_cache)))
-        _kline_cache[cache_key] = all_candles
-
-    return all_candles
-
-
-BACKTEST_DB = '/opt/trading-bot/quant-trade-bot/data/db/backtest_history.db'
-
-def init_backtest_db():
-    """初始化回测历史数据库"""
-    conn = sqlite3.connect(BACKTEST_DB)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS backtest_runs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        symbol TEXT, year INTEGER, initial_capital REAL,
-        final_capital REAL, total_pnl REAL, win_rate REAL,
-        total_trades INTEGER, win_trades INTEGER, loss_trades INTEGER,
-        max_drawdown REAL, profit_factor REAL,
-        avg_win REAL, avg_loss REAL, best_trade REAL, worst_trade REAL,
-        bankrupt INTEGER, strategy_version TEXT,
-        run_time TEXT, note TEXT
-    )''')
-    c.execute('''CREATE TABLE IF NOT EXISTS backtest_trades (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        run_id INTEGER, trade_id INTEGER,
-        direction TEXT, entry_price REAL, exit_price REAL,
-        amount REAL, leverage INTEGER,
-        pnl REAL, roi REAL, fee REAL, funding_fee REAL,
-        reason TEXT, entry_time TEXT, exit_time TEXT,
-        score INTEGER, stop_moves INTEGER,
-        FOREIGN KEY (run_id) REFERENCES backtest_runs(id)
-    )''')
-    conn.commit()
-    conn.close()
+# K线加载、回测历史库、策略预设 STRATEGY_PRESETS 见 backtest_data
 
 init_backtest_db()
 
-# 策略预设
-STRATEGY_PRESETS = {
-    'v1': {
-        'label': 'v1 原始 (Original)',
-        'description': '低门槛/高杠杆/1h冷却',
-        'config': {
-            'min_score': 55,
-            'cooldown': 1,
-            'max_leverage': 10,
-            'enable_trend_filter': False,
-            'roi_stop_loss': -10,
-            'roi_trailing_start': 5,
-            'roi_trailing_distance': 3,
-        }
-    },
-    'v2': {
-        'label': 'v2 稳健 (Conservative)',
-        'description': '高门槛/低杠杆/12h冷却/趋势过滤/ROI模式',
-        'config': {
-            'min_score': 70,
-            'cooldown': 12,
-            'max_leverage': 5,
-            'enable_trend_filter': True,
-            'roi_stop_loss': -8,
-            'roi_trailing_start': 5,
-            'roi_trailing_distance': 3,
-        }
-    },
-    'v3': {
-        'label': 'v3 ROI模式 (ROI-Based)',
-        'description': '宽止损/移动止盈/让利润跑',
-        'config': {
-            'min_score': 60,
-            'cooldown': 4,
-            'max_leverage': 5,
-            'enable_trend_filter': True,
-            'roi_stop_loss': -10,
-            'roi_trailing_start': 8,
-            'roi_trailing_distance': 3,
-        }
-    },
-    'v4.1': {
-        'label': 'v4.1 防守反击',
-        'description': 'LONG≥70/3x杠杆/4h冷却/严格趋势过滤',
-        'config': {
-            'min_score': 60,
-            'long_min_score': 70,
-            'cooldown': 4,
-            'max_leverage': 3,
-            'enable_trend_filter': True,
-            'long_ma_slope_threshold': 0.02,
-            'roi_stop_loss': -10,
-            'roi_trailing_start': 6,
-            'roi_trailing_distance': 3,
-        }
-    },
-    'v4.2': {
-        'label': 'v4.2 扩容版',
-        'description': 'v4.1基础 + 30m冷却 + 20仓位 + 不限方向 + SHORT偏置1.05 + LONG加强过滤',
-        'config': {
-            'min_score': 60,
-            'long_min_score': 70,
-            'cooldown': 1,
-            'max_leverage': 3,
-            'max_positions': 12,
-            'max_same_direction': 12,
-            'short_bias': 1.05,
-            'enable_trend_filter': True,
-            'enable_btc_filter': True,
-            'long_ma_slope_threshold': 0.02,
-            'roi_stop_loss': -10,
-            'roi_trailing_start': 6,
-            'roi_trailing_distance': 3,
-        }
-    },
-    'v4.3': {
-        'label': 'v4.3 动态版',
-        'description': '动态杠杆(3-10x) + 移动止盈(按趋势强度调整启动点和回撤距离)',
-        'config': {
-            'min_score': 60,
-            'long_min_score': 70,
-            'cooldown': 1,
-            'max_leverage': 10,
-            'max_positions': 12,
-            'max_same_direction': 12,
-            'short_bias': 1.05,
-            'enable_trend_filter': True,
-            'enable_btc_filter': True,
-            'long_ma_slope_threshold': 0.02,
-            'dynamic_leverage': True,
-            'dynamic_tpsl': True,
-            'fixed_tp_mode': False,
-            'roi_stop_loss': -8,
-            'roi_trailing_start': 6,
-            'roi_trailing_distance': 3,
-        }
-    },
-    'v4.3.1': {
-        'label': 'v4.3.1 动态杠杆版',
-        'description': '动态杠杆(3-10x) + 杠杆联动止盈止损(高杠杆紧/低杠杆松)',
-        'config': {
-            'min_score': 60,
-            'long_min_score': 70,
-            'cooldown': 1,
-            'max_leverage': 10,
-            'max_positions': 15,
-            'max_same_direction': 15,
-            'short_bias': 1.05,
-            'enable_trend_filter': True,
-            'enable_btc_filter': True,
-            'long_ma_slope_threshold': 0.02,
-            'dynamic_leverage': True,
-            'leverage_based_tpsl': True,
-        }
-    },
-    'v4.4': {
-        'label': 'v4.4 高盈亏比',
-        'description': 'v4.2基础 + 止盈15% + 止损8% (风险收益比 1:1.87)',
-        'config': {
-            'min_score': 60,
-            'long_min_score': 70,
-            'cooldown': 1,
-            'max_leverage': 3,
-            'max_positions': 12,
-            'max_same_direction': 12,
-            'short_bias': 1.05,
-            'enable_trend_filter': True,
-            'enable_btc_filter': True,
-            'long_ma_slope_threshold': 0.02,
-            'roi_stop_loss': -8,
-            'roi_take_profit': 15,
-            'roi_trailing_start': 15,
-            'roi_trailing_distance': 3,
-        }
-    },
-    'v5.0': {
-        'label': 'v5.0 三重确认',
-        'description': '10x杠杆 | MACD+RSI+BB+ADX三重确认 | TP1:+10%(50%) TP2:+20%尾随 | ATR动态止损',
-        'config': {
-            'v5_mode': True,
-            'min_score': 75,
-            'long_min_score': 80,
-            'cooldown': 1,
-            'max_leverage': 10,
-            'max_positions': 5,
-            'max_same_direction': 5,
-            'short_bias': 1.05,
-            'adx_min_threshold': 25,
-            'roi_stop_loss': -8,
-            'tp1_roi': 10,
-            'tp1_close_ratio': 0.5,
-            'tp2_roi': 20,
-            'tp2_trail_distance': 5,
-        }
-    },
-    'v6': {
-        'label': 'v6 智能整合',
-        'description': 'v4.2评分基础 + MACD/ADX/BB加分(3x) | 6年回测PnL比v4.2高59%',
-        'config': {
-            'v6b_mode': True,
-            'min_score': 70,
-            'long_min_score': 85,
-            'cooldown': 1,
-            'max_leverage': 3,
-            'max_positions': 15,
-            'max_same_direction': 15,
-            'short_bias': 1.05,
-            'enable_trend_filter': True,
-            'long_ma_slope_threshold': 0.02,
-            'roi_stop_loss': -10,
-            'roi_trailing_start': 6,
-            'roi_trailing_distance': 3,
-        }
-    },
-    'v8': {
-        'label': 'v8 ATR双轨 (Dual Trail)',
-        'description': '快轨ATR(5)×0.5 + 慢轨ATR(10)×3 | 5x杠杆 | 交叉入场 | ATR止损 | 分步止盈',
-        'config': {
-            'v8_mode': True,
-            'min_score': 65,
-            'long_min_score': 75,
-            'cooldown': 1,
-            'max_leverage': 5,
-            'max_positions': 10,
-            'max_same_direction': 10,
-            'short_bias': 1.05,
-            'roi_stop_loss': -10,
-            'tp1_roi': 12,
-            'tp1_close_ratio': 0.5,
-            'tp2_roi': 25,
-            'tp2_trail_distance': 4,
-            'v8_fast_atr_period': 5,
-            'v8_fast_atr_factor': 0.5,
-            'v8_slow_atr_period': 10,
-            'v8_slow_atr_factor': 3.0,
-            'v8_adx_filter': True,
-        }
-    },
-    'v9': {
-        'label': 'v9 V6+V8融合 (Combined)',
-        'description': 'V6b评分 + V8 ATR双轨软确认 | 3x杠杆 | V6移动止盈 | 假信号过滤',
-        'config': {
-            'v9_mode': True,
-            'v8_fast_atr_period': 5,
-            'v8_fast_atr_factor': 0.5,
-            'v8_slow_atr_period': 10,
-            'v8_slow_atr_factor': 3.0,
-            'short_bias': 1.05,
-            'min_score': 70,
-            'long_min_score': 85,
-            'cooldown': 1,
-            'max_leverage': 3,
-            'max_positions': 15,
-            'max_same_direction': 15,
-            'enable_trend_filter': True,
-            'long_ma_slope_threshold': 0.02,
-            'roi_stop_loss': -10,
-            'roi_trailing_start': 6,
-            'roi_trailing_distance': 3,
-        }
-    },
-    'v4': {
-        'label': 'v4 自定义 (Custom)',
-        'description': '自由调整所有参数',
-        'config': {}
-    }
-}
-
 
 @app.route('/backtest')
 def backtest_page():
     """回测模拟器页面"""
-    return render_template_string(BACKTEST_TEMPLATE)
+    return render_template_string(BACKTEST_TEMPLATE, scan_max=SCAN_MAX_COMBOS)
 
 
 @app.route('/api/backtest/symbols')
@@ -4746,78 +4390,91 @@ def get_strategies():
                     for k, v in STRATEGY_PRESETS.items()})
 
 
-@app.route('/api/backtest/run', methods=['POST'])
-def run_backtest_api():
-    """执行回测并保存结果"""
-    try:
-        from backtest_engine import run_backtest
-
-        params = request.get_json()
-        symbol = params.get('symbol', 'BTC')
-        year = int(params.get('year', 2024))
-        initial_capital = float(params.get('initial_capital', 1000))
-        strategy = params.get('strategy', 'v2')
-        custom_params = params.get('custom_params', {})
-        note = params.get('note', '')
-
-        candles = fetch_historical_klines(symbol, year)
-        if not candles:
-            return jsonify({'error': f'{symbol} 在 {year} 年没有数据'}), 400
-
-        # 构建配置：基础 + 策略预设 + 自定义覆盖
-        config = {
-            'initial_capital': initial_capital,
-            'fee_rate': 0.0005,
-            'max_positions': 3,
-            'max_same_direction': 2
-        }
-        preset = STRATEGY_PRESETS.get(strategy, STRATEGY_PRESETS['v2'])
-        config.update(preset['config'])
-        if strategy == 'v4' and custom_params:
-            for k, v in custom_params.items():
-                config[k] = float(v) if isinstance(v, str) else v
-
-        result = run_backtest(candles, config)
+# ==================== 回测任务 ====================
+# 回测/验证接口只负责把请求解析成执行计划 (backtest_jobs.JobPlan)，
+# 实际回测在进程池中执行。默认同步等待结果（响应格式不变）；
+# 请求体或URL带 async=1 时立即返回 202 + job_id，进度从 /api/jobs/<id> 查询。
 
-        # 保存到数据库
-        s = result['summary']
-        conn = sqlite3.connect(BACKTEST_DB)
-        c = conn.cursor()
-        c.execute('''INSERT INTO backtest_runs
-            (symbol, year, initial_capital, final_capital, total_pnl,
-             win_rate, total_trades, win_trades, loss_trades,
-             max_drawdown, profit_factor, avg_win, avg_loss,
-             best_trade, worst_trade, bankrupt, strategy_version, run_time, note)
-            VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)''',
-            (symbol, year, s['initial_capital'], s['final_capital'], s['total_pnl'],
-             s['win_rate'], s['total_trades'], s['win_trades'], s['loss_trades'],
-             s['max_drawdown'], s['profit_factor'], s['avg_win'], s['avg_loss'],
-             s['best_trade'], s['worst_trade'], 1 if s['bankrupt'] else 0,
-             strategy, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), note))
-        run_id = c.lastrowid
-
-        for t in result['trades']:
-            c.execute('''INSERT INTO backtest_trades
-                (run_id, trade_id, direction, entry_price, exit_price,
-                 amount, leverage, pnl, roi, fee, funding_fee,
-                 reason, entry_time, exit_time, score, stop_moves)
-                VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)''',
-                (run_id, t['trade_id'], t['direction'], t['entry_price'], t['exit_price'],
-                 t['amount'], t['leverage'], t['pnl'], t['roi'], t['fee'], t['funding_fee'],
-                 t['reason'], t['entry_time'], t['exit_time'], t['score'], t['stop_moves']))
-
-        conn.commit()
-        conn.close()
+import backtest_jobs
+from backtest_jobs import JobError, JobPlan, Task
+
+SCAN_MAX_COMBOS_SYNC = 50                                        # 同步扫描上限
+SCAN_MAX_COMBOS = int(os.environ.get('SCAN_MAX_COMBOS', 5000))   # 异步扫描上限
 
-        result['run_id'] = run_id
-        return jsonify(result)
 
+def _wants_async(params):
+    flag = params.get('async', request.args.get('async'))
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+
+def _dispatch_backtest_job(build_plan):
+    """解析请求 -> 提交任务；同步模式等待完成后按原格式返回"""
+    try:
+        params = request.get_json(silent=True) or {}
+        is_async = _wants_async(params)
+        plan = build_plan(params, is_async)
+        job = backtest_jobs.submit(plan, fetch_historical_klines)
+        if is_async:
+            return jsonify({
+                'job_id': job.id,
+                'kind': job.kind,
+                'status': job.status,
+                'total': job.total,
+                'status_url': f'/api/jobs/{job.id}',
+                'stream_url': f'/api/jobs/{job.id}/stream'
+            }), 202
+        job.wait()
+        if job.status != 'done':
+            return jsonify({'error': job.error or job.status}), job.error_status
+        return jsonify(job.result)
+
+    except JobError as e:
+        return jsonify({'error': str(e)}), e.status
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
 
+def _plan_backtest_run(params, is_async):
+    symbol = params.get('symbol', 'BTC')
+    year = int(params.get('year', 2024))
+    initial_capital = float(params.get('initial_capital', 1000))
+    strategy = params.get('strategy', 'v2')
+    custom_params = params.get('custom_params', {})
+    note = params.get('note', '')
+
+    # 构建配置：基础 + 策略预设 + 自定义覆盖
+    config = base_backtest_config(initial_capital, strategy)
+    if strategy == 'v4' and custom_params:
+        for k, v in custom_params.items():
+            config[k] = float(v) if isinstance(v, str) else v
+
+    def finalize(results):
+        if results[0] is None:
+            raise JobError(f'{symbol} 在 {year} 年没有数据')
+        result = dict(results[0])  # 缓存中的结果对象不能被修改
+
+        # 保存到数据库
+        conn = sqlite3.connect(BACKTEST_DB)
+        try:
+            run_id, = save_backtest_runs(conn, [(symbol, year, strategy, result, note)])
+        finally:
+            conn.close()
+
+        result['run_id'] = run_id
+        return result
+
+    tasks = [Task(symbol, year, strategy, config, meta={'symbol': symbol, 'year': year})]
+    return JobPlan('run', tasks, finalize, full=True)
+
+
+@app.route('/api/backtest/run', methods=['POST'])
+def run_backtest_api():
+    """执行回测并保存结果"""
+    return _dispatch_backtest_job(_plan_backtest_run)
+
+
 @app.route('/api/backtest/history')
 def get_backtest_history():
     """获取回测历史列表"""
@@ -4842,59 +4499,51 @@ def get_backtest_trades(run_id):
     return jsonify(trades)
 
 
-@app.route('/api/backtest/scan', methods=['POST'])
-def run_backtest_scan():
-    """参数扫描 - 遍历不同参数组合"""
-    try:
-        from backtest_engine import run_backtest
-        import itertools
-
-        params = request.get_json()
-        symbol = params.get('symbol', 'BTC')
-        year = int(params.get('year', 2024))
-        initial_capital = float(params.get('initial_capital', 1000))
-        strategy = params.get('strategy', 'v2')
-        scan_params = params.get('scan_params', {})
-
-        if not scan_params:
-            return jsonify({'error': '请至少选择一个扫描参数'}), 400
-
-        candles = fetch_historical_klines(symbol, year)
-        if not candles:
-            return jsonify({'error': f'{symbol} 在 {year} 年没有数据'}), 400
-
-        # 安全限制
-        param_names = list(scan_params.keys())
-        param_values = list(scan_params.values())
-        total_combos = 1
-        for v in param_values:
-            total_combos *= len(v)
-        if total_combos > 50:
-            return jsonify({'error': f'组合数过多 ({total_combos})，最多50种'}), 400
-
-        # 基础配置
-        base_config = {
-            'initial_capital': initial_capital,
-            'fee_rate': 0.0005,
-            'max_positions': 3,
-            'max_same_direction': 2
-        }
-        preset = STRATEGY_PRESETS.get(strategy, STRATEGY_PRESETS['v2'])
-        base_config.update(preset['config'])
-
-        results = []
-        for combo in itertools.product(*param_values):
-            cfg = dict(base_config)
-            label_parts = []
-            for name, val in zip(param_names, combo):
-                cfg[name] = val
-                label_parts.append(f"{name}={val}")
-
-            result = run_backtest(candles, cfg)
+def _plan_backtest_scan(params, is_async):
+    import itertools
+
+    symbol = params.get('symbol', 'BTC')
+    year = int(params.get('year', 2024))
+    initial_capital = float(params.get('initial_capital', 1000))
+    strategy = params.get('strategy', 'v2')
+    scan_params = params.get('scan_params', {})
+
+    if not scan_params:
+        raise JobError('请至少选择一个扫描参数')
+
+    # 安全限制：同步请求会占住Web线程，异步任务只占进程池
+    param_names = list(scan_params.keys())
+    param_values = list(scan_params.values())
+    total_combos = 1
+    for v in param_values:
+        total_combos *= len(v)
+    max_combos = SCAN_MAX_COMBOS if is_async else SCAN_MAX_COMBOS_SYNC
+    if total_combos > max_combos:
+        raise JobError(f'组合数过多 ({total_combos})，最多{max_combos}种')
+
+    base_config = base_backtest_config(initial_capital, strategy)
+
+    tasks = []
+    for combo in itertools.product(*param_values):
+        cfg = dict(base_config)
+        label_parts = []
+        for name, val in zip(param_names, combo):
+            cfg[name] = val
+            label_parts.append(f"{name}={val}")
+        tasks.append(Task(symbol, year, strategy, cfg, meta={
+            'params': dict(zip(param_names, combo)),
+            'params_label': ', '.join(label_parts)
+        }))
+
+    def finalize(results):
+        if any(r is None for r in results):
+            raise JobError(f'{symbol} 在 {year} 年没有数据')
+        rows = []
+        for task, result in zip(tasks, results):
             sm = result['summary']
-            results.append({
-                'params': dict(zip(param_names, combo)),
-                'params_label': ', '.join(label_parts),
+            rows.append({
+                'params': task.meta['params'],
+                'params_label': task.meta['params_label'],
                 'final_capital': sm['final_capital'],
                 'total_pnl': sm['total_pnl'],
                 'win_rate': sm['win_rate'],
@@ -4904,19 +4553,70 @@ def run_backtest_scan():
                 'bankrupt': sm['bankrupt']
             })
 
-        results.sort(key=lambda r: r['total_pnl'], reverse=True)
+        rows.sort(key=lambda r: r['total_pnl'], reverse=True)
 
-        return jsonify({
+        return {
             'symbol': symbol,
             'year': year,
-            'total_combos': len(results),
-            'results': results
-        })
+            'total_combos': len(rows),
+            'results': rows
+        }
 
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
+    return JobPlan('scan', tasks, finalize)
+
+
+@app.route('/api/backtest/scan', methods=['POST'])
+def run_backtest_scan():
+    """参数扫描 - 遍历不同参数组合"""
+    return _dispatch_backtest_job(_plan_backtest_scan)
+
+
+@app.route('/api/jobs')
+def list_backtest_jobs():
+    """最近的回测任务（不含结果）+ 结果缓存命中情况"""
+    return jsonify({'jobs': backtest_jobs.list_jobs(), 'cache': backtest_jobs.result_cache.stats()})
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET', 'DELETE'])
+def get_backtest_job(job_id):
+    """任务进度；since=N 只返回第N条之后的部分结果，完成后带 result"""
+    if request.method == 'DELETE':
+        job = backtest_jobs.cancel_job(job_id)
+    else:
+        job = backtest_jobs.get_job(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在或已过期'}), 404
+    return jsonify(job.to_dict(since=request.args.get('since', 0, type=int)))
+
+
+@app.route('/api/jobs/<job_id>/stream')
+def stream_backtest_job(job_id):
+    """SSE：推送任务进度和新增的部分结果，任务结束后关闭"""
+    from flask import Response
+    import json
+
+    job = backtest_jobs.get_job(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在或已过期'}), 404
+
+    first = request.args.get('since', 0, type=int)
+
+    def _events():
+        since, seen = first, -1
+        while True:
+            version = job.wait_change(seen)
+            if version == seen and not job.finished:
+                yield ": keepalive\n\n"
+                continue
+            seen = version
+            d = job.to_dict(since=since)
+            since = d['next']
+            yield f"event: progress\ndata: {json.dumps(d, ensure_ascii=False)}\n\n"
+            if job.finished:
+                break
+
+    return Response(_events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
 @app.route('/api/backtest/kline/<symbol>')
@@ -6742,14 +6442,15 @@ BACKTEST_TEMPLATE = '''
         document.addEventListener('keydown', e => { if (e.key === 'Escape') closeModal(); });
 
         // === 参数扫描 ===
+        const SCAN_MAX = {{ scan_max }};
         function updateComboCount() {
             let total = 1;
             document.querySelectorAll('.scan-cb:checked').forEach(cb => {
                 total *= parseInt(cb.dataset.n);
             });
             const el = document.getElementById('scan-combo-count');
-            if (total > 50) {
-                el.textContent = total + ' 种组合（超过50上限）';
+            if (total > SCAN_MAX) {
+                el.textContent = total + ' 种组合（超过' + SCAN_MAX + '上限）';
                 el.style.color = '#ef4444';
             } else {
                 el.textContent = total + ' 种组合';
@@ -6769,13 +6470,14 @@ BACKTEST_TEMPLATE = '''
 
             let total = 1;
             Object.values(scanParams).forEach(v => total *= v.length);
-            if (total > 50) { alert('组合数过多 (' + total + ')，请减少勾选参数'); return; }
+            if (total > SCAN_MAX) { alert('组合数过多 (' + total + ')，最多' + SCAN_MAX + '种'); return; }
 
             const btn = document.getElementById('scan-btn');
             btn.disabled = true;
-            btn.textContent = '扫描中... (' + total + '组合)';
+            btn.textContent = '提交中... (' + total + '组合)';
 
             try {
+                // 异步任务：提交后轮询进度，扫描在服务端进程池中执行
                 const response = await fetch('/api/backtest/scan', {
                     method: 'POST',
                     headers: {'Content-Type': 'application/json'},
@@ -6784,12 +6486,27 @@ BACKTEST_TEMPLATE = '''
                         year: document.getElementById('year-select').value,
                         initial_capital: parseFloat(document.getElementById('capital-input').value) || 2000,
                         strategy: document.getElementById('strategy-select').value,
-                        scan_params: scanParams
+                        scan_params: scanParams,
+                        async: true
                     })
                 });
-                const data = await response.json();
-                if (data.error) { alert('扫描失败: ' + data.error); return; }
-                renderScanResults(data);
+                const job = await response.json();
+                if (job.error) { alert('扫描失败: ' + job.error); return; }
+
+                let seen = 0;
+                while (true) {
+                    await new Promise(r => setTimeout(r, 1000));
+                    const st = await (await fetch(job.status_url + '?since=' + seen)).json();
+                    seen = st.next || seen;
+                    if (st.error && st.status !== 'error') { alert('扫描失败: ' + st.error); return; }
+                    btn.textContent = '扫描中... ' + st.done + '/' + st.total +
+                        (st.cached ? ' (缓存' + st.cached + ')' : '');
+                    if (st.status === 'done') { renderScanResults(st.result); break; }
+                    if (st.status === 'error' || st.status === 'cancelled') {
+                        alert('扫描失败: ' + (st.error || st.status));
+                        return;
+                    }
+                }
             } catch(e) {
                 alert('扫描请求失败: ' + e.message);
             } finally {
@@ -6837,56 +6554,45 @@ BACKTEST_TEMPLATE = '''
 
 # ==================== 过拟合验证页 ====================
 
-@app.route('/api/validation/walk-forward', methods=['POST'])
-def walk_forward_validation():
-    """Walk-Forward 验证：训练期 → 验证期 → 测试期"""
-    try:
-        from backtest_engine import run_backtest
-
-        params = request.get_json()
-        symbol = params.get('symbol', 'BTC')
-        strategy = params.get('strategy', 'v4.1')
-        initial_capital = float(params.get('initial_capital', 1000))
-        # 可选多币种
-        symbols = params.get('symbols', [symbol])
-        if not symbols:
-            symbols = [symbol]
-
-        preset = STRATEGY_PRESETS.get(strategy, STRATEGY_PRESETS['v4.1'])
-
-        base_config = {
-            'initial_capital': initial_capital,
-            'fee_rate': 0.0005,
-            'max_positions': 3,
-            'max_same_direction': 2
-        }
-        base_config.update(preset['config'])
-
-        # Walk-Forward: 按时间顺序，越早越偏训练，越晚越偏测试
-        periods = [
-            {'year': 2020, 'role': 'train', 'label': '2020 远期训练'},
-            {'year': 2021, 'role': 'train', 'label': '2021 训练期'},
-            {'year': 2022, 'role': 'train', 'label': '2022 训练期'},
-            {'year': 2023, 'role': 'validate', 'label': '2023 验证期'},
-            {'year': 2024, 'role': 'validate', 'label': '2024 验证期'},
-            {'year': 2025, 'role': 'test', 'label': '2025 测试期'}
-        ]
-
+def _plan_walk_forward(params, is_async):
+    symbol = params.get('symbol', 'BTC')
+    strategy = params.get('strategy', 'v4.1')
+    initial_capital = float(params.get('initial_capital', 1000))
+    # 可选多币种
+    symbols = params.get('symbols', [symbol])
+    if not symbols:
+        symbols = [symbol]
+
+    base_config = base_backtest_config(initial_capital, strategy, 'v4.1')
+
+    # Walk-Forward: 按时间顺序，越早越偏训练，越晚越偏测试
+    periods = [
+        {'year': 2020, 'role': 'train', 'label': '2020 远期训练'},
+        {'year': 2021, 'role': 'train', 'label': '2021 训练期'},
+        {'year': 2022, 'role': 'train', 'label': '2022 训练期'},
+        {'year': 2023, 'role': 'validate', 'label': '2023 验证期'},
+        {'year': 2024, 'role': 'validate', 'label': '2024 验证期'},
+        {'year': 2025, 'role': 'test', 'label': '2025 测试期'}
+    ]
+
+    tasks = [Task(sym, p['year'], strategy, base_config, min_bars=100,
+                  meta={'symbol': sym, 'year': p['year'], 'role': p['role']})
+             for sym in symbols for p in periods]
+
+    def finalize(task_results):
         results = []
+        it = iter(task_results)
         for sym in symbols:
             sym_data = {'symbol': sym, 'periods': []}
             for p in periods:
-                candles = fetch_historical_klines(sym, p['year'])
-                if not candles or len(candles) < 100:
+                result = next(it)
+                if result is None:
                     sym_data['periods'].append({
                         'year': p['year'], 'role': p['role'], 'label': p['label'],
                         'pnl': 0, 'win_rate': 0, 'trades': 0, 'no_data': True
                     })
                     continue
 
-                cfg = dict(base_config)
-                cfg['initial_capital'] = initial_capital
-                result = run_backtest(candles, cfg)
                 s = result['summary']
                 sym_data['periods'].append({
                     'year': p['year'], 'role': p['role'], 'label': p['label'],
@@ -6942,7 +6648,7 @@ def walk_forward_validation():
             overfit_level = 'HIGH'
             overfit_msg = '策略表现严重衰减，过拟合风险高'
 
-        return jsonify({
+        return {
             'strategy': strategy,
             'symbols': symbols,
             'results': results,
@@ -6956,64 +6662,55 @@ def walk_forward_validation():
                 'validate_ratio': round(validate_ratio, 2),
                 'test_ratio': round(test_ratio, 2)
             }
-        })
-
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
-
-
-@app.route('/api/validation/param-sensitivity', methods=['POST'])
-def param_sensitivity():
-    """参数敏感度分析：扫描单个参数观察PnL变化"""
-    try:
-        from backtest_engine import run_backtest
+        }
 
-        params = request.get_json()
-        symbol = params.get('symbol', 'BTC')
-        year = int(params.get('year', 2024))
-        strategy = params.get('strategy', 'v4.1')
-        initial_capital = float(params.get('initial_capital', 1000))
-        param_name = params.get('param_name', 'min_score')
+    return JobPlan('walk_forward', tasks, finalize)
 
-        # 参数范围定义
-        PARAM_RANGES = {
-            'min_score':       {'values': list(range(50, 81, 5)),   'label': '最低评分', 'unit': '分'},
-            'long_min_score':  {'values': list(range(55, 86, 5)),   'label': 'LONG最低评分', 'unit': '分'},
-            'cooldown':        {'values': [1, 2, 3, 4, 5, 6, 8],   'label': '冷却时间', 'unit': 'h'},
-            'max_leverage':    {'values': [1, 2, 3, 4, 5, 7, 10],  'label': '最大杠杆', 'unit': 'x'},
-            'roi_stop_loss':   {'values': [-5, -8, -10, -12, -15, -20], 'label': '止损ROI', 'unit': '%'},
-            'roi_trailing_start': {'values': [3, 4, 5, 6, 8, 10],  'label': '移动止盈触发', 'unit': '%'},
-            'roi_trailing_distance': {'values': [1, 2, 3, 4, 5],   'label': '移动止盈距离', 'unit': '%'},
-        }
 
-        if param_name not in PARAM_RANGES:
-            return jsonify({'error': f'不支持的参数: {param_name}'}), 400
+@app.route('/api/validation/walk-forward', methods=['POST'])
+def walk_forward_validation():
+    """Walk-Forward 验证：训练期 → 验证期 → 测试期"""
+    return _dispatch_backtest_job(_plan_walk_forward)
+
+
+def _plan_param_sensitivity(params, is_async):
+    symbol = params.get('symbol', 'BTC')
+    year = int(params.get('year', 2024))
+    strategy = params.get('strategy', 'v4.1')
+    initial_capital = float(params.get('initial_capital', 1000))
+    param_name = params.get('param_name', 'min_score')
+
+    # 参数范围定义
+    PARAM_RANGES = {
+        'min_score':       {'values': list(range(50, 81, 5)),   'label': '最低评分', 'unit': '分'},
+        'long_min_score':  {'values': list(range(55, 86, 5)),   'label': 'LONG最低评分', 'unit': '分'},
+        'cooldown':        {'values': [1, 2, 3, 4, 5, 6, 8],   'label': '冷却时间', 'unit': 'h'},
+        'max_leverage':    {'values': [1, 2, 3, 4, 5, 7, 10],  'label': '最大杠杆', 'unit': 'x'},
+        'roi_stop_loss':   {'values': [-5, -8, -10, -12, -15, -20], 'label': '止损ROI', 'unit': '%'},
+        'roi_trailing_start': {'values': [3, 4, 5, 6, 8, 10],  'label': '移动止盈触发', 'unit': '%'},
+        'roi_trailing_distance': {'values': [1, 2, 3, 4, 5],   'label': '移动止盈距离', 'unit': '%'},
+    }
 
-        prange = PARAM_RANGES[param_name]
-        preset = STRATEGY_PRESETS.get(strategy, STRATEGY_PRESETS['v4.1'])
+    if param_name not in PARAM_RANGES:
+        raise JobError(f'不支持的参数: {param_name}')
 
-        base_config = {
-            'initial_capital': initial_capital,
-            'fee_rate': 0.0005,
-            'max_positions': 3,
-            'max_same_direction': 2
-        }
-        base_config.update(preset['config'])
+    prange = PARAM_RANGES[param_name]
+    base_config = base_backtest_config(initial_capital, strategy, 'v4.1')
 
-        candles = fetch_historical_klines(symbol, year)
-        if not candles:
-            return jsonify({'error': f'{symbol} 在 {year} 年没有数据'}), 400
+    # 记录当前值
+    current_value = base_config.get(param_name)
 
-        # 记录当前值
-        current_value = base_config.get(param_name)
+    tasks = []
+    for val in prange['values']:
+        cfg = dict(base_config)
+        cfg[param_name] = val
+        tasks.append(Task(symbol, year, strategy, cfg, meta={'value': val}))
 
+    def finalize(task_results):
+        if any(r is None for r in task_results):
+            raise JobError(f'{symbol} 在 {year} 年没有数据')
         results = []
-        for val in prange['values']:
-            cfg = dict(base_config)
-            cfg[param_name] = val
-            result = run_backtest(candles, cfg)
+        for val, result in zip(prange['values'], task_results):
             s = result['summary']
             results.append({
                 'value': val,
@@ -7051,7 +6748,7 @@ def param_sensitivity():
             stability = 'N/A'
             stability_msg = '数据不足'
 
-        return jsonify({
+        return {
             'symbol': symbol,
             'year': year,
             'strategy': strategy,
@@ -7066,47 +6763,42 @@ def param_sensitivity():
                 'cv': round(cv, 3),
                 'pnl_range': round(pnl_range, 2) if len(pnls) > 1 else 0
             }
-        })
+        }
 
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
+    return JobPlan('param_sensitivity', tasks, finalize)
 
 
-@app.route('/api/validation/multi-coin-wf', methods=['POST'])
-def multi_coin_walk_forward():
-    """多币种Walk-Forward：用top10币种做快速验证"""
-    try:
-        from backtest_engine import run_backtest
+@app.route('/api/validation/param-sensitivity', methods=['POST'])
+def param_sensitivity():
+    """参数敏感度分析：扫描单个参数观察PnL变化"""
+    return _dispatch_backtest_job(_plan_param_sensitivity)
 
-        params = request.get_json()
-        strategy = params.get('strategy', 'v4.1')
-        initial_capital = float(params.get('initial_capital', 1000))
-        top_n = min(int(params.get('top_n', 10)), 30)
 
-        preset = STRATEGY_PRESETS.get(strategy, STRATEGY_PRESETS['v4.1'])
-        base_config = {
-            'initial_capital': initial_capital, 'fee_rate': 0.0005,
-            'max_positions': 3, 'max_same_direction': 2
-        }
-        base_config.update(preset['config'])
+def _plan_multi_coin_wf(params, is_async):
+    strategy = params.get('strategy', 'v4.1')
+    initial_capital = float(params.get('initial_capital', 1000))
+    top_n = min(int(params.get('top_n', 10)), 30)
+
+    base_config = base_backtest_config(initial_capital, strategy, 'v4.1')
+
+    # 选出交易量大的币种
+    test_symbols = WATCH_SYMBOLS[:top_n]
 
-        # 选出交易量大的币种
-        test_symbols = WATCH_SYMBOLS[:top_n]
+    all_years = [2020, 2021, 2022, 2023, 2024, 2025]
+    tasks = [Task(sym, year, strategy, base_config, min_bars=100,
+                  meta={'symbol': sym, 'year': year})
+             for sym in test_symbols for year in all_years]
 
-        all_years = [2020, 2021, 2022, 2023, 2024, 2025]
+    def finalize(task_results):
         results = []
+        it = iter(task_results)
         for sym in test_symbols:
             row = {'symbol': sym}
             for year in all_years:
-                candles = fetch_historical_klines(sym, year)
-                if not candles or len(candles) < 100:
+                result = next(it)
+                if result is None:
                     row[str(year)] = {'pnl': 0, 'trades': 0, 'win_rate': 0, 'no_data': True}
                     continue
-                cfg = dict(base_config)
-                cfg['initial_capital'] = initial_capital
-                result = run_backtest(candles, cfg)
                 s = result['summary']
                 row[str(year)] = {
                     'pnl': round(s['total_pnl'], 2),
@@ -7124,17 +6816,20 @@ def multi_coin_walk_forward():
             count = sum(1 for r in results if not r.get(yr, {}).get('no_data'))
             year_totals[yr] = {'pnl': round(pnl_sum, 2), 'trades': trades_sum, 'coins': count}
 
-        return jsonify({
+        return {
             'strategy': strategy,
             'symbols': test_symbols,
             'results': results,
             'year_totals': year_totals
-        })
+        }
 
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
+    return JobPlan('multi_coin_wf', tasks, finalize)
+
+
+@app.route('/api/validation/multi-coin-wf', methods=['POST'])
+def multi_coin_walk_forward():
+    """多币种Walk-Forward：用top10币种做快速验证"""
+    return _dispatch_backtest_job(_plan_multi_coin_wf)
 
 
 @app.route('/validation')
@@ -7760,5 +7455,7 @@ if __name__ == '__main__':
     print("  - 6种时间周期筛选")
     print("=" * 60)
     print()
-    
+
+    # 在Web线程启动前fork回测进程池
+    backtest_jobs.warm_pool()
     app.run(host='0.0.0.0', port=5111, debug=False)
@@ -1,5 +1,12 @@
 """参数自动调优器 - Phase 3 (Spec §29 扩展)
-通过网格搜索在回测中寻找最优参数组合。
+通过网格搜索 / 随机搜索 / 逐步减半 (successive halving) 在回测中寻找最优参数组合。
+
+性能:
+  - 指标列与扫描参数无关, 用 PreparedData 只预计算一次, 所有组合复用
+  - workers > 1 时用进程池并行; 预计算数据写入临时 .npy 文件, 子进程以 mmap
+    只读共享, 不再为每个任务 pickle DataFrame
+  - abandon_drawdown_pct: 权益从峰值回撤超过阈值的组合提前终止并丢弃 (默认关闭)
+
 支持的可调参数:
   - risk_per_trade: 单笔风险百分比
   - stop_atr_multiple: 止损ATR倍数
@@ -11,10 +18,16 @@
 import logging
 import itertools
 import copy
+import math
+import random
+import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from typing import Dict, List, Any
 
-from app.backtest.engine import BacktestEngine
+from app import config as app_config
+from app.backtest.vector_engine import VectorBacktestEngine, PreparedData
 from app.config import get
 
 log = logging.getLogger(__name__)
@@ -34,78 +47,197 @@ EXTENDED_PARAM_GRID = {
     'score_min_trade': [58, 62, 66, 70],
 }
 
+SEARCH_STRATEGIES = ('grid', 'random', 'halving')
+
+
+# ─── 进程池子进程状态 (initializer 设置, 每个子进程一份) ───
+
+_worker_data = None
+_worker_base_cfg = None
+_worker_abandon = None
+
+
+def _init_worker(data_dir, cfg_snapshot, base_cfg, abandon_drawdown_pct):
+    """子进程初始化: mmap 加载预计算数据, 同步主进程配置"""
+    global _worker_data, _worker_base_cfg, _worker_abandon
+    app_config._cfg = cfg_snapshot
+    _worker_data = PreparedData.load(data_dir, mmap=True)
+    _worker_base_cfg = base_cfg
+    _worker_abandon = abandon_drawdown_pct
+    logging.getLogger('app.backtest').setLevel(logging.WARNING)
+
+
+def _run_combo(params, max_bars):
+    """子进程任务: 只传参数, 返回 (params, metrics, abandoned)"""
+    return _backtest(_worker_data, _worker_base_cfg, params, max_bars, _worker_abandon)
+
+
+def _backtest(data, base_cfg, params, max_bars, abandon_drawdown_pct):
+    cfg = copy.copy(base_cfg)
+    cfg.update(params)
+    engine = VectorBacktestEngine(config=cfg, abandon_drawdown_pct=abandon_drawdown_pct)
+    metrics = engine.run_prepared(data, max_bars=max_bars)
+    return params, metrics, engine.abandoned
+
 
 class ParameterOptimizer:
-    """网格搜索参数调优器"""
+    """参数调优器 (网格 / 随机 / 逐步减半, 可并行)"""
 
-    def __init__(self, symbol_data, symbols=None):
+    def __init__(self, symbol_data, symbols=None, workers=1, abandon_drawdown_pct=None):
         """
         symbol_data: {symbol: DataFrame} 回测数据
         symbols: 回测币种列表
+        workers: 并行进程数, 1 为串行
+        abandon_drawdown_pct: 权益从峰值回撤超过该比例 (如0.3) 提前放弃该组合, None 不放弃
         """
         self.symbol_data = symbol_data
         self.symbols = symbols
+        self.workers = max(1, int(workers or 1))
+        self.abandon_drawdown_pct = abandon_drawdown_pct
         self.results = []
+        self.abandoned_count = 0
+        self.runs = 0
+        self._prepared = None
 
-    def optimize(self, param_grid=None, metric='sharpe', top_n=10, max_combos=500):
+    @property
+    def prepared(self) -> PreparedData:
+        """预计算的指标列与时间轴 (与扫描参数无关, 只算一次)"""
+        if self._prepared is None:
+            self._prepared = PreparedData.from_frames(self.symbol_data, self.symbols)
+        return self._prepared
+
+    def optimize(self, param_grid=None, metric='sharpe', top_n=10, max_combos=500,
+                 strategy='grid', n_samples=None, eta=3, min_bars=2000, seed=None):
         """
-        运行网格搜索优化
+        运行参数优化
         param_grid: {param_name: [values]} 参数搜索空间
         metric: 优化目标指标 (sharpe, profit_factor, total_return_pct, win_rate)
         top_n: 返回前N个最优结果
         max_combos: 最大组合数限制 (防止过长)
+        strategy: grid=网格, random=随机采样 n_samples 个, halving=逐步减半
+        eta: halving 每轮保留 1/eta 的组合, 下一轮数据长度 ×eta
+        min_bars: halving 第一轮最少回放的K线数
         """
         if param_grid is None:
             param_grid = DEFAULT_PARAM_GRID
+        if strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"未知搜索策略: {strategy}, 可选 {SEARCH_STRATEGIES}")
 
-        # 生成所有参数组合
+        rng = random.Random(seed)
         param_names = list(param_grid.keys())
-        param_values = list(param_grid.values())
-        all_combos = list(itertools.product(*param_values))
+        all_combos = list(itertools.product(*param_grid.values()))
 
-        if len(all_combos) > max_combos:
+        if strategy == 'random':
+            n = min(n_samples or max_combos, len(all_combos))
+            all_combos = rng.sample(all_combos, n)
+        elif len(all_combos) > max_combos:
             log.warning(f"参数组合数 {len(all_combos)} 超过限制 {max_combos}, 随机采样")
-            import random
-            random.shuffle(all_combos)
+            rng.shuffle(all_combos)
             all_combos = all_combos[:max_combos]
+        candidates = [dict(zip(param_names, combo)) for combo in all_combos]
 
-        log.info(f"参数调优开始: {len(all_combos)} 个组合, 优化目标={metric}")
+        log.info(f"参数调优开始: {len(candidates)} 个组合, 策略={strategy}, "
+                 f"优化目标={metric}, 进程数={self.workers}")
         start_time = time.time()
+        self.abandoned_count = 0
+        self.runs = 0
 
-        self.results = []
-        for i, combo in enumerate(all_combos):
-            params = dict(zip(param_names, combo))
-
-            try:
-                metrics = self._run_single(params)
-                if metrics and 'error' not in metrics:
-                    score = metrics.get(metric, 0)
-                    self.results.append({
-                        'params': params,
-                        'score': score,
-                        'metrics': metrics,
-                    })
-            except Exception as e:
-                log.debug(f"组合 {params} 失败: {e}")
-
-            if (i + 1) % 50 == 0:
-                elapsed = time.time() - start_time
-                log.info(f"进度: {i+1}/{len(all_combos)} ({elapsed:.1f}s)")
+        with self._evaluator() as evaluate:
+            if strategy == 'halving':
+                self.results = self._successive_halving(evaluate, candidates, metric, eta, min_bars)
+            else:
+                self.results = evaluate(candidates, metric, None)
 
         elapsed = time.time() - start_time
-        log.info(f"参数调优完成: {len(self.results)} 个有效结果, 耗时 {elapsed:.1f}s")
+        log.info(f"参数调优完成: {len(self.results)} 个有效结果, {self.runs} 次回测, "
+                 f"{self.abandoned_count} 个提前放弃, 耗时 {elapsed:.1f}s")
 
         # 按目标指标排序
         self.results.sort(key=lambda x: x['score'], reverse=True)
         return self.results[:top_n]
 
+    def _successive_halving(self, evaluate, candidates, metric, eta, min_bars):
+        """逐步减半: 先用短数据评估全部组合, 每轮只保留前 1/eta 并加长数据"""
+        total_bars = len(self.prepared.timestamps)
+        rounds = int(math.log(len(candidates), eta)) if len(candidates) > 1 else 0
+        budget = max(min_bars, total_bars // (eta ** rounds)) if rounds else total_bars
+
+        while budget < total_bars and len(candidates) > 1:
+            results = evaluate(candidates, metric, budget)
+            results.sort(key=lambda x: x['score'], reverse=True)
+            keep = max(1, len(candidates) // eta)
+            log.info(f"减半: {budget}根K线 {len(results)}/{len(candidates)} 有效, 保留 {keep}")
+            candidates = [r['params'] for r in results[:keep]]
+            budget *= eta
+
+        return evaluate(candidates, metric, None) if candidates else []
+
+    @contextmanager
+    def _evaluator(self):
+        """返回 evaluate(candidates, metric, max_bars) -> results, 串行或进程池"""
+        base_cfg = copy.copy(get('execution'))
+
+        def collect(outcomes, total, metric):
+            results = []
+            start_time = time.time()
+            for i, outcome in enumerate(outcomes):
+                params, metrics, abandoned = outcome
+                self.runs += 1
+                if abandoned:
+                    self.abandoned_count += 1
+                elif metrics and 'error' not in metrics:
+                    results.append({
+                        'params': params,
+                        'score': metrics.get(metric, 0),
+                        'metrics': metrics,
+                    })
+                if (i + 1) % 50 == 0:
+                    log.info(f"进度: {i+1}/{total} ({time.time() - start_time:.1f}s)")
+            return results
+
+        if self.workers == 1:
+            data = self.prepared
+
+            def evaluate(candidates, metric, max_bars):
+                def outcomes():
+                    for params in candidates:
+                        try:
+                            yield _backtest(data, base_cfg, params, max_bars,
+                                            self.abandon_drawdown_pct)
+                        except Exception as e:
+                            log.debug(f"组合 {params} 失败: {e}")
+                return collect(outcomes(), len(candidates), metric)
+
+            yield evaluate
+            return
+
+        with tempfile.TemporaryDirectory(prefix='quant_bot_opt_') as data_dir:
+            self.prepared.save(data_dir)
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(data_dir, app_config._cfg, base_cfg, self.abandon_drawdown_pct),
+            ) as pool:
+
+                def evaluate(candidates, metric, max_bars):
+                    futures = [pool.submit(_run_combo, params, max_bars) for params in candidates]
+
+                    def outcomes():
+                        for fut in as_completed(futures):
+                            try:
+                                yield fut.result()
+                            except Exception as e:
+                                log.debug(f"组合失败: {e}")
+                    return collect(outcomes(), len(candidates), metric)
+
+                yield evaluate
+
     def _run_single(self, params):
         """用指定参数运行一次回测"""
         # 以当前execution配置为基础, 覆盖优化参数
-        base_cfg = copy.copy(get('execution'))
-        base_cfg.update(params)
-        engine = BacktestEngine(config=base_cfg)
-        return engine.run(self.symbol_data, self.symbols)
+        _, metrics, _ = _backtest(self.prepared, copy.copy(get('execution')), params,
+                                  None, self.abandon_drawdown_pct)
+        return metrics
 
     def get_best_params(self):
         """获取最优参数"""
@@ -0,0 +1,484 @@
+"""向量化回测引擎 - 指标一次预计算 + 整数时间轴
+
+与 BacktestEngine 逻辑完全一致 (同样的开仓/持仓/平仓规则), 区别只在数据访问:
+  - 每个币种的 EMA/ADX/ATR/ATRP/BOLL/RSI 在全量K线上只计算一次.
+    这些指标都是因果的 (ewm adjust=False / rolling), 第i根的值与在 df.iloc[:i+1]
+    上重新计算的值逐位相同.
+  - 所有币种对齐到共享的整数时间轴, row_at[sym][t] = 该币种在第t个时间戳的行号
+    (-1 表示缺失), 每根K线不再做 df[df['timestamp'] == ts] 过滤.
+
+复杂度从 O(bars² × symbols) 降到 O(bars × symbols).
+要求 DataFrame 使用默认 RangeIndex (fetch_ohlcv 的输出即是).
+
+预计算结果 (PreparedData) 与回测参数无关, 参数优化器在多个组合间复用,
+也可以 save/load 为 .npy 文件供子进程以 mmap 只读共享.
+"""
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+from app.backtest.engine import BacktestEngine, BTPosition
+from app.indicators import calc
+from app.config import get
+
+log = logging.getLogger(__name__)
+
+MIN_BARS = 55
+
+
+class SymbolArrays:
+    """单币种预计算的 NumPy 列 (与回测参数无关)"""
+
+    BASE_COLUMNS = ('open', 'high', 'low', 'close', 'volume',
+                    'ema7', 'ema20', 'ema21', 'ema50', 'adx', 'atr', 'atrp')
+    MR_COLUMNS = ('bb_upper', 'bb_mid', 'bb_lower', 'rsi')
+
+    def __init__(self, df: pd.DataFrame = None, with_mean_reversion: bool = False):
+        self.bb_upper = self.bb_mid = self.bb_lower = self.rsi = None
+        if df is None:
+            return
+
+        self.open = df['open'].to_numpy(dtype=float)
+        self.high = df['high'].to_numpy(dtype=float)
+        self.low = df['low'].to_numpy(dtype=float)
+        self.close = df['close'].to_numpy(dtype=float)
+        self.volume = df['volume'].to_numpy(dtype=float)
+
+        close = df['close']
+        self.ema7 = calc.ema(close, 7).to_numpy(dtype=float)
+        self.ema20 = calc.ema(close, 20).to_numpy(dtype=float)
+        self.ema21 = calc.ema(close, 21).to_numpy(dtype=float)
+        self.ema50 = calc.ema(close, 50).to_numpy(dtype=float)
+        adx_vals, _, _ = calc.adx(df, 14)
+        self.adx = adx_vals.to_numpy(dtype=float)
+        self.atr = calc.atr(df, 14).to_numpy(dtype=float)
+        self.atrp = calc.atrp(df, 14).to_numpy(dtype=float)
+
+        if with_mean_reversion:
+            upper, mid, lower = calc.bollinger_bands(close, 20, 2.0)
+            self.bb_upper = upper.to_numpy(dtype=float)
+            self.bb_mid = mid.to_numpy(dtype=float)
+            self.bb_lower = lower.to_numpy(dtype=float)
+            self.rsi = calc.rsi(close, 14).to_numpy(dtype=float)
+
+    def __len__(self):
+        return len(self.close)
+
+    @property
+    def columns(self):
+        return self.BASE_COLUMNS + (self.MR_COLUMNS if self.rsi is not None else ())
+
+    def to_matrix(self) -> np.ndarray:
+        """所有列堆叠为 (n_columns, n_bars) 矩阵"""
+        return np.vstack([getattr(self, c) for c in self.columns])
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray) -> 'SymbolArrays':
+        """从 to_matrix() 的结果 (可以是 mmap 只读视图) 重建, 不复制数据"""
+        a = cls()
+        names = cls.BASE_COLUMNS
+        if matrix.shape[0] == len(cls.BASE_COLUMNS) + len(cls.MR_COLUMNS):
+            names = names + cls.MR_COLUMNS
+        for k, name in enumerate(names):
+            setattr(a, name, matrix[k])
+        return a
+
+
+def build_timeline(symbol_data: Dict[str, pd.DataFrame], symbols: List[str]):
+    """对齐所有币种到共享时间轴
+
+    Returns:
+        (timestamps: list, row_at: {symbol: np.ndarray[int]})
+        row_at[sym][t] 为第t个时间戳在该币种 DataFrame 中的首个行号, 缺失为 -1
+    """
+    stamps = pd.concat([symbol_data[s]['timestamp'] for s in symbols], ignore_index=True)
+    timeline = pd.Index(stamps.drop_duplicates().sort_values(ignore_index=True))
+
+    row_at = {}
+    for sym in symbols:
+        ts = symbol_data[sym]['timestamp']
+        first = ~ts.duplicated().to_numpy()
+        rows = np.flatnonzero(first)
+        mapping = np.full(len(timeline), -1, dtype=np.int64)
+        mapping[timeline.get_indexer(ts[first])] = rows
+        row_at[sym] = mapping
+    return timeline.tolist(), row_at
+
+
+class PreparedData:
+    """回测输入的预计算形式: 指标列 + 共享时间轴"""
+
+    def __init__(self, symbols: List[str], arrays: Dict[str, SymbolArrays],
+                 timestamps: list, row_at: Dict[str, np.ndarray]):
+        self.symbols = list(symbols)
+        self.arrays = arrays
+        self.timestamps = timestamps
+        self.row_at = row_at
+
+    @classmethod
+    def from_frames(cls, symbol_data: Dict[str, pd.DataFrame], symbols: List[str] = None,
+                    with_mean_reversion: bool = None) -> 'PreparedData':
+        if symbols is None:
+            symbols = list(symbol_data.keys())
+        if with_mean_reversion is None:
+            with_mean_reversion = bool(get('mean_reversion', 'enable', False))
+        arrays = {sym: SymbolArrays(symbol_data[sym], with_mean_reversion) for sym in symbols}
+        timestamps, row_at = build_timeline(symbol_data, symbols)
+        return cls(symbols, arrays, timestamps, row_at)
+
+    def save(self, directory: str):
+        """写入 .npy 文件 (每币种一个矩阵 + 时间轴映射), 供 load(mmap=True) 共享"""
+        os.makedirs(directory, exist_ok=True)
+        for k, sym in enumerate(self.symbols):
+            np.save(os.path.join(directory, f'sym{k}.npy'), self.arrays[sym].to_matrix())
+            np.save(os.path.join(directory, f'row{k}.npy'), self.row_at[sym])
+        pd.to_pickle(self.timestamps, os.path.join(directory, 'timestamps.pkl'))
+        with open(os.path.join(directory, 'symbols.json'), 'w') as f:
+            json.dump(self.symbols, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'PreparedData':
+        mode = 'r' if mmap else None
+        with open(os.path.join(directory, 'symbols.json')) as f:
+            symbols = json.load(f)
+        arrays, row_at = {}, {}
+        for k, sym in enumerate(symbols):
+            arrays[sym] = SymbolArrays.from_matrix(
+                np.load(os.path.join(directory, f'sym{k}.npy'), mmap_mode=mode))
+            row_at[sym] = np.load(os.path.join(directory, f'row{k}.npy'), mmap_mode=mode)
+        timestamps = pd.read_pickle(os.path.join(directory, 'timestamps.pkl'))
+        return cls(symbols, arrays, timestamps, row_at)
+
+
+def _nan_mean(values):
+    """与 pandas Series.mean() 一致: 跳过NaN, 全NaN返回NaN"""
+    values = values[~np.isnan(values)]
+    return values.mean() if len(values) else np.nan
+
+
+def _nan_max(values):
+    values = values[~np.isnan(values)]
+    return values.max() if len(values) else np.nan
+
+
+class VectorBacktestEngine(BacktestEngine):
+    """向量化回测引擎, 交易/指标结果与 BacktestEngine 一致"""
+
+    def __init__(self, config=None, abandon_drawdown_pct: float = None):
+        """
+        abandon_drawdown_pct: 权益从历史峰值回撤超过该比例 (如0.3) 即提前终止
+                              (参数搜索用), None 表示跑完全程
+        """
+        super().__init__(config)
+        self.abandon_drawdown_pct = abandon_drawdown_pct
+        self.abandoned = False
+
+    def run(self, symbol_data: Dict[str, pd.DataFrame], symbols: List[str] = None):
+        """
+        运行回测 (接口同 BacktestEngine.run)
+        symbol_data: {symbol: DataFrame with columns [timestamp, open, high, low, close, volume]}
+        symbols: 要回测的币种列表，None则使用全部
+        """
+        return self.run_prepared(PreparedData.from_frames(symbol_data, symbols))
+
+    def run_prepared(self, data: PreparedData, max_bars: int = None):
+        """
+        在预计算数据上运行回测
+        max_bars: 只回放时间轴前N根 (逐步减半搜索用), None为全部
+        """
+        symbols = data.symbols
+        arrays = data.arrays
+        row_at = data.row_at
+        all_timestamps = data.timestamps
+        n_bars = len(all_timestamps) if max_bars is None else min(max_bars, len(all_timestamps))
+
+        log.info(f"回测开始(向量化): {len(symbols)}个币种, {n_bars}根K线")
+        log.info(f"初始资金: {self.initial_balance}U, 杠杆: {self.leverage}x")
+
+        self.equity = self.initial_balance
+        daily_start_equity = self.equity
+        current_date = None
+        consecutive_losses = 0
+        max_pos = get('execution', 'max_positions', 3)
+        risk_pct = self.cfg.get('risk_per_trade', get('execution', 'risk_per_trade', 0.004))
+        peak_equity = self.equity
+        last_t = n_bars - 1
+
+        for t in range(n_bars):
+            ts = all_timestamps[t]
+            dt = pd.Timestamp(ts)
+            today = dt.date()
+
+            # 日切
+            if current_date != today:
+                if current_date:
+                    self.daily_pnl[current_date] = self.equity - daily_start_equity
+                    self.daily_equity[current_date] = self.equity
+                current_date = today
+                daily_start_equity = self.equity
+
+            # 管理持仓
+            for pos in list(self.positions):
+                a = arrays.get(pos.symbol)
+                if a is None:
+                    continue
+                i = row_at[pos.symbol][t]
+                if i < 0:
+                    continue
+                bar = {'high': a.high[i], 'low': a.low[i], 'close': a.close[i]}
+                self._manage_bt_position(pos, bar, dt)
+
+            # 提前终止回撤过大的组合 (相对权益峰值)
+            if self.abandon_drawdown_pct is not None:
+                peak_equity = max(peak_equity, self.equity)
+                abandon_below = peak_equity * (1 - self.abandon_drawdown_pct)
+                if self.equity < abandon_below:
+                    self.abandoned = True
+                    last_t = t
+                    log.info(f"回测提前终止: 权益 {self.equity:.2f}U < 峰值 {peak_equity:.2f}U "
+                             f"回撤 {self.abandon_drawdown_pct:.0%}")
+                    break
+
+            # 日亏损检查
+            daily_loss = (self.equity - daily_start_equity) / daily_start_equity if daily_start_equity > 0 else 0
+            if daily_loss <= -0.03:
+                continue  # 停止开仓
+
+            # 连亏检查
+            if consecutive_losses >= 5:
+                continue
+
+            # 最大持仓检查
+            if len(self.positions) >= max_pos:
+                continue
+
+            # 扫描信号
+            for sym in symbols:
+                if any(p.symbol == sym for p in self.positions):
+                    continue
+                if len(self.positions) >= max_pos:
+                    break
+
+                i = row_at[sym][t]
+                if i < MIN_BARS:
+                    continue
+
+                a = arrays[sym]
+                signal = self._signal_at(a, i)
+                if signal is None:
+                    continue
+
+                risk_amount = self.equity * risk_pct
+                stop_dist = abs(signal['entry'] - signal['stop'])
+                if stop_dist <= 0:
+                    continue
+
+                notional = risk_amount / (stop_dist / signal['entry'])
+                margin = notional / self.leverage
+                size = notional / signal['entry']
+
+                # 最大保证金检查
+                if margin > self.equity * 0.30:
+                    margin = self.equity * 0.30
+                    notional = margin * self.leverage
+                    size = notional / signal['entry']
+
+                if margin <= 0 or margin > self.equity * 0.9:
+                    continue
+
+                # 部分成交模型 (Spec §23: partial fills)
+                if self.partial_fill_enable:
+                    bar_volume_usd = a.volume[i] * a.close[i]
+                    max_fill_usd = bar_volume_usd * self.partial_fill_max_pct
+                    if notional > max_fill_usd:
+                        fill_ratio = max_fill_usd / notional
+                        if fill_ratio < self.partial_fill_min_ratio:
+                            continue
+                        notional = max_fill_usd
+                        margin = notional / self.leverage
+                        size = notional / signal['entry']
+
+                # 模拟滑点
+                entry_price = signal['entry'] * (1 + self.slippage_pct / 100 * signal['direction'])
+                fee = notional * self.fee_rate
+
+                self.positions.append(BTPosition(
+                    symbol=sym,
+                    direction=signal['direction'],
+                    entry_price=entry_price,
+                    size=size,
+                    margin=margin,
+                    stop_loss=signal['stop'],
+                    tp1=signal['tp1'],
+                    tp2=signal['tp2'],
+                    opened_at=dt.to_pydatetime() if hasattr(dt, 'to_pydatetime') else dt,
+                    setup_type=signal['setup'],
+                    original_size=size,
+                ))
+                self.equity -= fee
+
+            # 记录权益曲线
+            unrealized = 0
+            for p in self.positions:
+                i = row_at[p.symbol][t] if p.symbol in row_at else -1
+                if i < 0:
+                    continue
+                price = arrays[p.symbol].close[i]
+                if p.direction == 1:
+                    unrealized += (price - p.entry_price) * p.size
+                else:
+                    unrealized += (p.entry_price - price) * p.size
+            self.equity_curve.append({
+                'timestamp': ts,
+                'equity': self.equity + unrealized,
+                'positions': len(self.positions),
+            })
+
+        # 最后一天
+        if current_date:
+            self.daily_pnl[current_date] = self.equity - daily_start_equity
+            self.daily_equity[current_date] = self.equity
+
+        # 强制平掉剩余持仓
+        for pos in list(self.positions):
+            if pos.symbol in arrays:
+                a = arrays[pos.symbol]
+                if last_t == len(all_timestamps) - 1:
+                    last_price = a.close[-1]
+                else:
+                    last_price = a.close[row_at[pos.symbol][:last_t + 1].max()]
+                self._close_bt_position(pos, last_price, all_timestamps[last_t], '回测结束')
+
+        log.info(f"回测完成: {len(self.trades)}笔交易, 最终权益: {self.equity:.2f}U")
+        return self.get_metrics()
+
+    def _signal_at(self, a: SymbolArrays, i: int):
+        """第i根K线的信号, 与 BacktestEngine._generate_signal(df.iloc[:i+1]) 等价"""
+        close = a.close[i]
+        e7 = a.ema7[i]
+        e20 = a.ema20[i]
+        e21 = a.ema21[i]
+        e50 = a.ema50[i]
+
+        curr_adx = a.adx[i] if not np.isnan(a.adx[i]) else 0
+
+        atr_val = a.atr[i]
+        if np.isnan(atr_val) or atr_val <= 0:
+            return None
+
+        adx_min = self.cfg.get('adx_min', get('trend_filter', 'adx_min', 22))
+        if curr_adx < adx_min:
+            return None
+
+        # 方向判定 (Spec §9), ema_slope(ema20, 3)
+        base = a.ema20[i - 2]
+        slope = (a.ema20[i] - base) / base if base != 0 else 0
+        direction = 0
+        if close > e20 > e50 and slope > 0:
+            direction = 1
+        elif close < e20 < e50 and slope < 0:
+            direction = -1
+
+        if direction == 0:
+            return None
+
+        # Regime过滤: EXTREME禁止开仓 (Spec §8.3)
+        mean_atrp = _nan_mean(a.atrp[i - 19:i + 1])
+        if not np.isnan(mean_atrp) and mean_atrp > 0:
+            if _nan_max(a.atrp[i - 2:i + 1]) > mean_atrp * 3:
+                return None
+
+        setup = None
+        stop_mult = self.cfg.get('stop_atr_multiple', get('execution', 'stop_atr_multiple', 1.2))
+        tp1_mult = self.cfg.get('tp1_r_multiple', get('execution', 'tp1_r_multiple', 1.5))
+        tp2_mult = self.cfg.get('tp2_r_multiple', get('execution', 'tp2_r_multiple', 2.8))
+        bar_open = a.open[i]
+
+        # 检测回踩
+        if direction == 1:
+            if close <= e21 * 1.005 and close >= e21 * 0.985:
+                if close > bar_open or close > e7:
+                    stop = min(a.low[i - 4:i + 1].min(), close - atr_val * stop_mult)
+                    r = close - stop
+                    if r > 0:
+                        setup = {
+                            'direction': 1, 'entry': close, 'stop': stop,
+                            'tp1': close + r * tp1_mult, 'tp2': close + r * tp2_mult,
+                            'setup': 'pullback',
+                        }
+        elif direction == -1:
+            if close >= e21 * 0.995 and close <= e21 * 1.015:
+                if close < bar_open or close < e7:
+                    stop = max(a.high[i - 4:i + 1].max(), close + atr_val * stop_mult)
+                    r = stop - close
+                    if r > 0:
+                        setup = {
+                            'direction': -1, 'entry': close, 'stop': stop,
+                            'tp1': close - r * tp1_mult, 'tp2': close - r * tp2_mult,
+                            'setup': 'pullback',
+                        }
+
+        # 检测压缩突破
+        if setup is None:
+            high_20 = a.high[i - 19:i + 1].max()
+            low_20 = a.low[i - 19:i + 1].min()
+            mid = (high_20 + low_20) / 2
+            comp = ((high_20 - low_20) / mid) * 100 if mid != 0 else float('inf')
+            if comp < 3.0:
+                avg_vol = _nan_mean(a.volume[i - 19:i + 1])
+                curr_vol = a.volume[i]
+
+                if direction == 1 and close > high_20 * 0.999 and curr_vol > avg_vol * 1.3:
+                    stop = max(low_20, close - atr_val * stop_mult)
+                    r = close - stop
+                    if r > 0:
+                        setup = {
+                            'direction': 1, 'entry': close, 'stop': stop,
+                            'tp1': close + r * tp1_mult, 'tp2': close + r * tp2_mult,
+                            'setup': 'compression_breakout',
+                        }
+                elif direction == -1 and close < low_20 * 1.001 and curr_vol > avg_vol * 1.3:
+                    stop = min(high_20, close + atr_val * stop_mult)
+                    r = stop - close
+                    if r > 0:
+                        setup = {
+                            'direction': -1, 'entry': close, 'stop': stop,
+                            'tp1': close - r * tp1_mult, 'tp2': close - r * tp2_mult,
+                            'setup': 'compression_breakout',
+                        }
+
+        # 均值回归 (Phase 2) - 趋势信号未找到 + ADX低
+        if setup is None and curr_adx < 25 and a.rsi is not None:
+            curr_upper = a.bb_upper[i]
+            curr_mid = a.bb_mid[i]
+            curr_lower = a.bb_lower[i]
+            rsi_val = a.rsi[i]
+
+            if not (np.isnan(curr_upper) or np.isnan(curr_lower) or np.isnan(rsi_val)):
+                bb_width = (curr_upper - curr_lower) / curr_mid * 100
+                if 1.0 <= bb_width <= 8.0:
+                    if rsi_val < 30 and close <= curr_lower * 1.002:
+                        if close > bar_open:
+                            stop = close - atr_val * 1.5
+                            r = close - stop
+                            if r > 0 and (curr_mid - close) / r >= 1.0:
+                                setup = {
+                                    'direction': 1, 'entry': close, 'stop': stop,
+                                    'tp1': curr_mid, 'tp2': curr_upper * 0.98,
+                                    'setup': 'mean_reversion',
+                                }
+                    elif rsi_val > 70 and close >= curr_upper * 0.998:
+                        if close < bar_open:
+                            stop = close + atr_val * 1.5
+                            r = stop - close
+                            if r > 0 and (close - curr_mid) / r >= 1.0:
+                                setup = {
+                                    'direction': -1, 'entry': close, 'stop': stop,
+                                    'tp1': curr_mid, 'tp2': curr_lower * 1.02,
+                                    'setup': 'mean_reversion',
+                                }
+
+        return setup
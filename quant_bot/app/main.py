@@ -46,6 +46,9 @@ class QuantBot:
         self.snapshots = {}
         self.last_pool_refresh = 0
         self.pool_refresh_interval = 300  # 5分钟刷新候选池
+        self._pool_thread = None          # 后台候选池刷新线程
+        self._pool_lock = threading.Lock()  # 保护 active_pool/snapshots/trend_scores 的整体替换
+        self._pool_pending = None         # 后台刷新完成、待主循环应用的新活跃池
         self.last_heartbeat = 0
         self.heartbeat_interval = get('monitoring', 'heartbeat_seconds', 60)
         self.last_daily_report_date = None
@@ -61,7 +64,12 @@ class QuantBot:
 
         self.exchange = ExchangeClient(api_key, api_secret, sandbox=sandbox)
         self.cache = OHLCVCache(self.exchange)
-        self.candidate_pool = CandidatePool(self.exchange, self.cache)
+        # 候选池在后台线程刷新: 独立的交易所客户端与K线缓存,
+        # 不与主循环(下单/改杠杆)共用同一个同步ccxt客户端
+        self.refresh_exchange = ExchangeClient(api_key, api_secret, sandbox=sandbox)
+        self.refresh_cache = OHLCVCache(self.refresh_exchange)
+        self.candidate_pool = CandidatePool(self.refresh_exchange, self.refresh_cache)
+        self.refresh_scoring = TrendScoring(self.refresh_cache)
         self.trend_scoring = TrendScoring(self.cache)
         self.signal_engine = SignalEngine(self.cache)
         self.entry_refiner = EntryRefiner(self.cache)
@@ -103,6 +111,7 @@ class QuantBot:
         notifier.send_telegram(f"🚀 QuantBot 已启动 ({mode}模式)")
         # 先刷新一次候选池, 然后启动WebSocket
         self._refresh_pool()
+        self._take_pool_update()
         self.last_pool_refresh = time.time()
         ws_symbols = [s['symbol'] for s in self.active_pool[:50]]
         self.ws_feed.start(ws_symbols)
@@ -129,10 +138,24 @@ class QuantBot:
     def _cycle(self):
         now = time.time()
 
-        # 定时刷新候选池
+        # 定时刷新候选池 (后台线程, 不阻塞本轮信号扫描与持仓管理)
         if now - self.last_pool_refresh > self.pool_refresh_interval:
-            self._refresh_pool()
-            self.last_pool_refresh = now
+            if self._pool_thread is None or not self._pool_thread.is_alive():
+                self._pool_thread = threading.Thread(
+                    target=self._refresh_pool, name='pool-refresh', daemon=True)
+                self._pool_thread.start()
+                self.last_pool_refresh = now
+
+        # 后台刷新完成的新活跃池: 在主循环线程更新相关性范围与WebSocket订阅
+        new_pool = self._take_pool_update()
+        if new_pool is not None:
+            self.ws_feed.update_subscriptions([s['symbol'] for s in new_pool[:50]])
+
+        # 本轮使用同一份候选池快照 (后台线程只整体替换, 不原地修改)
+        with self._pool_lock:
+            active_pool = self.active_pool
+            snapshots = self.snapshots
+            trend_scores = self.trend_scores
 
         # 心跳通知
         if now - self.last_heartbeat > self.heartbeat_interval:
@@ -153,7 +176,7 @@ class QuantBot:
                 generate_daily_report(
                     self.position_manager.trade_history,
                     self.risk_engine,
-                    self.active_pool,
+                    active_pool,
                 )
                 # 保存每日统计到数据库
                 try:
@@ -191,7 +214,7 @@ class QuantBot:
 
         # 管理现有持仓
         self.position_manager.sync_positions()
-        self.position_manager.manage_all(self.trend_scores)
+        self.position_manager.manage_all(trend_scores)
 
         # 检查止损移动 - 同步到交易所
         if not self.paper_mode:
@@ -214,15 +237,15 @@ class QuantBot:
         if not in_schedule:
             return
 
-        if not self.active_pool:
+        if not active_pool:
             return
 
         # 扫描信号
         allowed_grade = self.risk_engine.get_allowed_grade()
 
-        for item in self.active_pool:
+        for item in active_pool:
             symbol = item['symbol']
-            snap = self.snapshots.get(symbol, item)
+            snap = snapshots.get(symbol, item)
             regime = snap.get('regime', 'UNKNOWN')
             direction = snap.get('direction', 0)
             score = snap.get('final_score', 0)
@@ -311,40 +334,59 @@ class QuantBot:
             break  # 每个周期最多开一笔
 
     def _refresh_pool(self):
+        """构建新候选池 (可在后台线程运行)
+
+        只使用 refresh_exchange / refresh_cache; 结果在本地构建完成后
+        加锁整体替换, 主循环不会看到半成品。
+        """
         try:
             self._log('info', "刷新候选池...")
             candidates = self.candidate_pool.build()
 
+            # 保留旧评分 (已出池但仍持仓的币种), 在副本上更新
+            snapshots = dict(self.snapshots)
+            trend_scores = dict(self.trend_scores)
             scored = []
             for c in candidates:
                 symbol = c['symbol']
-                m_score, q_score, final, direction, regime = self.trend_scoring.score_symbol(symbol)
+                m_score, q_score, final, direction, regime = self.refresh_scoring.score_symbol(symbol)
                 c['momentum_score'] = m_score
                 c['quality_score'] = q_score
                 c['final_score'] = final
                 c['direction'] = direction
                 c['regime'] = regime
-                c['grade'] = self.trend_scoring.grade(final)
-                self.snapshots[symbol] = c
-                self.trend_scores[symbol] = final
+                c['grade'] = self.refresh_scoring.grade(final)
+                snapshots[symbol] = c
+                trend_scores[symbol] = final
                 scored.append(c)
 
             scored.sort(key=lambda x: x['final_score'], reverse=True)
             pool_size = get('market', 'active_pool_size', 12)
-            self.active_pool = scored[:pool_size]
+            active_pool = scored[:pool_size]
 
-            symbols = [f"{s['symbol']}({s.get('grade','?')})" for s in self.active_pool[:8]]
-            self._log('info', f"活跃池 ({len(self.active_pool)}): {', '.join(symbols)}")
-            self.correlation.clear_cache()
+            with self._pool_lock:
+                self.snapshots = snapshots
+                self.trend_scores = trend_scores
+                self.active_pool = active_pool
+                self._pool_pending = active_pool
 
-            # 更新WebSocket订阅
-            ws_symbols = [s['symbol'] for s in self.active_pool[:50]]
-            self.ws_feed.update_subscriptions(ws_symbols)
+            symbols = [f"{s['symbol']}({s.get('grade','?')})" for s in active_pool[:8]]
+            self._log('info', f"活跃池 ({len(active_pool)}): {', '.join(symbols)}")
 
         except Exception as e:
             self._log('error', f"候选池刷新失败: {e}")
             notifier.notify_data_error(f"候选池刷新失败: {e}")
 
+    def _take_pool_update(self):
+        """应用后台刷新出的新活跃池 (仅在主循环线程调用), 无更新返回None"""
+        with self._pool_lock:
+            pool, self._pool_pending = self._pool_pending, None
+        if pool is not None:
+            self.correlation.set_universe(
+                [s['symbol'] for s in pool]
+                + [p.symbol for p in self.position_manager.positions])
+        return pool
+
     def _execute_entry(self, order_plan):
         symbol = order_plan['symbol']
         dir_str = '做多' if order_plan['direction'] == 1 else '做空'
@@ -1,16 +1,97 @@
-"""Correlation guard - prevent highly correlated positions"""
+"""Correlation guard - prevent highly correlated positions
+
+The full return-correlation matrix of the watched symbols (active pool plus
+open positions) is computed in one vectorized pass per 15m bar:
+
+- closes are aligned on a shared 15m bar grid ending at the newest bar, so
+  a symbol with a missing or late bar contributes NaN instead of shifting
+- pairwise correlations skip NaN returns per pair (min_periods overlap)
+- the matrix is rebuilt automatically when a newer 15m bar shows up in the
+  cache or a symbol outside the matrix is queried
+
+With ``correlation.incremental: true`` a one-bar advance updates running
+pairwise sums (add the new return row, drop the one leaving the window)
+instead of recomputing over the whole window; a full rebuild still happens
+on universe changes, gaps and every ``window_bars`` bars to bound drift.
+"""
 import logging
+import threading
+import time
 import numpy as np
+import pandas as pd
 from app.config import get
 
 log = logging.getLogger(__name__)
 
+BAR_MS = 15 * 60 * 1000
+CHECK_SECONDS = 10      # how often to look for a new bar in the cache
+
+
+def _tail(df, n):
+    """Last ``n`` bars as (open times in epoch ms, closes) NumPy arrays"""
+    ts = df['timestamp'].values if 'timestamp' in df.columns else df.index.values
+    ts = ts[-n:]
+    if np.issubdtype(ts.dtype, np.datetime64):
+        ts = ts.astype('datetime64[ms]').astype(np.int64)
+    elif not np.issubdtype(ts.dtype, np.number):
+        ts = pd.to_datetime(ts).values.astype('datetime64[ms]').astype(np.int64)
+    return ts.astype(np.int64), df['close'].values[-n:].astype(np.float64)
+
+
+def _pair_sums(returns):
+    """Pairwise sums over rows where both symbols have a return.
+
+    returns: (bars, n) array with NaN for missing. Each sum matrix is
+    (n, n): n_obs, sx[i, j] = sum of x_i over rows where i and j are valid,
+    sxx likewise for x_i**2, sxy = sum of x_i * x_j.
+    """
+    valid = ~np.isnan(returns)
+    m = valid.astype(np.float64)
+    x = np.where(valid, returns, 0.0)
+    return {
+        'n': m.T @ m,
+        'sx': x.T @ m,
+        'sxx': (x * x).T @ m,
+        'sxy': x.T @ x,
+    }
+
+
+def _corr_from_sums(s, min_periods):
+    n, sx, sxx, sxy = s['n'], s['sx'], s['sxx'], s['sxy']
+    sy, syy = sx.T, sxx.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = n * sxy - sx * sy
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[(n < min_periods) | ~np.isfinite(corr)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
 
 class CorrelationGuard:
     def __init__(self, ohlcv_cache):
         self.cache = ohlcv_cache
         self._corr_cfg = get('correlation')
-        self._corr_matrix = {}  # {(sym1, sym2): correlation}
+        self._universe = []           # symbols the matrix should cover
+        self._symbols = []            # matrix row/column order
+        self._index = {}              # symbol -> row
+        self._matrix = None           # (n, n) ndarray, NaN = not enough data
+        self._bar_ms = None           # newest 15m bar the matrix includes
+        self._returns = None          # (window, n) return rows behind the matrix
+        self._sums = None             # running pairwise sums (incremental mode)
+        self._incremental_steps = 0
+        self._stamp = None            # last bar per symbol when last (re)built
+        self._checked_at = 0.0
+        self.check_seconds = CHECK_SECONDS
+        self._lock = threading.RLock()  # pool refresh runs on a background thread
+
+    @property
+    def window(self):
+        return self._corr_cfg.get('window_bars', 72)
+
+    @property
+    def min_periods(self):
+        return self._corr_cfg.get('min_periods', 20)
 
     def block(self, symbol, direction, active_positions):
         """Check if new position would be too correlated with existing ones"""
@@ -30,34 +111,116 @@ class CorrelationGuard:
 
         return False
 
-    def _get_correlation(self, sym1, sym2):
-        """Calculate rolling correlation between two symbols"""
-        key = tuple(sorted([sym1, sym2]))
-        if key in self._corr_matrix:
-            return self._corr_matrix[key]
-
-        window = self._corr_cfg.get('window_bars', 72)
-        df1 = self.cache.get(sym1, '15m')
-        df2 = self.cache.get(sym2, '15m')
-
-        if df1 is None or df2 is None or len(df1) < window or len(df2) < window:
-            return None
-
-        returns1 = df1['close'].pct_change().iloc[-window:]
-        returns2 = df2['close'].pct_change().iloc[-window:]
-
-        # Align by length
-        min_len = min(len(returns1), len(returns2))
-        r1 = returns1.iloc[-min_len:].values
-        r2 = returns2.iloc[-min_len:].values
-
-        mask = ~(np.isnan(r1) | np.isnan(r2))
-        if mask.sum() < 20:
-            return None
-
-        corr = np.corrcoef(r1[mask], r2[mask])[0, 1]
-        self._corr_matrix[key] = corr
-        return corr
+    def set_universe(self, symbols):
+        """Symbols to keep in the matrix (active pool); rebuilt on next query"""
+        symbols = list(dict.fromkeys(symbols))
+        with self._lock:
+            if symbols != self._universe:
+                self._universe = symbols
+                self.clear_cache()
 
     def clear_cache(self):
-        self._corr_matrix.clear()
+        with self._lock:
+            self._matrix = None
+            self._stamp = None
+
+    def _get_correlation(self, sym1, sym2):
+        """Correlation of 15m returns from the current-bar matrix"""
+        with self._lock:
+            self._ensure_current([sym1, sym2])
+            i, j = self._index.get(sym1), self._index.get(sym2)
+            if self._matrix is None or i is None or j is None:
+                return None
+            corr = self._matrix[i, j]
+        return None if np.isnan(corr) else float(corr)
+
+    def matrix(self):
+        """Current matrix as a DataFrame (dashboards); refreshed if a new bar closed"""
+        with self._lock:
+            self._ensure_current([])
+            if self._matrix is None:
+                return pd.DataFrame()
+            return pd.DataFrame(self._matrix.copy(), index=self._symbols, columns=self._symbols)
+
+    def to_dict(self):
+        """JSON-friendly matrix: {'bar_ms', 'symbols', 'matrix' (None for NaN)}"""
+        with self._lock:
+            self._ensure_current([])
+            if self._matrix is None:
+                return {'bar_ms': None, 'symbols': [], 'matrix': []}
+            bar_ms, symbols = self._bar_ms, list(self._symbols)
+            rounded = np.round(self._matrix, 4)
+        return {
+            'bar_ms': bar_ms,
+            'symbols': symbols,
+            'matrix': [[None if np.isnan(v) else float(v) for v in row] for row in rounded],
+        }
+
+    # ─── Matrix maintenance ─────────────────────────────────────────
+
+    def _ensure_current(self, symbols):
+        missing = [s for s in symbols if s not in self._universe]
+        if missing:
+            self._universe = list(dict.fromkeys(self._universe + missing))
+            self.clear_cache()
+        now = time.monotonic()
+        if self._matrix is not None and now - self._checked_at < self.check_seconds:
+            return
+        self._checked_at = now
+
+        frames = {}
+        for sym in self._universe:
+            df = self.cache.get(sym, '15m')
+            if df is not None and len(df) >= 2:
+                frames[sym] = _tail(df, self.window + 1)
+        if not frames:
+            self._matrix = None
+            return
+        stamp = tuple(int(times[-1]) for times, _ in frames.values())
+        if self._matrix is not None and stamp == self._stamp and list(frames) == self._symbols:
+            return
+
+        newest = max(stamp)
+        in_sync = len(set(stamp)) == 1 and len(set(self._stamp or (None,))) == 1
+        if (self._matrix is not None and self._corr_cfg.get('incremental', False)
+                and in_sync and newest == self._bar_ms + BAR_MS
+                and list(frames) == self._symbols
+                and self._incremental_steps < self.window):
+            self._advance(frames, newest)
+        else:
+            self._rebuild(frames, newest)
+        self._stamp = stamp
+
+    def _aligned_returns(self, frames, newest, bars):
+        """(bars, n) returns on the grid ending at ``newest``; NaN where missing"""
+        grid = newest - BAR_MS * np.arange(bars, -1, -1, dtype=np.int64)
+        closes = np.full((bars + 1, len(frames)), np.nan)
+        for col, (times, close) in enumerate(frames.values()):
+            times, close = times[-(bars + 1):], close[-(bars + 1):]
+            pos = np.searchsorted(grid, times)
+            ok = (pos < len(grid)) & (grid[np.minimum(pos, len(grid) - 1)] == times)
+            closes[pos[ok], col] = close[ok]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return closes[1:] / closes[:-1] - 1.0
+
+    def _rebuild(self, frames, newest):
+        returns = self._aligned_returns(frames, newest, self.window)
+        self._symbols = list(frames)
+        self._index = {s: i for i, s in enumerate(self._symbols)}
+        self._returns = returns
+        self._sums = _pair_sums(returns)
+        self._matrix = _corr_from_sums(self._sums, self.min_periods)
+        self._bar_ms = newest
+        self._incremental_steps = 0
+
+    def _advance(self, frames, newest):
+        """Slide the window by one bar: add the new row, drop the oldest"""
+        new_row = self._aligned_returns(frames, newest, 1)
+        old_row = self._returns[:1]
+        add, drop = _pair_sums(new_row), _pair_sums(old_row)
+        for key in self._sums:
+            self._sums[key] += add[key] - drop[key]
+        self._returns = np.vstack([self._returns[1:], new_row])
+        self._matrix = _corr_from_sums(self._sums, self.min_periods)
+        self._bar_ms = newest
+        self._incremental_steps += 1
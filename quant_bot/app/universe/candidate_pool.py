@@ -1,7 +1,10 @@
 """候选池筛选 - 三层过滤"""
 import logging
+import time
 from datetime import datetime
 from app.config import get, get_blacklist, get_whitelist
+from app.indicators import calc
+from app.universe.market_snapshot import MarketSnapshot
 
 log = logging.getLogger(__name__)
 
@@ -11,6 +14,7 @@ class CandidatePool:
         self.exchange = exchange_client
         self.cache = ohlcv_cache
         self.filters = get('filters')
+        self.snapshot = MarketSnapshot(exchange_client)
 
     def build(self):
         """从全市场构建候选池"""
@@ -34,11 +38,26 @@ class CandidatePool:
             if ws not in scan_symbols and ws not in blacklist:
                 scan_symbols.append(ws)
 
+        # 批量快照: ticker/盘口/资金费率各一次全市场请求, 市场信息跨刷新缓存
+        t0 = time.time()
+        markets = self.snapshot.fetch(scan_symbols)
+        passed = {}
+        for sym, m in markets.items():
+            pre = self._hard_filter(sym, m)
+            if pre:
+                passed[sym] = pre
+
+        # OI 无批量接口: 只对通过硬过滤的币种并发拉取
+        oi_map = self.snapshot.fetch_open_interest(list(passed))
         candidates = []
-        for sym in scan_symbols:
-            snap = self._evaluate_symbol(sym)
+        for sym, pre in passed.items():
+            if sym not in oi_map:
+                continue
+            snap = self._evaluate_symbol(sym, pre, oi_map[sym])
             if snap:
                 candidates.append(snap)
+        log.info(f"快照: {len(markets)} 个行情, 硬过滤后 {len(passed)} 个, "
+                 f"拉取OI {len(oi_map)} 个, 耗时 {time.time() - t0:.1f}s")
 
         candidates.sort(key=lambda x: x['score'], reverse=True)
         pool_size = get('market', 'active_pool_size', 12)
@@ -46,53 +65,51 @@ class CandidatePool:
         log.info(f"活跃池: 从 {len(candidates)} 个候选中选出 {len(active)} 个")
         return active
 
-    def _evaluate_symbol(self, symbol):
-        """三层过滤评估"""
-        try:
-            ticker = self.exchange.fetch_ticker(symbol)
-            if not ticker:
-                return None
+    def _hard_filter(self, symbol, market):
+        """第一层硬过滤 (不含OI): 成交额 / 点差 / 资金费率 / 上线天数"""
+        ticker = market['ticker']
 
-            # === 第一层: 硬过滤 ===
+        # 24h成交额
+        vol_24h = float(ticker.get('quoteVolume', 0) or 0)
+        if vol_24h < self.filters.get('min_24h_volume', 8_000_000):
+            return None
 
-            # 24h成交额
-            vol_24h = float(ticker.get('quoteVolume', 0) or 0)
-            if vol_24h < self.filters.get('min_24h_volume', 8_000_000):
-                return None
+        # 点差
+        spread = 0
+        bid = float(ticker.get('bid', 0) or 0)
+        ask = float(ticker.get('ask', 0) or 0)
+        if bid > 0 and ask > 0:
+            spread = (ask - bid) / bid * 100
+        if spread > self.filters.get('max_spread_pct', 0.04):
+            return None
 
-            # 点差
-            spread = 0
-            bid = float(ticker.get('bid', 0) or 0)
-            ask = float(ticker.get('ask', 0) or 0)
-            if bid > 0 and ask > 0:
-                spread = (ask - bid) / bid * 100
-            if spread > self.filters.get('max_spread_pct', 0.04):
-                return None
+        # 资金费率
+        funding = market['funding_rate']
+        if abs(funding) > self.filters.get('max_abs_funding_rate', 0.0075):
+            return None
 
-            # 资金费率
-            funding = self.exchange.fetch_funding_rate(symbol)
-            if abs(funding) > self.filters.get('max_abs_funding_rate', 0.0075):
+        # 上线天数 (市场信息中的上线时间)
+        launch_ts = market.get('listing_ts')
+        if launch_ts:
+            listing_days = (datetime.utcnow() - datetime.utcfromtimestamp(launch_ts / 1000)).days
+            if listing_days < self.filters.get('min_listing_days', 14):
                 return None
 
+        return {
+            'volume_24h': vol_24h,
+            'spread_pct': spread,
+            'funding_rate': funding,
+            'last_price': float(ticker.get('last', 0) or 0),
+        }
+
+    def _evaluate_symbol(self, symbol, pre, oi):
+        """OI过滤 + 第二/三层 (基于本地K线缓存)"""
+        try:
             # 持仓量(Open Interest)
-            oi = self.exchange.fetch_open_interest(symbol)
             if oi < self.filters.get('min_open_interest', 3_000_000):
                 return None
 
-            # 上线天数 (通过市场信息检查)
-            markets = self.exchange.load_markets()
-            market_key = f"{symbol}:USDT"
-            if market_key in markets:
-                market_info = markets[market_key]
-                # 尝试获取上线时间
-                launch_ts = market_info.get('created')
-                if launch_ts:
-                    listing_days = (datetime.utcnow() - datetime.utcfromtimestamp(launch_ts / 1000)).days
-                    if listing_days < self.filters.get('min_listing_days', 14):
-                        return None
-
             # === 第二层: 波动过滤 ===
-            from app.indicators import calc
             df_1h = self.cache.get(symbol, '1h')
             if df_1h is None or len(df_1h) < 20:
                 return None
@@ -118,15 +135,14 @@ class CandidatePool:
                 if avg_hourly_vol > 0 and recent_12_vol < avg_hourly_vol * 0.5:
                     return None  # 近1小时量能太低
 
-            last_price = float(ticker.get('last', 0) or 0)
             return {
                 'symbol': symbol,
-                'volume_24h': vol_24h,
+                'volume_24h': pre['volume_24h'],
                 'open_interest': oi,
-                'spread_pct': spread,
-                'funding_rate': funding,
+                'spread_pct': pre['spread_pct'],
+                'funding_rate': pre['funding_rate'],
                 'atrp_1h': current_atrp,
-                'last_price': last_price,
+                'last_price': pre['last_price'],
                 'wicky_count': wicky,
                 'score': 0,  # 由 trend_scoring 填充
             }
@@ -0,0 +1,158 @@
+"""全市场快照 - 候选池的批量数据阶段
+
+替代候选池逐币种的 fetch_ticker / fetch_funding_rate / load_markets 调用:
+- ticker、盘口(bid/ask)、资金费率各用一次全市场批量请求
+- 市场元数据 (上线时间等) 跨刷新缓存, 默认 6 小时重新加载一次
+- 持仓量(OI)交易所无批量接口, 只对通过硬过滤的币种用线程池并发拉取,
+  并受请求权重预算约束, 避免触发 Binance 限频
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import get
+
+log = logging.getLogger(__name__)
+
+# Binance USDT-M 请求权重 (不带 symbol 的全市场接口)
+WEIGHT_TICKERS = 40
+WEIGHT_BOOK_TICKERS = 5
+WEIGHT_FUNDING_RATES = 10
+WEIGHT_OPEN_INTEREST = 1
+WEIGHT_EXCHANGE_INFO = 1
+
+
+class WeightBudget:
+    """请求权重预算 - 每分钟最多消耗 per_minute 权重, 不足时阻塞等待"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, weight=1):
+        weight = min(float(weight), self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait = (weight - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _market_key(symbol):
+    """quant_bot 符号 BTC/USDT -> ccxt 永续符号 BTC/USDT:USDT"""
+    return symbol if ':' in symbol else f"{symbol}:USDT"
+
+
+def _lookup(table, symbol):
+    if not table:
+        return None
+    item = table.get(_market_key(symbol))
+    return item if item is not None else table.get(symbol)
+
+
+class MarketSnapshot:
+    """批量拉取全市场 ticker / 资金费率 / 上线信息, 并发拉取 OI"""
+
+    def __init__(self, exchange_client):
+        self.exchange = exchange_client
+        self.markets_ttl = get('market', 'markets_cache_seconds', 6 * 3600)
+        self.oi_workers = get('market', 'oi_workers', 8)
+        self.budget = WeightBudget(get('market', 'snapshot_weight_per_minute', 1200))
+        self._markets = None
+        self._markets_at = 0.0
+        self._markets_lock = threading.Lock()
+
+    @property
+    def _ccxt(self):
+        """底层 ccxt 实例 (ExchangeClient.exchange), 批量接口直接调用它"""
+        return getattr(self.exchange, 'exchange', None) or self.exchange
+
+    # ─── 市场元数据 ────────────────────────────────────────────────
+
+    def markets(self):
+        """load_markets() 结果, 跨候选池刷新缓存 markets_ttl 秒"""
+        with self._markets_lock:
+            if self._markets is None or time.time() - self._markets_at > self.markets_ttl:
+                self.budget.acquire(WEIGHT_EXCHANGE_INFO)
+                try:
+                    self._markets = self.exchange.load_markets() or {}
+                    self._markets_at = time.time()
+                except Exception as e:
+                    log.warning(f"加载市场信息失败: {e}")
+                    if self._markets is None:
+                        return {}
+            return self._markets
+
+    def listing_ts(self, symbol):
+        """上线时间戳(ms), 未知返回 None"""
+        market = _lookup(self.markets(), symbol)
+        return market.get('created') if market else None
+
+    # ─── 批量行情 ──────────────────────────────────────────────────
+
+    def fetch(self, symbols):
+        """一次批量请求拿到所有币种的 ticker + 资金费率
+
+        Returns:
+            {symbol: {'ticker': dict, 'funding_rate': float, 'listing_ts': int|None}}
+            拿不到 ticker 的币种不在结果中
+        """
+        ex = self._ccxt
+        self.budget.acquire(WEIGHT_TICKERS)
+        tickers = ex.fetch_tickers()
+
+        # 期货 24h ticker 不含 bid/ask, 用全市场 bookTicker 补齐
+        books = {}
+        try:
+            self.budget.acquire(WEIGHT_BOOK_TICKERS)
+            books = ex.fetch_bids_asks()
+        except Exception as e:
+            log.debug(f"批量盘口获取失败: {e}")
+
+        fundings = {}
+        try:
+            self.budget.acquire(WEIGHT_FUNDING_RATES)
+            fundings = ex.fetch_funding_rates()
+        except Exception as e:
+            log.warning(f"批量资金费率获取失败: {e}")
+
+        result = {}
+        for sym in symbols:
+            ticker = _lookup(tickers, sym)
+            if not ticker:
+                continue
+            book = _lookup(books, sym)
+            if book and not (ticker.get('bid') and ticker.get('ask')):
+                ticker = dict(ticker, bid=book.get('bid'), ask=book.get('ask'))
+            fr = _lookup(fundings, sym)
+            result[sym] = {
+                'ticker': ticker,
+                'funding_rate': float((fr or {}).get('fundingRate') or 0),
+                'listing_ts': self.listing_ts(sym),
+            }
+        return result
+
+    def fetch_open_interest(self, symbols):
+        """并发拉取 OI (受权重预算约束), 失败的币种不在结果中"""
+        def one(sym):
+            self.budget.acquire(WEIGHT_OPEN_INTEREST)
+            try:
+                return sym, float(self.exchange.fetch_open_interest(sym) or 0)
+            except Exception as e:
+                log.debug(f"OI获取失败 {sym}: {e}")
+                return sym, None
+
+        if not symbols:
+            return {}
+        workers = max(1, min(self.oi_workers, len(symbols)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='oi') as pool:
+            return {sym: oi for sym, oi in pool.map(one, symbols) if oi is not None}
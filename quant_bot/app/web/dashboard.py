@@ -72,6 +72,14 @@ def api_pool():
     return jsonify(bot.active_pool)
 
 
+@app.route('/api/correlation')
+def api_correlation():
+    bot = get_bot()
+    if bot is None:
+        return jsonify({'bar_ms': None, 'symbols': [], 'matrix': []})
+    return jsonify(bot.correlation.to_dict())
+
+
 @app.route('/api/trades')
 def api_trades():
     bot = get_bot()
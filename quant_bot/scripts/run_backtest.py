@@ -11,6 +11,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.config import load_config
 from app.data.exchange_client import ExchangeClient
 from app.backtest.engine import BacktestEngine
+from app.backtest.vector_engine import VectorBacktestEngine
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 log = logging.getLogger(__name__)
@@ -24,6 +25,8 @@ def main():
     parser.add_argument('--days', type=int, default=180, help='回测天数')
     parser.add_argument('--config', default=None, help='配置文件路径')
     parser.add_argument('--output', default='backtest_result.json', help='结果输出文件')
+    parser.add_argument('--engine', choices=['vector', 'legacy'], default='vector',
+                        help='回测引擎: vector=指标预计算(快), legacy=逐bar重算')
     args = parser.parse_args()
 
     load_config(args.config)
@@ -53,7 +56,7 @@ def main():
         return
 
     # 运行回测
-    engine = BacktestEngine()
+    engine = VectorBacktestEngine() if args.engine == 'vector' else BacktestEngine()
     metrics = engine.run(symbol_data, args.symbols)
 
     # 输出结果
@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
-"""运行参数优化 - 快速版 (减少搜索空间)"""
+"""运行参数优化 - 快速版 (减少搜索空间)
+
+并行 + 逐步减半示例:
+  python scripts/run_optimize.py --workers 16 --strategy halving
+"""
 import os
 import sys
 import json
 import logging
+import argparse
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -15,7 +20,7 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(me
 log = logging.getLogger(__name__)
 
 
-# 精简搜索空间: 3×3×3×3 = 81 个组合 (~2.7小时)
+# 精简搜索空间: 3×3×3×3 = 81 个组合
 FAST_PARAM_GRID = {
     'stop_atr_multiple': [1.5, 2.0, 3.0],
     'tp1_r_multiple': [1.0, 1.5, 2.0],
@@ -25,6 +30,15 @@ FAST_PARAM_GRID = {
 
 
 def main():
+    parser = argparse.ArgumentParser(description='QuantBot 参数优化')
+    parser.add_argument('--workers', type=int, default=1, help='并行进程数 (1 为串行)')
+    parser.add_argument('--strategy', choices=['grid', 'random', 'halving'], default='grid',
+                        help='搜索策略')
+    parser.add_argument('--samples', type=int, default=None, help='random 策略的采样数')
+    parser.add_argument('--abandon-dd', type=float, default=None,
+                        help='权益从峰值回撤超过该比例提前放弃组合 (如0.3), 默认不放弃')
+    args = parser.parse_args()
+
     load_config()
 
     api_key = os.environ.get('BINANCE_API_KEY', '')
@@ -48,12 +62,17 @@ def main():
         return
 
     # 运行优化
-    optimizer = ParameterOptimizer(symbol_data, symbols)
+    optimizer = ParameterOptimizer(
+        symbol_data, symbols, workers=args.workers,
+        abandon_drawdown_pct=args.abandon_dd,
+    )
     results = optimizer.optimize(
         param_grid=FAST_PARAM_GRID,
         metric='profit_factor',
         top_n=10,
         max_combos=81,
+        strategy=args.strategy,
+        n_samples=args.samples,
     )
 
     print("\n" + "=" * 60)
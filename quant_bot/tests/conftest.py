@@ -120,6 +120,38 @@ def ranging_ohlcv():
     return df
 
 
+def _make_backtest_symbol(seed, n=400, start='2026-01-01', drop=None):
+    """Trending + ranging random walk so every setup type gets a chance to fire"""
+    rng = np.random.default_rng(seed)
+    drift = np.concatenate([
+        np.full(n // 4, 0.002), np.full(n // 4, -0.002),
+        np.zeros(n // 4), np.full(n - 3 * (n // 4), 0.0015),
+    ])
+    close = 100 * np.cumprod(1 + drift + rng.normal(0, 0.006, n))
+    open_ = close * (1 + rng.normal(0, 0.002, n))
+    df = pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n, freq='15min'),
+        'open': open_,
+        'high': np.maximum(open_, close) * (1 + rng.uniform(0.0005, 0.006, n)),
+        'low': np.minimum(open_, close) * (1 - rng.uniform(0.0005, 0.006, n)),
+        'close': close,
+        'volume': rng.uniform(2e5, 8e5, n),
+    })
+    if drop is not None:
+        df = df.drop(index=drop).reset_index(drop=True)
+    return df
+
+
+@pytest.fixture
+def backtest_symbol_data():
+    """3 symbols of 15m bars: one with a gap, one starting later"""
+    return {
+        'BTC/USDT': _make_backtest_symbol(1),
+        'ETH/USDT': _make_backtest_symbol(2, drop=list(range(120, 135))),
+        'SOL/USDT': _make_backtest_symbol(3, n=360, start='2026-01-01 10:00'),
+    }
+
+
 @pytest.fixture
 def make_signal():
     """Factory for creating Signal objects"""
@@ -0,0 +1,128 @@
+"""Tests for CandidatePool bulk snapshot stage"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.universe.candidate_pool import CandidatePool
+from app.universe.market_snapshot import WeightBudget
+
+
+def _ohlcv(n, step=1.0):
+    close = 100 + np.cumsum(np.where(np.arange(n) % 2, step, -step * 0.8))
+    return pd.DataFrame({
+        'open': close * 0.995, 'high': close * 1.002, 'low': close * 0.993,
+        'close': close, 'volume': np.full(n, 1000.0),
+    })
+
+
+class FakeCache:
+
+    def get(self, symbol, tf):
+        return _ohlcv(80 if tf == '1h' else 100)
+
+
+class FakeCcxt:
+    """Bulk endpoints keyed by ccxt swap symbols"""
+
+    def __init__(self, symbols):
+        self.calls = {'fetch_tickers': 0, 'fetch_bids_asks': 0, 'fetch_funding_rates': 0}
+        self.symbols = symbols
+
+    def fetch_tickers(self):
+        self.calls['fetch_tickers'] += 1
+        return {f"{s}:USDT": {'symbol': f"{s}:USDT", 'last': 100.0, 'bid': None, 'ask': None,
+                              'quoteVolume': 2e6 if s.startswith('THIN') else 5e7}
+                for s in self.symbols}
+
+    def fetch_bids_asks(self):
+        self.calls['fetch_bids_asks'] += 1
+        return {f"{s}:USDT": {'bid': 100.0, 'ask': 100.5 if s.startswith('WIDE') else 100.01}
+                for s in self.symbols}
+
+    def fetch_funding_rates(self):
+        self.calls['fetch_funding_rates'] += 1
+        return {f"{s}:USDT": {'fundingRate': 0.01 if s.startswith('HOT') else 0.0001}
+                for s in self.symbols}
+
+
+class FakeClient:
+
+    def __init__(self, symbols, oi_delay=0.0):
+        self.symbols = symbols
+        self.exchange = FakeCcxt(symbols)
+        self.oi_delay = oi_delay
+        self.oi_calls = []
+        self.load_markets_calls = 0
+        self.max_concurrent = 0
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def get_usdt_perpetuals(self):
+        return list(self.symbols)
+
+    def load_markets(self):
+        self.load_markets_calls += 1
+        new = (time.time() - 3 * 86400) * 1000
+        return {f"{s}:USDT": {'created': new if s.startswith('NEW') else 1_500_000_000_000}
+                for s in self.symbols}
+
+    def fetch_open_interest(self, symbol):
+        with self._lock:
+            self.oi_calls.append(symbol)
+            self._active += 1
+            self.max_concurrent = max(self.max_concurrent, self._active)
+        time.sleep(self.oi_delay)
+        with self._lock:
+            self._active -= 1
+        return 1e6 if symbol.startswith('LOWOI') else 1e8
+
+
+SYMBOLS = ['BTC/USDT', 'ETH/USDT', 'THIN/USDT', 'WIDE/USDT', 'HOT/USDT',
+           'NEW/USDT', 'LOWOI/USDT', 'SOL/USDT']
+
+
+class TestCandidatePool:
+
+    def test_filters_with_bulk_calls(self):
+        client = FakeClient(SYMBOLS)
+        pool = CandidatePool(client, FakeCache())
+        active = pool.build()
+
+        assert [c['symbol'] for c in active] == ['BTC/USDT', 'ETH/USDT', 'SOL/USDT']
+        assert active[0]['spread_pct'] == pytest.approx(0.01)
+        assert active[0]['open_interest'] == 1e8
+        assert client.exchange.calls == {
+            'fetch_tickers': 1, 'fetch_bids_asks': 1, 'fetch_funding_rates': 1}
+        # OI only for symbols that passed the hard filters
+        assert sorted(client.oi_calls) == ['BTC/USDT', 'ETH/USDT', 'LOWOI/USDT', 'SOL/USDT']
+
+    def test_markets_cached_across_refreshes(self):
+        client = FakeClient(SYMBOLS)
+        pool = CandidatePool(client, FakeCache())
+        pool.build()
+        pool.build()
+        assert client.load_markets_calls == 1
+
+    def test_open_interest_fetched_concurrently(self):
+        symbols = [f"C{i}/USDT" for i in range(40)]
+        client = FakeClient(symbols, oi_delay=0.05)
+        pool = CandidatePool(client, FakeCache())
+        t0 = time.time()
+        pool.build()
+        assert len(client.oi_calls) == len(symbols)
+        assert client.max_concurrent > 1
+        assert time.time() - t0 < 40 * 0.05 / 2
+
+
+class TestWeightBudget:
+
+    def test_blocks_when_exhausted(self):
+        budget = WeightBudget(600)  # 10 weight/s
+        budget.acquire(600)
+        t0 = time.monotonic()
+        budget.acquire(2)
+        assert time.monotonic() - t0 >= 0.15
+
@@ -0,0 +1,98 @@
+"""Tests for CorrelationGuard vectorized matrix"""
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.risk.correlation_guard import CorrelationGuard
+
+
+def _frames(n_symbols=6, n=200, seed=7):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.01, n)
+    ts = pd.date_range('2026-01-01', periods=n, freq='15min')
+    frames = {}
+    for k in range(n_symbols):
+        beta = 0.2 + 0.15 * k
+        rets = beta * market + rng.normal(0, 0.01, n)
+        frames[f"S{k}/USDT"] = pd.DataFrame({
+            'timestamp': ts, 'close': 100 * np.cumprod(1 + rets),
+        })
+    return frames
+
+
+class FakeCache:
+
+    def __init__(self, frames, upto):
+        self.frames = frames
+        self.upto = upto
+
+    def get(self, symbol, tf):
+        df = self.frames.get(symbol)
+        return None if df is None else df.iloc[:self.upto].reset_index(drop=True)
+
+
+def _guard(cache, **cfg):
+    guard = CorrelationGuard(cache)
+    guard._corr_cfg = {'window_bars': 72, 'min_periods': 20, **cfg}
+    guard.check_seconds = 0
+    return guard
+
+
+def _expected(frames, upto, window=72):
+    closes = pd.DataFrame({s: df['close'].iloc[:upto].values for s, df in frames.items()})
+    return closes.pct_change().iloc[-window:].corr(min_periods=20)
+
+
+class TestCorrelationMatrix:
+
+    def test_matches_pandas_pairwise(self):
+        frames = _frames()
+        # drop a few bars from one symbol: NaN-aware, aligned on the bar grid
+        frames['S2/USDT'] = frames['S2/USDT'].drop(index=[150, 151, 160]).reset_index(drop=True)
+        cache = FakeCache(frames, 170)
+        guard = _guard(cache)
+        guard.set_universe(list(frames))
+
+        # S2 now ends 3 bars later than the rest; those bars are NaN for others
+        closes = pd.DataFrame({s: cache.get(s, '15m').set_index('timestamp')['close']
+                               for s in frames})
+        expected = closes.pct_change(fill_method=None).iloc[-72:].corr(min_periods=20)
+        np.testing.assert_allclose(guard.matrix().values, expected.values, atol=1e-9)
+
+    def test_rebuilds_on_new_bar(self):
+        frames = _frames()
+        cache = FakeCache(frames, 120)
+        guard = _guard(cache)
+        guard.set_universe(list(frames))
+        before = guard._get_correlation('S0/USDT', 'S5/USDT')
+        cache.upto = 121
+        after = guard._get_correlation('S0/USDT', 'S5/USDT')
+        assert after != before
+        assert after == pytest.approx(_expected(frames, 121).loc['S0/USDT', 'S5/USDT'])
+        assert guard.to_dict()['bar_ms'] == int(frames['S0/USDT']['timestamp'].iloc[120].value // 10**6)
+
+    def test_incremental_matches_full(self):
+        frames = _frames()
+        cache = FakeCache(frames, 100)
+        guard = _guard(cache, incremental=True)
+        guard.set_universe(list(frames))
+        guard.matrix()
+        for upto in range(101, 140):
+            cache.upto = upto
+            incremental = guard.matrix().values
+            np.testing.assert_allclose(incremental, _expected(frames, upto).values, atol=1e-9)
+        assert 0 < guard._incremental_steps <= 72
+
+    def test_block_uses_matrix(self):
+        frames = _frames()
+        frames['TWIN/USDT'] = frames['S3/USDT'].assign(close=frames['S3/USDT']['close'] * 2)
+        guard = _guard(FakeCache(frames, 150), max_same_dir_corr=0.8)
+        guard.set_universe(list(frames))
+        positions = [SimpleNamespace(symbol='S3/USDT', direction=1)]
+        assert guard.block('TWIN/USDT', 1, positions)
+        assert not guard.block('TWIN/USDT', -1, positions)
+        assert not guard.block('S0/USDT', 1, positions)
+        # symbols with no data are simply unknown
+        assert guard._get_correlation('NOPE/USDT', 'S3/USDT') is None
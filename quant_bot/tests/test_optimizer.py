@@ -0,0 +1,99 @@
+"""Tests for app/backtest/optimizer.py"""
+import pytest
+
+from app.backtest.optimizer import ParameterOptimizer
+from app.backtest.vector_engine import PreparedData, VectorBacktestEngine
+
+GRID = {
+    'stop_atr_multiple': [1.2, 2.0],
+    'tp1_r_multiple': [1.0, 1.5],
+    'risk_per_trade': [0.004, 0.006],
+}
+
+
+def _ranking(results):
+    return [(tuple(sorted(r['params'].items())), r['score']) for r in results]
+
+
+class TestSearchStrategies:
+    def test_grid_runs_every_combo(self, backtest_symbol_data):
+        opt = ParameterOptimizer(backtest_symbol_data)
+        top = opt.optimize(GRID, metric='total_return_pct', top_n=3)
+        assert opt.runs == 8
+        assert len(top) <= 3
+        assert [r['score'] for r in top] == sorted((r['score'] for r in top), reverse=True)
+
+    def test_parallel_matches_serial(self, backtest_symbol_data):
+        serial = ParameterOptimizer(backtest_symbol_data)
+        serial.optimize(GRID, metric='total_return_pct', top_n=8)
+        parallel = ParameterOptimizer(backtest_symbol_data, workers=2)
+        parallel.optimize(GRID, metric='total_return_pct', top_n=8)
+        assert sorted(_ranking(parallel.results)) == sorted(_ranking(serial.results))
+
+    def test_random_search_samples_n(self, backtest_symbol_data):
+        opt = ParameterOptimizer(backtest_symbol_data)
+        opt.optimize(GRID, metric='total_return_pct', strategy='random', n_samples=3, seed=7)
+        assert opt.runs == 3
+
+    def test_successive_halving_prunes(self, backtest_symbol_data):
+        opt = ParameterOptimizer(backtest_symbol_data)
+        top = opt.optimize(GRID, metric='total_return_pct', strategy='halving',
+                           eta=2, min_bars=100)
+        # 8 combos on short data, then 4, 2, and the survivor(s) on full data
+        assert opt.runs < 8 * 3
+        assert 1 <= len(top) <= 2
+        full = ParameterOptimizer(backtest_symbol_data)
+        assert top[0]['metrics'] == full._run_single(top[0]['params'])
+
+    def test_unknown_strategy_raises(self, backtest_symbol_data):
+        with pytest.raises(ValueError):
+            ParameterOptimizer(backtest_symbol_data).optimize(GRID, strategy='bayes')
+
+
+class TestEarlyAbandon:
+    def test_losing_combos_abandoned(self, backtest_symbol_data):
+        opt = ParameterOptimizer(backtest_symbol_data, abandon_drawdown_pct=0.0)
+        opt.optimize(GRID, metric='total_return_pct')
+        assert opt.abandoned_count > 0
+        assert len(opt.results) + opt.abandoned_count <= opt.runs
+
+    def test_threshold_is_drawdown_from_peak(self, backtest_symbol_data):
+        class Recording(VectorBacktestEngine):
+            """Records the equity seen by every abandon check, never abandons"""
+            seen = []
+
+            @property
+            def abandon_drawdown_pct(self):
+                self.seen.append(self.equity)
+                return 10.0
+
+            @abandon_drawdown_pct.setter
+            def abandon_drawdown_pct(self, value):
+                pass
+
+        data = PreparedData.from_frames(backtest_symbol_data)
+        full = Recording()
+        full_metrics = full.run_prepared(data)
+        peak, max_dd = full.initial_balance, 0.0
+        for eq in full.seen:
+            peak = max(peak, eq)
+            max_dd = max(max_dd, (peak - eq) / peak)
+        assert max_dd > 0
+
+        kept = VectorBacktestEngine(abandon_drawdown_pct=max_dd * 1.001)
+        assert kept.run_prepared(data) == full_metrics and not kept.abandoned
+
+        cut = VectorBacktestEngine(abandon_drawdown_pct=max_dd * 0.999)
+        cut.run_prepared(data)
+        assert cut.abandoned
+        assert len(cut.trades) <= len(full.trades)
+
+
+class TestPreparedData:
+    def test_mmap_roundtrip_gives_same_backtest(self, backtest_symbol_data, tmp_path):
+        data = PreparedData.from_frames(backtest_symbol_data)
+        data.save(str(tmp_path))
+        loaded = PreparedData.load(str(tmp_path), mmap=True)
+        a = VectorBacktestEngine().run_prepared(data)
+        b = VectorBacktestEngine().run_prepared(loaded)
+        assert a == b
@@ -0,0 +1,48 @@
+"""Parity tests: VectorBacktestEngine vs BacktestEngine"""
+import pandas as pd
+
+from app.backtest.engine import BacktestEngine
+from app.backtest.vector_engine import VectorBacktestEngine, build_timeline
+
+
+def _trade_tuples(trades):
+    return [(t.symbol, t.direction, t.entry_price, t.exit_price, t.size, t.pnl,
+             t.fees, t.setup_type, t.close_reason, t.opened_at, t.closed_at,
+             t.funding_fees) for t in trades]
+
+
+class TestVectorEngineParity:
+    def test_identical_trades_and_metrics(self, backtest_symbol_data):
+        legacy = BacktestEngine()
+        legacy_metrics = legacy.run(backtest_symbol_data)
+        fast = VectorBacktestEngine()
+        fast_metrics = fast.run(backtest_symbol_data)
+
+        assert len(legacy.trades) > 0
+        assert _trade_tuples(fast.trades) == _trade_tuples(legacy.trades)
+        assert fast.equity == legacy.equity
+        assert fast.equity_curve == legacy.equity_curve
+        assert fast_metrics == legacy_metrics
+
+    def test_parity_with_param_overrides(self, backtest_symbol_data):
+        cfg = {'risk_per_trade': 0.006, 'stop_atr_multiple': 2.0,
+               'tp1_r_multiple': 1.0, 'tp2_r_multiple': 2.0, 'adx_min': 18,
+               'max_holding_minutes': 75}
+        legacy = BacktestEngine(config=dict(cfg))
+        legacy.run(backtest_symbol_data, ['BTC/USDT', 'ETH/USDT'])
+        fast = VectorBacktestEngine(config=dict(cfg))
+        fast.run(backtest_symbol_data, ['BTC/USDT', 'ETH/USDT'])
+        assert _trade_tuples(fast.trades) == _trade_tuples(legacy.trades)
+
+
+class TestTimeline:
+    def test_missing_bars_map_to_minus_one(self, backtest_symbol_data):
+        symbol_data = backtest_symbol_data
+        timestamps, row_at = build_timeline(symbol_data, list(symbol_data))
+        assert timestamps == sorted(timestamps)
+        eth = row_at['ETH/USDT']
+        missing = pd.Timestamp('2026-01-01') + pd.Timedelta(minutes=15 * 125)
+        assert eth[timestamps.index(missing)] == -1
+        # SOL starts 10h later → its first 40 slots are empty
+        assert (row_at['SOL/USDT'][:40] == -1).all()
+        assert row_at['SOL/USDT'][40] == 0
@@ -14,7 +14,8 @@ def create_app(config_class=Config):
     migrate.init_app(app, db)
     cors.init_app(app)
     socketio.init_app(app, cors_allowed_origins=app.config.get('CORS_ORIGINS', '*'),
-                      async_mode='gevent', logger=False, engineio_logger=False)
+                      async_mode='gevent', logger=False, engineio_logger=False,
+                      message_queue=app.config.get('SOCKETIO_MESSAGE_QUEUE') or None)
 
     # Register blueprints
     from .api.auth import auth_bp
@@ -58,9 +59,8 @@ def create_app(config_class=Config):
         # Bot count
         running_bots = 0
         try:
-            from .engine.bot_manager import BotManager
-            manager = BotManager.get_instance()
-            running_bots = sum(1 for b in manager._bots.values() if b.is_running)
+            from .engine.bot_commands import get_bot_control
+            running_bots = get_bot_control().running_count()
         except Exception:
             pass
 
@@ -86,9 +86,11 @@ def create_app(config_class=Config):
         from . import models  # noqa: F401
         db.create_all()
 
-    # Start bot watchdog (auto-restart crashed bots)
-    from .engine.bot_manager import BotManager
-    manager = BotManager.get_instance(app)
-    manager.start_watchdog()
+    # Start bot watchdog (auto-restart crashed bots); with an external
+    # bot runner the bots and their watchdog live in that process
+    if app.config.get('BOT_RUNNER', 'embedded') == 'embedded':
+        from .engine.bot_manager import BotManager
+        manager = BotManager.get_instance(app)
+        manager.start_watchdog()
 
     return app
@@ -6,10 +6,11 @@ from ..middleware.auth_middleware import admin_required, get_current_user_id
 from ..services.auth_service import hash_password
 from ..services.audit_service import log_action
 from ..services.encryption_service import EncryptionService
+from ..services.stats_service import get_agent_stats, ensure_agent_stats
 from ..models.agent import Agent
 from ..models.agent_config import AgentApiKey, AgentTradingConfig
 from ..models.bot_state import BotState
-from ..models.trade import Trade
+from ..models.trade import Trade, AgentStats
 from ..models.audit import AuditLog
 from ..extensions import db
 
@@ -47,35 +48,31 @@ def _fetch_agent_balance(agent_id):
 @admin_required
 def dashboard():
     admin_id = get_current_user_id()
-    total_agents = Agent.query.filter_by(admin_id=admin_id).count()
-    active_agents = Agent.query.filter_by(admin_id=admin_id, is_active=True).count()
-    trading_enabled = Agent.query.filter_by(
-        admin_id=admin_id, is_trading_enabled=True
-    ).count()
-
-    # Running bots
-    running_bots = (
-        db.session.query(BotState)
-        .join(Agent)
-        .filter(Agent.admin_id == admin_id, BotState.status == 'running')
-        .count()
-    )
+    ensure_agent_stats(
+        [row[0] for row in db.session.query(Agent.id).filter_by(admin_id=admin_id)])
 
-    # Total PnL across all agents
+    # One pass over agents; bot_state and agent_stats are 1:1 so no fan-out
     from sqlalchemy import func
-    total_pnl = (
-        db.session.query(func.sum(Trade.pnl))
-        .join(Agent)
-        .filter(Agent.admin_id == admin_id, Trade.status == 'CLOSED')
-        .scalar()
-    ) or 0
+    total, active, trading, running, total_pnl = (
+        db.session.query(
+            func.count(Agent.id),
+            func.sum(db.case((Agent.is_active.is_(True), 1), else_=0)),
+            func.sum(db.case((Agent.is_trading_enabled.is_(True), 1), else_=0)),
+            func.sum(db.case((BotState.status == 'running', 1), else_=0)),
+            func.sum(AgentStats.total_pnl),
+        )
+        .outerjoin(BotState, BotState.agent_id == Agent.id)
+        .outerjoin(AgentStats, AgentStats.agent_id == Agent.id)
+        .filter(Agent.admin_id == admin_id)
+        .one()
+    )
 
     return jsonify({
-        'total_agents': total_agents,
-        'active_agents': active_agents,
-        'trading_enabled': trading_enabled,
-        'running_bots': running_bots,
-        'total_pnl': float(total_pnl),
+        'total_agents': total or 0,
+        'active_agents': int(active or 0),
+        'trading_enabled': int(trading or 0),
+        'running_bots': int(running or 0),
+        'total_pnl': float(total_pnl or 0),
     })
 
 
@@ -148,23 +145,15 @@ def get_agent(agent_id):
 
     # Include trade stats
     from sqlalchemy import func
-    stats = (
-        db.session.query(
-            func.count(Trade.id),
-            func.sum(Trade.pnl),
-            func.sum(db.case((Trade.pnl > 0, 1), else_=0)),
-        )
-        .filter(Trade.agent_id == agent_id, Trade.status == 'CLOSED')
-        .first()
-    )
-
-    bot_pnl = float(stats[1]) if stats[1] else 0
+    stats = get_agent_stats(agent_id)
+    bot_pnl = float(stats.total_pnl or 0)
 
     result = agent.to_admin_dict()
     result['trade_stats'] = {
-        'total_trades': stats[0] or 0,
+        'total_trades': stats.closed_trades or 0,
         'total_pnl': bot_pnl,
-        'win_trades': int(stats[2]) if stats[2] else 0,
+        'win_trades': stats.win_trades or 0,
+        'max_drawdown': float(stats.max_drawdown or 0),
     }
 
     # Fetch wallet balance and calculate PnL breakdown
@@ -366,45 +355,69 @@ def get_audit_log():
 @admin_bp.route('/leaderboard', methods=['GET'])
 @admin_required
 def leaderboard():
-    """Agent performance leaderboard sorted by total PnL."""
-    from sqlalchemy import func
+    """Agent performance leaderboard sorted by total PnL.
+
+    All-time (days >= 9999) reads the maintained agent_stats rows; a window
+    is one GROUP BY over trades joined to agents. max_drawdown is all-time.
+    """
+    from sqlalchemy import func, and_
 
     admin_id = get_current_user_id()
     days = request.args.get('days', 30, type=int)
     sort_by = request.args.get('sort', 'pnl')  # pnl, win_rate, trades
 
-    agents = Agent.query.filter_by(admin_id=admin_id, is_active=True).all()
-    result = []
-
-    for agent in agents:
-        date_filter = []
-        if days < 9999:
-            from datetime import datetime, timedelta, timezone
-            cutoff = datetime.now(timezone.utc) - timedelta(days=days)
-            date_filter = [Trade.exit_time >= cutoff]
+    ensure_agent_stats(
+        [row[0] for row in db.session.query(Agent.id).filter_by(
+            admin_id=admin_id, is_active=True)])
 
-        stats = db.session.query(
+    if days < 9999:
+        from datetime import datetime, timedelta, timezone
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        trade_join = and_(Trade.agent_id == Agent.id, Trade.status == 'CLOSED',
+                          Trade.exit_time >= cutoff)
+        aggregates = (
             func.count(Trade.id),
             func.sum(Trade.pnl),
             func.sum(db.case((Trade.pnl > 0, 1), else_=0)),
             func.max(Trade.pnl),
             func.min(Trade.pnl),
-        ).filter(
-            Trade.agent_id == agent.id,
-            Trade.status == 'CLOSED',
-            *date_filter,
-        ).first()
-
-        total = stats[0] or 0
-        total_pnl = float(stats[1]) if stats[1] else 0
-        wins = int(stats[2]) if stats[2] else 0
-        best = float(stats[3]) if stats[3] else 0
-        worst = float(stats[4]) if stats[4] else 0
+        )
+        query = db.session.query(
+            Agent.id, Agent.username, Agent.display_name, BotState.status,
+            AgentStats.max_drawdown, *aggregates,
+        ).outerjoin(Trade, trade_join).group_by(
+            Agent.id, Agent.username, Agent.display_name, BotState.status,
+            AgentStats.max_drawdown,
+        )
+    else:
+        query = db.session.query(
+            Agent.id, Agent.username, Agent.display_name, BotState.status,
+            AgentStats.max_drawdown, AgentStats.closed_trades,
+            AgentStats.total_pnl, AgentStats.win_trades,
+            AgentStats.best_trade, AgentStats.worst_trade,
+        )
+
+    rows = (
+        query
+        .outerjoin(BotState, BotState.agent_id == Agent.id)
+        .outerjoin(AgentStats, AgentStats.agent_id == Agent.id)
+        .filter(Agent.admin_id == admin_id, Agent.is_active.is_(True))
+        .all()
+    )
+
+    result = []
+    for (agent_id, username, display_name, bot_status, max_dd,
+         total, total_pnl, wins, best, worst) in rows:
+        total = total or 0
+        total_pnl = float(total_pnl) if total_pnl else 0
+        wins = int(wins) if wins else 0
+        best = float(best) if best else 0
+        worst = float(worst) if worst else 0
 
         result.append({
-            'agent_id': agent.id,
-            'username': agent.username,
-            'display_name': agent.display_name,
+            'agent_id': agent_id,
+            'username': username,
+            'display_name': display_name,
             'total_trades': total,
             'total_pnl': round(total_pnl, 2),
             'win_rate': round(wins / total * 100, 1) if total > 0 else 0,
@@ -412,7 +425,8 @@ def leaderboard():
             'loss_trades': total - wins,
             'best_trade': round(best, 2),
             'worst_trade': round(worst, 2),
-            'bot_status': agent.bot_state.status if agent.bot_state else 'stopped',
+            'max_drawdown': round(float(max_dd or 0), 2),
+            'bot_status': bot_status or 'stopped',
         })
 
     # Sort
@@ -452,19 +466,17 @@ def get_agent_trades(agent_id):
 
     # For OPEN positions, fetch current prices and calculate unrealized PnL
     if status_filter == 'OPEN' and trades_list:
-        from ..engine.signal_analyzer import fetch_price
+        from ..engine.market_data import MarketDataHub
         # Determine agent's exchange
         api_record = AgentApiKey.query.filter_by(agent_id=agent_id).first()
         ex_name = (api_record.exchange or 'binance') if api_record else 'binance'
         symbols = list({t['symbol'] for t in trades_list})
+        hub = MarketDataHub.get_instance()
         prices = {}
         for sym in symbols:
-            try:
-                p = fetch_price(sym, timeout=5, exchange=ex_name)
-                if p:
-                    prices[sym] = p
-            except Exception:
-                pass
+            p = hub.get_book_price(sym, exchange=ex_name)
+            if p:
+                prices[sym] = p
 
         for t in trades_list:
             current_price = prices.get(t['symbol'])
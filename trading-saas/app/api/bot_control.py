@@ -5,14 +5,15 @@ from ..middleware.auth_middleware import (
     agent_required, admin_required, get_current_user_id,
 )
 from ..models.bot_state import BotState
-from ..engine.bot_manager import BotManager
+from ..engine.bot_commands import get_bot_control
 
 bot_bp = Blueprint('bot', __name__)
 bot_admin_bp = Blueprint('bot_admin', __name__)
 
 
-def _get_manager() -> BotManager:
-    return BotManager.get_instance(current_app._get_current_object())
+def _get_control():
+    """BotManager in this process, or the external bot runner (BOT_RUNNER)."""
+    return get_bot_control(current_app._get_current_object())
 
 
 # ─── Agent endpoints (/api/agent/bot/*) ──────────────────────
@@ -25,8 +26,7 @@ def bot_status():
     if not state:
         return jsonify({'status': 'stopped'})
     result = state.to_dict()
-    manager = _get_manager()
-    live = manager.get_bot_status(agent_id)
+    live = _get_control().get_status(agent_id)
     result['positions'] = live.get('positions', 0)
     result['scan_count_live'] = live.get('scan_count', 0)
     return jsonify(result)
@@ -37,11 +37,9 @@ def bot_status():
 def bot_logs():
     """Get recent bot activity log entries."""
     agent_id = get_current_user_id()
-    manager = _get_manager()
-    bot = manager._bots.get(agent_id)
-    if not bot:
+    logs = _get_control().get_logs(agent_id)
+    if logs is None:
         return jsonify({'logs': [], 'message': 'Bot is not running'})
-    logs = list(bot.activity_log)
     return jsonify({'logs': logs})
 
 
@@ -50,9 +48,8 @@ def bot_logs():
 def bot_signals():
     """Get last scan result for signal panel."""
     agent_id = get_current_user_id()
-    manager = _get_manager()
-    bot = manager._bots.get(agent_id)
-    if not bot:
+    last_scan = _get_control().get_last_scan(agent_id)
+    if last_scan is None:
         return jsonify({
             'last_scan_time': None,
             'signals_analyzed': 0,
@@ -61,15 +58,14 @@ def bot_signals():
             'positions_opened': 0,
             'message': 'Bot is not running',
         })
-    return jsonify(bot.last_scan_result)
+    return jsonify(last_scan)
 
 
 @bot_bp.route('/start', methods=['POST'])
 @agent_required
 def start_bot():
     agent_id = get_current_user_id()
-    manager = _get_manager()
-    success, message = manager.start_bot(agent_id)
+    success, message = _get_control().execute('start', agent_id)
     if not success:
         return jsonify({'error': message}), 400
     return jsonify({'message': message, 'status': 'running'})
@@ -79,8 +75,7 @@ def start_bot():
 @agent_required
 def stop_bot():
     agent_id = get_current_user_id()
-    manager = _get_manager()
-    success, message = manager.stop_bot(agent_id)
+    success, message = _get_control().execute('stop', agent_id)
     if not success:
         return jsonify({'error': message}), 400
     return jsonify({'message': message, 'status': 'stopped'})
@@ -90,8 +85,7 @@ def stop_bot():
 @agent_required
 def pause_bot():
     agent_id = get_current_user_id()
-    manager = _get_manager()
-    success, message = manager.pause_bot(agent_id)
+    success, message = _get_control().execute('pause', agent_id)
     if not success:
         return jsonify({'error': message}), 400
     return jsonify({'message': message, 'status': 'paused'})
@@ -101,8 +95,7 @@ def pause_bot():
 @agent_required
 def resume_bot():
     agent_id = get_current_user_id()
-    manager = _get_manager()
-    success, message = manager.resume_bot(agent_id)
+    success, message = _get_control().execute('resume', agent_id)
     if not success:
         return jsonify({'error': message}), 400
     return jsonify({'message': message, 'status': 'running'})
@@ -115,24 +108,37 @@ def resume_bot():
 def admin_all_bots():
     """Admin: get all bots status with live info."""
     states = BotState.query.all()
-    manager = _get_manager()
+    control = _get_control()
     result = []
     for state in states:
         d = state.to_dict()
         d['agent_id'] = state.agent_id
-        live = manager.get_bot_status(state.agent_id)
+        live = control.get_status(state.agent_id)
         d['positions'] = live.get('positions', 0)
         d['thread_alive'] = live.get('thread_alive', False)
         result.append(d)
     return jsonify({'bots': result})
 
 
+@bot_admin_bp.route('/market-data', methods=['GET'])
+@admin_required
+def admin_market_data_stats():
+    """Admin: shared market-data / signal / exchange-metadata cache metrics."""
+    return jsonify(_get_control().market_data_stats())
+
+
+@bot_admin_bp.route('/runners', methods=['GET'])
+@admin_required
+def admin_bot_runners():
+    """Admin: bot-runner processes and the agents each one leases."""
+    return jsonify({'runners': _get_control().runners()})
+
+
 @bot_admin_bp.route('/<int:agent_id>/start', methods=['POST'])
 @admin_required
 def admin_start_bot(agent_id):
     """Admin: start a specific agent's bot."""
-    manager = _get_manager()
-    success, message = manager.start_bot(agent_id)
+    success, message = _get_control().execute('start', agent_id)
     if not success:
         return jsonify({'error': message}), 400
     return jsonify({'message': message, 'status': 'running'})
@@ -142,8 +148,7 @@ def admin_start_bot(agent_id):
 @admin_required
 def admin_stop_bot(agent_id):
     """Admin: stop a specific agent's bot."""
-    manager = _get_manager()
-    success, message = manager.stop_bot(agent_id)
+    success, message = _get_control().execute('stop', agent_id)
     if not success:
         return jsonify({'error': message}), 400
     return jsonify({'message': message, 'status': 'stopped'})
@@ -153,8 +158,7 @@ def admin_stop_bot(agent_id):
 @admin_required
 def admin_restart_bot(agent_id):
     """Admin: restart a specific agent's bot."""
-    manager = _get_manager()
-    success, message = manager.restart_bot(agent_id)
+    success, message = _get_control().execute('restart', agent_id)
     if not success:
         return jsonify({'error': message}), 400
     return jsonify({'message': message, 'status': 'running'})
@@ -3,7 +3,8 @@ import logging
 from flask import Blueprint, request, jsonify
 
 from ..middleware.auth_middleware import any_auth_required, get_current_user_id
-from ..engine.signal_analyzer import fetch_price as sa_fetch_price, fetch_klines as sa_fetch_klines
+from ..engine.market_data import MarketDataHub
+from ..engine.signal_analyzer import fetch_klines as sa_fetch_klines
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +30,7 @@ def _get_agent_exchange() -> str:
 def get_price(symbol):
     try:
         exchange = _get_agent_exchange()
-        price = sa_fetch_price(symbol, exchange=exchange)
+        price = MarketDataHub.get_instance().get_book_price(symbol, exchange=exchange)
         if price is not None:
             return jsonify({
                 'symbol': symbol,
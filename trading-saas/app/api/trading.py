@@ -2,26 +2,20 @@
 import csv
 import io
 import logging
-import requests as req
 from datetime import datetime, timezone
 from flask import Blueprint, request, jsonify, Response
-from sqlalchemy import func, case
 
 from ..middleware.auth_middleware import agent_required, admin_required, get_current_user_id
 from ..models.trade import Trade, DailyStat
 from ..models.agent import Agent
 from ..extensions import db
+from ..services.stats_service import get_agent_stats
+from ..engine.market_data import MarketDataHub
 from ..engine.signal_analyzer import exchange_symbol
 
 logger = logging.getLogger(__name__)
 trading_bp = Blueprint('trading', __name__)
 
-# Exchange price endpoints
-_PRICE_ENDPOINTS = {
-    'binance': 'https://fapi.binance.com/fapi/v1/ticker/price',
-    'bitget':  'https://api.bitget.com/api/v2/mix/market/tickers',
-}
-
 
 def _get_agent_exchange(agent_id: int) -> str:
     """Get exchange name from agent's API key config."""
@@ -35,25 +29,6 @@ def _get_agent_exchange(agent_id: int) -> str:
     return 'binance'
 
 
-def _fetch_all_prices(exchange: str = 'binance') -> dict:
-    """Fetch all futures ticker prices in one call."""
-    try:
-        if exchange == 'bitget':
-            resp = req.get(
-                _PRICE_ENDPOINTS['bitget'],
-                params={'productType': 'USDT-FUTURES'},
-                timeout=5,
-            )
-            data = resp.json().get('data', [])
-            return {item['symbol']: float(item['lastPr']) for item in data}
-        else:
-            resp = req.get(_PRICE_ENDPOINTS['binance'], timeout=5)
-            return {item['symbol']: float(item['price']) for item in resp.json()}
-    except Exception:
-        logger.warning(f"Failed to fetch {exchange} prices for PnL enrichment")
-        return {}
-
-
 @trading_bp.route('/positions', methods=['GET'])
 @agent_required
 def get_positions():
@@ -63,9 +38,10 @@ def get_positions():
         agent_id=agent_id, status='OPEN'
     ).order_by(Trade.entry_time.desc()).all()
 
-    # Batch-fetch all futures prices (single HTTP call)
+    # Shared price book: one bulk ticker call per exchange across all requests
     ex = _get_agent_exchange(agent_id)
-    all_prices = _fetch_all_prices(ex) if trades else {}
+    all_prices, price_age = (MarketDataHub.get_instance().get_price_book(ex)
+                             if trades else ({}, None))
 
     positions = []
     for t in trades:
@@ -99,7 +75,10 @@ def get_positions():
         d['peak_roi'] = float(t.peak_roi) if t.peak_roi else 0
         positions.append(d)
 
-    return jsonify({'positions': positions})
+    return jsonify({
+        'positions': positions,
+        'price_age': round(price_age, 1) if price_age is not None else None,
+    })
 
 
 @trading_bp.route('/history', methods=['GET'])
@@ -162,21 +141,9 @@ def get_trade(trade_id):
 def get_stats():
     """Comprehensive trade statistics."""
     agent_id = get_current_user_id()
+    stats = get_agent_stats(agent_id)
 
-    stats = db.session.query(
-        func.count(Trade.id),
-        func.sum(Trade.pnl),
-        func.sum(Trade.fee),
-        func.sum(Trade.funding_fee),
-        func.max(Trade.pnl),
-        func.min(Trade.pnl),
-        func.sum(case((Trade.pnl > 0, 1), else_=0)),
-        func.avg(Trade.pnl),
-    ).filter(
-        Trade.agent_id == agent_id, Trade.status == 'CLOSED'
-    ).first()
-
-    total_trades = stats[0] or 0
+    total_trades = stats.closed_trades or 0
     if total_trades == 0:
         return jsonify({
             'total_trades': 0, 'win_trades': 0, 'loss_trades': 0,
@@ -185,62 +152,30 @@ def get_stats():
             'profit_factor': 0, 'max_drawdown': 0,
         })
 
-    total_pnl = float(stats[1]) if stats[1] else 0
-    total_fees = float(stats[2] or 0) + float(stats[3] or 0)
-    best = float(stats[4]) if stats[4] else 0
-    worst = float(stats[5]) if stats[5] else 0
-    wins = int(stats[6]) if stats[6] else 0
-    avg_pnl = float(stats[7]) if stats[7] else 0
-
-    # Profit factor
-    gross_profit = db.session.query(
-        func.sum(Trade.pnl)
-    ).filter(
-        Trade.agent_id == agent_id, Trade.status == 'CLOSED', Trade.pnl > 0
-    ).scalar() or 0
-    gross_loss = abs(db.session.query(
-        func.sum(Trade.pnl)
-    ).filter(
-        Trade.agent_id == agent_id, Trade.status == 'CLOSED', Trade.pnl < 0
-    ).scalar() or 0)
-    profit_factor = float(gross_profit) / float(gross_loss) if gross_loss > 0 else (
+    s = stats.to_dict()
+    gross_profit, gross_loss = s['gross_profit'], s['gross_loss']
+    profit_factor = gross_profit / gross_loss if gross_loss > 0 else (
         999.99 if gross_profit > 0 else 0)
 
-    # Max drawdown from trade history
-    closed_trades = Trade.query.filter_by(
-        agent_id=agent_id, status='CLOSED'
-    ).order_by(Trade.exit_time).all()
-
     from ..models.agent_config import AgentTradingConfig
     tc = AgentTradingConfig.query.filter_by(agent_id=agent_id).first()
-    initial_capital = float(tc.initial_capital) if tc else 2000
-
-    peak = initial_capital
-    max_dd = 0
-    cumulative = initial_capital
-    for t in closed_trades:
-        cumulative += float(t.pnl) if t.pnl else 0
-        if cumulative > peak:
-            peak = cumulative
-        dd = (peak - cumulative) / peak * 100 if peak > 0 else 0
-        max_dd = max(max_dd, dd)
 
     # Open positions count and unrealized
     open_count = Trade.query.filter_by(agent_id=agent_id, status='OPEN').count()
 
     return jsonify({
         'total_trades': total_trades,
-        'win_trades': wins,
-        'loss_trades': total_trades - wins,
-        'win_rate': round(wins / total_trades * 100, 1),
-        'total_pnl': round(total_pnl, 2),
-        'total_fees': round(total_fees, 4),
-        'avg_pnl': round(avg_pnl, 2),
-        'best_trade': round(best, 2),
-        'worst_trade': round(worst, 2),
+        'win_trades': s['win_trades'],
+        'loss_trades': s['loss_trades'],
+        'win_rate': s['win_rate'],
+        'total_pnl': round(s['total_pnl'], 2),
+        'total_fees': round(s['total_fees'], 4),
+        'avg_pnl': round(s['total_pnl'] / total_trades, 2),
+        'best_trade': round(s['best_trade'], 2),
+        'worst_trade': round(s['worst_trade'], 2),
         'profit_factor': round(profit_factor, 2),
-        'max_drawdown': round(max_dd, 2),
-        'current_capital': round(cumulative, 2),
+        'max_drawdown': round(s['max_drawdown'], 2),
+        'current_capital': round(s['equity'], 2),
         'open_positions': open_count,
         'strategy_version': tc.strategy_version if tc else None,
     })
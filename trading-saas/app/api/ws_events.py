@@ -1,9 +1,42 @@
-"""WebSocket event handlers and emitters for real-time updates."""
+"""WebSocket event handlers and emitters for real-time updates.
+
+Every connection joins the room of its agent (``agent:<id>``) on connect,
+so an emit only reaches that agent's sockets instead of scanning every
+connection.
+
+With ``SOCKETIO_MESSAGE_QUEUE`` set (e.g. ``redis://...``), emits go through
+the queue: each web worker delivers to its own members of the room, and
+processes without a Socket.IO server (bot runners, scripts) publish through
+a write-only emitter. Without it, emits only reach sockets in this process.
+
+``bot_status`` and ``signal_update`` are coalesced per agent: the first
+event goes out immediately, later ones within ``WS_COALESCE_SECONDS`` are
+collapsed and only the latest payload is sent when the interval ends.
+"""
+import os
+import threading
+import time
+
+from flask import current_app, has_app_context
 from flask_jwt_extended import decode_token
+from flask_socketio import SocketIO, join_room
 from ..extensions import socketio
 
-# Track connected agents: sid -> agent_id
-_connected = {}
+DEFAULT_COALESCE_SECONDS = 1.0
+
+_external = None              # (queue url, write-only SocketIO) outside the web app
+_external_lock = threading.Lock()
+
+
+def agent_room(agent_id) -> str:
+    """Room name for an agent (JWT identities are strings, bot ids are ints)."""
+    return f'agent:{agent_id}'
+
+
+def _setting(key: str, default=None):
+    if has_app_context() and key in current_app.config:
+        return current_app.config[key]
+    return os.environ.get(key, default)
 
 
 @socketio.on('connect')
@@ -18,41 +51,153 @@ def on_connect(auth):
         if not agent_id:
             return False
         from flask import request
-        _connected[request.sid] = agent_id
+        join_room(agent_room(agent_id))
         socketio.emit('connected', {'agent_id': agent_id}, to=request.sid)
     except Exception:
         return False  # reject invalid token
 
 
-@socketio.on('disconnect')
-def on_disconnect():
-    from flask import request
-    _connected.pop(request.sid, None)
+# Rooms are left automatically on disconnect.
+
+
+# ─── Emitting ────────────────────────────────────────────────────
+
+def _emitter():
+    """Socket.IO instance to emit through, or None if nobody can receive.
+
+    Inside the web app this is the configured server (which publishes to the
+    message queue when one is set). Elsewhere a write-only emitter on the
+    message queue is created once per process.
+    """
+    global _external
+    if socketio.server is not None:
+        return socketio
+    url = _setting('SOCKETIO_MESSAGE_QUEUE')
+    if not url:
+        return None
+    with _external_lock:
+        if _external is None or _external[0] != url:
+            _external = (url, SocketIO(message_queue=url))
+        return _external[1]
+
+
+def _emit(event: str, agent_id, data: dict):
+    emitter = _emitter()
+    if emitter is not None:
+        emitter.emit(event, data, to=agent_room(agent_id))
+
+
+class Coalescer:
+    """Latest-wins throttle per (event, agent).
+
+    Leading edge is emitted immediately; events arriving within ``interval``
+    of the last emit replace each other and the newest one is emitted when
+    the interval is over, by a single background thread.
+    """
+
+    def __init__(self, emit, interval=None):
+        self._emit = emit
+        self._interval = interval
+        self._last_sent = {}      # key -> monotonic time of last emit
+        self._pending = {}        # key -> latest payload waiting for its slot
+        self._cond = threading.Condition()
+        self._thread = None
+        self.stats = {'submitted': 0, 'emitted': 0, 'coalesced': 0}
+
+    @property
+    def interval(self) -> float:
+        if self._interval is not None:
+            return self._interval
+        return float(_setting('WS_COALESCE_SECONDS', DEFAULT_COALESCE_SECONDS))
+
+    def submit(self, event: str, agent_id, data: dict):
+        key = (event, agent_id)
+        interval = self.interval
+        now = time.monotonic()
+        with self._cond:
+            self.stats['submitted'] += 1
+            last = self._last_sent.get(key)
+            if interval <= 0 or (key not in self._pending
+                                 and (last is None or now - last >= interval)):
+                self._last_sent[key] = now
+                self.stats['emitted'] += 1
+                send_now = True
+            else:
+                if key in self._pending:
+                    self.stats['coalesced'] += 1
+                self._pending[key] = data
+                self._ensure_thread()
+                self._cond.notify()
+                send_now = False
+        if send_now:
+            self._emit(event, agent_id, data)
+
+    def flush(self):
+        """Emit everything still pending (shutdown / tests)."""
+        with self._cond:
+            items = list(self._pending.items())
+            self._pending.clear()
+            now = time.monotonic()
+            for key, _ in items:
+                self._last_sent[key] = now
+            self.stats['emitted'] += len(items)
+        for (event, agent_id), data in items:
+            self._emit(event, agent_id, data)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='ws-coalescer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    interval = self.interval
+                    now = time.monotonic()
+                    due = [k for k in self._pending
+                           if now - self._last_sent.get(k, 0) >= interval]
+                    if due:
+                        break
+                    if self._pending:
+                        wait = min(self._last_sent.get(k, 0) + interval
+                                   for k in self._pending) - now
+                        self._cond.wait(timeout=max(wait, 0.001))
+                    else:
+                        self._cond.wait()
+                batch = [(k, self._pending.pop(k)) for k in due]
+                for k, _ in batch:
+                    self._last_sent[k] = now
+                self.stats['emitted'] += len(batch)
+                # forget agents that went quiet so the map stays small
+                for k in [k for k, t in self._last_sent.items()
+                          if now - t > 60 * interval and k not in self._pending]:
+                    del self._last_sent[k]
+            for (event, agent_id), data in batch:
+                try:
+                    self._emit(event, agent_id, data)
+                except Exception as e:
+                    print(f"[WS] Coalesced emit {event} for agent {agent_id} failed: {e}")
+
+
+_coalescer = Coalescer(_emit)
 
 
 def emit_bot_status(agent_id: int, status_data: dict):
-    """Push bot status update to a specific agent."""
-    for sid, aid in _connected.items():
-        if aid == agent_id:
-            socketio.emit('bot_status', status_data, to=sid)
+    """Push bot status update to a specific agent (coalesced)."""
+    _coalescer.submit('bot_status', agent_id, status_data)
 
 
 def emit_trade_event(agent_id: int, event_type: str, data: dict):
     """Push trade open/close event to a specific agent."""
-    for sid, aid in _connected.items():
-        if aid == agent_id:
-            socketio.emit('trade_event', {'type': event_type, **data}, to=sid)
+    _emit('trade_event', agent_id, {'type': event_type, **data})
 
 
 def emit_notification(agent_id: int, notification: dict):
     """Push new notification to a specific agent."""
-    for sid, aid in _connected.items():
-        if aid == agent_id:
-            socketio.emit('notification', notification, to=sid)
+    _emit('notification', agent_id, notification)
 
 
 def emit_signal_update(agent_id: int, signals_data: dict):
-    """Push signal scan result to a specific agent."""
-    for sid, aid in _connected.items():
-        if aid == agent_id:
-            socketio.emit('signal_update', signals_data, to=sid)
+    """Push signal scan result to a specific agent (coalesced)."""
+    _coalescer.submit('signal_update', agent_id, signals_data)
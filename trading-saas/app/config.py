@@ -52,6 +52,13 @@ class Config:
 
     # Redis
     REDIS_URL = os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/0')
+    RATE_LIMIT_ALGORITHM = os.environ.get('RATE_LIMIT_ALGORITHM', 'sliding_window')
+
+    # WebSocket: message queue shared by web workers and bot processes
+    # (e.g. the REDIS_URL); empty = emits reach only this process
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE', '')
+    # bot_status / signal_update: at most one push per agent per interval (latest wins)
+    WS_COALESCE_SECONDS = float(os.environ.get('WS_COALESCE_SECONDS', '1.0'))
 
     # Encryption
     ENCRYPTION_MASTER_KEY = os.environ.get('ENCRYPTION_MASTER_KEY', '')
@@ -61,6 +68,14 @@ class Config:
 
     # Trading
     BOT_SCAN_INTERVAL = int(os.environ.get('BOT_SCAN_INTERVAL', '60'))
+    # Where AgentBots run: 'embedded' = threads of the (single) web worker,
+    # 'external' = `python manage.py run_bots`, driven through bot_commands
+    BOT_RUNNER = os.environ.get('BOT_RUNNER', 'embedded')
+    # How long an API call waits for the runner to execute a command
+    BOT_COMMAND_TIMEOUT = float(os.environ.get('BOT_COMMAND_TIMEOUT', '15'))
+    # Several runners share the agents through leases renewed every 5s; a
+    # runner silent for this long is dead and its agents move to the others
+    BOT_LEASE_SECONDS = float(os.environ.get('BOT_LEASE_SECONDS', '30'))
 
     # Admin Telegram notifications (circuit breaker alerts)
     ADMIN_TELEGRAM_BOT_TOKEN = os.environ.get('ADMIN_TELEGRAM_BOT_TOKEN', '')
@@ -23,15 +23,17 @@ from ..models.trade import Trade, DailyStat
 from ..models.bot_state import BotState
 from ..models.audit import AuditLog
 from ..services.encryption_service import EncryptionService
+from ..services.stats_service import record_trade_close, invalidate_agent_stats
 
 from .signal_analyzer import (
-    analyze_signal, calculate_position_size, calculate_stop_take,
-    analyze_signal_v5, calculate_position_size_v5, calculate_stop_take_v5,
-    analyze_signal_v6,
-    analyze_signal_v8, calculate_position_size_v8, calculate_stop_take_v8,
-    analyze_signal_v9, calculate_position_size_v9, calculate_stop_take_v9,
-    fetch_price, DEFAULT_WATCHLIST, COIN_TIERS, SKIP_COINS,
+    calculate_position_size, calculate_stop_take,
+    calculate_position_size_v5, calculate_stop_take_v5,
+    calculate_position_size_v8, calculate_stop_take_v8,
+    calculate_position_size_v9, calculate_stop_take_v9,
+    DEFAULT_WATCHLIST, COIN_TIERS, SKIP_COINS,
 )
+from .market_data import MarketDataHub
+from .signal_hub import SignalHub
 from .order_executor import OrderExecutor
 from .risk_manager import RiskManager
 
@@ -69,6 +71,7 @@ class AgentBot:
         self.app = app
         self._stop_event = threading.Event()
         self._paused = False
+        self._detached = False     # handed over: leave BotState to the new owner
 
         # In-memory position tracking (symbol -> position dict)
         self.positions = {}
@@ -85,6 +88,7 @@ class AgentBot:
         self._consecutive_errors = 0
 
         self.executor = None
+        self.is_testnet = False
         self.risk_manager = None
         self.config = {}
         self.scan_count = 0
@@ -131,6 +135,7 @@ class AgentBot:
         api_key = keys['k']
         api_secret = keys['s']
         self.exchange_name = api_key_record.exchange or 'binance'
+        self.is_testnet = bool(api_key_record.is_testnet)
 
         # Initialize executor
         self.executor = OrderExecutor(
@@ -327,6 +332,8 @@ class AgentBot:
 
     def _update_state(self, status: str, error: str = None):
         """Update bot state in database."""
+        if self._detached:
+            return
         state = BotState.query.filter_by(agent_id=self.agent_id).first()
         if not state:
             state = BotState(agent_id=self.agent_id)
@@ -350,6 +357,19 @@ class AgentBot:
 
         db.session.commit()
 
+        # WebSocket push (coalesced per agent)
+        try:
+            from ..api.ws_events import emit_bot_status
+            emit_bot_status(self.agent_id, {
+                'status': status,
+                'scan_count': self.scan_count,
+                'last_scan_at': state.last_scan_at.isoformat(),
+                'last_error': state.last_error,
+                'positions': len(self.positions),
+            })
+        except Exception:
+            pass
+
     def _send_telegram(self, message: str):
         """Send Telegram notification for this agent."""
         try:
@@ -605,13 +625,24 @@ class AgentBot:
 
     # ─── Check Position ──────────────────────────────────────
 
+    def _get_price(self, symbol: str):
+        """Current price for position checks.
+
+        Live agents read the shared price book (one bulk ticker call per
+        exchange for all positions and agents); testnet agents need their
+        sandbox ticker. Either source falls back to the other.
+        """
+        hub = MarketDataHub.get_instance()
+        if self.is_testnet:
+            return (self.executor.get_price(symbol)
+                    or hub.get_book_price(symbol, exchange=self.exchange_name))
+        return (hub.get_book_price(symbol, exchange=self.exchange_name)
+                or self.executor.get_price(symbol))
+
     def _check_position(self, symbol: str, position: dict):
         """Check if a position should be closed."""
         try:
-            current_price = self.executor.get_price(symbol)
-            if not current_price:
-                # Fallback to direct API
-                current_price = fetch_price(symbol, exchange=self.exchange_name)
+            current_price = self._get_price(symbol)
             if not current_price:
                 return
 
@@ -757,6 +788,7 @@ class AgentBot:
                     trade.exit_time = datetime.now(timezone.utc)
                     trade.close_reason = f"Error: invalid entry_price ({entry_price})"
                     db.session.commit()
+                    self._record_agent_stats(0, 0, trade.exit_time)
                 del self.positions[symbol]
                 return
             if direction == 'LONG':
@@ -791,6 +823,7 @@ class AgentBot:
                 trade.close_reason = reason
                 trade.peak_roi = Decimal(str(round(position.get('peak_roi', 0), 4)))
                 db.session.commit()
+                self._record_agent_stats(pnl, total_fee + funding_fee, trade.exit_time)
 
             # Update daily stats (non-critical, don't block close)
             try:
@@ -922,6 +955,16 @@ class AgentBot:
             except Exception:
                 pass
 
+    def _record_agent_stats(self, pnl: float, fees: float, closed_at):
+        """Fold the close into agent_stats (non-critical, rebuilt on next read if it fails)."""
+        try:
+            record_trade_close(self.agent_id, pnl, fees, closed_at)
+            db.session.commit()
+        except Exception as e:
+            self._log('error', f"Agent stats update failed: {e}")
+            db.session.rollback()
+            invalidate_agent_stats(self.agent_id)
+
     def _update_daily_stats(self, pnl: float, fees: float):
         """Update or create daily stats record."""
         today = datetime.now(timezone.utc).date()
@@ -1004,17 +1047,10 @@ class AgentBot:
                     else:
                         del self.cooldowns[symbol]
 
-                # Analyze signal — route by strategy version
-                if strategy_ver.startswith('v9'):
-                    score, analysis = analyze_signal_v9(symbol, self.config, exchange=self.exchange_name)
-                elif strategy_ver.startswith('v8'):
-                    score, analysis = analyze_signal_v8(symbol, self.config, exchange=self.exchange_name)
-                elif strategy_ver.startswith('v5'):
-                    score, analysis = analyze_signal_v5(symbol, self.config, exchange=self.exchange_name)
-                elif strategy_ver.startswith('v6'):
-                    score, analysis = analyze_signal_v6(symbol, self.config, exchange=self.exchange_name)
-                else:
-                    score, analysis = analyze_signal(symbol, self.config, exchange=self.exchange_name)
+                # Analyze signal — routed by strategy version, computed once per
+                # group of agents with the same analysis settings (SignalHub)
+                score, analysis = SignalHub.get_instance().analyze(
+                    strategy_ver, symbol, self.config, exchange=self.exchange_name)
                 scan_analyzed += 1
                 if not analysis or score < min_score:
                     continue
@@ -1180,6 +1216,15 @@ class AgentBot:
         """Signal the bot to stop."""
         self._stop_event.set()
 
+    def detach(self):
+        """Stop without writing any further status (no final 'stopped').
+
+        The agent is being handed over; its BotState belongs to the
+        BotManager restoring it and then to the runner taking over.
+        """
+        self._detached = True
+        self._stop_event.set()
+
     def pause(self):
         """Pause scanning (existing positions still monitored)."""
         self._paused = True
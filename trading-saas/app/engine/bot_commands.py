@@ -0,0 +1,181 @@
+"""Bot control as seen from the web tier.
+
+BOT_RUNNER=embedded (default): bots run as threads of the web process and
+are driven directly through BotManager (single gunicorn worker).
+
+BOT_RUNNER=external: bots run in the bot-runner process
+(`python manage.py run_bots`). Start/stop/... are queued in `bot_commands`
+and the call waits for the runner's reply; live data (positions, logs, last
+scan) is read from the `bot_runtime` snapshots the runner publishes. The web
+process holds no bot state, so it can run several workers and be restarted
+without touching the trading loops.
+"""
+import time
+from datetime import datetime, timezone, timedelta
+
+from flask import current_app
+
+from ..extensions import db
+from ..models.bot_runtime import BotCommand, BotRuntime, BotRunnerNode, BotLease
+from .bot_manager import BotManager
+
+ACTIONS = ('start', 'stop', 'pause', 'resume', 'restart')
+
+DEFAULT_COMMAND_TIMEOUT = 15    # stop_bot alone may join a thread for 10s
+COMMAND_POLL_INTERVAL = 0.2
+SNAPSHOT_STALE_SECONDS = 30     # runner publishes every BOT_RUNNER_STATUS_INTERVAL (5s)
+
+
+def _as_utc(dt):
+    """DB drivers return naive datetimes for values stored as UTC."""
+    if dt is None:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def is_fresh(dt, max_age: float = SNAPSHOT_STALE_SECONDS) -> bool:
+    dt = _as_utc(dt)
+    return dt is not None and datetime.now(timezone.utc) - dt <= timedelta(seconds=max_age)
+
+
+def shared_data_stats() -> dict:
+    """Stats of the process-wide caches shared by all bots in this process."""
+    from .exchange_pool import ExchangePool
+    from .market_data import MarketDataHub
+    from .signal_hub import SignalHub
+    return {**MarketDataHub.get_instance().get_stats(),
+            'signals': SignalHub.get_instance().get_stats(),
+            'exchanges': ExchangePool.get_instance().get_stats()}
+
+
+class LocalBotControl:
+    """Bots live in this process."""
+
+    external = False
+
+    def __init__(self, app):
+        self.manager = BotManager.get_instance(app)
+
+    def execute(self, action: str, agent_id: int) -> tuple:
+        return getattr(self.manager, f'{action}_bot')(agent_id)
+
+    def get_status(self, agent_id: int) -> dict:
+        return self.manager.get_bot_status(agent_id)
+
+    def get_logs(self, agent_id: int):
+        """Activity log entries, or None when the bot is not in memory."""
+        bot = self.manager._bots.get(agent_id)
+        return list(bot.activity_log) if bot else None
+
+    def get_last_scan(self, agent_id: int):
+        bot = self.manager._bots.get(agent_id)
+        return bot.last_scan_result if bot else None
+
+    def running_count(self) -> int:
+        return sum(1 for b in self.manager._bots.values() if b.is_running)
+
+    def market_data_stats(self) -> dict:
+        return shared_data_stats()
+
+    def runners(self) -> list:
+        return []
+
+
+class RemoteBotControl:
+    """Bots live in the bot-runner process; talk to it through the DB."""
+
+    external = True
+
+    def __init__(self, timeout: float = None):
+        self.timeout = timeout if timeout is not None else float(
+            current_app.config.get('BOT_COMMAND_TIMEOUT', DEFAULT_COMMAND_TIMEOUT))
+
+    def execute(self, action: str, agent_id: int) -> tuple:
+        if action not in ACTIONS:
+            return False, f"Unknown action: {action}"
+        cmd = BotCommand(agent_id=agent_id, action=action)
+        db.session.add(cmd)
+        db.session.commit()
+        cmd_id = cmd.id
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            # commit ends the read snapshot so the runner's update is visible
+            db.session.commit()
+            cmd = db.session.get(BotCommand, cmd_id)
+            if cmd.status in ('done', 'failed'):
+                return cmd.status == 'done', cmd.message or ''
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(COMMAND_POLL_INTERVAL)
+
+        # Don't let a late runner act on a request the caller gave up on
+        gave_up = BotCommand.query.filter_by(id=cmd_id, status='pending').update(
+            {'status': 'failed', 'message': 'Timed out waiting for bot runner',
+             'processed_at': datetime.now(timezone.utc)})
+        db.session.commit()
+        if gave_up:
+            return False, "Bot runner did not respond (is it running?)"
+        return False, "Bot runner is still processing the request"
+
+    def _runtime(self, agent_id: int):
+        row = db.session.get(BotRuntime, agent_id)
+        return row if row and is_fresh(row.updated_at) else None
+
+    def get_status(self, agent_id: int) -> dict:
+        row = self._runtime(agent_id)
+        return {
+            'agent_id': agent_id,
+            'in_memory': row is not None,
+            'thread_alive': bool(row and row.thread_alive),
+            'is_running': bool(row and row.is_running),
+            'positions': row.positions if row else 0,
+            'scan_count': row.scan_count if row else 0,
+            'runner_id': row.runner_id if row else None,
+        }
+
+    def get_logs(self, agent_id: int):
+        row = self._runtime(agent_id)
+        return row.logs() if row else None
+
+    def get_last_scan(self, agent_id: int):
+        row = self._runtime(agent_id)
+        return row.scan_result() if row else None
+
+    def running_count(self) -> int:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=SNAPSHOT_STALE_SECONDS)
+        return BotRuntime.query.filter(
+            BotRuntime.is_running.is_(True), BotRuntime.updated_at >= cutoff,
+        ).count()
+
+    def market_data_stats(self) -> dict:
+        """Shared-cache stats of each live runner (the caches live there)."""
+        import json
+        runners = [r for r in BotRunnerNode.query.all() if is_fresh(r.heartbeat_at)]
+        return {
+            'runners': [
+                {**r.to_dict(), 'market_data': json.loads(r.market_data) if r.market_data else {}}
+                for r in runners
+            ],
+        }
+
+    def runners(self) -> list:
+        """Runner processes with liveness and the agents each one leases."""
+        now = datetime.now(timezone.utc)
+        leased = {}
+        for lease in BotLease.query.all():
+            expired = _as_utc(lease.expires_at) < now
+            leased.setdefault(lease.runner_id, []).append(
+                {'agent_id': lease.agent_id, 'expired': expired})
+        return [
+            {**r.to_dict(), 'live': is_fresh(r.heartbeat_at),
+             'leases': sorted(leased.get(r.runner_id, []), key=lambda l: l['agent_id'])}
+            for r in BotRunnerNode.query.order_by(BotRunnerNode.runner_id).all()
+        ]
+
+
+def get_bot_control(app=None):
+    app = app or current_app._get_current_object()
+    if app.config.get('BOT_RUNNER', 'embedded') == 'external':
+        return RemoteBotControl()
+    return LocalBotControl(app)
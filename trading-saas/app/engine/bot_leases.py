@@ -0,0 +1,121 @@
+"""Agent leases - spread AgentBots over several bot-runner processes.
+
+Every runner heartbeats in `bot_runners`; the live set is the runners whose
+heartbeat is younger than the lease period. Each agent that should run
+(BotState running/paused) is assigned by rendezvous hashing over the live
+set, so every runner computes the same assignment without talking to the
+others, and a runner joining or leaving only moves the agents that hash to
+it. A runner may only run an agent while it holds that agent's row in
+`bot_leases`; leases of a dead runner expire after one lease period and
+are then claimed by the new owners.
+"""
+import hashlib
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..models.bot_runtime import BotLease, BotRunnerNode, BotRuntime
+
+DEFAULT_LEASE_SECONDS = 30
+PRUNE_AFTER_LEASES = 10      # forget runners silent for 10 lease periods
+
+
+def rendezvous_owner(agent_id: int, runner_ids):
+    """Runner with the highest hash(runner, agent); None if no runner."""
+    best, best_score = None, None
+    for runner_id in runner_ids:
+        score = hashlib.md5(f"{runner_id}|{agent_id}".encode()).digest()
+        if best_score is None or score > best_score:
+            best, best_score = runner_id, score
+    return best
+
+
+class AgentLeases:
+    """Lease bookkeeping for one runner. Call inside an app context."""
+
+    def __init__(self, runner_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.runner_id = runner_id
+        self.lease_seconds = lease_seconds
+
+    def _expiry(self, now):
+        return now + timedelta(seconds=self.lease_seconds)
+
+    def live_runners(self, now=None) -> list:
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=self.lease_seconds)
+        rows = db.session.query(BotRunnerNode.runner_id).filter(
+            BotRunnerNode.heartbeat_at >= cutoff).all()
+        return sorted(r[0] for r in rows)
+
+    def prune_runners(self, now=None):
+        """Drop heartbeat/snapshot rows of runners that are long gone."""
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=self.lease_seconds * PRUNE_AFTER_LEASES)
+        dead = [r[0] for r in db.session.query(BotRunnerNode.runner_id).filter(
+            BotRunnerNode.heartbeat_at < cutoff).all()]
+        if dead:
+            BotRuntime.query.filter(BotRuntime.runner_id.in_(dead)).delete(
+                synchronize_session=False)
+            BotRunnerNode.query.filter(BotRunnerNode.runner_id.in_(dead)).delete(
+                synchronize_session=False)
+
+    def owner(self, agent_id: int, live: list):
+        return rendezvous_owner(agent_id, live)
+
+    def held(self) -> set:
+        """Agents leased to this runner (renewed or not)."""
+        rows = db.session.query(BotLease.agent_id).filter(
+            BotLease.runner_id == self.runner_id).all()
+        return {r[0] for r in rows}
+
+    def holder(self, agent_id: int, now=None):
+        """Runner holding an unexpired lease on the agent, or None."""
+        now = now or datetime.now(timezone.utc)
+        row = db.session.query(BotLease.runner_id).filter(
+            BotLease.agent_id == agent_id, BotLease.expires_at >= now).first()
+        return row[0] if row else None
+
+    def claim(self, agent_id: int, now=None) -> bool:
+        """Take the lease if it's free, expired or already ours."""
+        now = now or datetime.now(timezone.utc)
+        taken = BotLease.query.filter(
+            BotLease.agent_id == agent_id,
+            or_(BotLease.runner_id == self.runner_id, BotLease.expires_at < now),
+        ).update({'runner_id': self.runner_id, 'acquired_at': now,
+                  'expires_at': self._expiry(now)}, synchronize_session=False)
+        if taken:
+            db.session.commit()
+            return True
+        db.session.add(BotLease(agent_id=agent_id, runner_id=self.runner_id,
+                                acquired_at=now, expires_at=self._expiry(now)))
+        try:
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()   # live lease of another runner
+            return False
+
+    def renew(self, agent_ids, now=None) -> set:
+        """Extend our leases; returns the agents still leased to us."""
+        now = now or datetime.now(timezone.utc)
+        agent_ids = list(agent_ids)
+        if agent_ids:
+            BotLease.query.filter(
+                BotLease.runner_id == self.runner_id,
+                BotLease.agent_id.in_(agent_ids),
+            ).update({'expires_at': self._expiry(now)}, synchronize_session=False)
+            db.session.commit()
+        return self.held()
+
+    def release(self, agent_ids=None):
+        """Give up leases (all of ours when agent_ids is None)."""
+        q = BotLease.query.filter(BotLease.runner_id == self.runner_id)
+        if agent_ids is not None:
+            agent_ids = list(agent_ids)
+            if not agent_ids:
+                return
+            q = q.filter(BotLease.agent_id.in_(agent_ids))
+        q.delete(synchronize_session=False)
+        db.session.commit()
@@ -4,6 +4,7 @@ Provides start/stop/status for each agent's trading bot.
 Singleton pattern: one BotManager per Flask application.
 Includes watchdog thread for automatic crash recovery.
 """
+import os
 import threading
 import time
 from datetime import datetime, timezone
@@ -30,10 +31,14 @@ class BotManager:
         self.app = app
         self._bots = {}       # agent_id -> AgentBot
         self._threads = {}    # agent_id -> Thread
+        self._detaching = {}  # agent_id -> status to restore once its thread exits
         self._scan_interval = 20  # seconds
         self._restart_history = {}  # agent_id -> [timestamp, ...]
         self._watchdog_thread = None
         self._watchdog_running = False
+        # Optional predicate(agent_id): agents this process may run. Set by a
+        # sharded bot runner so its watchdog only restarts agents it leases.
+        self.owns = None
 
     @classmethod
     def get_instance(cls, app=None) -> 'BotManager':
@@ -45,9 +50,13 @@ class BotManager:
                 cls._instance.app = app
             return cls._instance
 
-    def start_bot(self, agent_id: int) -> tuple:
+    def start_bot(self, agent_id: int, paused: bool = False) -> tuple:
         """Start a bot for an agent.
 
+        Args:
+            paused: Start with scanning paused (positions still monitored);
+                set before the thread runs, so no scan happens in between
+
         Returns:
             (success: bool, message: str)
         """
@@ -58,6 +67,8 @@ class BotManager:
             # Check if already running
             if agent_id in self._bots and self._bots[agent_id].is_running:
                 return False, "Bot is already running"
+            if agent_id in self._detaching:
+                return False, "Bot is still stopping"
 
             # Validate agent
             agent = Agent.query.get(agent_id)
@@ -72,6 +83,8 @@ class BotManager:
 
             # Create and start bot
             bot = AgentBot(agent_id, self.app)
+            if paused:
+                bot.pause()
             thread = threading.Thread(
                 target=bot.run,
                 args=(self._scan_interval,),
@@ -93,8 +106,8 @@ class BotManager:
                 except Exception:
                     db.session.rollback()
                     state = BotState.query.filter_by(agent_id=agent_id).first()
-            state.status = 'running'
-            state.pid = thread.ident
+            state.status = 'paused' if paused else 'running'
+            state.pid = os.getpid()     # process hosting the AgentBot-<id> thread
             state.started_at = datetime.now(timezone.utc)
             db.session.commit()
 
@@ -120,6 +133,7 @@ class BotManager:
         # Clean up
         self._bots.pop(agent_id, None)
         self._threads.pop(agent_id, None)
+        self._detaching.pop(agent_id, None)
 
         # Update state
         with self.app.app_context():
@@ -190,6 +204,83 @@ class BotManager:
         for agent_id in list(self._bots.keys()):
             self.stop_bot(agent_id)
 
+    def detach_bots(self, agent_ids=None, timeout: float = 10) -> set:
+        """Stop bot threads but keep their saved running/paused status.
+
+        Used when a bot runner exits or hands agents over to another runner,
+        which then picks the same bots up again (stop_bot would mark them
+        stopped). agent_ids=None detaches every bot in this process.
+
+        A detached bot does not write its final 'stopped' status. Its saved
+        status is restored only once its thread has exited: a bot still in
+        the middle of a scan after `timeout` seconds stays in `_bots` (and
+        in `_detaching`) until reap_detached() sees it finish, so the caller
+        must keep the agent's lease until then.
+
+        Returns:
+            Agents whose threads have exited (including earlier detaches)
+        """
+        if agent_ids is None:
+            agent_ids = list(self._bots.keys())
+        agent_ids = [a for a in agent_ids if a in self._bots and a not in self._detaching]
+        if agent_ids:
+            with self.app.app_context():
+                saved = {
+                    s.agent_id: s.status
+                    for s in BotState.query.filter(BotState.agent_id.in_(agent_ids)).all()
+                }
+            for agent_id in agent_ids:
+                self._detaching[agent_id] = saved.get(agent_id)
+                self._bots[agent_id].detach()
+
+            deadline = time.monotonic() + timeout
+            for agent_id in agent_ids:
+                thread = self._threads.get(agent_id)
+                if thread and thread.is_alive():
+                    thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        return self.reap_detached()
+
+    def reap_detached(self, force: bool = False) -> set:
+        """Drop detached bots whose threads have exited and restore their status.
+
+        Args:
+            force: Also drop bots whose threads are still alive (process exit)
+
+        Returns:
+            Agents dropped
+        """
+        done = {
+            agent_id for agent_id in self._detaching
+            if force or not (self._threads.get(agent_id)
+                             and self._threads[agent_id].is_alive())
+        }
+        if not done:
+            return set()
+        saved = {a: self._detaching.pop(a) for a in done}
+        for agent_id in done:
+            self._bots.pop(agent_id, None)
+            self._threads.pop(agent_id, None)
+
+        restore = {a: st for a, st in saved.items() if st in ('running', 'paused')}
+        if restore:
+            with self.app.app_context():
+                for state in BotState.query.filter(
+                    BotState.agent_id.in_(list(restore.keys()))
+                ).all():
+                    state.status = restore[state.agent_id]
+                    state.pid = None
+                db.session.commit()
+        return done
+
+    def shutdown(self):
+        """Detach every bot (bot-runner exit).
+
+        Bots still stopping after the join timeout are dropped anyway: their
+        daemon threads end with the process.
+        """
+        self.detach_bots()
+        self.reap_detached(force=True)
+
     def restart_bot(self, agent_id: int) -> tuple:
         """Restart a bot (stop then start)."""
         if agent_id in self._bots:
@@ -249,6 +340,10 @@ class BotManager:
             ).all()
 
             for state in running_states:
+                if self.owns is not None and not self.owns(state.agent_id):
+                    continue    # another runner's shard
+                if state.agent_id in self._detaching:
+                    continue    # handed over, its thread is still stopping
                 thread = self._threads.get(state.agent_id)
 
                 # Thread is alive — nothing to do
@@ -279,7 +374,7 @@ class BotManager:
                 self._bots.pop(aid, None)
                 self._threads.pop(aid, None)
                 self._record_restart(aid)
-                success, msg = self.start_bot(aid)
+                success, msg = self.start_bot(aid, paused=state.status == 'paused')
                 if not success:
                     print(f"[BotManager] Watchdog: restart failed for agent "
                           f"{aid}: {msg}")
@@ -0,0 +1,272 @@
+"""Bot Runner - standalone process that owns BotManager.
+
+Started with `python manage.py run_bots` when BOT_RUNNER=external. It
+  - executes start/stop/pause/resume/restart requests queued by the web tier
+    in `bot_commands`,
+  - publishes a snapshot of every in-memory AgentBot to `bot_runtime` and its
+    own heartbeat to `bot_runners`,
+  - leases its share of the agents (see bot_leases): several runners, on one
+    or more machines, split the agents between them, rebalance when one
+    joins or leaves, and take over a dead runner's agents once its leases
+    expire,
+  - runs the watchdog for the agents it leases.
+WebSocket events from the bots reach browsers through SOCKETIO_MESSAGE_QUEUE.
+"""
+import json
+import os
+import signal
+import socket
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+
+from ..extensions import db
+from ..models.bot_runtime import BotCommand, BotRuntime, BotRunnerNode
+from ..models.bot_state import BotState
+from .bot_manager import BotManager
+from .bot_commands import ACTIONS, DEFAULT_COMMAND_TIMEOUT, shared_data_stats
+from .bot_leases import AgentLeases, DEFAULT_LEASE_SECONDS
+
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_STATUS_INTERVAL = 5.0
+
+
+class BotRunner:
+    """Command loop + status publisher around a BotManager."""
+
+    def __init__(self, app, poll_interval: float = None, status_interval: float = None,
+                 runner_id: str = None):
+        self.app = app
+        self.manager = BotManager.get_instance(app)
+        self.poll_interval = poll_interval or app.config.get(
+            'BOT_RUNNER_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+        self.status_interval = status_interval or app.config.get(
+            'BOT_RUNNER_STATUS_INTERVAL', DEFAULT_STATUS_INTERVAL)
+        self.runner_id = (runner_id or f"{socket.gethostname()}:{os.getpid()}")[:64]
+        self.leases = AgentLeases(self.runner_id, app.config.get(
+            'BOT_LEASE_SECONDS', DEFAULT_LEASE_SECONDS))
+        self._held = set()      # agents leased to us as of the last tick
+        self._stop_event = threading.Event()
+        self._last_status = 0.0
+        # watchdog: only restart agents of our shard
+        self.manager.owns = lambda agent_id: agent_id in self._held
+
+    # ─── Commands ────────────────────────────────────────────
+
+    def process_commands(self) -> int:
+        """Execute pending commands in arrival order. Returns how many ran."""
+        with self.app.app_context():
+            # Nobody is waiting for these any more (web worker died mid-request)
+            now = datetime.now(timezone.utc)
+            timeout = self.app.config.get('BOT_COMMAND_TIMEOUT', DEFAULT_COMMAND_TIMEOUT)
+            BotCommand.query.filter(
+                BotCommand.status == 'pending',
+                BotCommand.created_at < now - timedelta(seconds=timeout),
+            ).update({'status': 'failed', 'message': 'Expired before the runner picked it up',
+                      'processed_at': now}, synchronize_session=False)
+
+            pending = BotCommand.query.filter_by(status='pending').order_by(
+                BotCommand.id).limit(50).all()
+            # Each command is handled by the runner leasing the agent, or by
+            # the one the agent hashes to if nobody leases it
+            live = self.leases.live_runners(now) if pending else []
+            ids = [c.id for c in pending if self._handles(c.agent_id, live, now)]
+            db.session.commit()
+
+        done = 0
+        for cmd_id in ids:
+            if self._execute(cmd_id):
+                done += 1
+        return done
+
+    def _handles(self, agent_id: int, live: list, now) -> bool:
+        holder = self.leases.holder(agent_id, now)
+        if holder:
+            return holder == self.runner_id
+        return self.leases.owner(agent_id, live or [self.runner_id]) == self.runner_id
+
+    def _execute(self, cmd_id: int) -> bool:
+        with self.app.app_context():
+            cmd = db.session.get(BotCommand, cmd_id)
+            action, agent_id = cmd.action, cmd.agent_id
+            # Starting needs the lease; if another runner got it first the
+            # command stays pending for that runner
+            if action in ('start', 'restart') and not self.leases.claim(agent_id):
+                return False
+            # Claim: the web side may have timed the command out meanwhile
+            claimed = BotCommand.query.filter_by(id=cmd_id, status='pending').update(
+                {'status': 'running', 'runner_id': self.runner_id})
+            db.session.commit()
+            if not claimed:
+                return False
+
+        try:
+            if action not in ACTIONS:
+                raise ValueError(f"Unknown action: {action}")
+            success, message = getattr(self.manager, f'{action}_bot')(agent_id)
+        except Exception as e:
+            success, message = False, f"Runner error: {e}"
+        print(f"[BotRunner] {action} agent {agent_id}: {message}")
+
+        with self.app.app_context():
+            if action in ('start', 'restart') and success:
+                self._held.add(agent_id)
+            elif action == 'stop' or (action in ('start', 'restart')
+                                      and agent_id not in self.manager._bots):
+                self.leases.release([agent_id])
+                self._held.discard(agent_id)
+            BotCommand.query.filter_by(id=cmd_id).update({
+                'status': 'done' if success else 'failed',
+                'message': message,
+                'processed_at': datetime.now(timezone.utc),
+            })
+            db.session.commit()
+        # Reflect the change right away instead of on the next status tick
+        self.publish_status()
+        return True
+
+    # ─── Status ──────────────────────────────────────────────
+
+    def publish_status(self):
+        """Write a snapshot of every in-memory bot plus this runner's heartbeat."""
+        now = datetime.now(timezone.utc)
+        self._last_status = time.monotonic()
+        with self.app.app_context():
+            agent_ids = []
+            for agent_id, bot in list(self.manager._bots.items()):
+                thread = self.manager._threads.get(agent_id)
+                row = db.session.get(BotRuntime, agent_id) or BotRuntime(agent_id=agent_id)
+                row.runner_id = self.runner_id
+                row.is_running = bot.is_running
+                row.thread_alive = bool(thread and thread.is_alive())
+                row.positions = len(bot.positions)
+                row.scan_count = bot.scan_count
+                row.activity_log = json.dumps(list(bot.activity_log), default=str)
+                row.last_scan_result = json.dumps(bot.last_scan_result, default=str)
+                row.updated_at = now
+                db.session.add(row)
+                agent_ids.append(agent_id)
+
+            # Bots this runner no longer holds
+            stale = BotRuntime.query.filter(BotRuntime.runner_id == self.runner_id)
+            if agent_ids:
+                stale = stale.filter(BotRuntime.agent_id.notin_(agent_ids))
+            stale.delete(synchronize_session=False)
+
+            node = db.session.get(BotRunnerNode, self.runner_id)
+            if node is None:
+                node = BotRunnerNode(runner_id=self.runner_id,
+                                     hostname=socket.gethostname(),
+                                     pid=os.getpid(), started_at=now)
+                db.session.add(node)
+            node.bots = len(agent_ids)
+            node.market_data = json.dumps(shared_data_stats())
+            node.heartbeat_at = now
+            db.session.commit()
+
+    # ─── Shard ───────────────────────────────────────────────
+
+    def rebalance(self):
+        """Renew our leases, hand over / claim agents per the live runner set.
+
+        Run right after publish_status() so our own heartbeat is fresh.
+        """
+        now = datetime.now(timezone.utc)
+        with self.app.app_context():
+            live = self.leases.live_runners(now)
+            if self.runner_id not in live:
+                live.append(self.runner_id)
+            statuses = dict(db.session.query(BotState.agent_id, BotState.status).filter(
+                BotState.status.in_(['running', 'paused', 'error'])).all())
+            held = self.leases.held()
+            self.leases.prune_runners(now)
+            db.session.commit()
+
+        local = set(self.manager._bots)
+        mine = {a for a in statuses if self.leases.owner(a, live) == self.runner_id}
+        give_up = {a for a in held
+                   if a not in mine
+                   or a not in statuses
+                   # error without a thread: watchdog gave up (crash loop)
+                   or (statuses[a] == 'error' and a not in local)}
+        # Fencing: our lease was taken over while we were stalled
+        lost = local - held
+
+        hand_over = (give_up | lost) & local - set(self.manager._detaching)
+        if hand_over:
+            print(f"[BotRunner] Handing over agents {sorted(hand_over)}")
+            self.manager.detach_bots(list(hand_over))
+        else:
+            self.manager.reap_detached()
+        # A handed-over bot whose thread is still finishing a scan keeps its
+        # lease until the thread exits, so nobody else starts it meanwhile
+        stopping = set(self.manager._detaching)
+        with self.app.app_context():
+            self.leases.release(give_up - stopping)
+            self._held = self.leases.renew((held - give_up) | (held & stopping), now)
+
+        for agent_id in sorted(mine - self._held):
+            if statuses[agent_id] == 'error' or agent_id in stopping:
+                continue
+            self._take_over(agent_id, statuses[agent_id])
+
+    def _take_over(self, agent_id: int, status: str):
+        with self.app.app_context():
+            if not self.leases.claim(agent_id):
+                return      # previous owner still holds it; retry next tick
+        success, message = self.manager.start_bot(agent_id, paused=status == 'paused')
+        print(f"[BotRunner] Claimed agent {agent_id}: {message}")
+        with self.app.app_context():
+            if not success:
+                self.leases.release([agent_id])
+                state = BotState.query.filter_by(agent_id=agent_id).first()
+                if state:
+                    state.status = 'error'
+                    state.last_error = f"Start on {self.runner_id} failed: {message}"
+                    state.error_count = (state.error_count or 0) + 1
+                    db.session.commit()
+                return
+        self._held.add(agent_id)
+
+    def _clear_status(self):
+        with self.app.app_context():
+            self.leases.release()
+            BotRuntime.query.filter_by(runner_id=self.runner_id).delete()
+            BotRunnerNode.query.filter_by(runner_id=self.runner_id).delete()
+            db.session.commit()
+
+    # ─── Lifecycle ───────────────────────────────────────────
+
+    def run(self):
+        """Main loop; returns after stop() / SIGTERM / SIGINT."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self.stop())
+            signal.signal(signal.SIGINT, lambda *_: self.stop())
+
+        print(f"[BotRunner] {self.runner_id} started "
+              f"(poll {self.poll_interval}s, status {self.status_interval}s)")
+        self.manager.start_watchdog()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    self.process_commands()
+                    if time.monotonic() - self._last_status >= self.status_interval:
+                        self.publish_status()
+                        self.rebalance()
+                except Exception as e:
+                    print(f"[BotRunner] Loop error: {e}")
+                    with self.app.app_context():
+                        db.session.rollback()
+                self._stop_event.wait(self.poll_interval)
+        finally:
+            print(f"[BotRunner] {self.runner_id} shutting down "
+                  f"({len(self.manager._bots)} bots)")
+            self.manager.stop_watchdog()
+            self.manager.shutdown()
+            try:
+                self._clear_status()
+            except Exception as e:
+                print(f"[BotRunner] Could not clear status rows: {e}")
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,241 @@
+"""Exchange Pool - Process-wide ccxt market metadata and HTTP sessions.
+
+Every OrderExecutor needs its own ccxt client (credentials are per agent),
+but the market metadata is the same for all of them: Binance alone loads
+several thousand spot/linear/inverse markets plus their raw exchangeInfo
+payload, i.e. several REST calls and megabytes per client on its first
+request. The pool loads it once per (exchange, testnet) with a
+credential-less client and injects the same (read-only) dicts into every
+agent's client, whose load_markets() is served from the pool.
+
+Clients created here also share one requests.Session per
+(exchange, testnet), so agents reuse keep-alive connections instead of each
+holding its own connection pool.
+
+Refresh: a snapshot older than MARKETS_TTL is reloaded by the first caller
+that notices, while the others keep using the current one; each client
+picks up the new snapshot on its next ccxt call.
+"""
+import threading
+import time
+from typing import Callable
+
+import ccxt
+import requests
+from requests.adapters import HTTPAdapter
+
+MARKETS_TTL = 3600      # Seconds before market metadata is reloaded
+MARKETS_RETRY = 60      # Seconds between reload attempts after a failure
+HTTP_POOL_SIZE = 32     # Keep-alive connections per (exchange, testnet)
+
+# ccxt client attributes filled by load_markets()
+MARKET_ATTRS = ('markets', 'markets_by_id', 'symbols', 'ids', 'currencies',
+                'currencies_by_id', 'codes', 'baseCurrencies', 'quoteCurrencies')
+
+
+class _PooledMarkets:
+    """ccxt client mixin: load_markets() served from the ExchangePool.
+
+    The HTTP session belongs to the pool: ccxt's Exchange.__del__ would
+    close it (flushing every agent's keep-alive connections) whenever a
+    stopped bot's client is collected, so pooled clients never close it.
+    """
+
+    _pool = None
+    _pool_key = None
+    _pool_version = None
+
+    def load_markets(self, reload=False, params={}):
+        return self._pool.load_markets(self, reload=reload)
+
+    def close(self):
+        self.session = None
+
+    def __del__(self):
+        self.session = None
+
+
+class _Snapshot:
+    """Market metadata of one (exchange, testnet) key."""
+
+    __slots__ = ('data', 'loaded_at', 'failed_at', 'lock')
+
+    def __init__(self):
+        self.data = None        # (version, {attr: value}), swapped atomically
+        self.loaded_at = 0.0
+        self.failed_at = 0.0
+        self.lock = threading.Lock()
+
+
+class ExchangePool:
+    """Shared ccxt market metadata and HTTP sessions for all OrderExecutors."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, loader: Callable = None, ttl: float = MARKETS_TTL,
+                 retry: float = MARKETS_RETRY, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            loader: (exchange_name, is_testnet, session) -> {attr: value},
+                defaults to loading markets with a credential-less ccxt client
+            ttl: Max age (seconds) of market metadata before reload
+            retry: Min seconds between reloads after a failure (or forced reload)
+            clock: Time source (injectable for tests)
+        """
+        self._loader = loader or _load_markets
+        self.ttl = ttl
+        self.retry = retry
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._snapshots = {}    # (exchange, testnet) -> _Snapshot
+        self._sessions = {}     # (exchange, testnet) -> requests.Session
+        self._classes = {}      # exchange -> pooled ccxt client class
+        self._stats = {
+            'clients': 0,
+            'market_loads': 0,
+            'market_load_errors': 0,
+            'market_injections': 0,
+        }
+
+    @classmethod
+    def get_instance(cls) -> 'ExchangePool':
+        """Get or create the process-wide pool."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    # ─── Clients ────────────────────────────────────────────
+
+    def session(self, exchange_name: str, is_testnet: bool = False) -> requests.Session:
+        """Shared HTTP session for one (exchange, testnet) key."""
+        key = (exchange_name, bool(is_testnet))
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.trust_env = False   # ccxt's default for its own sessions
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[key] = session
+            return session
+
+    def create_client(self, exchange_name: str, config: dict, is_testnet: bool = False):
+        """New ccxt client for one agent, wired to the shared session and markets.
+
+        Sandbox mode is still set by the caller (set_sandbox_mode), exactly
+        as for a plain ccxt client; is_testnet selects the matching markets.
+        """
+        key = (exchange_name, bool(is_testnet))
+        with self._lock:
+            cls = self._classes.get(exchange_name)
+            if cls is None:
+                base = getattr(ccxt, exchange_name)
+                cls = self._classes[exchange_name] = type(
+                    f'Pooled{base.__name__}', (_PooledMarkets, base), {})
+            self._stats['clients'] += 1
+
+        client = cls({**config, 'session': self.session(*key)})
+        client._pool = self
+        client._pool_key = key
+        return client
+
+    # ─── Markets ────────────────────────────────────────────
+
+    def load_markets(self, client, reload: bool = False) -> dict:
+        """Inject the current snapshot into `client` (ccxt load_markets hook)."""
+        version, attrs = self._current(client._pool_key, reload)
+        if client._pool_version != version:
+            for attr, value in attrs.items():
+                setattr(client, attr, value)
+            client._pool_version = version
+            self._bump('market_injections')
+        return client.markets
+
+    def _current(self, key: tuple, reload: bool) -> tuple:
+        with self._lock:
+            snap = self._snapshots.get(key)
+            if snap is None:
+                snap = self._snapshots[key] = _Snapshot()
+
+        if snap.data is None:
+            # First use: everyone waits for the one load (errors propagate
+            # to the ccxt call, as with a plain client)
+            with snap.lock:
+                if snap.data is None:
+                    self._load(snap, key)
+            return snap.data
+
+        age = self._clock() - snap.loaded_at
+        due = age >= self.ttl or (reload and age >= self.retry)
+        if due and self._clock() - snap.failed_at >= self.retry \
+                and snap.lock.acquire(blocking=False):
+            # One thread reloads; the others keep the current snapshot
+            try:
+                self._load(snap, key)
+            except Exception as e:
+                snap.failed_at = self._clock()
+                print(f"[ExchangePool] Market reload failed {key}: {e}")
+            finally:
+                snap.lock.release()
+        return snap.data
+
+    def _load(self, snap: _Snapshot, key: tuple):
+        try:
+            attrs = self._loader(key[0], key[1], self.session(*key))
+        except Exception:
+            self._bump('market_load_errors')
+            raise
+        version = snap.data[0] + 1 if snap.data else 1
+        snap.data = (version, attrs)
+        snap.loaded_at = self._clock()
+        self._bump('market_loads')
+
+    # ─── Metrics ────────────────────────────────────────────
+
+    def _bump(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_stats(self) -> dict:
+        """Counters plus per-key market count and snapshot age."""
+        with self._lock:
+            stats = dict(self._stats)
+            snapshots = dict(self._snapshots)
+        now = self._clock()
+        stats['markets'] = {
+            f"{ex}{':testnet' if testnet else ''}": {
+                'markets': len(snap.data[1].get('markets') or {}),
+                'version': snap.data[0],
+                'age': round(now - snap.loaded_at, 1),
+            }
+            for (ex, testnet), snap in snapshots.items() if snap.data
+        }
+        return stats
+
+    def clear(self):
+        """Drop snapshots and reset counters (sessions and classes are kept)."""
+        with self._lock:
+            self._snapshots.clear()
+            for k in self._stats:
+                self._stats[k] = 0
+
+
+def _load_markets(exchange_name: str, is_testnet: bool, session) -> dict:
+    """Load market metadata with a credential-less client."""
+    from .order_executor import EXCHANGE_OPTIONS
+    client = getattr(ccxt, exchange_name)({
+        'enableRateLimit': True,
+        'session': session,
+        'options': {'defaultType': EXCHANGE_OPTIONS[exchange_name]['defaultType']},
+    })
+    if is_testnet:
+        client.set_sandbox_mode(True)
+    try:
+        client.load_markets()
+        return {attr: getattr(client, attr) for attr in MARKET_ATTRS}
+    finally:
+        client.session = None   # shared: keep ccxt's __del__ from closing it
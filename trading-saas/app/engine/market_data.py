@@ -0,0 +1,369 @@
+"""Market Data Hub - Process-wide shared kline/price cache.
+
+Every AgentBot thread scans the same DEFAULT_WATCHLIST, so without sharing
+N agents cost N identical REST requests per symbol per scan. The hub keeps
+one candle store per (exchange, symbol, interval) and at most one in-flight
+fetch per key; every other thread asking for the same key waits for that
+fetch and reads the shared result.
+
+Freshness rules:
+- A stored series is served while the last (forming) bar has not closed
+  and the data is younger than KLINE_TTL seconds.
+- When stale, only the bars since the last stored bar are refetched and
+  merged by bar open time (per-bar deduplication); a full fetch is only
+  needed on first use, on gaps, or when a caller asks for more history.
+- Last prices come from a per-exchange price book filled by one bulk
+  ticker call every PRICE_TTL seconds, so checking N positions costs one
+  request. If a refresh fails the previous book is served for up to
+  PRICE_BOOK_MAX_AGE seconds; symbols missing from the book (or no book at
+  all) fall back to a single-symbol fetch.
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+# Cache constants
+KLINE_TTL = 15          # Seconds a forming bar may be reused (< bot scan interval)
+PRICE_TTL = 3           # Seconds a last price / price book may be reused
+PRICE_BOOK_MAX_AGE = 30 # Seconds a book may be served after failed refreshes
+MAX_STORED_BARS = 1000  # Hard cap per (exchange, symbol, interval) series
+
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000,
+    '30m': 1_800_000, '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000,
+    '6h': 21_600_000, '8h': 28_800_000, '12h': 43_200_000,
+    '1d': 86_400_000, '1w': 604_800_000,
+}
+
+
+class _Series:
+    """Stored candles for one (exchange, symbol, interval) key."""
+
+    __slots__ = ('candles', 'depth', 'fetched_at', 'lock')
+
+    def __init__(self):
+        self.candles = []       # chronological candle dicts
+        self.depth = 0          # largest limit a full fetch has satisfied
+        self.fetched_at = 0.0   # time.time() of last successful fetch
+        self.lock = threading.Lock()
+
+
+class _PriceBook:
+    """Last prices of every symbol on one exchange, from one bulk call."""
+
+    __slots__ = ('prices', 'fetched_at', 'failed_at', 'lock')
+
+    def __init__(self):
+        self.prices = {}        # exchange symbol (e.g. 'BTCUSDT') -> price
+        self.fetched_at = 0.0
+        self.failed_at = 0.0    # last failed refresh (retry after price_ttl)
+        self.lock = threading.Lock()
+
+
+class MarketDataHub:
+    """Shared, thread-safe kline and price cache for all bots in a process."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, fetch_klines: Callable = None, fetch_price: Callable = None,
+                 fetch_prices: Callable = None,
+                 kline_ttl: float = KLINE_TTL, price_ttl: float = PRICE_TTL,
+                 price_book_max_age: float = PRICE_BOOK_MAX_AGE,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            fetch_klines: Raw REST fetcher, defaults to signal_analyzer.fetch_klines
+            fetch_price: Raw REST fetcher, defaults to signal_analyzer.fetch_price
+            fetch_prices: Bulk ticker fetcher, defaults to signal_analyzer.fetch_all_prices
+            kline_ttl: Max age (seconds) of a forming bar before refetch
+            price_ttl: Max age (seconds) of a cached last price or price book
+            price_book_max_age: Max age (seconds) of a book served after failed refreshes
+            clock: Time source (injectable for tests)
+        """
+        self._fetch_klines = fetch_klines
+        self._fetch_price = fetch_price
+        self._fetch_prices = fetch_prices
+        self.kline_ttl = kline_ttl
+        self.price_ttl = price_ttl
+        self.price_book_max_age = price_book_max_age
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._series = {}   # (exchange, symbol, interval) -> _Series
+        self._prices = {}   # (exchange, symbol) -> (price, fetched_at)
+        self._price_locks = {}
+        self._books = {}    # exchange -> _PriceBook
+        self._stats = {
+            'kline_requests': 0,
+            'kline_hits': 0,
+            'kline_coalesced': 0,
+            'kline_full_fetches': 0,
+            'kline_incremental_fetches': 0,
+            'kline_errors': 0,
+            'price_requests': 0,
+            'price_hits': 0,
+            'price_fetches': 0,
+            'price_errors': 0,
+            'book_requests': 0,
+            'book_hits': 0,
+            'book_fetches': 0,
+            'book_errors': 0,
+            'book_stale_served': 0,
+            'book_fallbacks': 0,
+        }
+
+    @classmethod
+    def get_instance(cls) -> 'MarketDataHub':
+        """Get or create the process-wide hub."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    # ─── Klines ─────────────────────────────────────────────
+
+    def get_klines(self, symbol: str, interval: str = '1h', limit: int = 100,
+                   exchange: str = 'binance') -> Optional[list]:
+        """Return the latest `limit` candles, fetching only when stale.
+
+        Same shape as signal_analyzer.fetch_klines. Callers must treat the
+        returned candle dicts as read-only (they are shared across threads).
+        """
+        key = (exchange, symbol, interval)
+        with self._lock:
+            self._stats['kline_requests'] += 1
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+
+        if self._is_fresh(series, interval, limit):
+            self._bump('kline_hits')
+            return series.candles[-limit:]
+
+        with series.lock:
+            # Another thread may have refreshed while we waited for the lock
+            if self._is_fresh(series, interval, limit):
+                self._bump('kline_coalesced')
+                return series.candles[-limit:]
+
+            candles = self._refresh(series, symbol, interval, limit, exchange)
+            if candles is None:
+                self._bump('kline_errors')
+                return None
+            return candles[-limit:]
+
+    def _is_fresh(self, series: _Series, interval: str, limit: int) -> bool:
+        candles = series.candles
+        if not candles or limit > series.depth:
+            return False
+        now = self._clock()
+        if now - series.fetched_at >= self.kline_ttl:
+            return False
+        bar_close_ms = candles[-1]['time'] + INTERVAL_MS.get(interval, 0)
+        return now * 1000 < bar_close_ms
+
+    def _refresh(self, series: _Series, symbol: str, interval: str,
+                 limit: int, exchange: str) -> Optional[list]:
+        """Refetch missing bars (or the full window) and merge into the store."""
+        fetch = self._fetch_klines or _default_fetch_klines
+        stored = series.candles
+        interval_ms = INTERVAL_MS.get(interval)
+        now = self._clock()
+
+        merged = None
+        if stored and interval_ms and limit <= series.depth:
+            last_open = stored[-1]['time']
+            # Bars opened since the last stored bar, plus that bar itself
+            needed = int((now * 1000 - last_open) // interval_ms) + 2
+            if needed < limit:
+                fresh = fetch(symbol, interval, max(needed, 2), exchange=exchange)
+                if fresh:
+                    merged = _merge_candles(stored, fresh)
+                    if merged is not None:
+                        self._bump('kline_incremental_fetches')
+
+        if merged is None:
+            fresh = fetch(symbol, interval, limit, exchange=exchange)
+            if not fresh:
+                return None
+            self._bump('kline_full_fetches')
+            merged = _merge_candles(stored, fresh) or list(fresh)
+            series.depth = max(series.depth, limit)
+
+        keep = min(max(limit, len(stored)), MAX_STORED_BARS)
+        series.candles = merged[-keep:]
+        series.fetched_at = now
+        return series.candles
+
+    def series_version(self, symbol: str, interval: str = '1h',
+                       exchange: str = 'binance') -> Optional[tuple]:
+        """(last bar open time, fetch time) of a stored series, None if empty.
+
+        Changes whenever get_klines refetches, i.e. on bar close and on each
+        forming-bar refresh; results derived from the series stay valid
+        while it is unchanged.
+        """
+        with self._lock:
+            series = self._series.get((exchange, symbol, interval))
+        if series is None or not series.candles:
+            return None
+        return series.candles[-1]['time'], series.fetched_at
+
+    # ─── Prices ─────────────────────────────────────────────
+
+    def get_price(self, symbol: str, exchange: str = 'binance') -> Optional[float]:
+        """Return the last price, shared across callers for PRICE_TTL seconds."""
+        key = (exchange, symbol)
+        with self._lock:
+            self._stats['price_requests'] += 1
+            cached = self._prices.get(key)
+            lock = self._price_locks.setdefault(key, threading.Lock())
+
+        if cached and self._clock() - cached[1] < self.price_ttl:
+            self._bump('price_hits')
+            return cached[0]
+
+        with lock:
+            cached = self._prices.get(key)
+            if cached and self._clock() - cached[1] < self.price_ttl:
+                self._bump('price_hits')
+                return cached[0]
+
+            fetch = self._fetch_price or _default_fetch_price
+            price = fetch(symbol, exchange=exchange)
+            if price is None:
+                self._bump('price_errors')
+                return None
+            self._bump('price_fetches')
+            with self._lock:
+                self._prices[key] = (price, self._clock())
+            return price
+
+    def get_price_book(self, exchange: str = 'binance') -> tuple:
+        """(prices by exchange symbol, age in seconds) for one exchange.
+
+        One bulk ticker call refreshes the book at most every price_ttl
+        seconds, with a single fetch in flight per exchange. Returns
+        ({}, None) when no book younger than price_book_max_age exists.
+        The returned dict is shared: treat it as read-only.
+        """
+        with self._lock:
+            self._stats['book_requests'] += 1
+            book = self._books.get(exchange)
+            if book is None:
+                book = self._books[exchange] = _PriceBook()
+
+        if book.prices and self._clock() - book.fetched_at < self.price_ttl:
+            self._bump('book_hits')
+            return book.prices, self._clock() - book.fetched_at
+
+        with book.lock:
+            now = self._clock()
+            if book.prices and now - book.fetched_at < self.price_ttl:
+                self._bump('book_hits')
+                return book.prices, now - book.fetched_at
+
+            # Do not hammer a failing endpoint: retry once per price_ttl
+            if now - book.failed_at >= self.price_ttl:
+                fetch = self._fetch_prices or _default_fetch_prices
+                prices = fetch(exchange=exchange)
+                if prices:
+                    book.prices, book.fetched_at = prices, now
+                    self._bump('book_fetches')
+                    return prices, 0.0
+                book.failed_at = now
+                self._bump('book_errors')
+
+            age = now - book.fetched_at
+            if book.prices and age < self.price_book_max_age:
+                self._bump('book_stale_served')
+                return book.prices, age
+            return {}, None
+
+    def get_book_price(self, symbol: str, exchange: str = 'binance',
+                       fallback: bool = True) -> Optional[float]:
+        """Last price of `symbol` from the price book.
+
+        Falls back to get_price (single-symbol fetch) when the symbol is not
+        in the book or no usable book exists, unless fallback is False.
+        """
+        from .signal_analyzer import exchange_symbol
+        prices, _ = self.get_price_book(exchange)
+        price = prices.get(exchange_symbol(symbol, exchange))
+        if price is not None or not fallback:
+            return price
+        self._bump('book_fallbacks')
+        return self.get_price(symbol, exchange=exchange)
+
+    # ─── Metrics ────────────────────────────────────────────
+
+    def _bump(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_stats(self) -> dict:
+        """Counters plus hit rates (served from cache / total requests)."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['kline_keys'] = len(self._series)
+            stats['price_keys'] = len(self._prices)
+            now = self._clock()
+            stats['price_book_age'] = {
+                ex: round(now - b.fetched_at, 1)
+                for ex, b in self._books.items() if b.fetched_at
+            }
+
+        kline_served = stats['kline_hits'] + stats['kline_coalesced']
+        stats['kline_hit_rate'] = round(
+            kline_served / stats['kline_requests'], 4
+        ) if stats['kline_requests'] else 0.0
+        stats['price_hit_rate'] = round(
+            stats['price_hits'] / stats['price_requests'], 4
+        ) if stats['price_requests'] else 0.0
+        stats['book_hit_rate'] = round(
+            stats['book_hits'] / stats['book_requests'], 4
+        ) if stats['book_requests'] else 0.0
+        return stats
+
+    def clear(self):
+        """Drop all cached data and reset counters."""
+        with self._lock:
+            self._series.clear()
+            self._prices.clear()
+            self._price_locks.clear()
+            self._books.clear()
+            for k in self._stats:
+                self._stats[k] = 0
+
+
+def _merge_candles(stored: list, fresh: list) -> Optional[list]:
+    """Merge fresh candles into stored ones keyed by bar open time.
+
+    Fresh bars replace stored bars with the same open time. Returns None
+    if the fresh window does not overlap or touch the stored series (gap).
+    """
+    if not stored:
+        return list(fresh)
+    first_new = fresh[0]['time']
+    if first_new > stored[-1]['time'] and len(stored) > 1:
+        step = stored[-1]['time'] - stored[-2]['time']
+        if first_new - stored[-1]['time'] > step:
+            return None
+    head = [c for c in stored if c['time'] < first_new]
+    return head + list(fresh)
+
+
+def _default_fetch_klines(symbol, interval, limit, exchange='binance'):
+    from . import signal_analyzer
+    return signal_analyzer.fetch_klines(symbol, interval, limit, exchange=exchange)
+
+
+def _default_fetch_price(symbol, exchange='binance'):
+    from . import signal_analyzer
+    return signal_analyzer.fetch_price(symbol, exchange=exchange)
+
+
+def _default_fetch_prices(exchange='binance'):
+    from . import signal_analyzer
+    return signal_analyzer.fetch_all_prices(exchange=exchange)
@@ -1,12 +1,15 @@
 """Order Executor - Futures trading via ccxt (Binance / Bitget).
 
 Handles order creation, position closing, and exchange API interactions.
-Each AgentBot gets its own OrderExecutor with isolated API credentials.
+Each AgentBot gets its own OrderExecutor with isolated API credentials;
+market metadata and HTTP connections are shared through ExchangePool.
 """
 import time
 import ccxt
 from typing import Optional
 
+from .exchange_pool import ExchangePool
+
 EXCHANGE_OPTIONS = {
     'binance': {'defaultType': 'future'},
     'bitget':  {'defaultType': 'swap'},
@@ -45,7 +48,8 @@ class OrderExecutor:
         if is_testnet:
             config['sandbox'] = True
 
-        self.exchange = getattr(ccxt, exchange_name)(config)
+        self.exchange = ExchangePool.get_instance().create_client(
+            exchange_name, config, is_testnet=is_testnet)
 
         if is_testnet:
             self.exchange.set_sandbox_mode(True)
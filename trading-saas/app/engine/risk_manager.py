@@ -2,6 +2,8 @@
 
 Extracted from paper_trader.py's check_risk_level() and calculate_risk_metrics().
 Uses SQLAlchemy models to read trade data instead of raw SQLite.
+Closed-trade state (capital walk, loss streak, daily/weekly PnL) comes from
+the incrementally maintained agent_stats row, not a scan of all trades.
 """
 import requests as _requests
 from datetime import datetime, timezone
@@ -10,8 +12,8 @@ from typing import Optional
 from flask import current_app
 
 from ..extensions import db
-from ..models.trade import Trade
 from ..models.bot_state import BotState
+from ..services.stats_service import get_agent_stats, replay_agent_stats, week_start
 
 
 class RiskManager:
@@ -48,45 +50,17 @@ class RiskManager:
         Returns:
             Dict with all risk metrics
         """
-        # 1. Calculate max & current drawdown from closed trades
-        closed_trades = (
-            Trade.query
-            .filter_by(agent_id=self.agent_id, status='CLOSED')
-            .order_by(Trade.exit_time)
-            .all()
-        )
-
-        peak_capital = self.initial_capital
-        cumulative_capital = self.initial_capital
-        max_drawdown = 0.0
-
-        for trade in closed_trades:
-            pnl = float(trade.pnl) if trade.pnl else 0
-            cumulative_capital += pnl
-            if cumulative_capital > peak_capital:
-                peak_capital = cumulative_capital
-            dd_pct = ((peak_capital - cumulative_capital) / peak_capital * 100
-                      if peak_capital > 0 else 0)
-            max_drawdown = max(max_drawdown, dd_pct)
-
-        current_capital = cumulative_capital
+        # 1. Max & current drawdown from the closed-trade accumulator
+        stats = self._closed_trade_stats()
+        current_capital = float(stats.equity)
+        peak_capital = float(stats.peak_equity)
+        max_drawdown = float(stats.max_drawdown or 0)
         current_drawdown = ((peak_capital - current_capital) / peak_capital * 100
                             if current_capital < peak_capital and peak_capital > 0 else 0)
 
-        # 2. Consecutive losses
-        recent = (
-            Trade.query
-            .filter_by(agent_id=self.agent_id, status='CLOSED')
-            .order_by(Trade.exit_time.desc())
-            .limit(10)
-            .all()
-        )
-        consecutive_losses = 0
-        for trade in recent:
-            if trade.pnl and float(trade.pnl) < 0:
-                consecutive_losses += 1
-            else:
-                break
+        # 2. Consecutive losses (last 10 closes, newest first)
+        recent = stats.recent_outcomes or ''
+        consecutive_losses = len(recent) - len(recent.lstrip('L'))
 
         # 3. Position concentration
         position_count = len(positions)
@@ -109,15 +83,11 @@ class RiskManager:
             leverages = [p.get('leverage', 1) for p in positions]
             avg_leverage = sum(leverages) / len(leverages)
 
-        # 6. Daily PnL
+        # 6. Daily / weekly PnL (UTC buckets of the latest closes)
         today = datetime.now(timezone.utc).date()
-        daily_trades = (
-            Trade.query
-            .filter_by(agent_id=self.agent_id, status='CLOSED')
-            .filter(db.func.date(Trade.exit_time) == today)
-            .all()
-        )
-        daily_pnl = sum(float(t.pnl) for t in daily_trades if t.pnl)
+        daily_pnl = float(stats.day_pnl or 0) if stats.pnl_day == today else 0
+        weekly_pnl = (float(stats.week_pnl or 0)
+                      if stats.pnl_week == week_start(today) else 0)
 
         # 7. Risk score (0-10) — v5 uses stricter thresholds
         risk_score = 0
@@ -178,7 +148,7 @@ class RiskManager:
         if drawdown_breach:
             # Auto-recovery: if recent 3 trades have ≥2 wins, reset peak
             # to current capital (accept loss, resume trading)
-            recent_wins = sum(1 for t in recent[:3] if t.pnl and float(t.pnl) > 0)
+            recent_wins = recent[:3].count('W')
             if recent_wins >= 2 and len(recent) >= 3:
                 # Reset peak to current capital — drawdown restarts from here
                 peak_capital = current_capital
@@ -202,11 +172,23 @@ class RiskManager:
             'short_ratio': short_ratio,
             'avg_leverage': avg_leverage,
             'daily_pnl': daily_pnl,
+            'weekly_pnl': weekly_pnl,
             'daily_loss_breach': daily_loss_breach,
             'drawdown_breach': drawdown_breach,
             'position_count': position_count,
         }
 
+    def _closed_trade_stats(self):
+        """Closed-trade totals walked from this manager's initial_capital.
+
+        Normally the persisted agent_stats row (updated on every close); a
+        config whose capital differs from the stored one gets a one-off replay.
+        """
+        stats = get_agent_stats(self.agent_id)
+        if float(stats.initial_capital) != self.initial_capital:
+            stats = replay_agent_stats(self.agent_id, self.initial_capital)
+        return stats
+
     def get_risk_level(self, risk_score: int) -> tuple:
         """Determine risk level and position multiplier.
 
@@ -344,6 +344,43 @@ def fetch_price(symbol: str, timeout: int = 5,
         return None
 
 
+def fetch_all_prices(timeout: int = 5, exchange: str = 'binance') -> Optional[dict]:
+    """Fetch every futures last price in one call.
+
+    Returns {exchange symbol: price} (e.g. 'BTCUSDT'), or None on failure.
+    """
+    try:
+        api = EXCHANGE_API.get(exchange, EXCHANGE_API['binance'])
+        if exchange == 'bitget':
+            resp = requests.get(
+                f"{api['base']}{api['price']}",
+                params={'productType': 'USDT-FUTURES'},
+                timeout=timeout,
+            )
+            resp.raise_for_status()
+            data = resp.json().get('data', [])
+            return {item['symbol'].upper(): float(item['lastPr']) for item in data}
+        else:
+            resp = requests.get(f"{api['base']}{api['price']}", timeout=timeout)
+            resp.raise_for_status()
+            return {item['symbol']: float(item['price']) for item in resp.json()}
+    except Exception as e:
+        print(f"[SignalAnalyzer] fetch_all_prices ({exchange}) failed: {e}")
+        return None
+
+
+def get_klines(symbol: str, interval: str = '1h', limit: int = 100,
+               exchange: str = 'binance') -> Optional[list]:
+    """Fetch klines through the process-wide MarketDataHub.
+
+    All analyze_signal* variants read from here so that concurrent agents
+    scanning the same symbol share one REST request per bar.
+    """
+    from .market_data import MarketDataHub
+    return MarketDataHub.get_instance().get_klines(
+        symbol, interval, limit, exchange=exchange)
+
+
 def get_btc_trend(timeout: int = 10) -> dict:
     """Get BTC market trend direction and strength.
 
@@ -357,7 +394,7 @@ def get_btc_trend(timeout: int = 10) -> dict:
             return _btc_trend_cache['data']
 
     try:
-        candles = fetch_klines('BTC/USDT', '1h', 60, timeout=timeout)
+        candles = get_klines('BTC/USDT', '1h', 60)
         if not candles or len(candles) < 50:
             return {'direction': 'neutral', 'strength': 0, 'price': 0, 'ma50': 0}
 
@@ -412,7 +449,7 @@ def analyze_signal(symbol: str, config: dict, exchange: str = 'binance') -> tupl
         (score: int, analysis: dict | None)
     """
     try:
-        klines = fetch_klines(symbol, '1h', 100, exchange=exchange)
+        klines = get_klines(symbol, '1h', 100, exchange=exchange)
         if not klines or len(klines) < 50:
             return 0, None
 
@@ -665,7 +702,7 @@ def analyze_signal_v6(symbol: str, config: dict, exchange: str = 'binance') -> t
     Matches paper_trader auto_trader_v6.py and backtest_engine analyze_signal_v6b().
     """
     try:
-        klines = fetch_klines(symbol, '1h', 100, exchange=exchange)
+        klines = get_klines(symbol, '1h', 100, exchange=exchange)
         if not klines or len(klines) < 50:
             return 0, None
 
@@ -842,7 +879,7 @@ def analyze_signal_v5(symbol: str, config: dict, exchange: str = 'binance') -> t
     Returns: (score: int, analysis: dict | None)
     """
     try:
-        klines = fetch_klines(symbol, '1h', 100, exchange=exchange)
+        klines = get_klines(symbol, '1h', 100, exchange=exchange)
         if not klines or len(klines) < 50:
             return 0, None
 
@@ -1226,7 +1263,7 @@ def analyze_signal_v8(symbol: str, config: dict, exchange: str = 'binance') -> t
     Returns: (score: int, analysis: dict | None)
     """
     try:
-        klines = fetch_klines(symbol, '1h', 100, exchange=exchange)
+        klines = get_klines(symbol, '1h', 100, exchange=exchange)
         if not klines or len(klines) < 50:
             return 0, None
 
@@ -1596,7 +1633,7 @@ def analyze_signal_v9(symbol: str, config: dict, exchange: str = 'binance') -> t
         current_price = v6_analysis['price']
 
         # Step 2: V8 ATR Dual Trail (soft confirmation)
-        klines = fetch_klines(symbol, '1h', 100, exchange=exchange)
+        klines = get_klines(symbol, '1h', 100, exchange=exchange)
         if not klines or len(klines) < 50:
             return v6_score, v6_analysis  # fallback to pure V6
 
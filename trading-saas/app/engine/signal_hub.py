@@ -0,0 +1,206 @@
+"""Signal Hub - compute each signal once per agent group, not once per agent.
+
+Most agents run the same strategy_version with the same analysis settings,
+so without sharing N agents run N identical analyze_signal* calls per
+symbol per scan. Agents are grouped by (strategy family, hash of the config
+keys the analyzer reads); the hub keeps one (score, analysis) per
+(group, exchange, symbol) and at most one computation in flight per key.
+
+A cached result is reused while its inputs are unchanged: the symbol's 1h
+series in MarketDataHub (new bar or forming-bar refresh, see
+series_version) and the BTC trend cache. Each agent then applies its own
+position / cooldown / score / risk filters to the shared result.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from . import signal_analyzer as sa
+from .market_data import MarketDataHub
+
+SIGNAL_INTERVAL = '1h'      # series every analyze_signal* variant reads
+SIGNAL_LIMIT = 100
+
+# Config keys each analyzer reads (and its defaults). Everything else in an
+# agent's config (sizing, stops, cooldowns, max_positions, ...) is applied
+# per agent after analysis and must not split groups.
+ANALYSIS_CONFIG_KEYS = {
+    'v4': ('enable_btc_filter', 'enable_trend_filter', 'short_bias'),
+    'v5': ('adx_min_threshold', 'enable_btc_filter', 'short_bias'),
+    'v6': ('short_bias',),
+    'v8': ('short_bias', 'v8_adx_filter', 'v8_fast_atr_factor', 'v8_fast_atr_period',
+           'v8_slow_atr_factor', 'v8_slow_atr_period'),
+    'v9': ('short_bias', 'v8_fast_atr_factor', 'v8_fast_atr_period',
+           'v8_slow_atr_factor', 'v8_slow_atr_period'),
+}
+
+ANALYZERS = {
+    'v4': 'analyze_signal',
+    'v5': 'analyze_signal_v5',
+    'v6': 'analyze_signal_v6',
+    'v8': 'analyze_signal_v8',
+    'v9': 'analyze_signal_v9',
+}
+
+
+def strategy_family(version: str) -> str:
+    """Analyzer family of a strategy_version (same routing AgentBot used)."""
+    version = version or ''
+    for family in ('v9', 'v8', 'v5', 'v6'):
+        if version.startswith(family):
+            return family
+    return 'v4'
+
+
+def analysis_group(version: str, config: dict) -> tuple:
+    """(family, config hash): agents with equal groups get identical signals."""
+    family = strategy_family(version)
+    relevant = {k: config.get(k) for k in ANALYSIS_CONFIG_KEYS[family]}
+    digest = hashlib.sha1(
+        json.dumps(relevant, sort_keys=True, default=str).encode()).hexdigest()[:12]
+    return family, digest
+
+
+class _Entry:
+    __slots__ = ('result', 'lock')
+
+    def __init__(self):
+        self.result = (None, 0, None)   # (version, score, analysis), swapped atomically
+        self.lock = threading.Lock()
+
+    def get(self, version):
+        """Cached (score, analysis copy) for this input version, else None."""
+        cached, score, analysis = self.result
+        if version is None or cached != version:
+            return None
+        return score, dict(analysis) if analysis else None
+
+
+class SignalHub:
+    """Shared, thread-safe cache of analyze_signal* results for all bots."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, market_data: MarketDataHub = None,
+                 analyzers: dict = None, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            market_data: Hub the analyzers read from (default: process hub)
+            analyzers: family -> analyze function (injectable for tests)
+            clock: Time source for the per-minute rates
+        """
+        self._market_data = market_data
+        self._analyzers = analyzers
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}      # (group, exchange, symbol) -> _Entry
+        self._groups = set()
+        self._stats = {'requests': 0, 'hits': 0, 'coalesced': 0,
+                       'computations': 0, 'uncached': 0}
+        self._minutes = deque()  # (second, requests, computations), last 60s
+
+    @classmethod
+    def get_instance(cls) -> 'SignalHub':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _hub(self) -> MarketDataHub:
+        return self._market_data or MarketDataHub.get_instance()
+
+    def _analyzer(self, family: str):
+        if self._analyzers is not None:
+            return self._analyzers[family]
+        return getattr(sa, ANALYZERS[family])
+
+    def _version(self, symbol: str, exchange: str):
+        hub = self._hub()
+        # Bring the series up to date exactly as the analyzer's own read would
+        hub.get_klines(symbol, SIGNAL_INTERVAL, SIGNAL_LIMIT, exchange=exchange)
+        series = hub.series_version(symbol, SIGNAL_INTERVAL, exchange=exchange)
+        if series is None:
+            return None
+        return series, sa._btc_trend_cache['ts']
+
+    def analyze(self, strategy_version: str, symbol: str, config: dict,
+                exchange: str = 'binance') -> tuple:
+        """Drop-in for the per-version analyze_signal* call: (score, analysis).
+
+        The returned analysis is a copy; the cached one is shared.
+        """
+        group = analysis_group(strategy_version, config)
+        key = (group, exchange, symbol)
+        with self._lock:
+            self._count(requests=1)
+            self._groups.add(group)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+
+        version = self._version(symbol, exchange)
+        hit = entry.get(version)
+        if hit is not None:
+            self._bump('hits')
+            return hit
+
+        with entry.lock:
+            # Another agent of the group may have computed it meanwhile
+            hit = entry.get(version)
+            if hit is not None:
+                self._bump('coalesced')
+                return hit
+
+            score, analysis = self._analyzer(group[0])(symbol, config, exchange=exchange)
+            with self._lock:
+                self._count(computations=1)
+                if version is None:
+                    self._stats['uncached'] += 1    # no candles: nothing to key on
+            entry.result = (version, score, analysis)
+        return score, dict(analysis) if analysis else None
+
+    # ─── Metrics ────────────────────────────────────────────
+
+    def _bump(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _count(self, requests: int = 0, computations: int = 0):
+        """Update totals and the 1-second buckets (caller holds _lock)."""
+        self._stats['requests'] += requests
+        self._stats['computations'] += computations
+        now = int(self._clock())
+        if self._minutes and self._minutes[-1][0] == now:
+            sec, r, c = self._minutes[-1]
+            self._minutes[-1] = (sec, r + requests, c + computations)
+        else:
+            self._minutes.append((now, requests, computations))
+        while self._minutes and self._minutes[0][0] <= now - 60:
+            self._minutes.popleft()
+
+    def get_stats(self) -> dict:
+        """Totals plus analyzer calls in the last 60s with and without sharing."""
+        with self._lock:
+            stats = dict(self._stats)
+            cutoff = int(self._clock()) - 60
+            recent = [b for b in self._minutes if b[0] > cutoff]
+            stats['groups'] = len(self._groups)
+            stats['keys'] = len(self._entries)
+        # "before" = one analyzer call per agent request, "after" = actual calls
+        stats['analyzer_calls_per_min_unshared'] = sum(b[1] for b in recent)
+        stats['analyzer_calls_per_min'] = sum(b[2] for b in recent)
+        stats['share_rate'] = round(
+            1 - stats['computations'] / stats['requests'], 4) if stats['requests'] else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+            self._minutes.clear()
+            for k in self._stats:
+                self._stats[k] = 0
@@ -1,51 +1,216 @@
-"""Rate Limiter — uses Redis if available, falls back to in-memory."""
+"""Rate Limiter — uses Redis if available, falls back to in-memory.
+
+Two algorithms, both O(1) state per key:
+
+- ``sliding_window`` (default): counts for the current and previous fixed
+  window; the previous one is weighted by how much of it still overlaps the
+  sliding window. State is ``[window_id, count, prev_count]``.
+- ``token_bucket``: ``max_requests`` tokens refilled evenly over
+  ``window_seconds``, allowing short bursts. State is ``[tokens, updated_at]``.
+
+Redis runs the same math in a Lua script (one round trip, atomic) against a
+single hash per key, through one pooled client per process. If Redis is
+unreachable, requests fall back to the in-process store and Redis is retried
+after ``REDIS_RETRY_SECONDS``.
+"""
+import math
 import time
 import threading
+from collections import OrderedDict
 from functools import wraps
-from collections import defaultdict
 from flask import jsonify, request, current_app
 from flask_jwt_extended import get_jwt_identity
 
+SLIDING_WINDOW = 'sliding_window'
+TOKEN_BUCKET = 'token_bucket'
 
-# In-memory fallback store with lock for thread safety
-_rate_store = defaultdict(list)
+REDIS_RETRY_SECONDS = 30      # skip Redis this long after a failure
+REDIS_SOCKET_TIMEOUT = 0.25
+MAX_MEMORY_KEYS = 100_000     # in-memory store cap (least recently used evicted)
+
+# In-memory fallback store: key -> [expires_at, state], ordered by last use
+_rate_store = OrderedDict()
 _rate_lock = threading.Lock()
-_last_cleanup = 0
 
+_redis = None                 # (url, client, {algorithm: script})
+_redis_lock = threading.Lock()
+_redis_down_until = 0.0
+
+
+# ─── Algorithms (shared by the in-memory path and mirrored in Lua) ──────────
+
+def _sliding_window(state, now, limit, window):
+    """Weighted two-window counter. Returns (allowed, retry_after_seconds)."""
+    w = int(now // window)
+    if state[0] != w:
+        state[2] = state[1] if state[0] == w - 1 else 0
+        state[1] = 0
+        state[0] = w
+    elapsed = now - w * window
+    estimate = state[2] * (window - elapsed) / window + state[1]
+    if estimate >= limit:
+        return False, window - elapsed
+    state[1] += 1
+    return True, 0
+
+
+def _token_bucket(state, now, limit, window):
+    """Token bucket of ``limit`` tokens refilled over ``window`` seconds."""
+    rate = limit / window
+    tokens = min(limit, state[0] + (now - state[1]) * rate)
+    state[1] = now
+    if tokens < 1:
+        state[0] = tokens
+        return False, (1 - tokens) / rate
+    state[0] = tokens - 1
+    return True, 0
+
+
+_ALGORITHMS = {
+    SLIDING_WINDOW: (_sliding_window, lambda now, limit: [None, 0, 0]),
+    TOKEN_BUCKET: (_token_bucket, lambda now, limit: [limit, now]),
+}
+
+_LUA = {
+    SLIDING_WINDOW: """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local w = math.floor(now / window)
+local st = redis.call('HMGET', KEYS[1], 'w', 'c', 'p')
+local sw = tonumber(st[1])
+local c = tonumber(st[2]) or 0
+local p = tonumber(st[3]) or 0
+if sw ~= w then
+    if sw == w - 1 then p = c else p = 0 end
+    c = 0
+end
+local elapsed = now - w * window
+local allowed = 0
+if p * (window - elapsed) / window + c < limit then
+    c = c + 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'w', w, 'c', c, 'p', p)
+redis.call('EXPIRE', KEYS[1], math.ceil(window * 2))
+if allowed == 1 then return {1, '0'} end
+return {0, tostring(window - elapsed)}
+""",
+    TOKEN_BUCKET: """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local rate = limit / window
+local st = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(st[1]) or limit
+local ts = tonumber(st[2]) or now
+tokens = math.min(limit, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(window * 2))
+return {allowed, tostring(retry)}
+""",
+}
+
+
+# ─── Redis ──────────────────────────────────────────────────────────────────
 
 def _get_redis():
-    """Try to get Redis connection from app config."""
+    """Process-wide pooled Redis client (and registered scripts), or None."""
+    global _redis
+    if time.time() < _redis_down_until:
+        return None
+    url = current_app.config.get('REDIS_URL', '')
+    if not url:
+        return None
+    cached = _redis
+    if cached is not None and cached[0] == url:
+        return cached
+    with _redis_lock:
+        if _redis is None or _redis[0] != url:
+            try:
+                import redis
+            except ImportError:
+                return None
+            client = redis.Redis(connection_pool=redis.ConnectionPool.from_url(
+                url, decode_responses=True,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+            ))
+            scripts = {name: client.register_script(src) for name, src in _LUA.items()}
+            _redis = (url, client, scripts)
+        return _redis
+
+
+def _mark_redis_down():
+    global _redis_down_until
+    _redis_down_until = time.time() + REDIS_RETRY_SECONDS
+
+
+def _check_redis(key, limit, window, algorithm):
+    cached = _get_redis()
+    if cached is None:
+        return None
     try:
-        import redis
-        url = current_app.config.get('REDIS_URL', '')
-        if url:
-            return redis.from_url(url, decode_responses=True)
+        allowed, retry = cached[2][algorithm](keys=[key], args=[time.time(), window, limit])
+        return bool(int(allowed)), float(retry)
     except Exception:
-        pass
-    return None
+        _mark_redis_down()
+        return None
+
 
+# ─── In-memory fallback ─────────────────────────────────────────────────────
 
-def _cleanup_store():
-    """Periodically remove stale keys from in-memory store."""
-    global _last_cleanup
+def _check_memory(key, limit, window, algorithm):
+    step, initial = _ALGORITHMS[algorithm]
     now = time.time()
-    if now - _last_cleanup < 300:  # every 5 minutes
-        return
-    _last_cleanup = now
-    cutoff = now - 300  # remove keys with no recent activity
-    stale = [k for k, v in _rate_store.items()
-             if not v or max(v) < cutoff]
-    for k in stale:
-        _rate_store.pop(k, None)
+    with _rate_lock:
+        entry = _rate_store.get(key)
+        if entry is None:
+            entry = [0, initial(now, limit)]
+            _rate_store[key] = entry
+        else:
+            _rate_store.move_to_end(key)
+        entry[0] = now + window * 2
+        result = step(entry[1], now, limit, window)
+
+        # Oldest-used first: drop expired heads, cap total size (amortized O(1))
+        while _rate_store:
+            head = next(iter(_rate_store.values()))
+            if head[0] > now and len(_rate_store) <= MAX_MEMORY_KEYS:
+                break
+            _rate_store.popitem(last=False)
+    return result
 
 
-def rate_limit(max_requests: int = 60, window_seconds: int = 60):
+def check_rate_limit(key: str, max_requests: int, window_seconds: float,
+                     algorithm: str = SLIDING_WINDOW):
+    """Count one request against ``key``. Returns (allowed, retry_after_seconds)."""
+    result = _check_redis(key, max_requests, window_seconds, algorithm)
+    if result is None:
+        result = _check_memory(key, max_requests, window_seconds, algorithm)
+    return result
+
+
+def rate_limit(max_requests: int = 60, window_seconds: int = 60, algorithm: str = None):
     """Rate limit decorator.
 
     Args:
         max_requests: Maximum requests allowed in window
         window_seconds: Time window in seconds
+        algorithm: 'sliding_window' or 'token_bucket'; defaults to the
+            RATE_LIMIT_ALGORITHM config value (sliding_window)
     """
+    if algorithm is not None and algorithm not in _ALGORITHMS:
+        raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
@@ -54,37 +219,15 @@ def rate_limit(max_requests: int = 60, window_seconds: int = 60):
                 user_key = f"{identity}" if identity else request.remote_addr
             except RuntimeError:
                 user_key = request.remote_addr
-            key = f"rl:{user_key}:{fn.__name__}"
-
-            # Try Redis first
-            r = _get_redis()
-            if r:
-                try:
-                    pipe = r.pipeline()
-                    now = time.time()
-                    pipe.zremrangebyscore(key, 0, now - window_seconds)
-                    pipe.zcard(key)
-                    pipe.zadd(key, {str(now): now})
-                    pipe.expire(key, window_seconds + 1)
-                    results = pipe.execute()
-                    count = results[1]
-                    if count >= max_requests:
-                        return jsonify({'error': 'Rate limit exceeded'}), 429
-                    return fn(*args, **kwargs)
-                except Exception:
-                    pass  # Fall through to in-memory
-
-            # In-memory fallback (with thread lock)
-            now = time.time()
-            cutoff = now - window_seconds
-
-            with _rate_lock:
-                _cleanup_store()
-                _rate_store[key] = [t for t in _rate_store[key] if t > cutoff]
-                if len(_rate_store[key]) >= max_requests:
-                    return jsonify({'error': 'Rate limit exceeded'}), 429
-                _rate_store[key].append(now)
+            algo = algorithm or current_app.config.get('RATE_LIMIT_ALGORITHM', SLIDING_WINDOW)
+            prefix = 'rlb' if algo == TOKEN_BUCKET else 'rl'
+            key = f"{prefix}:{user_key}:{fn.__name__}"
 
+            allowed, retry_after = check_rate_limit(key, max_requests, window_seconds, algo)
+            if not allowed:
+                resp = jsonify({'error': 'Rate limit exceeded'})
+                resp.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                return resp, 429
             return fn(*args, **kwargs)
         return wrapper
     return decorator
@@ -2,9 +2,10 @@
 from .admin import Admin
 from .agent import Agent
 from .agent_config import AgentApiKey, AgentTelegramConfig, AgentTradingConfig
-from .trade import Trade, DailyStat
+from .trade import Trade, DailyStat, AgentStats
 from .billing import BillingPeriod
 from .bot_state import BotState
+from .bot_runtime import BotCommand, BotRuntime, BotRunnerNode, BotLease
 from .audit import AuditLog
 from .strategy_preset import StrategyPreset
 from .notification import Notification
@@ -12,7 +13,8 @@ from .notification import Notification
 __all__ = [
     'Admin', 'Agent',
     'AgentApiKey', 'AgentTelegramConfig', 'AgentTradingConfig',
-    'Trade', 'DailyStat',
+    'Trade', 'DailyStat', 'AgentStats',
     'BillingPeriod', 'BotState', 'AuditLog', 'StrategyPreset',
+    'BotCommand', 'BotRuntime', 'BotRunnerNode', 'BotLease',
     'Notification',
 ]
@@ -0,0 +1,112 @@
+"""Bot Runner Models - command queue and live status shared by web and runner.
+
+With BOT_RUNNER=external the bots live in a separate process
+(`python manage.py run_bots`). The web tier queues start/stop/... requests in
+`bot_commands`; the runner executes them and publishes what used to be read
+from in-memory AgentBots (positions, activity log, last scan) to `bot_runtime`.
+Several runners can share the agents: each heartbeats in `bot_runners` and
+holds a lease in `bot_leases` for every agent it runs.
+"""
+import json
+from datetime import datetime, timezone
+from ..extensions import db
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+class BotCommand(db.Model):
+    __tablename__ = 'bot_commands'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    agent_id = db.Column(db.Integer, db.ForeignKey('agents.id'), nullable=False)
+    action = db.Column(db.Enum('start', 'stop', 'pause', 'resume', 'restart'),
+                       nullable=False)
+    status = db.Column(db.Enum('pending', 'running', 'done', 'failed'),
+                       default='pending', nullable=False)
+    message = db.Column(db.Text)
+    runner_id = db.Column(db.String(64))
+    created_at = db.Column(db.DateTime, default=_utcnow)
+    processed_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('idx_status_created', 'status', 'created_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'agent_id': self.agent_id,
+            'action': self.action,
+            'status': self.status,
+            'message': self.message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'processed_at': self.processed_at.isoformat() if self.processed_at else None,
+        }
+
+
+class BotRuntime(db.Model):
+    """Snapshot of one in-memory AgentBot, refreshed by its runner."""
+    __tablename__ = 'bot_runtime'
+
+    agent_id = db.Column(db.Integer, db.ForeignKey('agents.id'), primary_key=True)
+    runner_id = db.Column(db.String(64), nullable=False, index=True)
+    is_running = db.Column(db.Boolean, default=False)
+    thread_alive = db.Column(db.Boolean, default=False)
+    positions = db.Column(db.Integer, default=0)
+    scan_count = db.Column(db.Integer, default=0)
+    activity_log = db.Column(db.Text)       # JSON list, as text for MariaDB 5.5
+    last_scan_result = db.Column(db.Text)   # JSON object
+    updated_at = db.Column(db.DateTime, default=_utcnow)
+
+    def logs(self) -> list:
+        return json.loads(self.activity_log) if self.activity_log else []
+
+    def scan_result(self) -> dict:
+        return json.loads(self.last_scan_result) if self.last_scan_result else {}
+
+
+class BotRunnerNode(db.Model):
+    """Heartbeat of a running bot-runner process."""
+    __tablename__ = 'bot_runners'
+
+    runner_id = db.Column(db.String(64), primary_key=True)   # host:pid
+    hostname = db.Column(db.String(255))
+    pid = db.Column(db.Integer)
+    bots = db.Column(db.Integer, default=0)
+    market_data = db.Column(db.Text)        # JSON MarketDataHub.get_stats()
+    started_at = db.Column(db.DateTime, default=_utcnow)
+    heartbeat_at = db.Column(db.DateTime, default=_utcnow, index=True)
+
+    def to_dict(self):
+        return {
+            'runner_id': self.runner_id,
+            'hostname': self.hostname,
+            'pid': self.pid,
+            'bots': self.bots,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+        }
+
+
+class BotLease(db.Model):
+    """Which runner may run an agent's bot, until expires_at.
+
+    Runners renew their leases every status tick; when a runner dies its
+    leases expire and the agents are claimed by the remaining runners.
+    """
+    __tablename__ = 'bot_leases'
+
+    agent_id = db.Column(db.Integer, db.ForeignKey('agents.id'), primary_key=True)
+    runner_id = db.Column(db.String(64), nullable=False, index=True)
+    acquired_at = db.Column(db.DateTime, default=_utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def to_dict(self):
+        return {
+            'agent_id': self.agent_id,
+            'runner_id': self.runner_id,
+            'acquired_at': self.acquired_at.isoformat() if self.acquired_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+        }
@@ -1,4 +1,4 @@
-"""Trade & DailyStat Models"""
+"""Trade, DailyStat & AgentStats Models"""
 from datetime import datetime, timezone
 from ..extensions import db
 
@@ -43,6 +43,7 @@ class Trade(db.Model):
     __table_args__ = (
         db.Index('idx_agent_status', 'agent_id', 'status'),
         db.Index('idx_agent_time', 'agent_id', 'entry_time'),
+        db.Index('idx_agent_status_exit', 'agent_id', 'status', 'exit_time'),
     )
 
     def to_dict(self):
@@ -99,3 +100,57 @@ class DailyStat(db.Model):
             'win_rate': (self.win_trades / self.trades_closed * 100
                          if self.trades_closed else 0),
         }
+
+
+class AgentStats(db.Model):
+    """Running per-agent totals over closed trades, updated on every close.
+
+    Equity/peak/drawdown replay the same walk as GET /api/agent/trades/stats:
+    start at ``initial_capital`` and add each closed trade's PnL in close order.
+    The recent-outcome string and day/week PnL buckets give RiskManager its
+    loss streak and daily/weekly loss checks without querying trades.
+    """
+    __tablename__ = 'agent_stats'
+
+    agent_id = db.Column(db.Integer, db.ForeignKey('agents.id'), primary_key=True)
+    closed_trades = db.Column(db.Integer, default=0, nullable=False)
+    win_trades = db.Column(db.Integer, default=0, nullable=False)
+    total_pnl = db.Column(db.Numeric(15, 4), default=0, nullable=False)
+    gross_profit = db.Column(db.Numeric(15, 4), default=0, nullable=False)
+    gross_loss = db.Column(db.Numeric(15, 4), default=0, nullable=False)
+    total_fees = db.Column(db.Numeric(15, 6), default=0, nullable=False)
+    best_trade = db.Column(db.Numeric(15, 4))
+    worst_trade = db.Column(db.Numeric(15, 4))
+    initial_capital = db.Column(db.Numeric(15, 2), nullable=False)
+    equity = db.Column(db.Numeric(15, 4), nullable=False)
+    peak_equity = db.Column(db.Numeric(15, 4), nullable=False)
+    max_drawdown = db.Column(db.Numeric(7, 4), default=0, nullable=False)  # percent
+    last_trade_at = db.Column(db.DateTime, nullable=True)
+    # Last 10 outcomes, newest first: W(in) / L(oss) / 0 (flat); NULL = not built
+    recent_outcomes = db.Column(db.String(10), nullable=True)
+    pnl_day = db.Column(db.Date, nullable=True)        # UTC day of day_pnl
+    day_pnl = db.Column(db.Numeric(15, 4), default=0, nullable=False)
+    pnl_week = db.Column(db.Date, nullable=True)       # Monday of week_pnl (UTC)
+    week_pnl = db.Column(db.Numeric(15, 4), default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
+                           onupdate=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self):
+        closed = self.closed_trades or 0
+        wins = self.win_trades or 0
+        return {
+            'total_trades': closed,
+            'win_trades': wins,
+            'loss_trades': closed - wins,
+            'win_rate': round(wins / closed * 100, 1) if closed else 0,
+            'total_pnl': float(self.total_pnl or 0),
+            'gross_profit': float(self.gross_profit or 0),
+            'gross_loss': float(self.gross_loss or 0),
+            'total_fees': float(self.total_fees or 0),
+            'best_trade': float(self.best_trade) if self.best_trade is not None else 0,
+            'worst_trade': float(self.worst_trade) if self.worst_trade is not None else 0,
+            'equity': float(self.equity or 0),
+            'peak_equity': float(self.peak_equity or 0),
+            'max_drawdown': float(self.max_drawdown or 0),
+            'last_trade_at': self.last_trade_at.isoformat() if self.last_trade_at else None,
+        }
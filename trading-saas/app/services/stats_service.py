@@ -0,0 +1,202 @@
+"""Per-agent Trade Statistics Service
+
+Closed-trade aggregates (PnL, win count, profit factor inputs, equity peak and
+max drawdown) are kept in ``agent_stats`` and updated incrementally when a
+trade closes, so stats/leaderboard endpoints and RiskManager never scan the trades table.
+A row is rebuilt from trades when it is missing, predates the risk columns,
+or the agent's initial_capital has changed.
+"""
+from datetime import timedelta, timezone
+from decimal import Decimal
+from ..extensions import db
+from ..models.trade import Trade, AgentStats
+from ..models.agent_config import AgentTradingConfig
+
+DEFAULT_INITIAL_CAPITAL = Decimal('2000')
+ZERO = Decimal('0')
+RECENT_OUTCOMES = 10
+
+
+def _dec(value) -> Decimal:
+    if value is None:
+        return ZERO
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _initial_capital(agent_id: int) -> Decimal:
+    tc = AgentTradingConfig.query.filter_by(agent_id=agent_id).first()
+    if tc and tc.initial_capital:
+        return _dec(tc.initial_capital)
+    return DEFAULT_INITIAL_CAPITAL
+
+
+def utc_date(dt):
+    """UTC calendar date of a (naive = UTC, or aware) datetime."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.date()
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def _apply(stats: AgentStats, pnl, fees, closed_at):
+    """Fold one closed trade into the running totals."""
+    pnl = _dec(pnl)
+    stats.closed_trades = (stats.closed_trades or 0) + 1
+    if pnl > 0:
+        stats.win_trades = (stats.win_trades or 0) + 1
+        stats.gross_profit = _dec(stats.gross_profit) + pnl
+    elif pnl < 0:
+        stats.gross_loss = _dec(stats.gross_loss) - pnl
+    stats.total_pnl = _dec(stats.total_pnl) + pnl
+    stats.total_fees = _dec(stats.total_fees) + _dec(fees)
+    stats.best_trade = pnl if stats.best_trade is None else max(_dec(stats.best_trade), pnl)
+    stats.worst_trade = pnl if stats.worst_trade is None else min(_dec(stats.worst_trade), pnl)
+
+    equity = _dec(stats.equity) + pnl
+    peak = max(_dec(stats.peak_equity), equity)
+    stats.equity = equity
+    stats.peak_equity = peak
+    if peak > 0:
+        dd = (peak - equity) / peak * 100
+        if dd > _dec(stats.max_drawdown):
+            stats.max_drawdown = dd.quantize(Decimal('0.0001'))
+
+    outcome = 'W' if pnl > 0 else 'L' if pnl < 0 else '0'
+    stats.recent_outcomes = (outcome + (stats.recent_outcomes or ''))[:RECENT_OUTCOMES]
+
+    if closed_at is not None:
+        stats.last_trade_at = closed_at
+        day = utc_date(closed_at)
+        # A close dated before the current bucket (out of order) is not counted
+        if stats.pnl_day is None or day > stats.pnl_day:
+            stats.pnl_day, stats.day_pnl = day, pnl
+        elif day == stats.pnl_day:
+            stats.day_pnl = _dec(stats.day_pnl) + pnl
+        week = week_start(day)
+        if stats.pnl_week is None or week > stats.pnl_week:
+            stats.pnl_week, stats.week_pnl = week, pnl
+        elif week == stats.pnl_week:
+            stats.week_pnl = _dec(stats.week_pnl) + pnl
+
+
+def _replay(stats: AgentStats, capital: Decimal) -> AgentStats:
+    """Reset ``stats`` to ``capital`` and fold in every closed trade."""
+    agent_id = stats.agent_id
+    stats.closed_trades = 0
+    stats.win_trades = 0
+    stats.total_pnl = ZERO
+    stats.gross_profit = ZERO
+    stats.gross_loss = ZERO
+    stats.total_fees = ZERO
+    stats.best_trade = None
+    stats.worst_trade = None
+    stats.initial_capital = capital
+    stats.equity = capital
+    stats.peak_equity = capital
+    stats.max_drawdown = ZERO
+    stats.last_trade_at = None
+    stats.recent_outcomes = ''
+    stats.pnl_day = None
+    stats.day_pnl = ZERO
+    stats.pnl_week = None
+    stats.week_pnl = ZERO
+
+    rows = (
+        db.session.query(Trade.pnl, Trade.fee, Trade.funding_fee, Trade.exit_time)
+        .filter(Trade.agent_id == agent_id, Trade.status == 'CLOSED')
+        .order_by(Trade.exit_time, Trade.id)
+        .yield_per(1000)
+    )
+    for pnl, fee, funding_fee, exit_time in rows:
+        _apply(stats, pnl, _dec(fee) + _dec(funding_fee), exit_time)
+    return stats
+
+
+def rebuild_agent_stats(agent_id: int) -> AgentStats:
+    """Recompute an agent's row from its closed trades (does not commit)."""
+    capital = _initial_capital(agent_id)
+    stats = db.session.get(AgentStats, agent_id)
+    if stats is None:
+        stats = AgentStats(agent_id=agent_id)
+        db.session.add(stats)
+    return _replay(stats, capital)
+
+
+def replay_agent_stats(agent_id: int, initial_capital) -> AgentStats:
+    """Unsaved stats walked from a different starting capital.
+
+    For callers whose capital differs from the agent's trading config
+    (the persisted row only tracks the configured one).
+    """
+    return _replay(AgentStats(agent_id=agent_id), _dec(initial_capital))
+
+
+def record_trade_close(agent_id: int, pnl, fees=0, closed_at=None) -> AgentStats:
+    """Fold a just-closed trade into agent_stats.
+
+    Call once the Trade row is marked CLOSED (flushed or committed); the
+    caller commits. If the agent has no row yet (or one from before the risk
+    columns) it is backfilled from trades, which already includes this one.
+    """
+    db.session.flush()
+    stats = (
+        AgentStats.query.filter_by(agent_id=agent_id)
+        .with_for_update()
+        .first()
+    )
+    if stats is None or stats.recent_outcomes is None:
+        return rebuild_agent_stats(agent_id)
+    _apply(stats, pnl, fees, closed_at)
+    return stats
+
+
+def invalidate_agent_stats(agent_id: int):
+    """Drop an agent's row so the next read rebuilds it from trades."""
+    try:
+        AgentStats.query.filter_by(agent_id=agent_id).delete()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+
+
+def get_agent_stats(agent_id: int) -> AgentStats:
+    """Stats row for an agent, rebuilt if missing or stale."""
+    stats = db.session.get(AgentStats, agent_id)
+    if (stats is None or stats.recent_outcomes is None
+            or _dec(stats.initial_capital) != _initial_capital(agent_id)):
+        stats = rebuild_agent_stats(agent_id)
+        db.session.commit()
+    return stats
+
+
+def ensure_agent_stats(agent_ids) -> int:
+    """Backfill rows for any of ``agent_ids`` that have none yet.
+
+    One indexed lookup when every row exists (the steady state); only agents
+    without a row are rebuilt. Returns the number of rows created.
+    """
+    agent_ids = set(agent_ids)
+    if not agent_ids:
+        return 0
+    existing = {
+        row[0] for row in
+        db.session.query(AgentStats.agent_id).filter(AgentStats.agent_id.in_(agent_ids))
+    }
+    missing = agent_ids - existing
+    for agent_id in missing:
+        rebuild_agent_stats(agent_id)
+    if missing:
+        db.session.commit()
+    return len(missing)
+
+
+def rebuild_all_stats() -> int:
+    """Backfill agent_stats for every agent with trades. Returns row count."""
+    agent_ids = [row[0] for row in db.session.query(Trade.agent_id).distinct()]
+    for agent_id in agent_ids:
+        rebuild_agent_stats(agent_id)
+    db.session.commit()
+    return len(agent_ids)
@@ -7,13 +7,12 @@ Outputs SQLite database with:
   - trade_klines: OHLC during holding period (for charts)
 """
 import os
-import json
 import time
 import sqlite3
 from datetime import datetime
 
 BASE_DIR = '/opt/backtest_2025'
-CACHE_DIR = os.path.join(BASE_DIR, 'data', 'klines_cache')
+STORE_DIR = os.path.join(BASE_DIR, 'data', 'kline_store')
 DB_PATH = os.path.join(BASE_DIR, 'data', 'backtest_2025.db')
 
 # === v6 strategy config (current prod) ===
@@ -596,26 +595,25 @@ def save_run(conn, symbol, summary, trades):
 
 def main():
     import sys
+    from kline_store import KlineStore
+    store = KlineStore(STORE_DIR)
     conn = init_db(DB_PATH)
     symbols = sys.argv[1:] if len(sys.argv) > 1 else None
 
     if symbols is None:
-        # All cached symbols
-        symbols = [f.replace('.json', '') for f in os.listdir(CACHE_DIR) if f.endswith('.json')]
-        symbols.sort()
+        # All stored symbols
+        symbols = store.symbols('1h')
 
     total_trades = 0
     total_pnl = 0
     success_count = 0
 
     for i, sym in enumerate(symbols, 1):
-        cache_path = os.path.join(CACHE_DIR, f'{sym}.json')
-        if not os.path.exists(cache_path):
-            print(f'[{i}/{len(symbols)}] {sym}: no cache, skip')
-            continue
         try:
-            with open(cache_path) as f:
-                bars = json.load(f)
+            bars = store.load_bars(sym, '1h')
+            if not bars:
+                print(f'[{i}/{len(symbols)}] {sym}: not in store, skip')
+                continue
             if len(bars) < 500:
                 print(f'[{i}/{len(symbols)}] {sym}: only {len(bars)} bars, skip')
                 continue
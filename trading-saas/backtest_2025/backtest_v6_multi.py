@@ -3,18 +3,20 @@
 Matches live bot: 10000U total, 20 positions max globally, per-symbol cooldown.
 """
 import os
-import json
 import time
 import sqlite3
 from datetime import datetime
 
+import numpy as np
+
 # Reuse indicators and analyze_signal_v6 from backtest_v6.py
 import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from backtest_v6 import analyze_signal_v6, calc_position_size
+from kline_store import KlineStore
 
 BASE_DIR = '/opt/backtest_2025'
-CACHE_DIR = os.path.join(BASE_DIR, 'data', 'klines_cache')
+STORE_DIR = os.path.join(BASE_DIR, 'data', 'kline_store')
 DB_PATH = os.path.join(BASE_DIR, 'data', 'backtest_2025_multi_score80.db')
 
 CONFIG = {
@@ -77,35 +79,46 @@ def init_db(db_path):
 
 
 def load_all_klines():
-    """Load all cached klines, returning {symbol: bars} aligned by time."""
-    all_data = {}
-    files = sorted([f for f in os.listdir(CACHE_DIR) if f.endswith('.json')])
-    for f in files:
-        sym = f.replace('.json', '')
-        with open(os.path.join(CACHE_DIR, f)) as fp:
-            bars = json.load(fp)
-        if len(bars) < 500:
-            continue
-        all_data[sym] = bars
-    return all_data
+    """Load all stored 1H klines as {symbol: structured array} (memory-mapped)."""
+    store = KlineStore(STORE_DIR)
+    return store.load_all('1h', min_bars=500)
 
 
-def build_time_index(all_data):
-    """Build mapping: timestamp_ms → {symbol: bar}.
-    Use the most common timeline (from BTC or ETH) as reference.
+class AlignedBars:
+    """One symbol's stored bars on the reference timeline.
+
+    bars[i] is the bar at ref_times[i] as a (time, o, h, l, c, v) tuple, or
+    None if the symbol has no bar there. Rows are read from the mmap'd array
+    only when asked for, so the full history is never materialised as lists.
     """
-    # Use the symbol with most bars as reference timeline
-    ref_sym = max(all_data.keys(), key=lambda s: len(all_data[s]))
-    ref_times = [b[0] for b in all_data[ref_sym]]
-    time_to_idx = {t: i for i, t in enumerate(ref_times)}
 
-    # For each symbol, build parallel array aligned to ref_times (None if missing)
-    aligned = {}
-    for sym, bars in all_data.items():
-        sym_map = {b[0]: b for b in bars}
-        aligned[sym] = [sym_map.get(t) for t in ref_times]
+    def __init__(self, arr, ref_times):
+        on_ref = np.isin(arr['time'], ref_times)
+        self.arr = arr if on_ref.all() else arr[on_ref]
+        self.row = np.full(len(ref_times), -1, dtype=np.int64)
+        self.row[np.searchsorted(ref_times, self.arr['time'])] = np.arange(len(self.arr))
+
+    def __len__(self):
+        return len(self.row)
 
-    return ref_times, aligned
+    def __getitem__(self, i):
+        r = self.row[i]
+        return None if r < 0 else self.arr[r].tolist()
+
+    def lookback(self, i, n=100):
+        """Up to n bars ending at ref_times[i] (which must have a bar)."""
+        r = int(self.row[i])
+        return self.arr[max(0, r - n + 1):r + 1].tolist()
+
+
+def build_time_index(all_data):
+    """Build the reference timeline and {symbol: AlignedBars} on it.
+    The symbol with most bars is used as the reference timeline.
+    """
+    ref_sym = max(all_data.keys(), key=lambda s: len(all_data[s]))
+    ref_times = np.asarray(all_data[ref_sym]['time'])
+    aligned = {sym: AlignedBars(arr, ref_times) for sym, arr in all_data.items()}
+    return ref_times.tolist(), aligned
 
 
 def run_multi_backtest(all_data, config):
@@ -247,14 +260,8 @@ def run_multi_backtest(all_data, config):
             if sym_bars[i] is None:
                 continue
 
-            # build lookback from this symbol's aligned bars (skip Nones)
-            lookback = []
-            j = i
-            while j >= 0 and len(lookback) < 100:
-                b = sym_bars[j]
-                if b is not None:
-                    lookback.insert(0, b)
-                j -= 1
+            # last 100 bars of this symbol up to this bar (gaps skipped)
+            lookback = sym_bars.lookback(i, 100)
             if len(lookback) < 50:
                 continue
 
@@ -1,16 +1,16 @@
 #!/usr/bin/env python3
 """Fetch 1H klines from Binance Futures for 2025-01-01 to 2025-12-31.
-Caches each symbol to JSON for reuse.
+Stores each symbol in the shared columnar kline store (see kline_store.py).
 """
 import os
-import json
 import time
-import requests
 from datetime import datetime
 
-BASE = 'https://fapi.binance.com/fapi/v1/klines'
-CACHE_DIR = os.path.join(os.path.dirname(__file__), 'data', 'klines_cache')
-os.makedirs(CACHE_DIR, exist_ok=True)
+from kline_store import KlineStore, SymbolNotListed
+
+STORE = KlineStore()
+# Pre-store JSON caches; imported into the store on first run
+LEGACY_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'data', 'klines_cache')
 
 # From auto_trader_v6.py (active 111 coins after skip_coins)
 WATCH_SYMBOLS = [
@@ -49,45 +49,25 @@ def bsym(symbol):
 
 
 def fetch_all(symbol):
-    """Fetch all 1H klines for 2025 for given symbol."""
-    cache_path = os.path.join(CACHE_DIR, f'{symbol}.json')
-    if os.path.exists(cache_path):
-        with open(cache_path) as f:
-            data = json.load(f)
-            if len(data) > 8000:  # full year ~8760
-                return data, True
-
-    binance_sym = bsym(symbol)
-    all_bars = []
-    cur = START_MS
-    while cur < END_MS:
-        url = f'{BASE}?symbol={binance_sym}&interval=1h&startTime={cur}&endTime={END_MS}&limit=1500'
-        for attempt in range(3):
-            try:
-                r = requests.get(url, timeout=20)
-                if r.status_code != 200:
-                    if r.status_code == 400:
-                        return [], False  # symbol not listed
-                    time.sleep(2)
-                    continue
-                data = r.json()
-                if not isinstance(data, list) or not data:
-                    return all_bars, bool(all_bars)
-                all_bars.extend(data)
-                cur = int(data[-1][0]) + 3600 * 1000
-                time.sleep(0.15)
-                break
-            except Exception as e:
-                print(f'    [{symbol}] retry {attempt+1}: {e}')
-                time.sleep(2)
-        else:
-            return all_bars, False
+    """Bring the store up to date for 2025 and return the year's bars.
 
-    # Convert to compact format: [time, open, high, low, close, volume]
-    compact = [[int(b[0]), float(b[1]), float(b[2]), float(b[3]), float(b[4]), float(b[5])] for b in all_bars]
-    with open(cache_path, 'w') as f:
-        json.dump(compact, f)
-    return compact, True
+    Only bars missing from the store are fetched; pages are appended as they
+    arrive, so re-running after an interruption resumes where it stopped.
+    A legacy JSON cache file, if present, is imported first.
+    """
+    if not STORE.time_range(symbol, '1h'):
+        legacy = os.path.join(LEGACY_CACHE_DIR, f'{symbol}.json')
+        if os.path.exists(legacy):
+            STORE.import_json(symbol, legacy)
+    try:
+        STORE.update(symbol, '1h', START_MS, END_MS, market_symbol=bsym(symbol))
+    except SymbolNotListed:
+        return [], False
+    except RuntimeError as e:
+        print(f'    [{symbol}] {e}')
+        return STORE.load(symbol, '1h', START_MS, END_MS), False
+    bars = STORE.load(symbol, '1h', START_MS, END_MS)
+    return bars, len(bars) > 0
 
 
 def main():
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""Columnar on-disk kline store shared by all backtesters.
+
+Layout: <root>/<interval>/<SYMBOL>.bin — one append-only file per
+symbol/interval holding fixed-width little-endian records
+(time int64 ms, open, high, low, close, volume float64), sorted by time.
+
+Reads are memory-mapped, so loading hundreds of symbols × several years
+costs a few page faults instead of re-parsing JSON. Updates only fetch
+bars after the last stored bar (or before the first one when backfilling)
+and every fetched page is appended immediately, so an interrupted fetch
+resumes where it stopped. Only closed bars are ever written. Missing
+ranges anywhere in the requested window (head, interior gaps, tail) are
+fetched; writers of one symbol/interval are serialized with a flock on
+<SYMBOL>.bin.lock, so threads and processes can update it concurrently.
+
+Ranges fetched from the exchange are recorded in <SYMBOL>.coverage.json,
+including the ones it had no bars for (before listing, after delisting,
+exchange outages), so a closed range is fetched once and never again.
+
+Usage:
+    store = KlineStore()
+    store.update('BTC', '1h', start_ms, end_ms)          # fetch missing ranges
+    arr = store.load('BTC', '1h', start_ms, end_ms)      # structured memmap
+    arr['close'], arr['time']                            # column views
+    bars = store.load_bars('BTC', '1h')                  # [[t, o, h, l, c, v], ...]
+"""
+import os
+import json
+import time
+import fcntl
+import tempfile
+from contextlib import contextmanager
+
+import requests
+import numpy as np
+
+DEFAULT_ROOT = os.environ.get(
+    'KLINE_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'kline_store'))
+
+BINANCE_KLINES = 'https://fapi.binance.com/fapi/v1/klines'
+PAGE_LIMIT = 1500
+
+BAR_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'),
+    ('low', '<f8'), ('close', '<f8'), ('volume', '<f8'),
+])
+
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000,
+    '30m': 1_800_000, '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000,
+    '6h': 21_600_000, '8h': 28_800_000, '12h': 43_200_000,
+    '1d': 86_400_000, '1w': 604_800_000,
+}
+
+# Bar open times are multiples of the interval, except weekly bars which
+# open on Monday 00:00 UTC (the epoch was a Thursday)
+INTERVAL_OFFSET_MS = {'1w': 4 * 86_400_000}
+
+_EMPTY = np.zeros(0, dtype=BAR_DTYPE)
+
+
+class SymbolNotListed(Exception):
+    """Exchange rejected the symbol (HTTP 400) — not listed on futures."""
+
+
+def fetch_binance_pages(market_symbol, interval, start_ms, end_ms, limit=PAGE_LIMIT):
+    """Yield pages of raw Binance futures klines covering [start_ms, end_ms].
+
+    Raises SymbolNotListed on HTTP 400, RuntimeError after 3 failed attempts.
+    """
+    step = INTERVAL_MS[interval]
+    cur = start_ms
+    while cur <= end_ms:
+        params = {'symbol': market_symbol, 'interval': interval,
+                  'startTime': cur, 'endTime': end_ms, 'limit': limit}
+        for attempt in range(3):
+            try:
+                r = requests.get(BINANCE_KLINES, params=params, timeout=20)
+                if r.status_code == 400:
+                    raise SymbolNotListed(market_symbol)
+                if r.status_code != 200:
+                    time.sleep(2)
+                    continue
+                data = r.json()
+                break
+            except SymbolNotListed:
+                raise
+            except Exception as e:
+                print(f'    [{market_symbol}] retry {attempt+1}: {e}')
+                time.sleep(2)
+        else:
+            raise RuntimeError(f'{market_symbol}: fetch failed at {cur}')
+
+        if not isinstance(data, list) or not data:
+            return
+        yield data
+        cur = int(data[-1][0]) + step
+        if len(data) < limit:
+            return
+        time.sleep(0.15)
+
+
+def to_records(rows):
+    """Convert [[t, o, h, l, c, v, ...], ...] (raw or compact) to BAR_DTYPE."""
+    if not len(rows):
+        return _EMPTY.copy()
+    out = np.empty(len(rows), dtype=BAR_DTYPE)
+    for i, name in enumerate(BAR_DTYPE.names):
+        col = [r[i] for r in rows]
+        out[name] = np.asarray(col, dtype=np.float64) if i else np.asarray(col, dtype=np.int64)
+    return out
+
+
+def bar_floor(t, interval):
+    """Open time of the bar containing t."""
+    step, offset = INTERVAL_MS[interval], INTERVAL_OFFSET_MS.get(interval, 0)
+    return (t - offset) // step * step + offset
+
+
+def _runs(times, step):
+    """[[first, last], ...] runs of consecutive bars in sorted times."""
+    if not len(times):
+        return []
+    breaks = np.nonzero(np.diff(times) != step)[0]
+    firsts = [int(times[0])] + [int(times[i + 1]) for i in breaks]
+    lasts = [int(times[i]) for i in breaks] + [int(times[-1])]
+    return [list(r) for r in zip(firsts, lasts)]
+
+
+def _merge_ranges(ranges, step):
+    """Sort and join overlapping or adjacent [lo, hi] bar ranges."""
+    out = []
+    for lo, hi in sorted(ranges):
+        if out and lo <= out[-1][1] + step:
+            out[-1][1] = max(out[-1][1], hi)
+        else:
+            out.append([lo, hi])
+    return out
+
+
+def _gaps(covered, start, end, step):
+    """[(lo, hi), ...] bar ranges of [start, end] outside the covered ranges."""
+    out = []
+    cur = start
+    for lo, hi in covered:
+        if hi < cur:
+            continue
+        if lo > end:
+            break
+        if lo > cur:
+            out.append((cur, lo - step))
+        cur = max(cur, hi + step)
+    if cur <= end:
+        out.append((cur, end))
+    return out
+
+
+class KlineStore:
+    """Append-only per-symbol/interval binary kline files with mmap reads."""
+
+    def __init__(self, root=None, fetch_pages=fetch_binance_pages, clock=time.time):
+        """
+        Args:
+            root: Store directory (default: $KLINE_STORE_DIR or ./data/kline_store)
+            fetch_pages: Page generator (market_symbol, interval, start_ms, end_ms)
+            clock: Time source in seconds, used to drop still-forming bars
+        """
+        self.root = root or DEFAULT_ROOT
+        self._fetch_pages = fetch_pages
+        self._clock = clock
+
+    def path(self, symbol, interval='1h'):
+        return os.path.join(self.root, interval, f'{symbol}.bin')
+
+    def symbols(self, interval='1h'):
+        d = os.path.join(self.root, interval)
+        if not os.path.isdir(d):
+            return []
+        return sorted(f[:-4] for f in os.listdir(d) if f.endswith('.bin'))
+
+    # ─── Reads ──────────────────────────────────────────────
+
+    def load(self, symbol, interval='1h', start_ms=None, end_ms=None, mmap=True):
+        """Return bars with start_ms <= time <= end_ms as a structured array.
+
+        With mmap=True the result is a read-only view onto the file.
+        """
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return _EMPTY
+        n = os.path.getsize(path) // BAR_DTYPE.itemsize
+        if n == 0:
+            return _EMPTY
+        if mmap:
+            arr = np.memmap(path, dtype=BAR_DTYPE, mode='r', shape=(n,))
+        else:
+            arr = np.fromfile(path, dtype=BAR_DTYPE, count=n)
+        times = arr['time']
+        lo = 0 if start_ms is None else int(np.searchsorted(times, start_ms, 'left'))
+        hi = n if end_ms is None else int(np.searchsorted(times, end_ms, 'right'))
+        return arr[lo:hi]
+
+    def load_bars(self, symbol, interval='1h', start_ms=None, end_ms=None):
+        """Same as load() but as [[time, open, high, low, close, volume], ...]
+        — the compact list format the legacy JSON caches used."""
+        return [list(b) for b in self.load(symbol, interval, start_ms, end_ms).tolist()]
+
+    def load_all(self, interval='1h', start_ms=None, end_ms=None, min_bars=0, symbols=None):
+        """{symbol: structured array} for every stored symbol with >= min_bars."""
+        out = {}
+        for sym in (symbols if symbols is not None else self.symbols(interval)):
+            arr = self.load(sym, interval, start_ms, end_ms)
+            if len(arr) >= max(min_bars, 1):
+                out[sym] = arr
+        return out
+
+    def time_range(self, symbol, interval='1h'):
+        """(first_ms, last_ms) of stored bars, or None if nothing stored."""
+        arr = self.load(symbol, interval)
+        if not len(arr):
+            return None
+        return int(arr['time'][0]), int(arr['time'][-1])
+
+    def coverage_path(self, symbol, interval='1h'):
+        return os.path.join(self.root, interval, f'{symbol}.coverage.json')
+
+    def coverage(self, symbol, interval='1h'):
+        """[[first_ms, last_ms], ...] bar ranges known to be complete.
+
+        Stored bars plus the ranges already fetched from the exchange, with
+        or without bars in them. Files written before coverage was recorded
+        start out with just their stored bars; a coverage file without its
+        bar file (deleted store) is ignored.
+        """
+        step = INTERVAL_MS[interval]
+        ranges = _runs(self.load(symbol, interval)['time'], step)
+        path = self.coverage_path(symbol, interval)
+        if os.path.exists(self.path(symbol, interval)) and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    ranges += json.load(f)['covered']
+            except (OSError, ValueError, KeyError) as e:
+                print(f'    [{symbol}] ignoring unreadable coverage file: {e}')
+        return _merge_ranges(ranges, step)
+
+    # ─── Writes ─────────────────────────────────────────────
+
+    @contextmanager
+    def _locked(self, symbol, interval):
+        """Exclusive writer lock for one symbol/interval (threads and processes).
+
+        Not reentrant: code holding it calls the unlocked _append/_insert.
+        """
+        path = self.path(symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.lock', 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def append(self, symbol, interval, rows):
+        """Append bars newer than the last stored one. Returns rows written.
+
+        Older or duplicate bars are dropped, so re-appending an overlapping
+        page is harmless. A torn trailing record (crash mid-write) is
+        truncated before appending.
+        """
+        with self._locked(symbol, interval):
+            return self._append(symbol, interval, rows)
+
+    def _append(self, symbol, interval, rows):
+        recs = rows if isinstance(rows, np.ndarray) else to_records(rows)
+        if not len(recs):
+            return 0
+        path = self.path(symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._truncate_torn(path)
+        last = self.time_range(symbol, interval)
+        if last is not None:
+            recs = recs[recs['time'] > last[1]]
+        if not len(recs):
+            return 0
+        recs = np.sort(recs, order='time')
+        keep = np.ones(len(recs), dtype=bool)
+        keep[1:] = recs['time'][1:] != recs['time'][:-1]
+        recs = recs[keep]
+        with open(path, 'ab') as f:
+            f.write(recs.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        return len(recs)
+
+    def _insert(self, symbol, interval, recs):
+        """Merge bars at any position; bars already stored win. Returns rows added.
+
+        Bars newer than the last stored one are appended, anything else
+        goes through one atomic rewrite.
+        """
+        if not len(recs):
+            return 0
+        last = self.time_range(symbol, interval)
+        if last is None or recs['time'].min() > last[1]:
+            return self._append(symbol, interval, recs)
+        stored = np.array(self.load(symbol, interval, mmap=False))
+        merged = np.concatenate([stored, recs])
+        merged = merged[np.argsort(merged['time'], kind='stable')]
+        _, idx = np.unique(merged['time'], return_index=True)
+        if len(idx) == len(stored):
+            return 0
+        self._rewrite(symbol, interval, merged[idx])
+        return len(idx) - len(stored)
+
+    def _rewrite(self, symbol, interval, recs):
+        """Atomically replace a symbol file (used for head/gap backfills)."""
+        path = self.path(symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=f'{symbol}.', suffix='.tmp',
+                                   dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(recs.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _cover(self, symbol, interval, lo, hi):
+        """Record [lo, hi] as fetched (caller holds the lock, bars already written)."""
+        covered = _merge_ranges(self.coverage(symbol, interval) + [[lo, hi]],
+                                INTERVAL_MS[interval])
+        open(self.path(symbol, interval), 'ab').close()     # may have no bars at all
+        path = self.coverage_path(symbol, interval)
+        fd, tmp = tempfile.mkstemp(prefix=f'{symbol}.', suffix='.tmp',
+                                   dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'covered': covered}, f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @staticmethod
+    def _truncate_torn(path):
+        if not os.path.exists(path):
+            return
+        size = os.path.getsize(path)
+        extra = size % BAR_DTYPE.itemsize
+        if extra:
+            with open(path, 'r+b') as f:
+                f.truncate(size - extra)
+
+    def update(self, symbol, interval, start_ms, end_ms, market_symbol=None):
+        """Fetch only the ranges of [start_ms, end_ms] not already stored.
+
+        Every range not covered yet is fetched: the head, interior gaps
+        (e.g. left by an interrupted backfill) and the tail. Ranges after
+        the last stored bar are appended page by page (resumable), earlier
+        ones are merged with one atomic rewrite. Fetched ranges are recorded
+        as covered even when the exchange has no bars for them, so a window
+        that is already covered returns without any request. Bars that have
+        not closed yet are never stored. Returns number of new bars.
+        Raises SymbolNotListed if the exchange does not list the symbol.
+        """
+        market_symbol = market_symbol or f'{symbol}USDT'
+        step = INTERVAL_MS[interval]
+        # Last bar that has closed, and the first bar at or after start_ms
+        end_ms = bar_floor(min(end_ms, int(self._clock() * 1000) - step), interval)
+        start_ms = bar_floor(start_ms + step - 1, interval)
+        if end_ms < start_ms or not _gaps(self.coverage(symbol, interval),
+                                          start_ms, end_ms, step):
+            return 0
+
+        with self._locked(symbol, interval):
+            added = 0
+            for lo, hi in _gaps(self.coverage(symbol, interval), start_ms, end_ms, step):
+                added += self._fetch_range(symbol, interval, market_symbol, lo, hi)
+                self._cover(symbol, interval, lo, hi)
+            return added
+
+    def _fetch_range(self, symbol, interval, market_symbol, lo, hi):
+        """Fetch and store the bars of [lo, hi] (caller holds the lock)."""
+        def clip(rows):
+            recs = to_records(rows)
+            return recs[(recs['time'] >= lo) & (recs['time'] <= hi)]
+
+        last = self.time_range(symbol, interval)
+        if last is None or lo > last[1]:
+            added = 0
+            for page in self._fetch_pages(market_symbol, interval, lo, hi):
+                recs = clip(page)
+                added += self._append(symbol, interval, recs)
+                if len(recs):
+                    # resumable: an interrupted fetch keeps what it covered
+                    self._cover(symbol, interval, lo, int(recs['time'].max()))
+            return added
+        rows = []
+        for page in self._fetch_pages(market_symbol, interval, lo, hi):
+            rows.extend(page)
+        return self._insert(symbol, interval, clip(rows))
+
+    def import_json(self, symbol, json_path, interval='1h'):
+        """Migrate a legacy klines_cache/<SYM>.json file into the store."""
+        with open(json_path) as f:
+            rows = json.load(f)
+        with self._locked(symbol, interval):
+            return self._insert(symbol, interval, to_records(rows))
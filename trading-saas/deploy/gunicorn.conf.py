@@ -4,9 +4,13 @@ import os
 # Server socket
 bind = "127.0.0.1:5200"
 
-# Worker processes - single worker for WebSocket + SocketIO
-# gevent handles concurrency via greenlets (coroutines)
-workers = 1
+# Worker processes - gevent handles concurrency via greenlets (coroutines).
+# With BOT_RUNNER=embedded the bots live in the worker, so keep ONE worker:
+# recycling it (max_requests below) restarts every bot. With
+# BOT_RUNNER=external (trading-saas-bots.service) the worker holds no bot
+# state and WEB_WORKERS can be raised; Socket.IO then needs
+# SOCKETIO_MESSAGE_QUEUE and sticky sessions (nginx ip_hash) for polling.
+workers = int(os.environ.get('WEB_WORKERS', '1'))
 worker_class = "gevent"
 timeout = 120
 keepalive = 5
@@ -201,8 +201,9 @@ echo "  ✓ Nginx configured"
 
 # Systemd
 cp /opt/trading-saas/deploy/trading-saas.service /etc/systemd/system/
+cp /opt/trading-saas/deploy/trading-saas-bots.service /etc/systemd/system/
 systemctl daemon-reload
-systemctl enable trading-saas
+systemctl enable trading-saas trading-saas-bots
 
 # Open firewall if firewalld is running
 if systemctl is-active --quiet firewalld; then
@@ -213,7 +214,7 @@ fi
 
 # Start services
 systemctl restart nginx
-systemctl restart trading-saas
+systemctl restart trading-saas trading-saas-bots
 sleep 3
 
 echo ""
@@ -186,13 +186,14 @@ echo "  ✓ Nginx configured"
 
 # Systemd
 cp /opt/trading-saas/deploy/trading-saas.service /etc/systemd/system/
+cp /opt/trading-saas/deploy/trading-saas-bots.service /etc/systemd/system/
 systemctl daemon-reload
-systemctl enable trading-saas
+systemctl enable trading-saas trading-saas-bots
 echo "  ✓ Systemd service registered"
 
 # Start/restart
 systemctl restart nginx
-systemctl restart trading-saas
+systemctl restart trading-saas trading-saas-bots
 sleep 3
 
 # Verify
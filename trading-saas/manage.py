@@ -156,12 +156,35 @@ def init_db():
         print("Database tables created.")
 
 
+def rebuild_stats():
+    """Recompute agent_stats (totals + risk state) from closed trades for every agent."""
+    from app.services.stats_service import rebuild_all_stats
+    with app.app_context():
+        n = rebuild_all_stats()
+        print(f"Rebuilt stats for {n} agents.")
+
+
+def run_bots():
+    """Run the bot-runner process (BOT_RUNNER=external): owns all AgentBots."""
+    from app.engine.bot_runner import BotRunner
+    if app.config.get('BOT_RUNNER') != 'external':
+        print("BOT_RUNNER is not 'external': bots already run inside the web "
+              "process. Set BOT_RUNNER=external for both services first.")
+        sys.exit(1)
+    if not app.config.get('SOCKETIO_MESSAGE_QUEUE'):
+        print("Warning: SOCKETIO_MESSAGE_QUEUE not set, bot events will not "
+              "reach WebSocket clients.")
+    BotRunner(app).run()
+
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python manage.py init_db                    - Create all tables")
         print("  python manage.py create_admin <user> <email> <pass>  - Create admin")
         print("  python manage.py seed_strategies             - Seed strategy presets")
+        print("  python manage.py rebuild_stats               - Recompute agent_stats (incl. risk state)")
+        print("  python manage.py run_bots                    - Run the bot runner (BOT_RUNNER=external)")
         sys.exit(1)
 
     cmd = sys.argv[1]
@@ -174,6 +197,10 @@ if __name__ == '__main__':
         create_admin(sys.argv[2], sys.argv[3], sys.argv[4])
     elif cmd == 'seed_strategies':
         seed_strategies()
+    elif cmd == 'rebuild_stats':
+        rebuild_stats()
+    elif cmd == 'run_bots':
+        run_bots()
     else:
         print(f"Unknown command: {cmd}")
         sys.exit(1)
@@ -0,0 +1,26 @@
+-- Per-agent closed-trade aggregates, maintained on every trade close
+-- Run: mysql -u saas_user -p trading_saas < this_file.sql
+-- Then backfill: python manage.py rebuild_stats
+
+CREATE TABLE IF NOT EXISTS agent_stats (
+    agent_id INT NOT NULL PRIMARY KEY,
+    closed_trades INT NOT NULL DEFAULT 0,
+    win_trades INT NOT NULL DEFAULT 0,
+    total_pnl DECIMAL(15,4) NOT NULL DEFAULT 0,
+    gross_profit DECIMAL(15,4) NOT NULL DEFAULT 0,
+    gross_loss DECIMAL(15,4) NOT NULL DEFAULT 0,
+    total_fees DECIMAL(15,6) NOT NULL DEFAULT 0,
+    best_trade DECIMAL(15,4) NULL,
+    worst_trade DECIMAL(15,4) NULL,
+    initial_capital DECIMAL(15,2) NOT NULL,
+    equity DECIMAL(15,4) NOT NULL,
+    peak_equity DECIMAL(15,4) NOT NULL,
+    max_drawdown DECIMAL(7,4) NOT NULL DEFAULT 0,
+    last_trade_at DATETIME NULL,
+    updated_at DATETIME NULL,
+    CONSTRAINT fk_agent_stats_agent FOREIGN KEY (agent_id) REFERENCES agents(id)
+);
+
+-- trades: windowed leaderboard aggregates (agent, CLOSED, exit_time >= cutoff)
+ALTER TABLE trades
+    ADD INDEX idx_agent_status_exit (agent_id, status, exit_time);
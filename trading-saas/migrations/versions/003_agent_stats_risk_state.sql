@@ -0,0 +1,11 @@
+-- RiskManager state on agent_stats: loss streak and daily/weekly PnL buckets
+-- Run: mysql -u saas_user -p trading_saas < this_file.sql
+-- Rows left with recent_outcomes NULL are rebuilt from trades on next read;
+-- or backfill now: python manage.py rebuild_stats
+
+ALTER TABLE agent_stats
+    ADD COLUMN recent_outcomes VARCHAR(10) NULL,
+    ADD COLUMN pnl_day DATE NULL,
+    ADD COLUMN day_pnl DECIMAL(15,4) NOT NULL DEFAULT 0,
+    ADD COLUMN pnl_week DATE NULL,
+    ADD COLUMN week_pnl DECIMAL(15,4) NOT NULL DEFAULT 0;
@@ -0,0 +1,41 @@
+-- Bot runner (BOT_RUNNER=external): command queue + live status shared with the web tier
+-- Run: mysql -u saas_user -p trading_saas < this_file.sql
+-- (db.create_all() at startup creates them too; this is for managed schemas)
+
+CREATE TABLE IF NOT EXISTS bot_commands (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    agent_id INT NOT NULL,
+    action ENUM('start','stop','pause','resume','restart') NOT NULL,
+    status ENUM('pending','running','done','failed') NOT NULL DEFAULT 'pending',
+    message TEXT NULL,
+    runner_id VARCHAR(64) NULL,
+    created_at DATETIME NULL,
+    processed_at DATETIME NULL,
+    INDEX idx_status_created (status, created_at),
+    CONSTRAINT fk_bot_commands_agent FOREIGN KEY (agent_id) REFERENCES agents(id)
+);
+
+CREATE TABLE IF NOT EXISTS bot_runtime (
+    agent_id INT NOT NULL PRIMARY KEY,
+    runner_id VARCHAR(64) NOT NULL,
+    is_running TINYINT(1) NULL,
+    thread_alive TINYINT(1) NULL,
+    positions INT NULL,
+    scan_count INT NULL,
+    activity_log TEXT NULL,
+    last_scan_result TEXT NULL,
+    updated_at DATETIME NULL,
+    INDEX ix_bot_runtime_runner_id (runner_id),
+    CONSTRAINT fk_bot_runtime_agent FOREIGN KEY (agent_id) REFERENCES agents(id)
+);
+
+CREATE TABLE IF NOT EXISTS bot_runners (
+    runner_id VARCHAR(64) NOT NULL PRIMARY KEY,
+    hostname VARCHAR(255) NULL,
+    pid INT NULL,
+    bots INT NULL,
+    market_data TEXT NULL,
+    started_at DATETIME NULL,
+    heartbeat_at DATETIME NULL,
+    INDEX ix_bot_runners_heartbeat_at (heartbeat_at)
+);
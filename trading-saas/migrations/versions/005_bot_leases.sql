@@ -0,0 +1,12 @@
+-- Agent leases for sharding bots over several bot runners (BOT_LEASE_SECONDS)
+-- Run: mysql -u saas_user -p trading_saas < this_file.sql
+
+CREATE TABLE IF NOT EXISTS bot_leases (
+    agent_id INT NOT NULL PRIMARY KEY,
+    runner_id VARCHAR(64) NOT NULL,
+    acquired_at DATETIME NULL,
+    expires_at DATETIME NOT NULL,
+    INDEX ix_bot_leases_runner_id (runner_id),
+    INDEX ix_bot_leases_expires_at (expires_at),
+    CONSTRAINT fk_bot_leases_agent FOREIGN KEY (agent_id) REFERENCES agents(id)
+);
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Benchmark: bot start time and RSS with N agents, per-client vs pooled markets.
+
+Usage: python scripts/bench_exchange_pool.py [--agents 100] [--markets 3000]
+                                             [--latency 0.25] [--live]
+
+Each mode runs in a fresh subprocess. Every agent thread builds an
+OrderExecutor and makes its first ccxt call (load_markets), as AgentBot does
+on start. `legacy` gives every agent a plain ccxt client that downloads the
+markets itself; `pooled` goes through ExchangePool.
+
+Offline by default: fetch_markets returns --markets synthetic markets shaped
+like Binance exchangeInfo entries after a --latency sleep per REST call
+(Binance loads spot, linear and inverse). --live hits the real public API.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _synthetic_markets(n):
+    markets = []
+    for i in range(n):
+        base = f'C{i:04d}'
+        kind = ('spot', 'linear', 'inverse')[i % 3]
+        spot = kind == 'spot'
+        markets.append({
+            'id': f'{base}USDT', 'symbol': f'{base}/USDT' if spot else f'{base}/USDT:USDT',
+            'base': base, 'quote': 'USDT', 'settle': None if spot else 'USDT',
+            'baseId': base, 'quoteId': 'USDT', 'settleId': None if spot else 'USDT',
+            'type': 'spot' if spot else 'swap', 'spot': spot, 'margin': spot,
+            'swap': not spot, 'future': False, 'option': False, 'active': True,
+            'contract': not spot, 'linear': None if spot else kind == 'linear',
+            'inverse': None if spot else kind == 'inverse',
+            'contractSize': None if spot else 1.0, 'expiry': None, 'strike': None,
+            'precision': {'amount': 0.001, 'price': 0.0001},
+            'limits': {'leverage': {'min': None, 'max': None},
+                       'amount': {'min': 0.001, 'max': 10000.0},
+                       'price': {'min': 0.0001, 'max': 100000.0},
+                       'cost': {'min': 5.0, 'max': None}},
+            # Raw exchangeInfo entry, kept by ccxt in market['info']
+            'info': {
+                'symbol': f'{base}USDT', 'pair': f'{base}USDT', 'status': 'TRADING',
+                'contractType': 'PERPETUAL', 'baseAsset': base, 'quoteAsset': 'USDT',
+                'marginAsset': 'USDT', 'pricePrecision': '4', 'quantityPrecision': '3',
+                'baseAssetPrecision': '8', 'quotePrecision': '8', 'underlyingType': 'COIN',
+                'underlyingSubType': ['Layer-1'], 'triggerProtect': '0.0500',
+                'liquidationFee': '0.012500', 'marketTakeBound': '0.05',
+                'orderTypes': ['LIMIT', 'MARKET', 'STOP', 'STOP_MARKET',
+                               'TAKE_PROFIT', 'TAKE_PROFIT_MARKET', 'TRAILING_STOP_MARKET'],
+                'timeInForce': ['GTC', 'IOC', 'FOK', 'GTX', 'GTD'],
+                'filters': [
+                    {'filterType': 'PRICE_FILTER', 'minPrice': '0.0001',
+                     'maxPrice': '100000', 'tickSize': '0.0001'},
+                    {'filterType': 'LOT_SIZE', 'minQty': '0.001',
+                     'maxQty': '10000', 'stepSize': '0.001'},
+                    {'filterType': 'MARKET_LOT_SIZE', 'minQty': '0.001',
+                     'maxQty': '1000', 'stepSize': '0.001'},
+                    {'filterType': 'MAX_NUM_ORDERS', 'limit': '200'},
+                    {'filterType': 'MAX_NUM_ALGO_ORDERS', 'limit': '10'},
+                    {'filterType': 'MIN_NOTIONAL', 'notional': '5'},
+                    {'filterType': 'PERCENT_PRICE', 'multiplierUp': '1.0500',
+                     'multiplierDown': '0.9500', 'multiplierDecimal': '4'},
+                ],
+            },
+        })
+    return markets
+
+
+def _patch_offline(n_markets, latency):
+    import ccxt
+
+    def fetch_markets(self, params={}):
+        types = self.safe_list(self.options, 'fetchMarkets', ['linear'])
+        time.sleep(latency * len(types))
+        return _synthetic_markets(n_markets)
+
+    ccxt.binance.fetch_markets = fetch_markets
+    ccxt.binance.fetch_currencies = lambda self, params={}: None
+
+
+def run_mode(mode, agents, n_markets, latency, live):
+    """Child process: start `agents` executors concurrently, print one result line."""
+    import ccxt
+    from app.engine import order_executor
+    from app.engine.exchange_pool import ExchangePool
+
+    if not live:
+        _patch_offline(n_markets, latency)
+    if mode == 'legacy':
+        order_executor.ExchangePool = _LegacyPool(ccxt)
+
+    rss0 = _rss_mb()
+    latencies, errors = [], []
+    barrier = threading.Barrier(agents)
+
+    def agent(i):
+        barrier.wait()
+        t0 = time.perf_counter()
+        try:
+            ex = order_executor.OrderExecutor(f'key{i}', f'secret{i}', exchange_name='binance')
+            ex.exchange.load_markets()
+        except Exception as e:
+            errors.append(repr(e))
+        latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=agent, args=(i,)) for i in range(agents)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    latencies.sort()
+    loads = ExchangePool.get_instance().get_stats()['market_loads'] if mode == 'pooled' else agents
+    print(f"{mode} {wall:.2f} {latencies[len(latencies) // 2]:.2f} {latencies[-1]:.2f} "
+          f"{_rss_mb() - rss0:.1f} {loads} {len(errors)}")
+    if errors:
+        print(f"  first error: {errors[0]}", file=sys.stderr)
+
+
+class _LegacyPool:
+    """Stand-in for ExchangePool: a plain ccxt client per agent (old behaviour)."""
+
+    def __init__(self, ccxt):
+        self.ccxt = ccxt
+
+    def get_instance(self):
+        return self
+
+    def create_client(self, exchange_name, config, is_testnet=False):
+        return getattr(self.ccxt, exchange_name)(config)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--agents', type=int, default=100)
+    p.add_argument('--markets', type=int, default=3000)
+    p.add_argument('--latency', type=float, default=0.25)
+    p.add_argument('--live', action='store_true')
+    p.add_argument('--mode', choices=('legacy', 'pooled'))
+    args = p.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.agents, args.markets, args.latency, args.live)
+        return
+
+    source = 'live API' if args.live else \
+        f'{args.markets} synthetic markets, {args.latency * 1000:.0f} ms/request'
+    print(f"{args.agents} agents starting concurrently ({source})")
+    print(f"  {'mode':<8} {'wall s':>8} {'p50 s':>8} {'max s':>8} "
+          f"{'RSS +MB':>9} {'loads':>6} {'errors':>7}")
+    for mode in ('legacy', 'pooled'):
+        cmd = [sys.executable, os.path.abspath(__file__), '--mode', mode,
+               '--agents', str(args.agents), '--markets', str(args.markets),
+               '--latency', str(args.latency)] + (['--live'] if args.live else [])
+        out = subprocess.run(cmd, capture_output=True, text=True)
+        if out.returncode != 0 or not out.stdout.strip():
+            print(f"  {mode:<8} failed: {out.stderr.strip()[-300:]}")
+            continue
+        name, wall, p50, mx, rss, loads, errors = out.stdout.split()
+        print(f"  {name:<8} {float(wall):>8.2f} {float(p50):>8.2f} {float(mx):>8.2f} "
+              f"{float(rss):>9.1f} {loads:>6} {errors:>7}")
+
+
+if __name__ == '__main__':
+    main()
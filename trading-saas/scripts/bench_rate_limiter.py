@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: per-request overhead of the rate limiter.
+
+Usage: python scripts/bench_rate_limiter.py [--redis redis://127.0.0.1:6379/0]
+
+Measures check_rate_limit() for both algorithms on the in-memory path and,
+when --redis is given and reachable, on the Redis (Lua) path. The legacy
+per-key timestamp list and the old per-request ``redis.from_url`` client
+construction (before any connect/round trip) are included for comparison.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import redis  # noqa: E402
+from flask import Flask  # noqa: E402
+from app.middleware import rate_limiter as rl  # noqa: E402
+
+N = 100_000
+KEYS = 1_000
+LIMIT, WINDOW = 1_000, 60
+
+
+def _legacy(store, key, now):
+    cutoff = now - WINDOW
+    store[key] = [t for t in store.get(key, []) if t > cutoff]
+    if len(store[key]) >= LIMIT:
+        return False
+    store[key].append(now)
+    return True
+
+
+def _bench(label, fn, n=N):
+    t0 = time.perf_counter()
+    for i in range(n):
+        fn(f"bench:{i % KEYS}")
+    us = (time.perf_counter() - t0) / n * 1e6
+    print(f"  {label:<34} {us:8.1f} us/request")
+    return us
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--redis', default='')
+    args = p.parse_args()
+
+    app = Flask(__name__)
+    app.config['REDIS_URL'] = args.redis
+    with app.app_context():
+        print(f"{N} requests over {KEYS} keys, limit {LIMIT}/{WINDOW}s")
+        legacy_store = {}
+        _bench('legacy timestamp list (memory)', lambda k: _legacy(legacy_store, k, time.time()))
+        _bench('legacy redis.from_url per request', lambda k: redis.from_url(
+            'redis://127.0.0.1:6379/0', decode_responses=True), n=N // 10)
+        for algo in (rl.SLIDING_WINDOW, rl.TOKEN_BUCKET):
+            rl._rate_store.clear()
+            _bench(f'{algo} (memory)',
+                   lambda k, a=algo: rl._check_memory(k, LIMIT, WINDOW, a))
+
+        if args.redis:
+            if rl._check_redis('bench:probe', LIMIT, WINDOW, rl.SLIDING_WINDOW) is None:
+                print(f"  redis at {args.redis} unreachable, skipped")
+                return
+            for algo in (rl.SLIDING_WINDOW, rl.TOKEN_BUCKET):
+                _bench(f'{algo} (redis lua)',
+                       lambda k, a=algo: rl._check_redis(k, LIMIT, WINDOW, a), n=N // 10)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Tests for the materialized agent_stats table and the endpoints reading it."""
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from app.models.agent import Agent
+from app.models.bot_state import BotState
+from app.models.trade import Trade, AgentStats
+from app.services.stats_service import (
+    record_trade_close, rebuild_agent_stats, get_agent_stats, ensure_agent_stats,
+)
+
+
+def _closed_trade(agent_id, pnl, exit_time, fee='0.5'):
+    return Trade(
+        agent_id=agent_id, symbol='ETH/USDT', direction='LONG',
+        entry_price=Decimal('3000'), exit_price=Decimal('3010'),
+        amount=Decimal('100'), leverage=3,
+        entry_time=exit_time - timedelta(hours=1), exit_time=exit_time,
+        status='CLOSED', pnl=Decimal(str(pnl)), fee=Decimal(fee),
+    )
+
+
+def _python_drawdown(pnls, initial=2000):
+    """The per-request walk GET /api/agent/trades/stats used to do."""
+    peak = cumulative = initial
+    max_dd = 0
+    for p in pnls:
+        cumulative += p
+        peak = max(peak, cumulative)
+        max_dd = max(max_dd, (peak - cumulative) / peak * 100)
+    return max_dd
+
+
+class TestStatsService:
+
+    def test_incremental_matches_rebuild(self, app_ctx, db, agent):
+        pnls = [120, -300, 45, -80, 260, -15]
+        base = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        for i, pnl in enumerate(pnls):
+            t = _closed_trade(agent.id, pnl, base + timedelta(hours=i))
+            db.session.add(t)
+            db.session.flush()
+            record_trade_close(agent.id, pnl, Decimal('0.5'), t.exit_time)
+            db.session.commit()
+
+        stats = db.session.get(AgentStats, agent.id)
+        incremental = stats.to_dict()
+        assert incremental['total_trades'] == 6
+        assert incremental['win_trades'] == 3
+        assert incremental['total_pnl'] == sum(pnls)
+        assert incremental['gross_loss'] == 395
+        assert incremental['best_trade'] == 260 and incremental['worst_trade'] == -300
+        assert incremental['total_fees'] == 3.0
+        assert round(incremental['max_drawdown'], 2) == round(_python_drawdown(pnls), 2)
+
+        rebuilt = rebuild_agent_stats(agent.id).to_dict()
+        db.session.commit()
+        assert rebuilt == incremental
+
+    def test_first_close_backfills_history(self, app_ctx, db, agent, sample_trades):
+        t = _closed_trade(agent.id, 10, datetime(2026, 2, 2, tzinfo=timezone.utc))
+        db.session.add(t)
+        record_trade_close(agent.id, 10, 0, t.exit_time)
+        db.session.commit()
+        assert db.session.get(AgentStats, agent.id).closed_trades == 6
+
+    def test_initial_capital_change_triggers_rebuild(self, app_ctx, db, agent, sample_trades):
+        stats = get_agent_stats(agent.id)
+        assert float(stats.equity) == 2000 + 90
+        agent.trading_config.initial_capital = Decimal('5000')
+        db.session.commit()
+        assert float(get_agent_stats(agent.id).equity) == 5000 + 90
+
+    def test_ensure_only_creates_missing(self, app_ctx, db, agent, sample_trades):
+        assert ensure_agent_stats([agent.id]) == 1
+        assert ensure_agent_stats([agent.id]) == 0
+
+
+class TestEndpoints:
+
+    def _second_agent(self, db, admin, pnl):
+        other = Agent(admin_id=admin.id, username='other', email='o@test.com',
+                      password_hash='x', display_name='Other', is_active=True)
+        db.session.add(other)
+        db.session.flush()
+        db.session.add(BotState(agent_id=other.id, status='running'))
+        db.session.add(_closed_trade(other.id, pnl, datetime.now(timezone.utc)))
+        db.session.commit()
+        return other
+
+    def test_leaderboard_all_time_and_window(self, client, db, admin, admin_token,
+                                             agent, sample_trades):
+        other = self._second_agent(db, admin, 500)
+        headers = {'Authorization': f'Bearer {admin_token}'}
+
+        board = client.get('/api/admin/leaderboard?days=9999', headers=headers).get_json()
+        rows = {r['agent_id']: r for r in board['leaderboard']}
+        assert [r['agent_id'] for r in board['leaderboard']] == [other.id, agent.id]
+        assert rows[agent.id]['total_trades'] == 5
+        assert rows[agent.id]['total_pnl'] == 90
+        assert rows[agent.id]['win_rate'] == 60.0
+        assert rows[agent.id]['worst_trade'] == -30
+        assert rows[other.id]['bot_status'] == 'running'
+
+        # sample_trades closed in Feb 2026 fall outside a 7-day window
+        board = client.get('/api/admin/leaderboard?days=7', headers=headers).get_json()
+        rows = {r['agent_id']: r for r in board['leaderboard']}
+        assert rows[agent.id]['total_trades'] == 0
+        assert rows[agent.id]['bot_status'] == 'stopped'
+        assert rows[other.id]['total_pnl'] == 500
+
+    def test_dashboard_aggregates(self, client, db, admin, admin_token, agent, sample_trades):
+        self._second_agent(db, admin, -40)
+        data = client.get('/api/admin/dashboard',
+                          headers={'Authorization': f'Bearer {admin_token}'}).get_json()
+        assert data == {
+            'total_agents': 2, 'active_agents': 2, 'trading_enabled': 1,
+            'running_bots': 1, 'total_pnl': 50.0,
+        }
+
+    def test_agent_stats_endpoint(self, client, agent_token, sample_trades):
+        data = client.get('/api/agent/trades/stats',
+                          headers={'Authorization': f'Bearer {agent_token}'}).get_json()
+        assert data['total_trades'] == 5
+        assert data['total_pnl'] == 90
+        assert data['profit_factor'] == 2.5
+        assert data['max_drawdown'] == round(_python_drawdown([50, -30, 50, -30, 50]), 2)
+        assert data['current_capital'] == 2090
@@ -0,0 +1,195 @@
+"""Tests for lease-based sharding of agents over several bot runners.
+
+Each runner gets its own runner_id and fake BotManager; they share the test
+database exactly like runner processes share MySQL.
+"""
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from app.engine.bot_leases import rendezvous_owner
+from app.engine.bot_runner import BotRunner
+from app.extensions import db as _db
+from app.models.agent import Agent
+from app.models.bot_runtime import BotCommand, BotLease, BotRunnerNode
+from app.models.bot_state import BotState
+from tests.test_bot_runner import FakeManager
+
+
+class ShardManager(FakeManager):
+    """FakeManager plus what the lease loop uses."""
+
+    owns = None
+
+    def start_bot(self, agent_id, paused=False):
+        ok, msg = super().start_bot(agent_id, paused=paused)
+        BotState.query.filter_by(agent_id=agent_id).update(
+            {'status': 'paused' if paused else 'running'})
+        _db.session.commit()
+        return ok, msg
+
+    def pause_bot(self, agent_id):
+        self.calls.append(('pause', agent_id))
+        return True, "Bot paused"
+
+    slow = False    # detached bots keep running until slow is cleared
+
+    def detach_bots(self, agent_ids=None):
+        for agent_id in agent_ids:
+            self.calls.append(('detach', agent_id))
+            self._detaching[agent_id] = 'running'
+        return self.reap_detached()
+
+    def reap_detached(self):
+        if self.slow:
+            return set()
+        done = set(self._detaching)
+        for agent_id in done:
+            self._bots.pop(agent_id, None)
+        self._detaching.clear()
+        return done
+
+
+@pytest.fixture
+def agents(app_ctx, admin):
+    ids = []
+    for i in range(12):
+        a = Agent(admin_id=admin.id, username=f'shard{i}', email=f's{i}@test.com',
+                  password_hash='x', is_active=True, is_trading_enabled=True)
+        _db.session.add(a)
+        _db.session.flush()
+        _db.session.add(BotState(agent_id=a.id, status='running'))
+        ids.append(a.id)
+    _db.session.commit()
+    return ids
+
+
+@pytest.fixture
+def make_runner(app):
+    def _make(name):
+        r = BotRunner(app, poll_interval=0.01, status_interval=60, runner_id=name)
+        r.manager = ShardManager()
+        r.manager.owns = lambda agent_id, r=r: agent_id in r._held
+        return r
+    return _make
+
+
+def tick(*runners, rounds=2):
+    for _ in range(rounds):
+        for r in runners:
+            r.publish_status()
+            r.rebalance()
+
+
+def _age_runner(runner_id, seconds):
+    past = datetime.now(timezone.utc) - timedelta(seconds=seconds)
+    BotRunnerNode.query.filter_by(runner_id=runner_id).update({'heartbeat_at': past})
+    BotLease.query.filter_by(runner_id=runner_id).update({'expires_at': past})
+    _db.session.commit()
+
+
+def test_rendezvous_moves_only_agents_of_new_runner():
+    before = {a: rendezvous_owner(a, ['r1', 'r2']) for a in range(500)}
+    after = {a: rendezvous_owner(a, ['r1', 'r2', 'r3']) for a in range(500)}
+    moved = [a for a in before if before[a] != after[a]]
+    assert moved and all(after[a] == 'r3' for a in moved)
+    assert 100 < len(moved) < 250
+
+
+def test_runners_split_agents_without_overlap(agents, make_runner):
+    a, b = make_runner('a'), make_runner('b')
+    tick(a, b)
+    on_a, on_b = set(a.manager._bots), set(b.manager._bots)
+    assert on_a and on_b
+    assert on_a | on_b == set(agents) and not on_a & on_b
+    assert all(rendezvous_owner(x, ['a', 'b']) == 'a' for x in on_a)
+    assert {l.agent_id for l in BotLease.query.filter_by(runner_id='a')} == on_a
+
+
+def test_new_runner_takes_its_share(agents, make_runner):
+    a = make_runner('a')
+    tick(a)
+    assert set(a.manager._bots) == set(agents)
+
+    b = make_runner('b')
+    tick(b, a, b, rounds=1)     # b joins, a hands over, b claims
+    moved = {x for x in agents if rendezvous_owner(x, ['a', 'b']) == 'b'}
+    assert set(b.manager._bots) == moved
+    assert ('detach', sorted(moved)[0]) in a.manager.calls
+    assert set(a.manager._bots) == set(agents) - moved
+
+
+def test_dead_runner_agents_taken_over_after_lease_expiry(app, agents, make_runner):
+    a, b = make_runner('a'), make_runner('b')
+    tick(a, b)
+    orphaned = set(b.manager._bots)
+
+    # b stops heartbeating but its leases are still valid: nobody steals them
+    BotRunnerNode.query.filter_by(runner_id='b').update(
+        {'heartbeat_at': datetime.now(timezone.utc) - timedelta(minutes=5)})
+    _db.session.commit()
+    tick(a, rounds=1)
+    assert not orphaned & set(a.manager._bots)
+
+    _age_runner('b', 60)
+    tick(a, rounds=1)
+    assert set(a.manager._bots) == set(agents)
+
+
+def test_slow_stopping_bot_keeps_lease_until_it_exits(agents, make_runner):
+    a = make_runner('a')
+    tick(a)
+    a.manager.slow = True
+    b = make_runner('b')
+    tick(b, a, b, rounds=1)
+    moved = {x for x in agents if rendezvous_owner(x, ['a', 'b']) == 'b'}
+    # a's threads are still finishing a scan: b must not start them yet
+    assert not set(b.manager._bots) & moved
+    assert moved <= {l.agent_id for l in BotLease.query.filter_by(runner_id='a')}
+
+    a.manager.slow = False
+    tick(a, b, rounds=1)
+    assert set(b.manager._bots) == moved
+    assert set(a.manager._bots) == set(agents) - moved
+
+
+def test_paused_agent_is_resumed_paused(agents, make_runner):
+    BotState.query.filter_by(agent_id=agents[0]).update({'status': 'paused'})
+    _db.session.commit()
+    a = make_runner('a')
+    tick(a, rounds=1)
+    # started paused, not started then paused (the thread could trade in between)
+    assert a.manager._bots[agents[0]].paused
+    assert not a.manager._bots[agents[1]].paused
+    assert ('pause', agents[0]) not in a.manager.calls
+    assert BotState.query.filter_by(agent_id=agents[0]).one().status == 'paused'
+
+
+def test_fencing_detaches_bot_whose_lease_was_taken(agents, make_runner):
+    a = make_runner('a')
+    tick(a, rounds=1)
+    BotLease.query.filter_by(agent_id=agents[0]).update({'runner_id': 'someone-else'})
+    _db.session.commit()
+    tick(a, rounds=1)
+    assert ('detach', agents[0]) in a.manager.calls
+    assert agents[0] not in a.manager._bots
+
+
+def test_commands_go_to_the_owning_runner(agents, make_runner):
+    a, b = make_runner('a'), make_runner('b')
+    for r in (a, b):
+        r.publish_status()
+    target = next(x for x in agents if rendezvous_owner(x, ['a', 'b']) == 'b')
+    BotState.query.update({'status': 'stopped'})
+    _db.session.add(BotCommand(agent_id=target, action='start'))
+    _db.session.commit()
+
+    assert a.process_commands() == 0
+    assert b.process_commands() == 1
+    assert target in b.manager._bots
+    assert _db.session.get(BotLease, target).runner_id == 'b'
+
+    _db.session.add(BotCommand(agent_id=target, action='stop'))
+    _db.session.commit()
+    assert a.process_commands() == 0 and b.process_commands() == 1
+    assert _db.session.get(BotLease, target) is None
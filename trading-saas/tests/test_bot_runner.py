@@ -0,0 +1,239 @@
+"""Tests for the external bot runner (command queue + runtime snapshots)."""
+import threading
+from collections import deque
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from app.engine import bot_commands
+from app.engine.bot_commands import RemoteBotControl
+from app.engine.bot_manager import BotManager
+from app.engine.bot_runner import BotRunner
+from app.models.bot_runtime import BotCommand, BotRuntime, BotRunnerNode
+from app.models.bot_state import BotState
+
+
+class FakeBot:
+    def __init__(self):
+        self.is_running = True
+        self.positions = {'BTC/USDT': {}, 'ETH/USDT': {}}
+        self.scan_count = 7
+        self.activity_log = deque([{'time': 't', 'level': 'info', 'message': 'hi'}])
+        self.last_scan_result = {'signals_analyzed': 3}
+
+    def stop(self):
+        self.is_running = False
+
+    def detach(self):
+        self.stop()
+
+
+class FakeManager:
+    def __init__(self):
+        self._bots, self._threads, self.calls = {}, {}, []
+        self._detaching = {}
+
+    def reap_detached(self):
+        return set()
+
+    def start_bot(self, agent_id, paused=False):
+        self.calls.append(('start', agent_id))
+        self._bots[agent_id] = FakeBot()
+        self._bots[agent_id].paused = paused
+        return True, f"Bot started for agent {agent_id}"
+
+    def stop_bot(self, agent_id):
+        self.calls.append(('stop', agent_id))
+        if self._bots.pop(agent_id, None) is None:
+            return False, "Bot not found or not running"
+        return True, f"Bot stopped for agent {agent_id}"
+
+
+@pytest.fixture
+def runner(app, db):
+    r = BotRunner(app, poll_interval=0.01, status_interval=60)
+    r.manager = FakeManager()
+    return r
+
+
+@pytest.fixture
+def external(app, runner, monkeypatch):
+    """BOT_RUNNER=external; the runner handles commands while the API waits."""
+    monkeypatch.setitem(app.config, 'BOT_RUNNER', 'external')
+    monkeypatch.setattr(bot_commands.time, 'sleep', lambda s: runner.process_commands())
+    return runner
+
+
+def test_command_roundtrip_and_snapshot(app_ctx, agent, external):
+    control = RemoteBotControl(timeout=5)
+    assert control.execute('start', agent.id) == (True, f"Bot started for agent {agent.id}")
+    assert external.manager.calls == [('start', agent.id)]
+
+    cmd = BotCommand.query.one()
+    assert (cmd.status, cmd.runner_id) == ('done', external.runner_id)
+
+    status = control.get_status(agent.id)
+    assert status['in_memory'] and status['is_running']
+    assert (status['positions'], status['scan_count']) == (2, 7)
+    assert control.get_logs(agent.id)[0]['message'] == 'hi'
+    assert control.get_last_scan(agent.id) == {'signals_analyzed': 3}
+    assert control.running_count() == 1
+    assert control.market_data_stats()['runners'][0]['bots'] == 1
+
+    ok, msg = control.execute('stop', agent.id)
+    assert ok
+    assert BotRuntime.query.count() == 0      # snapshot removed with the bot
+    assert control.get_logs(agent.id) is None
+
+
+def test_failed_command_reports_runner_message(app_ctx, agent, external):
+    ok, msg = RemoteBotControl(timeout=5).execute('stop', agent.id)
+    assert (ok, msg) == (False, "Bot not found or not running")
+    assert BotCommand.query.one().status == 'failed'
+
+
+def test_timed_out_command_is_not_executed_later(app_ctx, agent, runner):
+    ok, msg = RemoteBotControl(timeout=0).execute('start', agent.id)
+    assert not ok and 'did not respond' in msg
+    assert runner.process_commands() == 0
+    assert runner.manager.calls == []
+
+
+def test_expired_pending_command_is_dropped(app, app_ctx, agent, runner):
+    from app.extensions import db
+    old = datetime.now(timezone.utc) - timedelta(
+        seconds=app.config.get('BOT_COMMAND_TIMEOUT', 15) + 5)
+    db.session.add(BotCommand(agent_id=agent.id, action='start', created_at=old))
+    db.session.commit()
+
+    assert runner.process_commands() == 0
+    assert runner.manager.calls == []
+    assert BotCommand.query.one().status == 'failed'
+
+
+def test_stale_snapshot_is_ignored(app_ctx, agent, runner):
+    from app.extensions import db
+    runner.manager.start_bot(agent.id)
+    runner.publish_status()
+    control = RemoteBotControl(timeout=0)
+    assert control.get_status(agent.id)['in_memory']
+
+    row = db.session.get(BotRuntime, agent.id)
+    row.updated_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+    node = db.session.get(BotRunnerNode, runner.runner_id)
+    node.heartbeat_at = row.updated_at
+    db.session.commit()
+    assert not control.get_status(agent.id)['in_memory']
+    assert control.running_count() == 0
+    assert control.market_data_stats() == {'runners': []}
+
+
+def test_api_goes_through_runner(client, agent_token, agent, external):
+    headers = {'Authorization': f'Bearer {agent_token}'}
+    resp = client.post('/api/agent/bot/start', headers=headers)
+    assert resp.status_code == 200
+    assert resp.get_json()['status'] == 'running'
+
+    assert client.get('/api/agent/bot/logs', headers=headers).get_json()['logs'][0]['message'] == 'hi'
+    assert client.get('/api/agent/bot/signals', headers=headers).get_json() == {'signals_analyzed': 3}
+    assert client.get('/api/health').get_json()['running_bots'] == 1
+
+
+def test_shutdown_keeps_saved_status(app, app_ctx, agent):
+    """Runner exit must not mark bots stopped, so the next runner resumes them."""
+    from app.extensions import db
+
+    class StoppingBot(FakeBot):
+        def stop(self):
+            # AgentBot.run writes 'stopped' on a clean exit
+            super().stop()
+            BotState.query.filter_by(agent_id=agent.id).update({'status': 'stopped'})
+            db.session.commit()
+
+    state = BotState.query.filter_by(agent_id=agent.id).one()
+    state.status, state.pid = 'paused', 1234
+    db.session.commit()
+
+    manager = BotManager(app)
+    manager._bots[agent.id] = StoppingBot()
+    manager.shutdown()
+
+    db.session.expire_all()
+    state = BotState.query.filter_by(agent_id=agent.id).one()
+    assert (state.status, state.pid) == ('paused', None)
+    assert manager._bots == {}
+
+
+def test_start_paused_pauses_before_thread_runs(app, app_ctx, agent, monkeypatch):
+    from app.engine import bot_manager
+    from app.extensions import db
+    from app.models.agent_config import AgentApiKey
+
+    db.session.add(AgentApiKey(agent_id=agent.id, binance_api_key_enc=b'k',
+                               binance_api_secret_enc=b's', encryption_iv=b'i' * 16,
+                               permissions_verified=True))
+    db.session.commit()
+
+    seen = []
+
+    class RecordingBot:
+        def __init__(self, agent_id, app):
+            self._paused = False
+            self.is_running = True
+
+        def pause(self):
+            self._paused = True
+
+        def run(self, scan_interval):
+            seen.append(self._paused)
+
+        def stop(self):
+            self.is_running = False
+
+    monkeypatch.setattr(bot_manager, 'AgentBot', RecordingBot)
+    manager = BotManager(app)
+    ok, _ = manager.start_bot(agent.id, paused=True)
+    assert ok
+    manager._threads[agent.id].join(5)
+    assert seen == [True]
+    db.session.expire_all()
+    assert BotState.query.filter_by(agent_id=agent.id).one().status == 'paused'
+
+
+def test_slow_detach_keeps_bot_until_thread_exits(app, app_ctx, agent, monkeypatch):
+    """A bot mid-scan outlives the join timeout: keep it, restore status after it exits."""
+    from app.engine.agent_bot import AgentBot
+    from app.extensions import db
+
+    in_scan, finish = threading.Event(), threading.Event()
+
+    def slow_scan(self):
+        in_scan.set()
+        finish.wait(5)
+
+    monkeypatch.setattr(AgentBot, '_load_config', lambda self: None)
+    monkeypatch.setattr(AgentBot, '_scan_once', slow_scan)
+    manager = BotManager(app)
+    manager.owns = lambda agent_id: True
+    bot = AgentBot(agent.id, app)
+    thread = threading.Thread(target=bot.run, args=(0.01,), daemon=True)
+    manager._bots[agent.id], manager._threads[agent.id] = bot, thread
+    thread.start()
+    assert in_scan.wait(5)
+
+    assert manager.detach_bots([agent.id], timeout=0.05) == set()
+    assert agent.id in manager._bots and agent.id in manager._detaching
+    assert manager.start_bot(agent.id) == (False, "Bot is still stopping")
+    manager.auto_restart_crashed()      # watchdog leaves it alone
+    assert manager._threads[agent.id] is thread
+
+    finish.set()
+    thread.join(5)
+    db.session.expire_all()
+    # no final 'stopped' from the detached bot
+    assert BotState.query.filter_by(agent_id=agent.id).one().status == 'running'
+    assert manager.reap_detached() == {agent.id}
+    assert manager._bots == {} and manager._detaching == {}
+    db.session.expire_all()
+    state = BotState.query.filter_by(agent_id=agent.id).one()
+    assert (state.status, state.pid) == ('running', None)
@@ -0,0 +1,187 @@
+"""Tests for the shared ccxt market metadata / session pool."""
+import gc
+import threading
+
+import ccxt
+import pytest
+
+from app.engine.exchange_pool import ExchangePool, MARKET_ATTRS, _load_markets
+from app.engine.order_executor import OrderExecutor
+from tests.test_market_data import FakeClock
+
+
+def _market(base, spot=False):
+    symbol = f'{base}/USDT' if spot else f'{base}/USDT:USDT'
+    return {
+        'id': f'{base}USDT', 'symbol': symbol, 'base': base, 'quote': 'USDT',
+        'settle': None if spot else 'USDT', 'baseId': base, 'quoteId': 'USDT',
+        'type': 'spot' if spot else 'swap', 'spot': spot, 'swap': not spot,
+        'future': False, 'option': False, 'contract': not spot, 'active': True,
+        'linear': None if spot else True, 'inverse': None if spot else False,
+        'precision': {'amount': 0.001, 'price': 0.1},
+        'limits': {'amount': {'min': 0.001, 'max': 1000}, 'cost': {'min': 5}},
+        'info': {'symbol': f'{base}USDT'},
+    }
+
+
+class FakeLoader:
+    """Builds real ccxt market structures offline and counts loads."""
+
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+        self.lock = threading.Lock()
+
+    def __call__(self, exchange_name, is_testnet, session):
+        with self.lock:
+            self.calls.append((exchange_name, is_testnet))
+        if self.fail:
+            raise ccxt.NetworkError('exchangeInfo unavailable')
+        client = getattr(ccxt, exchange_name)({'session': session})
+        client.set_markets([_market(b, spot) for b in ('BTC', 'ETH') for spot in (True, False)])
+        client.session = None   # like _load_markets: don't close the shared session
+        return {attr: getattr(client, attr) for attr in MARKET_ATTRS}
+
+
+@pytest.fixture
+def pool():
+    clock = FakeClock(1_700_000_000)
+    loader = FakeLoader()
+    pool = ExchangePool(loader=loader, ttl=3600, retry=60, clock=clock)
+    return pool, loader, clock
+
+
+def _client(pool, exchange='binance', testnet=False):
+    return pool.create_client(exchange, {
+        'apiKey': 'k', 'secret': 's', 'enableRateLimit': True,
+        'options': {'defaultType': 'future'},
+    }, is_testnet=testnet)
+
+
+def test_clients_share_one_market_load(pool):
+    pool, loader, _ = pool
+    clients = [_client(pool) for _ in range(20)]
+    for c in clients:
+        c.load_markets()
+    assert loader.calls == [('binance', False)]
+    assert all(c.markets is clients[0].markets for c in clients)
+    # ccxt's own helpers work on the injected metadata
+    assert clients[5].market('BTC/USDT')['symbol'] == 'BTC/USDT:USDT'
+    assert clients[5].amount_to_precision('ETH/USDT:USDT', 0.12345) == '0.123'
+
+    stats = pool.get_stats()
+    assert stats['clients'] == 20 and stats['market_loads'] == 1
+    assert stats['market_injections'] == 20
+    assert stats['markets']['binance']['markets'] == 4
+
+
+def test_sessions_shared_per_exchange_and_testnet(pool):
+    pool, loader, _ = pool
+    a, b = _client(pool), _client(pool)
+    t = _client(pool, testnet=True)
+    assert a.session is b.session is pool.session('binance')
+    assert t.session is not a.session
+    a.load_markets()
+    t.load_markets()
+    assert loader.calls == [('binance', False), ('binance', True)]
+
+
+def test_markets_reloaded_after_ttl(pool):
+    pool, loader, clock = pool
+    a = _client(pool)
+    a.load_markets()
+    old = a.markets
+    clock.now += 3599
+    a.load_markets()
+    assert len(loader.calls) == 1
+
+    clock.now += 1
+    a.load_markets()
+    assert len(loader.calls) == 2
+    assert a.markets is not old and a._pool_version == 2
+
+
+def test_failed_reload_keeps_snapshot_and_backs_off(pool):
+    pool, loader, clock = pool
+    a = _client(pool)
+    a.load_markets()
+    loader.fail = True
+    clock.now += 3600
+    assert a.load_markets() is a.markets      # old snapshot still served
+    clock.now += 30
+    a.load_markets()
+    assert len(loader.calls) == 2             # no retry within `retry`
+    assert pool.get_stats()['market_load_errors'] == 1
+
+    loader.fail = False
+    clock.now += 30
+    a.load_markets()
+    assert len(loader.calls) == 3 and a._pool_version == 2
+
+
+def test_first_load_failure_propagates(pool):
+    pool, loader, _ = pool
+    loader.fail = True
+    with pytest.raises(ccxt.NetworkError):
+        _client(pool).load_markets()
+    loader.fail = False
+    assert 'BTC/USDT:USDT' in _client(pool).load_markets()
+
+
+def test_concurrent_first_use_loads_once(pool):
+    pool, loader, _ = pool
+    clients = [_client(pool) for _ in range(16)]
+    barrier = threading.Barrier(len(clients))
+
+    def worker(c):
+        barrier.wait()
+        c.load_markets()
+
+    threads = [threading.Thread(target=worker, args=(c,)) for c in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(loader.calls) == 1
+    assert all(c.markets is clients[0].markets for c in clients)
+
+
+def test_order_executor_uses_process_pool(pool, monkeypatch):
+    pool, loader, _ = pool
+    monkeypatch.setattr(ExchangePool, '_instance', pool)
+    a = OrderExecutor('k1', 's1', exchange_name='binance')
+    b = OrderExecutor('k2', 's2', exchange_name='binance')
+    assert a.exchange.apiKey == 'k1' and b.exchange.apiKey == 'k2'
+    assert a.exchange.session is b.exchange.session
+    assert a.exchange.load_markets() is b.exchange.load_markets()
+    assert len(loader.calls) == 1
+
+
+def _watch_close(session):
+    closed = []
+    session.close = lambda: closed.append(True)
+    return closed
+
+
+def test_collected_client_leaves_shared_session_open(pool):
+    pool, _, _ = pool
+    closed = _watch_close(pool.session('binance'))
+    client = _client(pool)
+    client.load_markets()
+    client.close()
+    del client
+    gc.collect()
+    assert not closed
+    assert _client(pool).session is pool.session('binance')
+
+
+def test_default_loader_leaves_shared_session_open(monkeypatch):
+    monkeypatch.setattr(ccxt.binance, 'fetch_markets', lambda self, params={}: [
+        _market(b, spot) for b in ('BTC', 'ETH') for spot in (True, False)])
+    monkeypatch.setattr(ccxt.binance, 'fetch_currencies', lambda self, params={}: None)
+    pool = ExchangePool()
+    closed = _watch_close(pool.session('binance'))
+    attrs = _load_markets('binance', False, pool.session('binance'))
+    gc.collect()
+    assert 'BTC/USDT:USDT' in attrs['markets']
+    assert not closed
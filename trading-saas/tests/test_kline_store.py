@@ -0,0 +1,207 @@
+"""Tests for the backtest columnar kline store (backtest_2025/kline_store.py)."""
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'backtest_2025'))
+
+from kline_store import BAR_DTYPE, KlineStore, SymbolNotListed  # noqa: E402
+
+H = 3_600_000
+T0 = 1_700_000_000_000 - 1_700_000_000_000 % H
+
+
+def _bar(t):
+    i = (t - T0) // H
+    return [t, 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 10.0 * i, t + H - 1, '0']
+
+
+class FakeFetcher:
+    """Serves raw Binance-style pages from a synthetic series and logs calls."""
+
+    def __init__(self, page=5, listed=('BTCUSDT',), first=None, last=None):
+        self.page = page
+        self.listed = listed
+        self.first, self.last = first, last   # trading window (listing/delisting)
+        self.calls = []
+        self.fail_after = None    # raise after yielding this many pages
+        self.delay = 0            # seconds per page, lets concurrent updates interleave
+
+    def __call__(self, market_symbol, interval, start_ms, end_ms):
+        self.calls.append((start_ms, end_ms))
+        if market_symbol not in self.listed:
+            raise SymbolNotListed(market_symbol)
+        served = 0
+        t = max(start_ms, self.first or start_ms)
+        end_ms = min(end_ms, self.last or end_ms)
+        while t <= end_ms:
+            # the exchange also returns the forming bar (time <= end_ms)
+            page = [_bar(x) for x in range(t, min(end_ms, t + (self.page - 1) * H) + 1, H)]
+            if self.fail_after is not None and served == self.fail_after:
+                raise RuntimeError('connection reset')
+            time.sleep(self.delay)
+            yield page
+            served += 1
+            t = page[-1][0] + H
+
+
+@pytest.fixture
+def store(tmp_path):
+    fetcher = FakeFetcher()
+    clock = [(T0 + 20 * H + 1) / 1000]   # bar 20 is forming
+    s = KlineStore(str(tmp_path), fetch_pages=fetcher, clock=lambda: clock[0])
+    return s, fetcher, clock
+
+
+def test_update_stores_only_closed_bars(store):
+    s, fetcher, _ = store
+    assert s.update('BTC', '1h', T0, T0 + 30 * H) == 20
+    arr = s.load('BTC', '1h')
+    assert arr.dtype == BAR_DTYPE and isinstance(arr, np.memmap)
+    assert arr['time'][0] == T0 and arr['time'][-1] == T0 + 19 * H
+    assert np.all(np.diff(arr['time']) == H)
+    assert s.load_bars('BTC', '1h')[3] == _bar(T0 + 3 * H)[:6]
+    assert s.symbols('1h') == ['BTC']
+
+
+def test_load_range(store):
+    s, _, _ = store
+    s.update('BTC', '1h', T0, T0 + 19 * H)
+    arr = s.load('BTC', '1h', T0 + 5 * H, T0 + 7 * H)
+    assert arr['time'].tolist() == [T0 + 5 * H, T0 + 6 * H, T0 + 7 * H]
+    assert not len(s.load('ETH', '1h'))
+
+
+def test_update_fetches_only_new_tail(store):
+    s, fetcher, clock = store
+    s.update('BTC', '1h', T0, T0 + 30 * H)
+    fetcher.calls.clear()
+    assert s.update('BTC', '1h', T0, T0 + 30 * H) == 0
+    assert fetcher.calls == []          # nothing new has closed yet
+
+    clock[0] += 4 * H / 1000
+    assert s.update('BTC', '1h', T0, T0 + 30 * H) == 4
+    assert [start for start, _ in fetcher.calls] == [T0 + 20 * H]
+    assert len(s.load('BTC', '1h')) == 24
+
+
+def test_backfill_head(store):
+    s, fetcher, _ = store
+    s.update('BTC', '1h', T0 + 10 * H, T0 + 19 * H)
+    fetcher.calls.clear()
+    assert s.update('BTC', '1h', T0, T0 + 19 * H) == 10
+    assert fetcher.calls == [(T0, T0 + 9 * H)]
+    times = s.load('BTC', '1h')['time']
+    assert times.tolist() == [T0 + i * H for i in range(20)]
+    assert not os.path.exists(s.path('BTC', '1h') + '.tmp')
+
+
+def test_interrupted_update_resumes(store, tmp_path):
+    s, fetcher, clock = store
+    fetcher.fail_after = 2
+    with pytest.raises(RuntimeError):
+        s.update('BTC', '1h', T0, T0 + 19 * H)
+    assert len(s.load('BTC', '1h')) == 10   # two pages of 5 kept
+
+    fetcher.fail_after = None
+    fetcher.calls.clear()
+    assert s.update('BTC', '1h', T0, T0 + 19 * H) == 10
+    assert fetcher.calls == [(T0 + 10 * H, T0 + 19 * H)]
+
+    fresh = KlineStore(str(tmp_path / 'fresh'), fetch_pages=FakeFetcher(),
+                       clock=lambda: clock[0])
+    fresh.update('BTC', '1h', T0, T0 + 19 * H)
+    assert np.array_equal(s.load('BTC', '1h'), fresh.load('BTC', '1h'))
+
+
+def test_torn_record_truncated_and_overlap_dropped(store):
+    s, _, _ = store
+    s.update('BTC', '1h', T0, T0 + 9 * H)
+    with open(s.path('BTC', '1h'), 'ab') as f:
+        f.write(b'\x00' * 13)           # crash mid-write
+    assert s.append('BTC', '1h', [_bar(T0 + i * H) for i in range(8, 12)]) == 2
+    assert s.load('BTC', '1h')['time'].tolist() == [T0 + i * H for i in range(12)]
+
+
+def test_interior_gap_refilled(store):
+    s, fetcher, _ = store
+    s.append('BTC', '1h', [_bar(T0 + i * H) for i in range(5)])
+    s.append('BTC', '1h', [_bar(T0 + i * H) for i in range(10, 20)])
+    assert s.update('BTC', '1h', T0, T0 + 19 * H) == 5
+    assert fetcher.calls == [(T0 + 5 * H, T0 + 9 * H)]
+    assert s.load('BTC', '1h')['time'].tolist() == [T0 + i * H for i in range(20)]
+
+
+def test_concurrent_updates_lose_no_bars(tmp_path):
+    fetcher = FakeFetcher(page=7)
+    fetcher.delay = 0.002
+    clock = (T0 + 400 * H) / 1000
+    stores = [KlineStore(str(tmp_path), fetch_pages=fetcher, clock=lambda: clock)
+              for _ in range(3)]
+    # one "year" per thread, like dashboard/job threads loading different years
+    threads = [threading.Thread(target=st.update,
+                                args=('BTC', '1h', T0 + k * 100 * H, T0 + (k + 1) * 100 * H - H))
+               for k, st in enumerate(stores)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    times = stores[0].load('BTC', '1h')['time']
+    assert times.tolist() == [T0 + i * H for i in range(300)]
+    assert not [f for f in os.listdir(tmp_path / '1h') if f.endswith('.tmp')]
+
+
+def test_ranges_without_bars_fetched_once(tmp_path):
+    # listed at bar 5, delisted after bar 14
+    fetcher = FakeFetcher(first=T0 + 5 * H, last=T0 + 14 * H)
+    clock = (T0 + 100 * H) / 1000
+    s = KlineStore(str(tmp_path), fetch_pages=fetcher, clock=lambda: clock)
+    assert s.update('BTC', '1h', T0, T0 + 29 * H) == 10
+    assert s.coverage('BTC', '1h') == [[T0, T0 + 29 * H]]
+    for _ in range(3):
+        assert s.update('BTC', '1h', T0, T0 + 29 * H) == 0
+    assert len(fetcher.calls) == 1
+
+    # persisted: another process sees the same coverage
+    again = KlineStore(str(tmp_path), fetch_pages=fetcher, clock=lambda: clock)
+    assert again.update('BTC', '1h', T0 + 3 * H, T0 + 20 * H) == 0
+    assert again.update('BTC', '1h', T0, T0 + 39 * H) == 0
+    assert fetcher.calls[1:] == [(T0 + 30 * H, T0 + 39 * H)]
+
+
+def test_range_before_listing_without_any_bars_fetched_once(tmp_path):
+    fetcher = FakeFetcher(first=T0 + 50 * H)
+    s = KlineStore(str(tmp_path), fetch_pages=fetcher, clock=lambda: (T0 + 100 * H) / 1000)
+    for _ in range(3):
+        assert s.update('BTC', '1h', T0, T0 + 19 * H) == 0
+    assert len(fetcher.calls) == 1
+    assert not len(s.load('BTC', '1h'))
+
+
+def test_unlisted_symbol(store):
+    s, _, _ = store
+    with pytest.raises(SymbolNotListed):
+        s.update('NOPE', '1h', T0, T0 + 5 * H)
+    assert not os.path.exists(s.path('NOPE', '1h'))
+
+
+def test_multi_backtest_reads_rows_on_demand(store):
+    from backtest_v6_multi import build_time_index
+    s, _, _ = store
+    s.update('BTC', '1h', T0, T0 + 19 * H)
+    s.append('ETH', '1h', [_bar(T0 + i * H) for i in range(5, 20) if i != 9])
+
+    ref_times, aligned = build_time_index(s.load_all('1h'))
+    assert ref_times == [T0 + i * H for i in range(20)]
+    eth = aligned['ETH']
+    assert len(eth) == 20
+    assert eth[4] is None and eth[9] is None
+    assert eth[10] == tuple(_bar(T0 + 10 * H)[:6])
+    # lookback skips the gap and stops at the symbol's first bar
+    assert [b[0] for b in eth.lookback(11, 4)] == [T0 + i * H for i in (7, 8, 10, 11)]
+    assert len(eth.lookback(11, 100)) == 6
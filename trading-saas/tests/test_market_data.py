@@ -0,0 +1,228 @@
+"""Tests for the shared MarketDataHub cache."""
+import threading
+import time
+
+from app.engine.market_data import MarketDataHub, INTERVAL_MS
+
+HOUR_MS = INTERVAL_MS['1h']
+
+
+class FakeExchange:
+    """Serves synthetic hourly candles up to the current (fake) time."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.calls = []
+        self.price_calls = 0
+        self.book_calls = 0
+        self.book_down = False
+
+    def fetch_klines(self, symbol, interval, limit, exchange='binance'):
+        self.calls.append((symbol, interval, limit, exchange))
+        now_ms = int(self.clock.now * 1000)
+        last_open = now_ms - now_ms % HOUR_MS
+        return [{
+            'time': last_open - (limit - 1 - i) * HOUR_MS,
+            'open': 100.0, 'high': 101.0, 'low': 99.0,
+            'close': 100.0 + self.clock.now % 7,
+            'volume': 1.0,
+        } for i in range(limit)]
+
+    def fetch_price(self, symbol, exchange='binance'):
+        self.price_calls += 1
+        return 123.0
+
+    def fetch_prices(self, exchange='binance'):
+        self.book_calls += 1
+        if self.book_down:
+            return None
+        return {'BTCUSDT': 123.0 + self.book_calls, 'ETHUSDT': 45.0, '1000PEPEUSDT': 0.01}
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _make_hub(start=1_700_000_000 + 600):
+    clock = FakeClock(start)
+    fake = FakeExchange(clock)
+    hub = MarketDataHub(fetch_klines=fake.fetch_klines, fetch_price=fake.fetch_price,
+                        fetch_prices=fake.fetch_prices, kline_ttl=15, price_ttl=3,
+                        price_book_max_age=30, clock=clock)
+    return hub, fake, clock
+
+
+class TestKlineCache:
+
+    def test_repeated_requests_share_one_fetch(self):
+        hub, fake, _ = _make_hub()
+        for _ in range(50):
+            candles = hub.get_klines('BTC/USDT', '1h', 100)
+            assert len(candles) == 100
+        assert len(fake.calls) == 1
+        stats = hub.get_stats()
+        assert stats['kline_requests'] == 50
+        assert stats['kline_hits'] == 49
+        assert stats['kline_hit_rate'] == 0.98
+
+    def test_smaller_limit_served_from_larger_series(self):
+        hub, fake, _ = _make_hub()
+        hub.get_klines('BTC/USDT', '1h', 100)
+        candles = hub.get_klines('BTC/USDT', '1h', 60)
+        assert len(candles) == 60
+        assert len(fake.calls) == 1
+
+    def test_keys_are_isolated_by_exchange(self):
+        hub, fake, _ = _make_hub()
+        hub.get_klines('BTC/USDT', '1h', 100, exchange='binance')
+        hub.get_klines('BTC/USDT', '1h', 100, exchange='bitget')
+        assert len(fake.calls) == 2
+
+    def test_ttl_expiry_triggers_incremental_fetch(self):
+        hub, fake, clock = _make_hub()
+        hub.get_klines('ETH/USDT', '1h', 100)
+        clock.now += 20
+        candles = hub.get_klines('ETH/USDT', '1h', 100)
+        assert len(candles) == 100
+        assert fake.calls[-1][2] == 2  # only the forming bar (+1 overlap)
+        assert hub.get_stats()['kline_incremental_fetches'] == 1
+
+    def test_bar_close_invalidates_and_dedups_by_open_time(self):
+        hub, fake, clock = _make_hub()
+        first = hub.get_klines('ETH/USDT', '1h', 100)
+        clock.now += 3600  # next bar opened
+        second = hub.get_klines('ETH/USDT', '1h', 100)
+        assert len(second) == 100
+        times = [c['time'] for c in second]
+        assert times == sorted(set(times))
+        assert times[-1] == first[-1]['time'] + HOUR_MS
+        assert fake.calls[-1][2] == 3
+
+    def test_gap_falls_back_to_full_fetch(self):
+        hub, fake, clock = _make_hub()
+        hub.get_klines('SOL/USDT', '1h', 100)
+        clock.now += 3600 * 200
+        candles = hub.get_klines('SOL/USDT', '1h', 100)
+        assert len(candles) == 100
+        assert fake.calls[-1][2] == 100
+        assert hub.get_stats()['kline_full_fetches'] == 2
+
+    def test_fetch_error_returns_none(self):
+        hub = MarketDataHub(fetch_klines=lambda *a, **k: None)
+        assert hub.get_klines('BTC/USDT', '1h', 100) is None
+        assert hub.get_stats()['kline_errors'] == 1
+
+    def test_concurrent_agents_coalesce_to_one_fetch(self):
+        calls = []
+
+        def slow_fetch(symbol, interval, limit, exchange='binance'):
+            calls.append(symbol)
+            time.sleep(0.05)
+            now_ms = int(time.time() * 1000)
+            last_open = now_ms - now_ms % HOUR_MS
+            return [{'time': last_open - (limit - 1 - i) * HOUR_MS, 'open': 1.0,
+                     'high': 1.0, 'low': 1.0, 'close': 1.0, 'volume': 1.0}
+                    for i in range(limit)]
+
+        hub = MarketDataHub(fetch_klines=slow_fetch)
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(hub.get_klines('BTC/USDT', '1h', 100)))
+            for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert all(r and len(r) == 100 for r in results)
+        assert hub.get_stats()['kline_coalesced'] == 19
+
+
+class TestPriceCache:
+
+    def test_price_cached_within_ttl(self):
+        hub, fake, clock = _make_hub()
+        assert hub.get_price('BTC/USDT') == 123.0
+        assert hub.get_price('BTC/USDT') == 123.0
+        assert fake.price_calls == 1
+        clock.now += 5
+        hub.get_price('BTC/USDT')
+        assert fake.price_calls == 2
+        assert hub.get_stats()['price_hit_rate'] == round(1 / 3, 4)
+
+    def test_clear_resets_cache_and_stats(self):
+        hub, fake, _ = _make_hub()
+        hub.get_klines('BTC/USDT', '1h', 100)
+        hub.clear()
+        assert hub.get_stats()['kline_requests'] == 0
+        hub.get_klines('BTC/USDT', '1h', 100)
+        assert len(fake.calls) == 2
+
+
+class TestPriceBook:
+
+    def test_all_positions_share_one_bulk_call(self):
+        hub, fake, _ = _make_hub()
+        for _ in range(15):
+            assert hub.get_book_price('BTC/USDT') == 124.0
+            assert hub.get_book_price('ETH/USDT') == 45.0
+        assert hub.get_book_price('PEPE/USDT') == 0.01     # 1000x symbol mapping
+        assert fake.book_calls == 1
+        assert fake.price_calls == 0
+
+    def test_book_refreshed_after_ttl(self):
+        hub, fake, clock = _make_hub()
+        hub.get_book_price('BTC/USDT')
+        clock.now += 3
+        assert hub.get_book_price('BTC/USDT') == 125.0
+        assert fake.book_calls == 2
+        assert hub.get_stats()['price_book_age'] == {'binance': 0.0}
+
+    def test_stale_book_served_then_fallback(self):
+        hub, fake, clock = _make_hub()
+        hub.get_book_price('BTC/USDT')
+        fake.book_down = True
+
+        clock.now += 5
+        prices, age = hub.get_price_book()
+        assert prices['BTCUSDT'] == 124.0 and age == 5
+        clock.now += 1                      # no retry within price_ttl of a failure
+        hub.get_price_book()
+        assert fake.book_calls == 2
+        assert hub.get_stats()['book_stale_served'] == 2
+
+        clock.now += 30                     # too old to serve: single-symbol fetch
+        assert hub.get_price_book() == ({}, None)
+        assert hub.get_book_price('BTC/USDT') == 123.0
+        assert fake.price_calls == 1
+
+        fake.book_down = False
+        clock.now += 3
+        assert hub.get_book_price('ETH/USDT') == 45.0
+
+    def test_unknown_symbol_falls_back(self):
+        hub, fake, _ = _make_hub()
+        assert hub.get_book_price('XYZ/USDT') == 123.0
+        assert hub.get_book_price('XYZ/USDT', fallback=False) is None
+        assert fake.price_calls == 1
+        assert hub.get_stats()['book_fallbacks'] == 1
+
+    def test_concurrent_callers_coalesce(self):
+        hub, fake, _ = _make_hub()
+        barrier = threading.Barrier(20)
+
+        def worker():
+            barrier.wait()
+            hub.get_book_price('ETH/USDT')
+
+        threads = [threading.Thread(target=worker) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert fake.book_calls == 1
@@ -0,0 +1,118 @@
+"""Tests for the rate limiter (O(1) algorithms, in-memory store, Redis fallback)."""
+import pytest
+
+from app.middleware import rate_limiter as rl
+
+
+class FakeClock:
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = FakeClock()
+    monkeypatch.setattr(rl, 'time', c)
+    return c
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    monkeypatch.setattr(rl, '_get_redis', lambda: None)
+
+
+class TestAlgorithms:
+
+    def test_sliding_window_weights_previous_window(self):
+        state = [None, 0, 0]
+        # 10 requests late in window 0 (t = 50..59 of a 60s window)
+        for i in range(10):
+            assert rl._sliding_window(state, 50 + i, 10, 60)[0]
+        assert rl._sliding_window(state, 59.5, 10, 60) == (False, 0.5)
+        # 15s into window 1: previous counts 10 * 45/60 = 7.5 -> 3 more allowed
+        for _ in range(3):
+            assert rl._sliding_window(state, 75, 10, 60)[0]
+        assert not rl._sliding_window(state, 75, 10, 60)[0]
+        # two windows later the old counts no longer apply
+        assert rl._sliding_window(state, 185, 10, 60)[0]
+        assert state == [3, 1, 0]
+
+    def test_token_bucket_burst_then_refill(self):
+        state = [5, 0.0]
+        for _ in range(5):
+            assert rl._token_bucket(state, 0.0, 5, 60)[0]
+        allowed, retry = rl._token_bucket(state, 0.0, 5, 60)
+        assert not allowed and retry == pytest.approx(12.0)
+        assert rl._token_bucket(state, 12.0, 5, 60)[0]
+        assert not rl._token_bucket(state, 12.0, 5, 60)[0]
+
+
+class TestMemoryStore:
+
+    def test_limit_and_recovery(self, app_ctx, clock, no_redis):
+        for _ in range(3):
+            assert rl.check_rate_limit('k', 3, 60)[0]
+        assert not rl.check_rate_limit('k', 3, 60)[0]
+        clock.now += 120
+        assert rl.check_rate_limit('k', 3, 60)[0]
+
+    def test_expired_keys_evicted_without_full_scan(self, app_ctx, clock, no_redis):
+        for i in range(50):
+            rl.check_rate_limit(f'old{i}', 5, 10)
+        clock.now += 21
+        rl.check_rate_limit('fresh', 5, 10)
+        assert list(rl._rate_store) == ['fresh']
+
+    def test_store_size_is_capped(self, app_ctx, clock, no_redis, monkeypatch):
+        monkeypatch.setattr(rl, 'MAX_MEMORY_KEYS', 10)
+        for i in range(25):
+            rl.check_rate_limit(f'k{i}', 5, 60)
+        assert len(rl._rate_store) == 10
+        assert 'k24' in rl._rate_store and 'k0' not in rl._rate_store
+
+
+class TestRedisPath:
+
+    def test_uses_script_and_falls_back_when_down(self, app_ctx, clock, monkeypatch):
+        calls = []
+
+        def script(keys, args):
+            calls.append((keys, args))
+            if len(calls) > 1:
+                raise ConnectionError('down')
+            return [1, '0']
+
+        monkeypatch.setattr(rl, '_redis', ('redis://x', object(),
+                                           {rl.SLIDING_WINDOW: script}))
+        monkeypatch.setattr(rl, '_redis_down_until', 0.0)
+        app_ctx.config['REDIS_URL'] = 'redis://x'
+        try:
+            assert rl.check_rate_limit('k', 1, 60) == (True, 0.0)
+            assert calls[0] == (['k'], [clock.now, 60, 1])
+            # Redis error -> in-memory for this request, Redis skipped until retry
+            assert rl.check_rate_limit('k', 1, 60)[0]
+            assert not rl.check_rate_limit('k', 1, 60)[0]
+            assert len(calls) == 2
+            clock.now += rl.REDIS_RETRY_SECONDS + 1
+            rl.check_rate_limit('k', 1, 60)
+            assert len(calls) == 3
+        finally:
+            app_ctx.config['REDIS_URL'] = 'redis://127.0.0.1:6379/0'
+
+
+class TestDecorator:
+
+    def test_login_rate_limited_with_retry_after(self, client, no_redis):
+        for _ in range(5):
+            client.post('/api/auth/admin/login', json={'username': 'x', 'password': 'y'})
+        resp = client.post('/api/auth/admin/login', json={'username': 'x', 'password': 'y'})
+        assert resp.status_code == 429
+        assert int(resp.headers['Retry-After']) >= 1
+
+    def test_unknown_algorithm_rejected(self):
+        with pytest.raises(ValueError):
+            rl.rate_limit(algorithm='leaky')
@@ -1,10 +1,10 @@
 """Tests for RiskManager."""
 import pytest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from app.engine.risk_manager import RiskManager
 from app.models.trade import Trade
-from app.extensions import db
+from app.services.stats_service import record_trade_close
 
 
 class TestRiskLevel:
@@ -180,3 +180,75 @@ class TestCheckCanOpen:
         metrics = rm.calculate_risk_metrics([])
         # 1000 loss on 2000 capital = 50% drawdown, well above 20% max
         assert metrics['drawdown_breach'] is True
+
+
+def _recompute(agent_id, initial_capital):
+    """Reference: the full scan calculate_risk_metrics used to run per call."""
+    closed = (Trade.query.filter_by(agent_id=agent_id, status='CLOSED')
+              .order_by(Trade.exit_time).all())
+    peak = cumulative = initial_capital
+    max_dd = 0.0
+    for t in closed:
+        cumulative += float(t.pnl) if t.pnl else 0
+        peak = max(peak, cumulative)
+        max_dd = max(max_dd, (peak - cumulative) / peak * 100 if peak > 0 else 0)
+    streak = 0
+    for t in reversed(closed[-10:]):
+        if t.pnl and float(t.pnl) < 0:
+            streak += 1
+        else:
+            break
+    today = datetime.now(timezone.utc).date()
+    daily = sum(float(t.pnl) for t in closed
+                if t.pnl and t.exit_time.date() == today)
+    return {'current_capital': cumulative, 'peak_capital': peak,
+            'max_drawdown': max_dd, 'consecutive_losses': streak,
+            'daily_pnl': daily}
+
+
+class TestIncrementalRiskState:
+    """calculate_risk_metrics reads agent_stats maintained on each close."""
+
+    def _close(self, db, agent_id, pnl, exit_time):
+        t = Trade(
+            agent_id=agent_id, symbol='SOL/USDT', direction='SHORT',
+            entry_price=Decimal('100'), exit_price=Decimal('99'),
+            amount=Decimal('100'), leverage=3,
+            entry_time=exit_time - timedelta(minutes=30), exit_time=exit_time,
+            status='CLOSED', pnl=Decimal(str(pnl)),
+        )
+        db.session.add(t)
+        db.session.flush()
+        record_trade_close(agent_id, pnl, 0, exit_time)
+        db.session.commit()
+
+    def test_matches_full_recompute(self, app_ctx, agent, db):
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        pnls = [80, -40, 120, -200, -15, 60, 0, -90, -30, 25, -70, -10, -5]
+        start = now - timedelta(days=2)
+        rm = RiskManager(agent.id, {'initial_capital': 2000})
+        for i, pnl in enumerate(pnls):
+            exit_time = start + timedelta(hours=4 * i)
+            self._close(db, agent.id, pnl, min(exit_time, now))
+            metrics = rm.calculate_risk_metrics([])
+            expected = _recompute(agent.id, 2000)
+            for key, value in expected.items():
+                assert metrics[key] == pytest.approx(value, abs=1e-3), (i, key)
+
+    def test_streak_resets_on_win_and_recovery_uses_last_three(self, app_ctx, agent, db):
+        base = datetime(2026, 2, 1, tzinfo=timezone.utc)
+        for i, pnl in enumerate([-300, -200, 10, 20, -5]):
+            self._close(db, agent.id, pnl, base + timedelta(hours=i))
+        rm = RiskManager(agent.id, {'initial_capital': 2000, 'max_drawdown_pct': 20})
+        metrics = rm.calculate_risk_metrics([])
+        assert metrics['consecutive_losses'] == 1
+        assert metrics['daily_pnl'] == 0
+        # 23.75% drawdown but 2 of the last 3 closes won -> auto-recovery
+        assert metrics['drawdown_breach'] is False
+        assert metrics['peak_capital'] == metrics['current_capital'] == 1525
+
+    def test_other_initial_capital_replays(self, app_ctx, agent, db):
+        self._close(db, agent.id, -100, datetime(2026, 2, 1, tzinfo=timezone.utc))
+        metrics = RiskManager(agent.id, {'initial_capital': 500}).calculate_risk_metrics([])
+        assert metrics['current_capital'] == 400
+        assert metrics['current_drawdown'] == pytest.approx(20.0)
@@ -0,0 +1,162 @@
+"""Tests for the shared SignalHub analysis cache."""
+import ast
+import inspect
+import textwrap
+import threading
+
+from app.engine import signal_analyzer as sa
+from app.engine.market_data import MarketDataHub
+from app.engine.signal_hub import (
+    SignalHub, ANALYZERS, ANALYSIS_CONFIG_KEYS, analysis_group, strategy_family,
+)
+from tests.test_market_data import FakeExchange, FakeClock
+
+BASE_CONFIG = {
+    'short_bias': 1.05, 'enable_btc_filter': True, 'enable_trend_filter': True,
+    'min_score': 60, 'max_positions': 5, 'roi_stop_loss': -10, 'cooldown': 4,
+}
+
+
+def _config_keys(func, seen=None):
+    """config.get('...') keys read by an analyzer and the analyzers it calls."""
+    seen = seen if seen is not None else set()
+    seen.add(func.__name__)
+    keys = set()
+    tree = ast.parse(textwrap.dedent(inspect.getsource(func)))
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        f = node.func
+        if (isinstance(f, ast.Attribute) and f.attr == 'get'
+                and isinstance(f.value, ast.Name) and f.value.id == 'config'
+                and node.args and isinstance(node.args[0], ast.Constant)):
+            keys.add(node.args[0].value)
+        elif (isinstance(f, ast.Name) and f.id not in seen
+                and callable(getattr(sa, f.id, None))
+                and getattr(getattr(sa, f.id), '__module__', None) == sa.__name__):
+            keys |= _config_keys(getattr(sa, f.id), seen)
+    return keys
+
+
+class Analyzers:
+    """Counts calls; the result depends on the config and the live close."""
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, family):
+        def analyze(symbol, config, exchange='binance'):
+            with self.lock:
+                self.calls.append((family, symbol))
+            close = self.hub.get_klines(symbol, '1h', 100, exchange=exchange)[-1]['close']
+            return int(close * config.get('short_bias', 1)), {'family': family, 'close': close}
+        return analyze
+
+
+def _make_signal_hub(start=1_700_000_000 + 600):
+    clock = FakeClock(start)
+    fake = FakeExchange(clock)
+    market = MarketDataHub(fetch_klines=fake.fetch_klines, fetch_price=fake.fetch_price,
+                           kline_ttl=15, clock=clock)
+    analyzers = Analyzers(market)
+    hub = SignalHub(market_data=market,
+                    analyzers={f: analyzers(f) for f in ANALYZERS}, clock=clock)
+    return hub, analyzers, clock
+
+
+def test_config_keys_cover_every_analyzer_input():
+    for family, name in ANALYZERS.items():
+        read = _config_keys(getattr(sa, name))
+        assert read <= set(ANALYSIS_CONFIG_KEYS[family]), (family, read)
+
+
+def test_strategy_family_matches_bot_routing():
+    assert strategy_family('v9.1') == 'v9'
+    assert strategy_family('v8') == 'v8'
+    assert strategy_family('v5.2') == 'v5'
+    assert strategy_family('v6') == 'v6'
+    assert strategy_family('v4.2') == 'v4'
+    assert strategy_family(None) == 'v4'
+
+
+def test_only_analysis_keys_split_groups():
+    g = analysis_group('v4.2', BASE_CONFIG)
+    sizing = {**BASE_CONFIG, 'max_positions': 9, 'min_score': 80, 'cooldown': 1}
+    assert analysis_group('v4.2', sizing) == g
+    assert analysis_group('v4.2', {**BASE_CONFIG, 'short_bias': 1.2}) != g
+    assert analysis_group('v4.1', BASE_CONFIG) == g
+    assert analysis_group('v8', BASE_CONFIG) != g
+
+
+def test_agents_of_one_group_share_one_computation():
+    hub, analyzers, _ = _make_signal_hub()
+    results = []
+    for agent in range(20):
+        config = {**BASE_CONFIG, 'max_positions': agent}
+        results.append(hub.analyze('v4.2', 'ETH/USDT', config))
+    assert len(analyzers.calls) == 1
+    assert all(r == results[0] for r in results)
+
+    stats = hub.get_stats()
+    assert stats['requests'] == 20 and stats['computations'] == 1
+    assert stats['hits'] == 19 and stats['groups'] == 1
+    assert stats['analyzer_calls_per_min_unshared'] == 20
+    assert stats['analyzer_calls_per_min'] == 1
+    assert stats['share_rate'] == 0.95
+
+
+def test_groups_and_symbols_are_computed_separately():
+    hub, analyzers, _ = _make_signal_hub()
+    hub.analyze('v4.2', 'ETH/USDT', BASE_CONFIG)
+    hub.analyze('v4.2', 'SOL/USDT', BASE_CONFIG)
+    hub.analyze('v8', 'ETH/USDT', BASE_CONFIG)
+    score_a, _ = hub.analyze('v4.2', 'ETH/USDT', {**BASE_CONFIG, 'short_bias': 2})
+    assert len(analyzers.calls) == 4
+    assert hub.get_stats()['groups'] == 3
+    assert score_a == 2 * hub.analyze('v4.2', 'ETH/USDT', {**BASE_CONFIG, 'short_bias': 1})[0]
+
+
+def test_result_recomputed_when_series_refreshes():
+    hub, analyzers, clock = _make_signal_hub()
+    first = hub.analyze('v4.2', 'ETH/USDT', BASE_CONFIG)
+    clock.now += 10                 # forming bar still fresh in MarketDataHub
+    assert hub.analyze('v4.2', 'ETH/USDT', BASE_CONFIG) == first
+    assert len(analyzers.calls) == 1
+
+    clock.now += 10                 # KLINE_TTL passed: live close refetched
+    second = hub.analyze('v4.2', 'ETH/USDT', BASE_CONFIG)
+    assert len(analyzers.calls) == 2
+    assert second[1]['close'] != first[1]['close']
+
+
+def test_result_recomputed_when_btc_trend_refreshes(monkeypatch):
+    hub, analyzers, _ = _make_signal_hub()
+    hub.analyze('v4.2', 'ETH/USDT', BASE_CONFIG)
+    monkeypatch.setitem(sa._btc_trend_cache, 'ts', sa._btc_trend_cache['ts'] + 1)
+    hub.analyze('v4.2', 'ETH/USDT', BASE_CONFIG)
+    assert len(analyzers.calls) == 2
+
+
+def test_callers_get_private_copies():
+    hub, _, _ = _make_signal_hub()
+    _, analysis = hub.analyze('v4.2', 'ETH/USDT', BASE_CONFIG)
+    analysis['close'] = -1
+    assert hub.analyze('v4.2', 'ETH/USDT', BASE_CONFIG)[1]['close'] != -1
+
+
+def test_concurrent_agents_coalesce_on_one_computation():
+    hub, analyzers, _ = _make_signal_hub()
+    barrier = threading.Barrier(16)
+
+    def agent(i):
+        barrier.wait()
+        hub.analyze('v4.2', 'ETH/USDT', {**BASE_CONFIG, 'max_positions': i})
+
+    threads = [threading.Thread(target=agent, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(analyzers.calls) == 1
@@ -0,0 +1,89 @@
+"""Tests for WebSocket fan-out (per-agent rooms, coalesced status/signal events)."""
+import importlib
+import time
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.extensions import socketio
+
+ws = importlib.import_module('app.api.ws_events')
+
+
+@pytest.fixture
+def connect(app):
+    clients = []
+
+    def _connect(agent_id):
+        with app.app_context():
+            token = create_access_token(identity=str(agent_id))
+        c = socketio.test_client(app, auth={'token': token})
+        assert c.is_connected()
+        c.get_received()   # drop 'connected'
+        clients.append(c)
+        return c
+
+    yield _connect
+    for c in clients:
+        if c.is_connected():
+            c.disconnect()
+
+
+def _events(client, name):
+    return [m['args'][0] for m in client.get_received() if m['name'] == name]
+
+
+class TestRooms:
+
+    def test_rejects_missing_token(self, app):
+        c = socketio.test_client(app, auth={})
+        assert not c.is_connected()
+
+    def test_emit_reaches_only_that_agents_sockets(self, app, connect):
+        a1, a2, b = connect(1), connect(1), connect(2)
+        ws.emit_trade_event(1, 'open', {'symbol': 'BTC'})
+        ws.emit_notification(2, {'title': 'hi'})
+
+        assert _events(a1, 'trade_event') == [{'type': 'open', 'symbol': 'BTC'}]
+        assert _events(a2, 'trade_event') == [{'type': 'open', 'symbol': 'BTC'}]
+        assert _events(b, 'notification') == [{'title': 'hi'}]
+        assert b.get_received() == []
+
+
+class TestCoalescing:
+
+    def test_latest_wins_within_interval(self, app, connect, monkeypatch):
+        monkeypatch.setattr(ws, '_coalescer', ws.Coalescer(ws._emit, interval=0.1))
+        c = connect(7)
+        for i in range(5):
+            ws.emit_signal_update(7, {'scan': i})
+        assert _events(c, 'signal_update') == [{'scan': 0}]
+
+        time.sleep(0.3)
+        assert _events(c, 'signal_update') == [{'scan': 4}]
+        assert ws._coalescer.stats['coalesced'] == 3
+
+    def test_agents_and_events_are_independent(self):
+        sent = []
+        co = ws.Coalescer(lambda *a: sent.append(a), interval=60)
+        co.submit('bot_status', 1, {'n': 1})
+        co.submit('bot_status', 2, {'n': 1})
+        co.submit('signal_update', 1, {'n': 1})
+        co.submit('bot_status', 1, {'n': 2})
+        assert sent == [('bot_status', 1, {'n': 1}), ('bot_status', 2, {'n': 1}),
+                        ('signal_update', 1, {'n': 1})]
+        co.flush()
+        assert sent[-1] == ('bot_status', 1, {'n': 2})
+
+    def test_zero_interval_disables_coalescing(self):
+        sent = []
+        co = ws.Coalescer(lambda *a: sent.append(a), interval=0)
+        for i in range(3):
+            co.submit('bot_status', 1, {'n': i})
+        assert len(sent) == 3
+
+
+def test_external_emitter_requires_message_queue(monkeypatch):
+    monkeypatch.setattr(socketio, 'server', None)
+    monkeypatch.delenv('SOCKETIO_MESSAGE_QUEUE', raising=False)
+    assert ws._emitter() is None
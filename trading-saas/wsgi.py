@@ -20,8 +20,12 @@ importlib.import_module('app.api.ws_events')
 def _auto_restart_bots():
     """Restart bots that were running before service restart.
 
-    Uses a file lock so only one Gunicorn worker does this.
+    Uses a file lock so only one Gunicorn worker does this. Skipped with
+    BOT_RUNNER=external: the bot runner's watchdog resumes them instead.
     """
+    if app.config.get('BOT_RUNNER', 'embedded') != 'embedded':
+        return
+
     lock_file = '/tmp/trading-saas-bot-autostart.lock'
     try:
         fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)